@@ -219,17 +219,17 @@ class Config:
 
     @property
     def model_manager_max_loaded(self) -> int:
-        """Max models loaded in Foundry simultaneously before LRU eviction."""
+        """Max models resident at once (HF, llama.cpp, Foundry) before LRU eviction; 0 — unlimited."""
         return self._config_data.get('model_manager', {}).get('max_loaded_models', 1)
 
     @property
     def model_manager_ttl_seconds(self) -> int:
-        """Seconds of inactivity before a model is unloaded."""
+        """Seconds of inactivity before a model is unloaded; 0 — never."""
         return self._config_data.get('model_manager', {}).get('ttl_seconds', 600)
 
     @property
     def model_manager_max_ram_percent(self) -> float:
-        """RAM usage threshold (%) above which LRU eviction is triggered."""
+        """RAM usage threshold (%) above which LRU eviction is triggered; 0 — ignored."""
         return self._config_data.get('model_manager', {}).get('max_ram_percent', 80.0)
 
     # ── ИИ Foundry ────────────────────────────────────────────────────────
@@ -312,6 +312,21 @@ class Config:
         # Default value
         return True
 
+    @property
+    def hf_batching_enabled(self) -> bool:
+        """Объединять одновременные запросы к HF модели в общий batch."""
+        return self._config_data.get('huggingface', {}).get('batching_enabled', True)
+
+    @property
+    def hf_batch_max_size(self) -> int:
+        """Максимум запросов в одном вызове model.generate()."""
+        return self._config_data.get('huggingface', {}).get('batch_max_size', 8)
+
+    @property
+    def hf_batch_max_wait_ms(self) -> float:
+        """Сколько миллисекунд первый запрос ждёт попутчиков перед запуском batch."""
+        return self._config_data.get('huggingface', {}).get('batch_max_wait_ms', 10)
+
     @property
     def foundry_top_p(self) -> float:
         return self._config_data.get('foundry_ai', {}).get('top_p', 0.9)
@@ -365,6 +380,28 @@ class Config:
     def lmstudio_request_timeout_sec(self) -> int:
         return self._config_data.get('lmstudio', {}).get('request_timeout_sec', 300)
 
+    # ── Пул HTTP-соединений ───────────────────────────────────────────────
+
+    @property
+    def http_pool_limit(self) -> int:
+        """Максимум одновременных соединений на backend (0 — без ограничения)."""
+        return self._config_data.get('http_pool', {}).get('limit', 100)
+
+    @property
+    def http_pool_limit_per_host(self) -> int:
+        """Максимум одновременных соединений к одному host:port."""
+        return self._config_data.get('http_pool', {}).get('limit_per_host', 32)
+
+    @property
+    def http_pool_keepalive_seconds(self) -> float:
+        """Сколько секунд держать простаивающее keep-alive соединение."""
+        return self._config_data.get('http_pool', {}).get('keepalive_seconds', 30)
+
+    @property
+    def http_pool_backends(self) -> dict:
+        """Переопределения limit / limit_per_host / keepalive_seconds по backend."""
+        return self._config_data.get('http_pool', {}).get('backends', {})
+
     # ── Управление портами ────────────────────────────────────────────────
 
     @property
@@ -402,6 +439,217 @@ class Config:
     def rag_top_k(self) -> int:
         return self._config_data.get('rag_system', {}).get('top_k', 5)
 
+    @property
+    def rag_search_cache_max_entries(self) -> int:
+        """Максимальное количество запросов в кэше поиска RAG (0 — кэш выключен).
+
+        Returns:
+            int: Лимит записей.
+        """
+        return self._config_data.get('rag_system', {}).get('search_cache_max_entries', 1024)
+
+    @property
+    def rag_search_cache_max_mb(self) -> int:
+        """Бюджет памяти кэша поиска RAG в мегабайтах.
+
+        Returns:
+            int: Лимит в МБ.
+        """
+        return self._config_data.get('rag_system', {}).get('search_cache_max_mb', 64)
+
+    @property
+    def rag_search_cache_ttl_seconds(self) -> int:
+        """Время жизни записи в кэше поиска RAG (0 — без ограничения).
+
+        Returns:
+            int: TTL в секундах.
+        """
+        return self._config_data.get('rag_system', {}).get('search_cache_ttl_seconds', 600)
+
+    @property
+    def rag_embedding_cache_size(self) -> int:
+        """Количество векторов запросов в LRU-кэше сервиса эмбеддингов.
+
+        Returns:
+            int: Лимит записей (0 — кэш выключен).
+        """
+        return self._config_data.get('rag_system', {}).get('embedding_cache_size', 4096)
+
+    @property
+    def rag_embedding_batch_window_ms(self) -> float:
+        """Окно сбора конкурентных запросов в один вызов encode().
+
+        Returns:
+            float: Длительность окна в миллисекундах.
+        """
+        return self._config_data.get('rag_system', {}).get('embedding_batch_window_ms', 5)
+
+    @property
+    def rag_embedding_max_batch(self) -> int:
+        """Максимальный размер пакета запросов для одного вызова encode().
+
+        Returns:
+            int: Размер пакета.
+        """
+        return self._config_data.get('rag_system', {}).get('embedding_max_batch', 32)
+
+    @property
+    def rag_retrieval_threads(self) -> int:
+        """Количество потоков пула поиска RAG (encode, FAISS, SQLite).
+
+        Returns:
+            int: Число потоков.
+        """
+        return self._config_data.get('rag_system', {}).get('retrieval_threads', 4)
+
+    @property
+    def rag_retrieval_queue_depth(self) -> int:
+        """Максимальная очередь задач поиска RAG сверх занятых потоков.
+
+        Returns:
+            int: Глубина очереди; при переполнении — 503.
+        """
+        return self._config_data.get('rag_system', {}).get('retrieval_queue_depth', 64)
+
+    @property
+    def rag_retrieval_retry_after_seconds(self) -> int:
+        """Значение заголовка Retry-After при отказе в поиске RAG.
+
+        Returns:
+            int: Секунды.
+        """
+        return self._config_data.get('rag_system', {}).get('retrieval_retry_after_seconds', 1)
+
+    @property
+    def rag_ann_index_type(self) -> str:
+        """Тип ANN-индекса по умолчанию для новых профилей (flat, ivf_flat, ivf_pq, hnsw).
+
+        Returns:
+            str: Тип индекса.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_index_type', 'flat')
+
+    @property
+    def rag_ann_nlist(self) -> int:
+        """Число кластеров IVF (0 — авто: 4·√N).
+
+        Returns:
+            int: nlist.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_nlist', 0)
+
+    @property
+    def rag_ann_pq_m(self) -> int:
+        """Число подвекторов PQ для ivf_pq.
+
+        Returns:
+            int: M для IndexIVFPQ.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_pq_m', 16)
+
+    @property
+    def rag_ann_hnsw_m(self) -> int:
+        """Число связей на узел графа HNSW.
+
+        Returns:
+            int: M для IndexHNSWFlat.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_hnsw_m', 32)
+
+    @property
+    def rag_ann_ef_construction(self) -> int:
+        """Глубина поиска HNSW при построении графа.
+
+        Returns:
+            int: efConstruction.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_ef_construction', 200)
+
+    @property
+    def rag_ann_nprobe(self) -> int:
+        """Число просматриваемых кластеров IVF при поиске.
+
+        Returns:
+            int: nprobe.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_nprobe', 16)
+
+    @property
+    def rag_ann_ef_search(self) -> int:
+        """Глубина поиска HNSW при запросе.
+
+        Returns:
+            int: efSearch.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_ef_search', 64)
+
+    @property
+    def rag_ann_train_sample(self) -> int:
+        """Максимальный размер выборки для обучения IVF/PQ.
+
+        Returns:
+            int: Количество векторов.
+        """
+        return self._config_data.get('rag_system', {}).get('ann_train_sample', 100000)
+
+    @property
+    def rag_index_mmap(self) -> bool:
+        """Загружать faiss.index и хранилище чанков через mmap.
+
+        По умолчанию выключено в Windows: отображённый файл нельзя заменить
+        при переиндексации, пока профиль загружен.
+
+        Returns:
+            bool: True — использовать mmap.
+        """
+        return bool(self._config_data.get('rag_system', {}).get('index_mmap', os.name != 'nt'))
+
+    @property
+    def rag_pool_max_profiles(self) -> int:
+        """Максимальное число одновременно загруженных профилей RAG.
+
+        Returns:
+            int: Количество профилей.
+        """
+        return self._config_data.get('rag_system', {}).get('pool_max_profiles', 4)
+
+    @property
+    def rag_pool_max_memory_mb(self) -> int:
+        """Бюджет памяти пула профилей RAG по размеру faiss.index (0 — без ограничения).
+
+        Returns:
+            int: Мегабайты.
+        """
+        return self._config_data.get('rag_system', {}).get('pool_max_memory_mb', 4096)
+
+    @property
+    def rag_delta_checkpoint_vectors(self) -> int:
+        """Число векторов в faiss.delta, после которого faiss.index перезаписывается целиком.
+
+        Returns:
+            int: Порог чекпоинта инкрементального индекса.
+        """
+        return self._config_data.get('rag_system', {}).get('delta_checkpoint_vectors', 5000)
+
+    @property
+    def rag_bulk_extract_workers(self) -> int:
+        """Число процессов извлечения на семейство форматов при пакетной индексации
+        (0 — как text_extractor.extraction_workers).
+
+        Returns:
+            int: Размер пула процессов семейства.
+        """
+        return self._config_data.get('rag_system', {}).get('bulk_extract_workers', 0)
+
+    @property
+    def rag_bulk_embed_batch_size(self) -> int:
+        """Размер пакета эмбеддингов при пакетной индексации.
+
+        Returns:
+            int: Количество чанков на один вызов encode.
+        """
+        return self._config_data.get('rag_system', {}).get('bulk_embed_batch_size', 256)
+
     # ── Директории ────────────────────────────────────────────────────────
 
     @property
@@ -447,6 +695,123 @@ class Config:
         """
         return self._config_data.get('dialogs', {}).get('max_size_mb') or 100
 
+    # ── Кэш ответов моделей ───────────────────────────────────────────────
+
+    @property
+    def response_cache_enabled(self) -> bool:
+        """Включить кэш детерминированных ответов (opt-in)."""
+        return self._config_data.get('response_cache', {}).get('enabled', False)
+
+    @property
+    def response_cache_max_entries(self) -> int:
+        """Размер LRU-кэша ответов в памяти (записей)."""
+        return self._config_data.get('response_cache', {}).get('max_entries', 1024)
+
+    @property
+    def response_cache_ttl_seconds(self) -> int:
+        """Время жизни закэшированного ответа в секундах (0 — без ограничения)."""
+        return self._config_data.get('response_cache', {}).get('ttl_seconds', 3600)
+
+    @property
+    def response_cache_max_temperature(self) -> float:
+        """Максимальная temperature, при которой ответ кэшируется."""
+        return self._config_data.get('response_cache', {}).get('max_temperature', 0.0)
+
+    @property
+    def response_cache_db_path(self) -> str:
+        """SQLite-файл дискового уровня кэша ответов ("" — только память)."""
+        return self._config_data.get('response_cache', {}).get('db_path', '~/.aiassistant/cache/responses.db')
+
+    @property
+    def response_cache_namespaces(self) -> dict:
+        """Переопределения enabled / ttl_seconds по модели ("ollama::qwen2.5": {...})."""
+        return self._config_data.get('response_cache', {}).get('namespaces', {})
+
+    # ── Контекст чат-сессий ───────────────────────────────────────────────
+
+    @property
+    def chat_context_max_tokens(self) -> int:
+        """Бюджет токенов истории чат-сессии, отправляемой модели (0 — без ограничения)."""
+        return self._config_data.get('chat_context', {}).get('max_tokens', 3072)
+
+    @property
+    def chat_context_trim_to(self) -> float:
+        """Доля бюджета, до которой обрезается история при переполнении."""
+        return self._config_data.get('chat_context', {}).get('trim_to', 0.75)
+
+    @property
+    def chat_context_summary_tokens(self) -> int:
+        """Размер сжатой заметки об отброшенных репликах (0 — просто обрезать)."""
+        return self._config_data.get('chat_context', {}).get('summary_tokens', 256)
+
+    @property
+    def chat_context_hf_kv_sessions(self) -> int:
+        """Сколько сессий хранят past_key_values HF-модели (0 — не хранить)."""
+        return self._config_data.get('chat_context', {}).get('hf_kv_sessions', 4)
+
+    # ── Контекстное окно моделей ──────────────────────────────────────────
+
+    @property
+    def context_window_default(self) -> int:
+        """Размер контекста модели, если бэкенд его не сообщает (токенов)."""
+        return self._config_data.get('context_window', {}).get('default_window', 4096)
+
+    @property
+    def context_window_safety_margin(self) -> int:
+        """Запас токенов под шаблон чата и служебные токены."""
+        return self._config_data.get('context_window', {}).get('safety_margin', 64)
+
+    @property
+    def context_window_models(self) -> dict:
+        """Размер контекста по модели ("ollama::qwen2.5": 32768)."""
+        return self._config_data.get('context_window', {}).get('models', {})
+
+    # ── Контроль допуска генераций ────────────────────────────────────────
+
+    @property
+    def admission_enabled(self) -> bool:
+        """Ограничивать параллельные генерации и ставить запросы в очереди."""
+        return self._config_data.get('admission', {}).get('enabled', True)
+
+    @property
+    def admission_backend_limits(self) -> dict:
+        """Максимум параллельных генераций по бэкенду ("llama": 8; 0 — без ограничения)."""
+        return self._config_data.get('admission', {}).get(
+            'backend_limits', {'foundry': 4, 'hf': 8, 'llama': 8, 'ollama': 4, 'lmstudio': 4}
+        )
+
+    @property
+    def admission_model_limits(self) -> dict:
+        """Максимум параллельных генераций по модели ("hf::Qwen/Qwen2.5-0.5B": 1)."""
+        return self._config_data.get('admission', {}).get('model_limits', {})
+
+    @property
+    def admission_queue_depth(self) -> dict:
+        """Длина очереди ожидания по классу приоритета (interactive / default / batch)."""
+        return self._config_data.get('admission', {}).get(
+            'queue_depth', {'interactive': 64, 'default': 32, 'batch': 16}
+        )
+
+    @property
+    def admission_max_queue_wait_seconds(self) -> float:
+        """Сколько запрос может ждать слот, прежде чем получить 503 (0 — без ограничения)."""
+        return self._config_data.get('admission', {}).get('max_queue_wait_seconds', 30)
+
+    @property
+    def admission_tiers(self) -> dict:
+        """Тарифы API-ключей: ключ → {"name", "priority", "max_inflight"}."""
+        return self._config_data.get('admission', {}).get('tiers', {})
+
+    @property
+    def admission_route_priorities(self) -> dict:
+        """Класс приоритета по префиксу URL ("/api/v1/chat": "interactive")."""
+        return self._config_data.get('admission', {}).get('route_priorities', {
+            '/api/v1/chat': 'interactive',
+            '/api/v1/ai/chat': 'interactive',
+            '/api/v1/agent': 'batch',
+            '/api/v1/mcp-agent': 'batch',
+        })
+
     # ── История чатов (SQLite) ────────────────────────────────────────────
 
     @property
@@ -487,6 +852,47 @@ class Config:
         """
         return self._config_data.get('chat_history', {}).get('rag_auto_ingest', False)
 
+    @property
+    def chat_history_hot_sessions(self) -> int:
+        """Сколько чат-сессий держать в памяти процесса (LRU перед ChatDB)."""
+        return self._config_data.get('chat_history', {}).get('hot_sessions', 256)
+
+    @property
+    def chat_history_load_turns(self) -> int:
+        """Сколько последних реплик-пар загружать из ChatDB при открытии сессии."""
+        return self._config_data.get('chat_history', {}).get('load_turns', 50)
+
+    @property
+    def chat_history_write_batch_ms(self) -> float:
+        """Окно group commit: сколько мс копить сообщения перед общей транзакцией."""
+        return self._config_data.get('chat_history', {}).get('write_batch_ms', 5)
+
+    @property
+    def chat_history_write_batch_max(self) -> int:
+        """Максимум сообщений в одной транзакции group commit."""
+        return self._config_data.get('chat_history', {}).get('write_batch_max', 500)
+
+    @property
+    def chat_history_retention_interval_hours(self) -> float:
+        """Период фоновой очистки истории чатов в часах (0 — только по запросу)."""
+        return self._config_data.get('chat_history', {}).get('retention_interval_hours', 24)
+
+    @property
+    def chat_history_retention_batch_size(self) -> int:
+        """Сколько сессий архивировать и удалять в одной транзакции."""
+        return self._config_data.get('chat_history', {}).get('retention_batch_size', 200)
+
+    @property
+    def chat_history_archive(self) -> bool:
+        """Сохранять удаляемые сессии в архив (.jsonl.gz) перед удалением."""
+        return self._config_data.get('chat_history', {}).get('archive', True)
+
+    @property
+    def chat_history_archive_dir(self) -> str:
+        """Каталог архивов истории чатов (с раскрытием ~)."""
+        raw = self._config_data.get('chat_history', {}).get('archive_dir') or '~/.aiassistant/archive/chat_history'
+        return str(Path(raw).expanduser())
+
     # ── Помощники ─────────────────────────────────────────────────────────
 
     def get_section(self, section: str) -> Dict[str, Any]:
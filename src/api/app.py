@@ -14,8 +14,22 @@
 # Project: AI Assistant (ai_assist)
 # Version: 0.8.0
 # Changes in 0.8.0:
+#   - ServiceOverloadedError handler: 503/429 with Retry-After header
+#   - RAG retrieval executor shut down in lifespan
 #   - Added lmstudio:: backend support
-#   - lmstudio_client session closed in lifespan shutdown
+#   - Shared per-backend HTTP pool (src/utils/http_pool.py) closed in lifespan
+#     shutdown instead of individual client sessions
+#   - Incremental RAG indexers checkpointed (faiss.delta → faiss.index) on shutdown
+#   - RAG bulk extraction process pool shut down in lifespan
+#   - Model residency manager: startup loads tracked, idle-TTL sweep started
+#     in lifespan
+#   - Response cache SQLite connection closed in lifespan
+#   - Chat history: queued group-commit messages flushed and ChatDB closed
+#     in lifespan
+#   - Chat history retention job (src/db/retention.py) started / stopped in
+#     lifespan
+#   - Admission context middleware: priority class (route prefix) and API key
+#     of each request bound for the generation admission controller
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -30,9 +44,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from ..models.foundry_client import foundry_client
 from ..rag.rag_system import rag_system
 from ..logger import configure_logging
+from ..utils.api_utils import ServiceOverloadedError
+from ..utils.http_pool import close_http_pool
+from ..models.admission import get_admission, reset_request_class, set_request_class
+from ..models.residency import get_residency_manager, shutdown_residency_manager
 
 configure_logging()
 logger = logging.getLogger(__name__)
@@ -42,7 +59,7 @@ async def lifespan(app: FastAPI):
     """Manage application lifecycle.
 
     Startup: initializes RAG system.
-    Shutdown: closes aiohttp session of foundry_client.
+    Shutdown: closes the shared HTTP connection pool of all backends.
 
     Args:
         app: FastAPI application instance.
@@ -57,7 +74,6 @@ async def lifespan(app: FastAPI):
 
     # Auto-load default model if it points to a specific backend
     try:
-        import asyncio
         from ..core.config import config as _cfg
         from ..models.hf_client import hf_client as _hf_client
         default_model: str = _cfg.foundry_default_model or ""
@@ -67,8 +83,7 @@ async def lifespan(app: FastAPI):
             hf_model_id = default_model[len("hf::"):]
             if hf_model_id:
                 logger.info("🤗 Auto-loading HF default model: %s", hf_model_id)
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(None, _hf_client.load_model, hf_model_id)
+                result = await _hf_client.ensure_loaded(hf_model_id)
                 if result.get("success"):
                     logger.info("✅ HF model loaded: %s on %s", hf_model_id, result.get("device"))
                 else:
@@ -84,6 +99,7 @@ async def lifespan(app: FastAPI):
                     ["foundry", "model", "load", foundry_model_id],
                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
                 )
+                await get_residency_manager().ensure_loaded("foundry", foundry_model_id)
     except Exception as e:
         logger.warning("⚠️ Auto-load default model failed: %s", e)
 
@@ -99,6 +115,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("⚠️ OpenCode auto-start failed: %s", e)
 
+    # Idle-TTL / RAM sweep of resident models (model_manager section)
+    get_residency_manager().start()
+
+    # Retention / archival of chat history (chat_history section)
+    try:
+        from ..db.retention import get_retention_job
+        get_retention_job().start()
+    except Exception as e:
+        logger.warning("⚠️ Chat history retention not started: %s", e)
+
     print("\n" + "═" * 60)
     print("  ✅  FastAPI Foundry — startup complete")
     print("  🌐  http://localhost:9696")
@@ -107,10 +133,20 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Stopping FastAPI Foundry...")
-    await foundry_client.close()
+    await shutdown_residency_manager()
+    try:
+        from ..rag.retrieval_executor import shutdown_retrieval_executor
+        shutdown_retrieval_executor()
+    except Exception:
+        pass
+    try:
+        from ..rag.incremental_indexer import checkpoint_all_indexers
+        checkpoint_all_indexers()
+    except Exception:
+        pass
     try:
-        from ..models.lmstudio_client import lmstudio_client
-        await lmstudio_client.close()
+        from ..rag.bulk_ingest import shutdown_bulk_extraction_engine
+        shutdown_bulk_extraction_engine()
     except Exception:
         pass
     try:
@@ -119,6 +155,20 @@ async def lifespan(app: FastAPI):
             await opencode_client.stop()
     except Exception:
         pass
+    try:
+        from ..models.response_cache import close_response_cache
+        close_response_cache()
+    except Exception:
+        pass
+    try:
+        from ..db.retention import shutdown_retention_job
+        await shutdown_retention_job()
+        from ..db.chat_db import close_chat_db
+        await close_chat_db()
+    except Exception as e:
+        logger.error(f"Chat history flush failed: {e}")
+    # Last: backend clients above may still use pooled connections
+    await close_http_pool()
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application.
@@ -174,6 +224,18 @@ def create_app() -> FastAPI:
                 content={"success": False, "error": "Invalid or missing API key"})
         return await call_next(request)
 
+    # -- Admission context ---------------------------------------------------
+    # Priority class (admission.route_priorities) and API key of the request,
+    # read by route_generate() when it takes a generation slot.
+    @app.middleware("http")
+    async def admission_context(request: Request, call_next):
+        api_key = request.headers.get("X-API-Key", "") or request.query_params.get("api_key", "")
+        token = set_request_class(get_admission().classify(request.url.path), api_key)
+        try:
+            return await call_next(request)
+        finally:
+            reset_request_class(token)
+
     # Middleware for request logging
     @app.middleware("http")
     async def log_requests(request: Request, call_next):
@@ -214,6 +276,17 @@ def create_app() -> FastAPI:
             )
         return response
     
+    # Load shedding: bounded queues reject work with a real status and Retry-After
+    @app.exception_handler(ServiceOverloadedError)
+    async def overloaded_exception_handler(request, exc: ServiceOverloadedError):
+        retry_after = max(1, int(round(exc.retry_after)))
+        logger.warning("Request rejected (overload) at %s: %s", request.url.path, exc)
+        return JSONResponse(
+            status_code=exc.status_code,
+            content={"success": False, "error": str(exc), "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+
     # Global exception handler
     @app.exception_handler(Exception)
     async def global_exception_handler(request, exc):
@@ -24,6 +24,10 @@
 # Changes in 0.8.0:
 #   - Removed dead stub endpoints: /ai/models, /ai/models/recommended,
 #     /ai/health, /ai/models/{id}/load, /ai/models/{id}/unload
+#   - /ai/generate/stream and /ai/chat/stream use route_generate_stream()
+#     (native token streaming for every backend, not Foundry only)
+#   - Cache-Control request header is passed to the router's response cache
+#   - /ai/chat: admission overload is answered 429 / 503 + Retry-After, not 500
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -32,11 +36,11 @@ import json
 import asyncio
 import uuid
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from src.logger import logger
-from ...models.foundry_client import foundry_client
-from ...models.router import route_generate
+from ...models.router import route_generate, route_generate_stream
+from ...utils.api_utils import ServiceOverloadedError
 from ...utils.text_utils import count_tokens_approx
 try:
     from ...rag.rag_system import rag_system
@@ -86,7 +90,7 @@ def _save_session_history(history: list, session_id: str = "default", chat_type:
 
 
 @router.post("/ai/generate")
-async def generate_text(request: dict):
+async def generate_text(request: dict, http_request: Request):
     """Generate text via AI Assistant orchestrator (all backends).
 
     Model prefix determines backend:
@@ -102,6 +106,7 @@ async def generate_text(request: dict):
         "model":       request.get("model"),
         "temperature": request.get("temperature", 0.7),
         "max_tokens":  request.get("max_tokens", 2048),
+        "cache_control": http_request.headers.get("cache-control"),
     }
 
     if request.get("use_rag", False):
@@ -120,8 +125,8 @@ async def generate_text(request: dict):
 
 
 @router.post("/ai/generate/stream")
-async def generate_text_stream(request: dict):
-    """Стриминговая генерация текста (Foundry only)."""
+async def generate_text_stream(request: dict, http_request: Request):
+    """Стриминговая генерация текста (все backend через route_generate_stream)."""
     prompt = request.get("prompt", "")
     if not prompt:
         raise HTTPException(status_code=400, detail="Prompt is required")
@@ -130,17 +135,18 @@ async def generate_text_stream(request: dict):
         "model":       request.get("model"),
         "temperature": request.get("temperature", 0.7),
         "max_tokens":  request.get("max_tokens", 2048),
+        "cache_control": http_request.headers.get("cache-control"),
     }
 
     async def generate():
-        async for chunk in foundry_client.generate_stream(prompt, **params):
+        async for chunk in route_generate_stream(prompt, **params):
             yield f"data: {json.dumps(chunk)}\n\n"
 
     return StreamingResponse(generate(), media_type="text/event-stream")
 
 
 @router.post("/ai/chat")
-async def chat_completion(request: dict):
+async def chat_completion(request: dict, http_request: Request):
     """Chat with message history via AI Assistant orchestrator (all backends)."""
     messages = request.get("messages", [])
     use_rag = request.get("use_rag", False)
@@ -186,7 +192,10 @@ async def chat_completion(request: dict):
             model=request.get("model"),
             temperature=request.get("temperature", 0.7),
             max_tokens=request.get("max_tokens", 2048),
+            cache_control=http_request.headers.get("cache-control"),
         )
+    except ServiceOverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Chat completion crashed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -206,7 +215,7 @@ async def chat_completion(request: dict):
 
 
 @router.post("/ai/chat/stream")
-async def chat_completion_stream(request: dict):
+async def chat_completion_stream(request: dict, http_request: Request):
     """Стриминговый чат с автоматическим сохранением истории после завершения."""
     session_id: str = request.get("session_id") or str(uuid.uuid4())
     messages: list = request.get("messages", [])
@@ -252,13 +261,13 @@ async def chat_completion_stream(request: dict):
         "model":       request.get("model"),
         "temperature": request.get("temperature", 0.7),
         "max_tokens":  request.get("max_tokens", 2048),
+        "cache_control": http_request.headers.get("cache-control"),
     }
 
     async def event_generator():
         accumulated_text: str = ""
         try:
-            await foundry_client._update_base_url()
-            async for chunk in foundry_client.generate_stream(prompt, **params):
+            async for chunk in route_generate_stream(prompt, **params):
                 if isinstance(chunk, dict) and chunk.get("success"):
                     accumulated_text += chunk.get("content", "")
                 elif isinstance(chunk, dict) and chunk.get("error"):
@@ -7,21 +7,44 @@
 #   POST   /api/v1/chat/start              — create new session (UUID)
 #   POST   /api/v1/chat/message            — send message, get response
 #   POST   /api/v1/chat/stream             — streaming message (SSE)
-#   GET    /api/v1/chat/history/{id}       — get in-memory session history
-#   DELETE /api/v1/chat/session/{id}       — delete in-memory session
+#   GET    /api/v1/chat/history/{id}       — get session history (last N turns)
+#   DELETE /api/v1/chat/session/{id}       — delete session
+#   GET    /api/v1/chat/sessions           — persisted sessions (keyset pages)
+#   GET    /api/v1/chat/session/{id}/messages — full session history (keyset pages)
+#   GET    /api/v1/chat/search             — full-text search over all messages
+#   GET    /api/v1/chat/retention          — retention job settings + last report
+#   POST   /api/v1/chat/retention          — prune / archive chat history now
 #   POST   /api/v1/chat/history/save       — persist history to disk
 #   GET    /api/v1/chat/history/list       — list saved dialogs from disk
 #   GET    /api/v1/chat/history/file/{fn}  — load one saved dialog from disk
 #   POST   /api/v1/chat/history/cleanup    — delete old/oversized dialogs
 #   GET    /api/v1/chat/models             — list available Foundry models
 #
-#   Sessions are stored in-memory (chat_sessions dict).
+#   Sessions are stored in ChatDB behind a bounded LRU of hot sessions
+#   (src/db/session_store.py), so any uvicorn worker can serve any session.
 #   Persisted dialogs go to config.dir_dialogs (~/.aiassistant/dialogs/).
 #   Auto-translation: enabled via config translator.enabled.
 #
 # File: chat_endpoints.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - POST /chat/stream streams tokens natively for every backend via
+#     router.route_generate_stream() (was one blocking chunk for HF/Ollama/llama.cpp)
+#   - History is sent as a messages array trimmed to chat_context.max_tokens
+#     (was the whole session flattened into one prompt on every turn); the
+#     session ID lets backends reuse the already prefilled prefix
+#   - History is sized with the target model's tokenizer against its context
+#     window (context_window.py) before the backend call
+#   - Admission overload (admission.py) is answered 429 / 503 + Retry-After
+#     instead of 500; stream errors carry retry_after
+#   - Session state moved from the chat_sessions dict to ChatSessionStore
+#     (ChatDB + hot LRU, invalidated when another worker writes); a session is
+#     loaded with its last chat_history.load_turns turns, not the whole history
+#   - Added GET /chat/sessions, GET /chat/session/{id}/messages (keyset
+#     cursors) and GET /chat/search (ChatDB FTS5)
+#   - Added GET / POST /chat/retention (src/db/retention.py); dialog cleanup
+#     shares retention.prune_dialogs()
 # Changes in 0.7.1:
 #   - save_chat_history: path from config.dir_dialogs (was hardcoded)
 #   - Added GET /chat/history/list
@@ -42,11 +65,15 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pathlib import Path
 
-from ...models.foundry_client import foundry_client
-from ...models.router import route_generate
+from ...models.chat_context import flatten_messages, get_chat_context
+from ...models.context_window import get_context_window
+from ...models.router import route_generate, route_generate_stream
+from ...utils.api_utils import ServiceOverloadedError
 from ...utils.translator import translator
 from ...core.config import config as app_config
 from ...db.chat_db import get_chat_db
+from ...db.retention import get_retention_job, prune_dialogs
+from ...db.session_store import get_session_store
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -68,38 +95,23 @@ def _dialogs_dir() -> Path:
     return p
 
 
-# In-memory session store
-chat_sessions: Dict[str, List[Dict]] = {}
+async def _ensure_session_loaded(session_id: str) -> bool:
+    """Load the last N turns of a session into the hot store if it exists."""
+    return await get_session_store().get(session_id) is not None
 
 
-async def _ensure_session_loaded(session_id: str) -> bool:
-    """Load a persisted chat session into memory if it exists."""
-    if session_id in chat_sessions:
-        return True
-    try:
-        db = await get_chat_db()
-        if not await db.session_exists(session_id):
-            return False
-        history = await db.get_session_history(session_id)
-        chat_sessions[session_id] = [
-            {"role": msg.role, "content": msg.content}
-            for msg in history
-        ]
-        return True
-    except Exception as exc:
-        logger.warning("Could not load persisted chat session %s: %s", session_id, exc)
-        return False
-
-
-async def _persist_chat_message(session_id: str, role: str, content: str) -> None:
-    """Best-effort persistence for shared chat context."""
-    try:
-        db = await get_chat_db()
-        if not await db.session_exists(session_id):
-            await db.create_session(session_id=session_id)
-        await db.save_message(session_id=session_id, role=role, content=content)
-    except Exception as exc:
-        logger.warning("Could not persist chat message for %s: %s", session_id, exc)
+async def _fit_history(session_id: str, model: Optional[str], max_tokens: Optional[int]) -> List[Dict]:
+    """Session history trimmed to the prompt budget of the target model."""
+    state = await get_session_store().get(session_id)
+    history = state.messages if state is not None else []
+    if state is not None and state.refreshed:
+        # Loaded from ChatDB or shortened: cut points of the old list no longer apply
+        get_chat_context().forget(session_id)
+        state.refreshed = False
+    window = get_context_window()
+    budget = await window.prompt_budget(model, max_tokens)
+    count = await window.counter(model, [str(msg.get("content") or "") for msg in history])
+    return get_chat_context().trim(session_id, history, budget=budget, count=count)
 
 
 @router.post("/chat/start")
@@ -115,12 +127,7 @@ async def start_chat_session(request: dict) -> dict:
     """
     session_id = str(uuid.uuid4())
     model = request.get("model", "default")
-    chat_sessions[session_id] = []
-    try:
-        db = await get_chat_db()
-        await db.create_session(session_id=session_id, model=model, title=request.get("title", ""))
-    except Exception as exc:
-        logger.warning("Could not persist chat session %s: %s", session_id, exc)
+    await get_session_store().create(session_id, model=model, title=request.get("title", ""))
     return {"success": True, "session_id": session_id, "model": model, "message": "Сессия чата начата"}
 
 
@@ -165,23 +172,23 @@ async def send_chat_message(request: dict) -> dict:
             model_message = tr["translated"]
             source_lang = user_lang
 
-    chat_sessions[session_id].append({"role": "user", "content": model_message})
-    await _persist_chat_message(session_id, "user", model_message)
-    prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_sessions[session_id]])
+    await get_session_store().append(session_id, "user", model_message)
+    messages = await _fit_history(session_id, request.get("model"), request.get("max_tokens", 2048))
 
     try:
         response = await route_generate(
-            prompt,
+            flatten_messages(messages),
             model=request.get("model"),
             temperature=request.get("temperature", 0.7),
             max_tokens=request.get("max_tokens", 2048),
+            messages=messages,
+            session_id=session_id,
         )
         if not response["success"]:
             raise Exception(response.get("error", "Unknown error"))
 
         ai_response = response.get("content", "")
-        chat_sessions[session_id].append({"role": "assistant", "content": ai_response})
-        await _persist_chat_message(session_id, "assistant", ai_response)
+        await get_session_store().append(session_id, "assistant", ai_response)
 
         reply_lang = locale if locale and locale != "auto" else source_lang
         if translate_on and reply_lang and reply_lang not in ("en", "auto"):
@@ -191,6 +198,8 @@ async def send_chat_message(request: dict) -> dict:
 
         return {"success": True, "response": ai_response, "session_id": session_id}
 
+    except ServiceOverloadedError:
+        raise
     except Exception as e:
         logger.error("Chat message generation failed for session %s: %s", session_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Ошибка генерации: {str(e)}")
@@ -232,9 +241,8 @@ async def send_chat_message_stream(request: dict) -> StreamingResponse:
         if tr_in["success"] and tr_in["was_translated"]:
             prompt_message = tr_in["translated"]
 
-    chat_sessions[session_id].append({"role": "user", "content": prompt_message})
-    await _persist_chat_message(session_id, "user", prompt_message)
-    prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in chat_sessions[session_id]])
+    await get_session_store().append(session_id, "user", prompt_message)
+    messages = await _fit_history(session_id, request.get("model"), request.get("max_tokens"))
 
     async def generate_stream():
         try:
@@ -242,59 +250,29 @@ async def send_chat_message_stream(request: dict) -> StreamingResponse:
             temperature = request.get("temperature")
             max_tokens = request.get("max_tokens")
 
-            # Foundry and LM Studio support native streaming; other backends use route_generate fallback
-            if not model or model.startswith("foundry::"):
-                accumulated = ""
-                clean_model = model[len("foundry::"):] if model.startswith("foundry::") else None
-                async for chunk in foundry_client.generate_stream(
-                    prompt=prompt,
-                    model=clean_model,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                ):
-                    if chunk["success"] and not chunk.get("finished", False):
-                        content = chunk.get("content", "")
-                        accumulated += content
-                        yield f"data: {json.dumps({'chunk': content})}\n\n"
-                    elif chunk.get("finished", False):
-                        break
-                if translate_on and user_lang not in ("en", "auto") and accumulated:
-                    tr_out = await translator.translate_response(accumulated, user_lang)
-                    if tr_out["success"]:
-                        accumulated = tr_out["translated"]
-                        yield f'data: {{"chunk_translated": {json.dumps(accumulated)}}}\n\n'
-                chat_sessions[session_id].append({"role": "assistant", "content": accumulated})
-                await _persist_chat_message(session_id, "assistant", accumulated)
-            elif model.startswith("lmstudio::"):
-                from ...models.lmstudio_client import lmstudio_client
-
-                accumulated = ""
-                clean_model = model[len("lmstudio::"):]
-                async for chunk in lmstudio_client.stream_generate(
-                    prompt=prompt,
-                    model=clean_model,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                ):
-                    if chunk.get("success") and not chunk.get("finished", False):
-                        content = chunk.get("content", "")
-                        accumulated += content
-                        yield f"data: {json.dumps({'chunk': content})}\n\n"
-                    elif not chunk.get("success"):
-                        yield f"data: {json.dumps({'error': chunk.get('error', 'LM Studio stream error')})}\n\n"
-                        return
-                chat_sessions[session_id].append({"role": "assistant", "content": accumulated})
-                await _persist_chat_message(session_id, "assistant", accumulated)
-            else:
-                # Non-Foundry backends: single call, stream as one chunk
-                result = await route_generate(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
-                if not result["success"]:
-                    yield f"data: {json.dumps({'error': result.get('error', 'Generation error')})}\n\n"
+            # Every backend streams natively through route_generate_stream()
+            accumulated = ""
+            async for chunk in route_generate_stream(
+                flatten_messages(messages), model=model or None, temperature=temperature,
+                max_tokens=max_tokens, messages=messages, session_id=session_id,
+            ):
+                if not chunk.get("success"):
+                    error = {"error": chunk.get("error", "Generation error")}
+                    if chunk.get("retry_after") is not None:
+                        error["retry_after"] = chunk["retry_after"]
+                    yield f"data: {json.dumps(error)}\n\n"
                     return
-                content = result.get("content", "")
-                chat_sessions[session_id].append({"role": "assistant", "content": content})
-                await _persist_chat_message(session_id, "assistant", content)
+                if chunk.get("finished"):
+                    break
+                content = chunk.get("content", "")
+                accumulated += content
                 yield f"data: {json.dumps({'chunk': content})}\n\n"
+            if translate_on and user_lang not in ("en", "auto") and accumulated:
+                tr_out = await translator.translate_response(accumulated, user_lang)
+                if tr_out["success"]:
+                    accumulated = tr_out["translated"]
+                    yield f'data: {{"chunk_translated": {json.dumps(accumulated)}}}\n\n'
+            await get_session_store().append(session_id, "assistant", accumulated)
 
             yield f"data: {json.dumps({'done': True})}\n\n"
         except Exception as e:
@@ -310,7 +288,7 @@ async def send_chat_message_stream(request: dict) -> StreamingResponse:
 
 @router.get("/chat/history/{session_id}")
 async def get_chat_history(session_id: str) -> dict:
-    """Get in-memory session history.
+    """Get session history (the last chat_history.load_turns turns).
 
     Args:
         session_id: Chat session UUID.
@@ -321,14 +299,15 @@ async def get_chat_history(session_id: str) -> dict:
     Raises:
         HTTPException 404: Session not found.
     """
-    if session_id not in chat_sessions:
+    state = await get_session_store().get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Сессия не найдена")
-    return {"success": True, "session_id": session_id, "history": chat_sessions[session_id]}
+    return {"success": True, "session_id": session_id, "history": state.messages}
 
 
 @router.delete("/chat/session/{session_id}")
 async def delete_chat_session(session_id: str) -> dict:
-    """Delete an in-memory chat session.
+    """Delete a chat session (hot copy and ChatDB rows).
 
     Args:
         session_id: Chat session UUID.
@@ -339,12 +318,92 @@ async def delete_chat_session(session_id: str) -> dict:
     Raises:
         HTTPException 404: Session not found.
     """
-    if session_id not in chat_sessions:
+    if not await get_session_store().delete(session_id):
         raise HTTPException(status_code=404, detail="Сессия не найдена")
-    del chat_sessions[session_id]
+    get_chat_context().forget(session_id)
     return {"success": True, "message": "Сессия удалена"}
 
 
+@router.get("/chat/sessions")
+async def list_chat_sessions(limit: int = 50, cursor: Optional[str] = None) -> dict:
+    """List persisted chat sessions, most recently updated first.
+
+    Args:
+        limit (int):   Max number of sessions per page (default: 50).
+        cursor (str):  next_cursor of the previous page.
+
+    Returns:
+        dict: success, sessions, next_cursor (None on the last page).
+
+    Raises:
+        HTTPException 400: Malformed cursor.
+    """
+    db = await get_chat_db()
+    try:
+        sessions, next_cursor = await db.list_sessions_page(limit=max(1, min(limit, 500)), cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "sessions": [s.model_dump() for s in sessions], "next_cursor": next_cursor}
+
+
+@router.get("/chat/session/{session_id}/messages")
+async def get_chat_session_messages(session_id: str, limit: int = 100, before: Optional[int] = None) -> dict:
+    """Page through the full persisted history of a session, newest page first.
+
+    Args:
+        session_id: Chat session UUID.
+        limit (int):  Max number of messages per page (default: 100).
+        before (int): next_cursor of the previous page (older messages).
+
+    Returns:
+        dict: success, session_id, messages (oldest first within the page),
+              next_cursor (None when there are no older messages).
+
+    Raises:
+        HTTPException 404: Session not found.
+    """
+    db = await get_chat_db()
+    if not await db.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    messages, next_cursor = await db.get_messages_page(session_id, limit=max(1, min(limit, 1000)), before_id=before)
+    return {"success": True, "session_id": session_id, "messages": messages, "next_cursor": next_cursor}
+
+
+@router.get("/chat/search")
+async def search_chat_messages(
+    q: str,
+    session_id: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[int] = None,
+    order: str = "recent",
+) -> dict:
+    """Full-text search over the chat history.
+
+    Args:
+        q (str):          Words that must all occur in a message.
+        session_id (str): Restrict the search to one session.
+        limit (int):      Max number of hits (default: 20).
+        cursor (int):     next_cursor of the previous page (order=recent).
+        order (str):      recent (newest first, paginated) | relevance (BM25, one page).
+
+    Returns:
+        dict: success, hits ({id, session_id, role, content, snippet, timestamp}),
+              next_cursor.
+
+    Raises:
+        HTTPException 400: Empty query or unknown order.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Пустой поисковый запрос")
+    if order not in ("recent", "relevance"):
+        raise HTTPException(status_code=400, detail="order: recent | relevance")
+    db = await get_chat_db()
+    hits, next_cursor = await db.search_messages(
+        q, limit=max(1, min(limit, 200)), session_id=session_id, before_id=cursor, order=order,
+    )
+    return {"success": True, "hits": hits, "next_cursor": next_cursor}
+
+
 @router.post("/chat/history/save")
 async def save_chat_history(request: dict) -> dict:
     """Persist chat history to disk.
@@ -475,37 +534,37 @@ async def cleanup_dialogs(request: Optional[dict] = None) -> dict:
     retention_days: int = req.get("retention_days") or app_config.dialogs_retention_days
     max_size_mb: int = req.get("max_size_mb") or app_config.dialogs_max_size_mb
 
-    history_dir = _dialogs_dir()
-    now = time.time()
-    cutoff = now - retention_days * 86400
-    max_bytes = max_size_mb * 1024 * 1024
-
-    files = sorted(history_dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
-    deleted = 0
-    freed = 0
-
-    # Delete files older than retention_days
-    for f in files:
-        if f.stat().st_mtime < cutoff:
-            freed += f.stat().st_size
-            f.unlink()
-            deleted += 1
-            logger.info(f"🗑️ cleanup: removed old dialog {f.name}")
-
-    # If total size still exceeds limit, remove oldest first
-    files = sorted(history_dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
-    total_size = sum(f.stat().st_size for f in files)
-    for f in files:
-        if total_size <= max_bytes:
-            break
-        freed += f.stat().st_size
-        total_size -= f.stat().st_size
-        f.unlink()
-        deleted += 1
-        logger.info(f"🗑️ cleanup: removed oversized dialog {f.name}")
-
-    remaining = len(list(history_dir.glob("*.json")))
-    return {"success": True, "deleted": deleted, "freed_bytes": freed, "remaining": remaining}
+    result = prune_dialogs(str(_dialogs_dir()), retention_days, max_size_mb)
+    return {"success": True, **result}
+
+
+@router.get("/chat/retention")
+async def get_chat_retention() -> dict:
+    """Chat history retention settings and the report of the last run.
+
+    Returns:
+        dict: success, retention_days, max_sessions, batch_size, interval_hours,
+              archive, archive_dir, running, runs, last_report.
+    """
+    return {"success": True, **get_retention_job().stats()}
+
+
+@router.post("/chat/retention")
+async def run_chat_retention() -> dict:
+    """Prune and archive chat history now (chat_history.retention_days / max_sessions).
+
+    Returns:
+        dict: success, sessions_deleted, messages_deleted, archive_file,
+              db_bytes_before, db_bytes_after, bytes_reclaimed, freed_pages,
+              free_pages, wal_busy, dialogs_deleted, dialogs_freed_bytes,
+              duration_seconds.
+    """
+    try:
+        report = await get_retention_job().run_once()
+    except Exception as e:
+        logger.error(f"Chat history retention failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка очистки истории: {e}")
+    return {"success": True, **report}
 
 
 @router.get("/chat/models")
@@ -18,7 +18,12 @@
 #
 # File: generate.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.0
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Response cache: RAG context hash and Cache-Control header passed to
+#     route_generate(); "cached" flag in the response
+#   - Prompt sized with the model's tokenizer: RAG chunks packed into the
+#     context window, oversized prompts rejected before the backend call
 # Changes in 0.7.0:
 #   - Replaced manual if/elif backend dispatch with router.route_generate()
 #   - Added foundry:: prefix support; bare IDs still work (legacy warning)
@@ -27,8 +32,10 @@
 # Copyright: © 2026 hypo69
 # =============================================================================
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from ...models.router import route_generate
+from ...models.context_window import get_context_window
+from ...models.response_cache import context_hash
 from ...rag.rag_system import rag_system
 from ...core.config import config as app_config
 from ...utils.text_utils import count_tokens_approx
@@ -39,7 +46,7 @@ router = APIRouter()
 
 @router.post("/generate")
 @api_response_handler
-async def generate_text(request: dict) -> dict:
+async def generate_text(request: dict, http_request: Request = None) -> dict:
     """Generate text via the AI Assistant orchestrator.
 
     Routes to the correct backend based on model prefix:
@@ -55,6 +62,7 @@ async def generate_text(request: dict) -> dict:
             top_k (int):                  RAG results count (default: from config).
             translate_model_dialog (bool): Translate prompt→EN and response→user lang.
             user_language (str|null):     User language ISO 639-1. null = auto-detect.
+        http_request: Incoming request; ``Cache-Control: no-cache`` bypasses the response cache.
 
     Returns:
         dict: success, content, model, usage, user_language, translated (bool)
@@ -82,17 +90,34 @@ async def generate_text(request: dict) -> dict:
         user_lang = user_language or "en"
         prompt_for_model = prompt
 
+    window = get_context_window()
+    budget = await window.prompt_budget(model, max_tokens)
+    rag_context_hash = None
     if use_rag:
         rag_results = await rag_system.search(prompt_for_model, top_k=top_k)
+        if rag_results:
+            question_tokens = await window.count(model, prompt_for_model)
+            rag_results = await window.pack_chunks(model, rag_results, budget - question_tokens)
         if rag_results:
             context = rag_system.format_context(rag_results)
             prompt_for_model = f"Context:\n{context}\n\nQuestion: {prompt_for_model}"
+            rag_context_hash = context_hash(rag_results)
+
+    prompt_tokens = await window.count(model, prompt_for_model)
+    if prompt_tokens > budget:
+        return {
+            "success": False,
+            "error": f"Prompt is {prompt_tokens} tokens; the model context leaves {budget} for the prompt",
+            "error_code": "context_length_exceeded",
+        }
 
     result = await route_generate(
         prompt=prompt_for_model,
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
+        context_hash=rag_context_hash,
+        cache_control=http_request.headers.get("cache-control") if http_request else None,
     )
 
     if not result.get("success"):
@@ -110,6 +135,7 @@ async def generate_text(request: dict) -> dict:
         "model": result["model"],
         "user_language": user_lang,
         "translated": translated,
+        "cached": bool(result.get("cached")),
         "usage": {
             "prompt_tokens":     raw_usage.get("prompt_tokens")     or count_tokens_approx(prompt_for_model),
             "completion_tokens": raw_usage.get("completion_tokens") or count_tokens_approx(content),
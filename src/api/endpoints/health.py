@@ -20,6 +20,7 @@
 # Project: AI Assistant (ai_assist)
 # Version: 0.8.0
 # Changes in 0.8.0:
+#   - Docs-server probe uses the shared keep-alive HTTP pool
 #   - All provider blocks unified: {status, active_model, ...}
 #   - Added hf_status with libraries, token, downloaded/loaded counts
 #   - Added real timestamp via datetime
@@ -35,6 +36,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from fastapi import APIRouter
 from config_manager import config
+from ...utils.http_pool import pooled_session
 
 router = APIRouter()
 
@@ -177,7 +179,7 @@ async def _check_docs_status() -> str:
     """Check MkDocs documentation server availability."""
     port = config.get_section('docs_server').get('port', 9697)
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+        async with pooled_session(timeout=aiohttp.ClientTimeout(total=2)) as session:
             async with session.get(f'http://127.0.0.1:{port}/') as resp:
                 return 'running' if resp.status == 200 else 'stopped'
     except Exception:
@@ -12,10 +12,15 @@
 #   POST /api/v1/hf/models/load      {"model_id": "google/gemma-2b"}
 #   POST /api/v1/hf/models/unload    {"model_id": "google/gemma-2b"}
 #   POST /api/v1/hf/generate         {"prompt": "Hello", "model_id": "google/gemma-2b"}
+#   GET  /api/v1/hf/batching
 #
 # File: src/api/endpoints/hf_models.py
 # Project: Ai Assistant (Docker)
-# Version: 0.4.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - GET /hf/batching: метрики batch-планировщика по загруженным моделям
+#   - /hf/models/load идёт через менеджер резидентности (LRU / TTL / RAM)
+#   - GET /hf/batching: KV-кэши чат-сессий (session_kv)
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # Copyright: © 2026 hypo69
@@ -229,10 +234,7 @@ async def load_hf_model(request: dict) -> dict:
     if not model_id:
         raise HTTPException(status_code=400, detail="model_id is required")
 
-    result = await asyncio.get_event_loop().run_in_executor(
-        None, lambda: hf_client.load_model(model_id, device)
-    )
-    return result
+    return await hf_client.ensure_loaded(model_id, device)
 
 
 @router.post("/models/unload")
@@ -285,6 +287,18 @@ async def hf_generate(request: dict) -> dict:
     return await hf_client.generate(prompt, model_id, max_new_tokens, temperature)
 
 
+@router.get("/batching")
+async def hf_batching_stats() -> dict:
+    """Метрики динамического batching по загруженным HF моделям.
+
+    Returns:
+        dict: success, models ({model_id: {queue_depth, batch_size_histogram,
+              avg_batch_size, avg_queue_wait_ms, tokens_per_sec, ...}}),
+              session_kv (KV-кэши чат-сессий: sessions, hits, misses, reused_tokens).
+    """
+    return {"success": True, "models": hf_client.batch_stats(), "session_kv": hf_client.session_cache_stats()}
+
+
 @router.get("/status")
 async def hf_status() -> dict:
     """Статус HuggingFace интеграции — доступность библиотек.
@@ -11,6 +11,10 @@
 #     GET  /api/v1/llama/props              — параметры сервера
 #     GET  /api/v1/llama/slots              — активные слоты инференса
 #     GET  /api/v1/llama/metrics            — Prometheus-метрики
+#     (?replica=N — реплика модели из группы llama_cpp.models)
+#
+#   Реплики (несколько llama-server одной модели):
+#     GET  /api/v1/llama/replicas           — нагрузка и здоровье реплик (балансировщик)
 #     POST /api/v1/llama/completion         — нативная генерация (top_k, mirostat, ...)
 #     POST /api/v1/llama/tokenize           — токенизация
 #     POST /api/v1/llama/detokenize         — детокенизация
@@ -27,7 +31,15 @@
 #
 # File: src/api/endpoints/llama_cpp.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - llama-server calls reuse the shared keep-alive pool of the llama backend
+#   - /start goes through the model residency manager; the managed server is
+#     stopped when its model is evicted (LRU / idle TTL / RAM limit)
+#   - /start accepts parallel (llama_cpp.parallel): slot count for
+#     per-session slot pinning
+#   - GET /replicas: replica groups of llama_balancer.py; /slots and /metrics
+#     take ?replica=N; /start passes --metrics (read by the balancer)
 # Changes in 0.7.1:
 #   - Added native llama-server API proxy: /props, /slots, /metrics
 #   - Added /completion (native, supports top_k/mirostat/repeat_penalty)
@@ -46,6 +58,8 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import PlainTextResponse
 from ...utils.api_utils import api_response_handler
+from ...utils.http_pool import pooled_session
+from ...models.residency import get_residency_manager, register_unloader
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/llama", tags=["llama-cpp"])
@@ -54,6 +68,7 @@ router = APIRouter(prefix="/llama", tags=["llama-cpp"])
 # Хранится на уровне модуля — один сервер на весь процесс FastAPI.
 _server_process: subprocess.Popen | None = None
 _last_error: str | None = None  # Last start/stop error, shown in /status
+_server_model: str | None = None  # Имя .gguf файла запущенного сервера (ключ резидентности)
 
 # Настройки по умолчанию — переопределяются через .env или тело запроса
 DEFAULT_HOST    = "127.0.0.1"
@@ -78,13 +93,13 @@ def _get_server_url() -> str:
     return f"http://{host}:{port}"
 
 
-def _get_server_url_for_model(model_id: str | None = None) -> str:
-    """Build llama.cpp server URL for a configured model alias/path."""
+def _get_server_url_for_model(model_id: str | None = None, replica: int | None = None) -> str:
+    """Build llama.cpp server URL for a configured model alias/path (and replica index)."""
     try:
-        from ...models.llama_registry import resolve_llama_server
-        server = resolve_llama_server(model_id)
-        if server:
-            return server.url
+        from ...models.llama_registry import resolve_llama_group
+        group = resolve_llama_group(model_id)
+        if group:
+            return group[replica if replica is not None and 0 <= replica < len(group) else 0].url
     except Exception:
         pass
     return _get_server_url()
@@ -104,7 +119,7 @@ async def llama_status(model: str | None = None) -> dict:
     # Проверяем HTTP доступность
     url = _get_server_url_for_model(model)
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.get(f"{url}/health", timeout=aiohttp.ClientTimeout(total=3)) as r:
                 reachable = r.status == 200
     except Exception:
@@ -138,7 +153,7 @@ async def llama_status(model: str | None = None) -> dict:
     active_model: str | None = None
     if reachable:
         try:
-            async with aiohttp.ClientSession() as s:
+            async with pooled_session("llama") as s:
                 async with s.get(f"{url}/v1/models", timeout=aiohttp.ClientTimeout(total=2)) as r:
                     if r.status == 200:
                         data = await r.json()
@@ -214,10 +229,10 @@ async def llama_start(request: dict) -> dict:
         ctx_size:     Размер контекста (default: 4096)
         threads:      Количество потоков CPU (default: auto)
         n_gpu_layers: Слоёв на GPU, 0 = только CPU (default: 0)
+        parallel:     Количество слотов (--parallel); чат-сессии закрепляются
+                      за слотом для повторного использования кэша промпта
         host:         Хост (default: 127.0.0.1)
     """
-    global _server_process, _last_error
-
     from ...core.config import config as _config
 
     # Resolve model_path: request body → config.llama_model_path
@@ -249,66 +264,87 @@ async def llama_start(request: dict) -> dict:
 
     model_path = str(dest) if dest.exists() else str(src)
 
-    # Остановить предыдущий если запущен
-    if _server_process and _server_process.poll() is None:
-        _server_process.terminate()
-        _server_process.wait(timeout=5)
-        logger.info("Предыдущий llama.cpp сервер остановлен")
-
-    _llama_cfg = _config.get_section("llama_cpp")
-
-    port         = int(request.get("port") or _llama_cfg.get("port", DEFAULT_PORT))
-    host         = request.get("host") or _llama_cfg.get("host", DEFAULT_HOST)
-    ctx_size     = int(request.get("ctx_size") or DEFAULT_CTX)
-    threads      = int(request.get("threads") or DEFAULT_THREADS)
-    n_gpu_layers = int(request.get("n_gpu_layers") or 0)
-
-    # Ищем llama-server в PATH и стандартных местах
-    server_bin = _find_llama_server()
-    if not server_bin:
-        _last_error = "llama-server binary not found. Install llama.cpp: https://github.com/ggerganov/llama.cpp/releases"
-        return {"success": False, "error": _last_error}
-
-    cmd = [
-        server_bin,
-        "--model",       model_path,
-        "--host",        host,
-        "--port",        str(port),
-        "--ctx-size",    str(ctx_size),
-        "--threads",     str(threads),
-        "--n-gpu-layers", str(n_gpu_layers),
-        "--log-disable",
-    ]
+    async def _spawn() -> dict:
+        global _server_process, _last_error, _server_model
+
+        # Остановить предыдущий если запущен
+        if _server_process and _server_process.poll() is None:
+            _server_process.terminate()
+            _server_process.wait(timeout=5)
+            logger.info("Предыдущий llama.cpp сервер остановлен")
+        if _server_model:
+            get_residency_manager().discard("llama", _server_model)
+            _server_model = None
+
+        _llama_cfg = _config.get_section("llama_cpp")
+
+        port         = int(request.get("port") or _llama_cfg.get("port", DEFAULT_PORT))
+        host         = request.get("host") or _llama_cfg.get("host", DEFAULT_HOST)
+        ctx_size     = int(request.get("ctx_size") or DEFAULT_CTX)
+        threads      = int(request.get("threads") or DEFAULT_THREADS)
+        n_gpu_layers = int(request.get("n_gpu_layers") or 0)
+        parallel     = int(request.get("parallel") or _llama_cfg.get("parallel") or 0)
+
+        # Ищем llama-server в PATH и стандартных местах
+        server_bin = _find_llama_server()
+        if not server_bin:
+            _last_error = "llama-server binary not found. Install llama.cpp: https://github.com/ggerganov/llama.cpp/releases"
+            return {"success": False, "error": _last_error}
+
+        cmd = [
+            server_bin,
+            "--model",       model_path,
+            "--host",        host,
+            "--port",        str(port),
+            "--ctx-size",    str(ctx_size),
+            "--threads",     str(threads),
+            "--n-gpu-layers", str(n_gpu_layers),
+            "--log-disable",
+            "--metrics",  # /metrics: очередь и загрузка для балансировщика реплик
+        ]
+        if parallel > 1:
+            cmd += ["--parallel", str(parallel)]
 
-    try:
-        _last_error = None
-        _server_process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.PIPE,
-            # Do NOT use text=True here — binary mode avoids pipe buffer deadlocks.
-            # stderr is read non-blocking in /status only when the process has exited.
-        )
-        logger.info(f"llama.cpp запущен: {Path(model_path).name} (PID: {_server_process.pid})")
-        return {
-            "success": True,
-            "pid": _server_process.pid,
-            "model": Path(model_path).name,
-            "url": f"http://{host}:{port}",
-            "openai_url": f"http://{host}:{port}/v1",
-            "status": "starting"
-        }
-    except Exception as e:
-        _last_error = str(e)
-        logger.error(f"Ошибка запуска llama.cpp: {e}")
-        return {"success": False, "error": _last_error}
+        try:
+            _last_error = None
+            _server_process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                # Do NOT use text=True here — binary mode avoids pipe buffer deadlocks.
+                # stderr is read non-blocking in /status only when the process has exited.
+            )
+            _server_model = Path(model_path).name
+            logger.info(f"llama.cpp запущен: {_server_model} (PID: {_server_process.pid})")
+            return {
+                "success": True,
+                "pid": _server_process.pid,
+                "model": Path(model_path).name,
+                "url": f"http://{host}:{port}",
+                "openai_url": f"http://{host}:{port}/v1",
+                "status": "starting"
+            }
+        except Exception as e:
+            _last_error = str(e)
+            logger.error(f"Ошибка запуска llama.cpp: {e}")
+            return {"success": False, "error": _last_error}
+
+    # Через менеджер резидентности: одновременные старты одной модели
+    # объединяются, лишние простаивающие модели выгружаются (LRU).
+    # Повторный /start той же модели — перезапуск, а не "already_loaded".
+    manager = get_residency_manager()
+    manager.discard("llama", Path(model_path).name)
+    return await manager.ensure_loaded("llama", Path(model_path).name, _spawn)
 
 
 @router.post("/stop")
 @api_response_handler
 async def llama_stop() -> dict:
     """Остановить llama.cpp сервер."""
-    global _server_process
+    global _server_process, _server_model
+    if _server_model:
+        get_residency_manager().discard("llama", _server_model)
+        _server_model = None
     if not _server_process or _server_process.poll() is not None:
         return {"success": True, "message": "Сервер не запущен"}
     try:
@@ -321,6 +357,16 @@ async def llama_stop() -> dict:
         return {"success": True, "message": f"Сервер принудительно остановлен: {e}"}
 
 
+async def _evict_server(model_name: str) -> dict:
+    """Остановить управляемый сервер, когда его модель вытеснена из памяти."""
+    if model_name != _server_model:
+        return {"success": True, "message": "Сервер с этой моделью не запущен"}
+    return await llama_stop()
+
+
+register_unloader("llama", _evict_server)
+
+
 # ── llama-server native API proxy endpoints ──────────────────────────────────
 
 @router.get("/props")
@@ -335,7 +381,7 @@ async def llama_props(model: str | None = None) -> dict:
     """
     url = _get_server_url_for_model(model)
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.get(f"{url}/props", timeout=aiohttp.ClientTimeout(total=5)) as r:
                 if r.status == 200:
                     return {"success": True, "props": await r.json()}
@@ -346,18 +392,22 @@ async def llama_props(model: str | None = None) -> dict:
 
 @router.get("/slots")
 @api_response_handler
-async def llama_slots(model: str | None = None) -> dict:
+async def llama_slots(model: str | None = None, replica: int | None = None) -> dict:
     """Активные слоты инференса llama-server.
 
     Проксирует GET /slots нативного llama-server API.
     Показывает параллельные запросы в обработке.
 
+    Args:
+        model: Алиас / путь модели.
+        replica: Номер реплики в группе модели (по умолчанию первая).
+
     Returns:
         dict: success, slots (list)
     """
-    url = _get_server_url_for_model(model)
+    url = _get_server_url_for_model(model, replica)
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.get(f"{url}/slots", timeout=aiohttp.ClientTimeout(total=5)) as r:
                 if r.status == 200:
                     return {"success": True, "slots": await r.json()}
@@ -367,18 +417,22 @@ async def llama_slots(model: str | None = None) -> dict:
 
 
 @router.get("/metrics")
-async def llama_metrics(model: str | None = None) -> PlainTextResponse:
+async def llama_metrics(model: str | None = None, replica: int | None = None) -> PlainTextResponse:
     """Prometheus-метрики llama-server: токены/сек, TTFT, очередь.
 
     Проксирует GET /metrics нативного llama-server API.
     Возвращает text/plain в формате Prometheus.
 
+    Args:
+        model: Алиас / путь модели.
+        replica: Номер реплики в группе модели (по умолчанию первая).
+
     Returns:
         Response: text/plain Prometheus metrics или JSON с ошибкой.
     """
-    url = _get_server_url_for_model(model)
+    url = _get_server_url_for_model(model, replica)
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.get(f"{url}/metrics", timeout=aiohttp.ClientTimeout(total=5)) as r:
                 if r.status == 200:
                     text = await r.text()
@@ -388,6 +442,30 @@ async def llama_metrics(model: str | None = None) -> PlainTextResponse:
         return PlainTextResponse(content=f"# Error: {e}\n", status_code=503)
 
 
+@router.get("/replicas")
+@api_response_handler
+async def llama_replicas(model: str | None = None) -> dict:
+    """Реплики моделей llama.cpp: нагрузка, слоты, здоровье, исключения.
+
+    Args:
+        model: Если указан — сначала опросить реплики этой модели
+               (/health, /slots, /metrics), иначе показать последние данные.
+
+    Returns:
+        dict: success, strategy, probe_interval_seconds, eject_seconds, retries,
+              sticky_sessions, groups — {alias: [{url, outstanding, requests,
+              failures, healthy, ejected_seconds, slots_total, slots_busy,
+              deferred, probe_age_seconds, last_error}]}.
+    """
+    from ...models.llama_balancer import get_llama_balancer
+    from ...models.llama_registry import resolve_llama_group
+
+    balancer = get_llama_balancer()
+    if model:
+        await balancer.refresh(resolve_llama_group(model))
+    return {"success": True, **balancer.stats()}
+
+
 @router.post("/completion")
 @api_response_handler
 async def llama_completion(request: dict) -> dict:
@@ -415,7 +493,7 @@ async def llama_completion(request: dict) -> dict:
     if not request.get("prompt"):
         return {"success": False, "error": "prompt is required"}
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.post(
                 f"{url}/completion",
                 json=request,
@@ -446,7 +524,7 @@ async def llama_tokenize(request: dict) -> dict:
     if not request.get("content"):
         return {"success": False, "error": "content is required"}
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.post(
                 f"{url}/tokenize",
                 json=request,
@@ -477,7 +555,7 @@ async def llama_detokenize(request: dict) -> dict:
     if not request.get("tokens"):
         return {"success": False, "error": "tokens is required"}
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.post(
                 f"{url}/detokenize",
                 json=request,
@@ -506,7 +584,7 @@ async def llama_v1_completions(request: dict) -> dict:
     """
     url = _get_server_url_for_model(request.get("model"))
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.post(
                 f"{url}/v1/completions",
                 json=request,
@@ -536,7 +614,7 @@ async def llama_v1_embeddings(request: dict) -> dict:
     if not request.get("input"):
         return {"success": False, "error": "input is required"}
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.post(
                 f"{url}/v1/embeddings",
                 json=request,
@@ -568,7 +646,7 @@ async def llama_v1_chat_completions(request: dict) -> dict:
     if not request.get("messages"):
         return {"success": False, "error": "messages is required"}
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.post(
                 f"{url}/v1/chat/completions",
                 json=request,
@@ -594,7 +672,7 @@ async def llama_v1_models(model: str | None = None) -> dict:
     """
     url = _get_server_url_for_model(model)
     try:
-        async with aiohttp.ClientSession() as s:
+        async with pooled_session("llama") as s:
             async with s.get(f"{url}/v1/models", timeout=aiohttp.ClientTimeout(total=5)) as r:
                 if r.status == 200:
                     data = await r.json()
@@ -172,11 +172,8 @@ async def load_model(model_id: str) -> dict:
         return {**result, "provider": "foundry", "model_id": model_id}
 
     if prefix == "hf":
-        import asyncio
         from ...models.hf_client import hf_client
-        result = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: hf_client.load_model(clean_id, "auto")
-        )
+        result = await hf_client.ensure_loaded(clean_id, "auto")
         return {**result, "provider": "huggingface", "model_id": model_id}
 
     if prefix == "llama":
@@ -4,6 +4,7 @@
 # =============================================================================
 # Description:
 #   GET /v1/models              — all local models in OpenAI format
+#   POST /v1/chat/completions   — chat completions (stream=true streams tokens)
 #
 #   Aggregates data from:
 #     - Foundry Local  (cached on disk)  → prefix foundry::
@@ -20,6 +21,13 @@
 # File: openai_models.py
 # Project: AI Assistant (ai_assist)
 # Version: 0.8.0
+# Changes in 0.8.0:
+#   - /v1/chat/completions with stream=true forwards backend tokens as they are
+#     generated (router.route_generate_stream) instead of one final chunk
+#   - Streaming is pull-based (backpressure); client disconnect closes the
+#     upstream generation; stream_options.include_usage adds a usage chunk
+#   - Cache-Control request header is passed to the router's response cache
+#   - Admission rejection of a stream (no slot) is answered 429 / 503 + Retry-After
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -28,11 +36,13 @@ import logging
 import time
 import asyncio
 import json
-from typing import List, Dict, Any
-from fastapi import APIRouter, HTTPException
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
-from ...models.router import route_generate
+from ...models.router import route_generate, route_generate_stream
+from ...utils.api_utils import ServiceOverloadedError
+from ...utils.text_utils import count_tokens_approx
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -254,13 +264,105 @@ async def get_openai_models() -> Dict[str, Any]:
         return {"data": [], "total": 0}
 
 
+def _usage(usage: Dict[str, Any], prompt: str, text: str) -> Dict[str, int]:
+    """OpenAI usage block from backend usage; missing counts are estimated."""
+    prompt_tokens = usage.get("prompt_tokens") or usage.get("input_tokens") or count_tokens_approx(prompt)
+    completion_tokens = (
+        usage.get("completion_tokens")
+        or usage.get("total_output_tokens")
+        or usage.get("output_tokens")
+        or (count_tokens_approx(text) if text else 0)
+    )
+    return {
+        "prompt_tokens": int(prompt_tokens),
+        "completion_tokens": int(completion_tokens),
+        "total_tokens": int(prompt_tokens) + int(completion_tokens),
+    }
+
+
+async def _stream_chat_completion(
+    http_request: Request,
+    stream: AsyncIterator[Dict[str, Any]],
+    first: Dict[str, Any],
+    completion_id: str,
+    created: int,
+    model: str,
+    prompt: str,
+    include_usage: bool,
+) -> AsyncIterator[str]:
+    """Relay router chunks as OpenAI ``chat.completion.chunk`` SSE events.
+
+    Backpressure: the next backend chunk is pulled only after the previous event
+    was handed to the server's send(), so generation never runs ahead of a slow
+    client. Cancellation: on client disconnect (or when the response task is
+    cancelled) the router stream is closed, which aborts the upstream request.
+
+    Args:
+        http_request: Incoming request (disconnect detection).
+        stream: route_generate_stream() iterator.
+        first: Chunk already read from stream (used to fail fast with 502).
+        completion_id: ``id`` of every chunk.
+        created: ``created`` timestamp of every chunk.
+        model: Model name reported to the client.
+        prompt: Prompt text (usage estimate when the backend reports none).
+        include_usage: Emit the final usage chunk (``stream_options.include_usage``).
+
+    Returns:
+        AsyncIterator[str]: SSE lines ending with ``data: [DONE]``.
+    """
+    def _event(choices: List[Dict[str, Any]], usage: Any = None) -> str:
+        body: Dict[str, Any] = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": choices,
+        }
+        if include_usage:
+            body["usage"] = usage
+        return f"data: {json.dumps(body, ensure_ascii=False)}\n\n"
+
+    def _delta(delta: Dict[str, Any], finish_reason: Any = None) -> str:
+        return _event([{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+    text = ""
+    try:
+        yield _delta({"role": "assistant", "content": ""})
+        chunk: Optional[Dict[str, Any]] = first
+        while True:
+            if chunk is None:
+                chunk = {"success": True, "finished": True}
+            if not chunk.get("success"):
+                logger.error("Chat completion stream failed: %s", chunk.get("error"))
+                error = {"error": {"message": chunk.get("error", "generation failed"), "type": "server_error"}}
+                yield f"data: {json.dumps(error, ensure_ascii=False)}\n\n"
+                return
+            if chunk.get("finished"):
+                yield _delta({}, "stop")
+                if include_usage:
+                    yield _event([], _usage(chunk.get("usage") or {}, prompt, text))
+                break
+            if chunk.get("content"):
+                text += chunk["content"]
+                yield _delta({"content": chunk["content"]})
+            if await http_request.is_disconnected():
+                logger.info("Chat completion client disconnected — stopping generation")
+                return
+            chunk = await anext(stream, None)
+        yield "data: [DONE]\n\n"
+    finally:
+        await stream.aclose()
+
+
 @router.post("/v1/chat/completions")
-async def create_chat_completion(request: Dict[str, Any]) -> Any:
+async def create_chat_completion(request: Dict[str, Any], http_request: Request) -> Any:
     """OpenAI-compatible chat completions endpoint for external tools.
 
     This is intentionally small and routes through the existing backend router,
     so OpenCode and other OpenAI-compatible clients can use FastAPI Foundry as
-    their single local provider.
+    their single local provider. With ``stream: true`` tokens are forwarded as
+    ``chat.completion.chunk`` events while the backend generates them;
+    ``stream_options.include_usage`` adds a final usage chunk.
     """
     messages = request.get("messages") or []
     if not isinstance(messages, list) or not messages:
@@ -287,47 +389,47 @@ async def create_chat_completion(request: Dict[str, Any]) -> Any:
     model = request.get("model")
     internal_model = map_from_openai_id(model) if isinstance(model, str) and model else None
 
+    temperature = request.get("temperature", 0.7)
+    max_tokens = request.get("max_tokens", request.get("max_completion_tokens", 2048))
+    now = int(time.time())
+
+    if request.get("stream"):
+        stream = route_generate_stream(
+            prompt=prompt, model=internal_model, temperature=temperature, max_tokens=max_tokens,
+            cache_control=http_request.headers.get("cache-control"),
+        )
+        first = await anext(stream)
+        if not first.get("success"):
+            # Nothing sent yet: report the failure as a normal HTTP error
+            await stream.aclose()
+            if first.get("error_code") == "overloaded":
+                raise ServiceOverloadedError(first["error"], first["retry_after"], first["status_code"])
+            raise HTTPException(status_code=502, detail=first.get("error", "generation failed"))
+        include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+        return StreamingResponse(
+            _stream_chat_completion(
+                http_request, stream, first,
+                completion_id=f"chatcmpl-{now}", created=now,
+                model=model or first.get("model") or "default",
+                prompt=prompt, include_usage=include_usage,
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     result = await route_generate(
         prompt=prompt,
         model=internal_model,
-        temperature=request.get("temperature", 0.7),
-        max_tokens=request.get("max_tokens", request.get("max_completion_tokens", 2048)),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        cache_control=http_request.headers.get("cache-control"),
     )
     if not result.get("success"):
         raise HTTPException(status_code=502, detail=result.get("error", "generation failed"))
 
     response_model = model or result.get("model") or "default"
-    now = int(time.time())
     content = result.get("content", "")
 
-    if request.get("stream"):
-        async def stream_response():
-            chunk = {
-                "id": f"chatcmpl-{now}",
-                "object": "chat.completion.chunk",
-                "created": now,
-                "model": response_model,
-                "choices": [
-                    {
-                        "index": 0,
-                        "delta": {"role": "assistant", "content": content},
-                        "finish_reason": None,
-                    }
-                ],
-            }
-            final_chunk = {
-                "id": f"chatcmpl-{now}",
-                "object": "chat.completion.chunk",
-                "created": now,
-                "model": response_model,
-                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
-            }
-            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
-            yield f"data: {json.dumps(final_chunk, ensure_ascii=False)}\n\n"
-            yield "data: [DONE]\n\n"
-
-        return StreamingResponse(stream_response(), media_type="text/event-stream")
-
     return {
         "id": f"chatcmpl-{now}",
         "object": "chat.completion",
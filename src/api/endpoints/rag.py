@@ -14,7 +14,26 @@
 # Project: Ai Assistant (Docker)
 # Package: FastApiFoundrychrome 
 # Module: api.endpoints.rag
-# Version: 0.6.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - GET /rag/cache/stats and POST /rag/cache/clear for the RAG search cache
+#   - POST /rag/query: answers keyed by the retrieved-context hash in the response
+#     cache; Cache-Control: no-cache bypasses it
+#   - GET /rag/cache/stats also reports query-embedding cache and batching counters
+#   - GET /rag/retrieval/stats: retrieval pool utilisation and per-stage latency
+#   - Incremental document endpoints invalidate only the active profile cache
+#   - POST /rag/build accepts index_type (flat, ivf_flat, ivf_pq, hnsw) and ANN params;
+#     meta.json is merged instead of overwritten so the recorded index type survives
+#   - Deactivation drops the chunk store instead of the in-memory chunk list
+#   - POST /rag/search honours profile (single profile) and profiles (fan-out merged by score)
+#     through the resident profile pool; GET /rag/pool/stats, POST /rag/pool/evict
+#   - Rebuilt and deleted profiles are evicted from the pool
+#   - Document add/update/delete, reindex and compact no longer reload faiss.index:
+#     the profile shares the indexer's in-memory index, only its cache is reset
+#   - POST /rag/compact?background=true starts compaction in a background thread
+#   - POST /rag/index/batch uses BulkIngestor (process-pool extraction, one embedding
+#     pass, one transaction, one FAISS write); POST /rag/index/bulk streams its stages over SSE
+#   - DELETE /rag/profiles/{name} closes the pooled documents.db connections first
 # Changes in 0.6.1:
 #   - Updated version to match project
 # Author: hypo69
@@ -29,7 +48,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, Query
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import faiss
@@ -62,6 +81,8 @@ class RAGSearchRequest(BaseModel):
     query: str
     top_k: Optional[int] = 5
     min_score: float = 0.0
+    profile: Optional[str] = None
+    profiles: List[str] = Field(default_factory=list)
 
 
 class RAGQueryFilterRequest(BaseModel):
@@ -80,6 +101,7 @@ class RAGQueryRequest(BaseModel):
     max_tokens: Optional[int] = None
     system_prompt: str = ""
     stream: bool = False
+    profile: Optional[str] = None
 
 
 class RAGBuildRequest(BaseModel):
@@ -89,6 +111,12 @@ class RAGBuildRequest(BaseModel):
     chunk_size: int = 1000
     overlap: int = 50
     force: bool = False
+    index_type: Optional[str] = None
+    nlist: Optional[int] = None
+    pq_m: Optional[int] = None
+    hnsw_m: Optional[int] = None
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
 
 
 class ExtractURLRequest(BaseModel):
@@ -135,6 +163,85 @@ async def get_rag_status() -> dict:
     }
 
 
+@router.get("/cache/stats")
+@api_response_handler
+async def get_rag_cache_stats() -> dict:
+    """Статистика кэша поиска RAG.
+
+    Returns:
+        dict: hits, misses, hit_rate, evictions, expirations, entries, bytes и лимиты;
+            embeddings — счетчики кэша векторов запросов и пакетирования.
+
+    Example:
+        >>> stats = await get_rag_cache_stats()
+        >>> stats['hit_rate']
+        0.42
+    """
+    return {
+        "success": True,
+        **rag_system.search_cache.stats(),
+        "embeddings": rag_system._embedder().stats(),
+    }
+
+
+@router.get("/retrieval/stats")
+@api_response_handler
+async def get_rag_retrieval_stats() -> dict:
+    """Загрузка пула поиска RAG и задержки по этапам (encode, ann, metadata, total).
+
+    Returns:
+        dict: threads, queue_depth, active, queued, rejected, stages.
+    """
+    from ...rag.retrieval_executor import get_retrieval_executor
+    return {"success": True, **get_retrieval_executor().stats()}
+
+
+@router.get("/pool/stats")
+@api_response_handler
+async def get_rag_pool_stats() -> dict:
+    """Резидентные профили RAG: тип индекса, размер, число поисков, простой.
+
+    Returns:
+        dict: max_profiles, max_memory_mb, memory_mb, hits, loads, evictions, profiles.
+    """
+    return {"success": True, **rag_system.pool.stats()}
+
+
+@router.post("/pool/evict")
+@api_response_handler
+async def evict_rag_profile(profile: str = Query(...)) -> dict:
+    """Выгрузка профиля из пула (активный профиль не выгружается).
+
+    Args:
+        profile (str): Имя профиля.
+
+    Returns:
+        dict: evicted — был ли профиль резидентным.
+    """
+    evicted = rag_system.evict_profile(str(_profile_index_dir(sanitize_for_filesystem(profile))))
+    return {"success": True, "evicted": evicted, "profile": profile}
+
+
+@router.post("/cache/clear")
+@api_response_handler
+async def clear_rag_cache(profile: Optional[str] = Query(None)) -> dict:
+    """Сброс кэша поиска RAG.
+
+    Args:
+        profile (str, optional): Имя профиля. Если не задано — сбрасывается весь кэш.
+
+    Returns:
+        dict: Количество удаленных записей (для профиля).
+    """
+    if not profile:
+        rag_system.search_cache.clear()
+        rag_system._embedder().clear_cache()
+        return {"success": True, "message": "RAG search cache cleared"}
+
+    removed = rag_system.invalidate_cache(str(_profile_index_dir(sanitize_for_filesystem(profile))))
+    return {"success": True, "removed": removed, "profile": profile}
+
+
 @router.put("/config")
 @api_response_handler
 async def update_rag_config(config: RAGConfig) -> dict:
@@ -164,8 +271,11 @@ async def update_rag_config(config: RAGConfig) -> dict:
 async def search_rag(request: RAGSearchRequest) -> dict:
     """Выполнение поиска в системе RAG.
 
+    Профиль выбирается явно: profile — поиск в одном профиле, profiles — поиск
+    по нескольким профилям с объединением по score; без них — активный профиль.
+
     Args:
-        request (RAGSearchRequest): Запрос с текстом и параметром top_k.
+        request (RAGSearchRequest): Запрос с текстом, top_k и профилем(ями).
 
     Returns:
         dict: Список результатов с контентом и оценками схожести.
@@ -178,22 +288,21 @@ async def search_rag(request: RAGSearchRequest) -> dict:
     results: List[Dict[str, Any]] = []
     top_k: int = request.top_k or 5
 
-    # Выполнение поиска через ядро системы
-    # Execution of the search through the system core
-    results = await rag_system.search(request.query, top_k=top_k)
-
-    # Фильтрация результатов по порогу схожести
-    # Filtration of results by the similarity threshold
-    if request.min_score > 0:
-        # ПОЧЕМУ ВЫБРАН ЭТОТ МЕТОД:
-        #   Использование централизованной логики фильтрации из RAGSystem гарантирует 
-        #   одинаковое поведение API и внутренних модулей генерации.
-        results = rag_system.filter_by_score(results, request.min_score)
+    # Выполнение поиска через ядро системы; порог схожести входит в ключ кэша
+    # Execution of the search through the system core; min_score is part of the cache key
+    filters: Dict[str, Any] = {"min_score": request.min_score} if request.min_score > 0 else {}
+    try:
+        if request.profiles:
+            results = await rag_system.search_profiles(request.query, request.profiles, top_k=top_k, filters=filters)
+        else:
+            results = await rag_system.search(request.query, top_k=top_k, filters=filters, profile=request.profile)
+    except FileNotFoundError as e:
+        return {"success": False, "error": str(e)}
 
     return {"success": True, "results": results[: request.top_k], "total": len(results)}
 
 
-def _to_service_query(request: RAGQueryRequest) -> ServiceRAGQueryRequest:
+def _to_service_query(request: RAGQueryRequest, cache_control: Optional[str] = None) -> ServiceRAGQueryRequest:
     """Convert API request model to service request dataclass."""
     return ServiceRAGQueryRequest(
         query=request.query,
@@ -209,16 +318,21 @@ def _to_service_query(request: RAGQueryRequest) -> ServiceRAGQueryRequest:
         max_tokens=request.max_tokens,
         system_prompt=request.system_prompt,
         stream=request.stream,
+        profile=request.profile,
+        cache_control=cache_control,
     )
 
 
 @router.post("/query")
-async def query_rag(request: RAGQueryRequest):
-    """Run retrieval + prompt + generation with optional SSE streaming."""
+async def query_rag(request: RAGQueryRequest, http_request: Request):
+    """Run retrieval + prompt + generation with optional SSE streaming.
+
+    ``Cache-Control: no-cache`` bypasses the response cache.
+    """
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="query is required")
 
-    service_request = _to_service_query(request)
+    service_request = _to_service_query(request, http_request.headers.get("cache-control"))
     if request.stream:
         async def _events():
             async for event in rag_service.stream_query(service_request):
@@ -226,7 +340,10 @@ async def query_rag(request: RAGQueryRequest):
 
         return StreamingResponse(_events(), media_type="text/event-stream")
 
-    return await rag_service.query(service_request)
+    try:
+        return await rag_service.query(service_request)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 
 @router.post("/rebuild")
@@ -309,12 +426,16 @@ async def index_stream(file: UploadFile = File(...)) -> StreamingResponse:
 async def index_batch(files: List[UploadFile] = File(...)) -> dict:
     """Пакетная индексация нескольких файлов или архивов за один запрос.
 
+    Извлечение текста выполняется параллельно в пуле процессов, эмбеддинги —
+    одним проходом крупными пакетами, запись в SQLite — одной транзакцией,
+    faiss.index записывается один раз (BulkIngestor).
+
     Args:
         files (List[UploadFile]): Список файлов. Поддерживаются все форматы
             включая zip, tar, tar.gz, tgz, 7z, rar.
 
     Returns:
-        dict: success, indexed, total, results, errors.
+        dict: success, indexed, total, chunks, results, errors.
 
     Example:
         POST /api/v1/rag/index/batch
@@ -324,35 +445,47 @@ async def index_batch(files: List[UploadFile] = File(...)) -> dict:
     if not files:
         raise HTTPException(status_code=400, detail="Необходимо предоставить хотя бы один файл")
 
-    pipeline = get_pipeline()
-    results: List[dict] = []
-    errors: List[dict] = []
-
-    for upload in files:
-        try:
-            result = await pipeline.ingest_upload(upload)
-            if result.get("success") and result.get("length"):
-                results.append({
-                    "file": upload.filename,
-                    "length": result["length"],
-                    "method": result.get("method"),
-                })
-            else:
-                errors.append({"file": upload.filename, "error": result.get("error", "No text extracted")})
-        except HTTPException as e:
-            errors.append({"file": upload.filename, "error": e.detail})
-        except Exception as e:
-            logger.error(f"Ошибка индексации {upload.filename}: {e}", exc_info=True)
-            errors.append({"file": upload.filename, "error": str(e)})
+    from ...rag.bulk_ingest import BulkIngestor
 
+    final = await BulkIngestor().ingest(files)
     return {
-        "success": len(results) > 0,
-        "indexed": len(results),
+        "success": final["stage"] == "done" and final.get("indexed", 0) > 0,
+        "indexed": final.get("indexed", 0),
         "total": len(files),
-        "results": results,
-        "errors": errors,
+        "chunks": final.get("chunks", 0),
+        "results": final.get("results", []),
+        "errors": final.get("failed", []) + ([{"error": final["message"]}] if final["stage"] == "error" else []),
     }
 
+
+@router.post("/index/bulk")
+async def index_bulk(files: List[UploadFile] = File(...)) -> StreamingResponse:
+    """Пакетная индексация с SSE-прогрессом по этапам.
+
+    Этапы: upload → extract (done/total по файлам) → chunk → embed → store → index → done.
+    Формат событий совпадает с /index/stream; финальное событие done содержит
+    results (по файлам) и failed.
+
+    Args:
+        files (List[UploadFile]): Файлы и архивы.
+
+    Returns:
+        StreamingResponse: text/event-stream с JSON-событиями.
+    """
+    import json as _json
+
+    from ...rag.bulk_ingest import BulkIngestor
+
+    if not files:
+        raise HTTPException(status_code=400, detail="Необходимо предоставить хотя бы один файл")
+
+    async def _events():
+        async for event in BulkIngestor().ingest_stream(files):
+            yield f"data: {_json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.post("/clear")
 @api_response_handler
 async def clear_rag_chunks() -> dict:
@@ -533,10 +666,8 @@ async def deactivate_rag_profiles() -> dict:
     cfg.setdefault("rag_system", {})["enabled"] = False
     config_path.write_text(json.dumps(cfg, ensure_ascii=False, indent=2), encoding="utf-8")
     app_config.reload_config()
-    rag_system.index = None
-    rag_system.chunks = []
-    rag_system.current_index_dir = None
-    rag_system._search_cache = {}
+    rag_system.deactivate()
+    rag_system.search_cache.clear()
     return {"success": True, "message": "RAG disabled"}
 
 
@@ -555,6 +686,10 @@ async def delete_rag_profile(name: str) -> dict:
     profile_dir = _profile_index_dir(sanitize_for_filesystem(name))
     if not profile_dir.exists():
         return {"success": False, "error": f"Profile '{name}' not found"}
+    rag_system.evict_profile(str(profile_dir))
+    # Pooled SQLite connections keep documents.db open (and locked on Windows)
+    from src.rag.document_store import close_store
+    close_store(str(profile_dir))
     shutil.rmtree(profile_dir, ignore_errors=True)
     return {"success": True, "message": f"Profile '{name}' deleted"}
 
@@ -586,9 +721,21 @@ async def build_rag_index(request: RAGBuildRequest) -> dict:
 
     try:
         from ...rag.indexer import RAGIndexer
+        from ...rag.ann_index import resolve_index_params
     except ImportError as e:
         return {"success": False, "error": f"RAG indexer not available: {e}"}
 
+    try:
+        index_params = resolve_index_params(
+            output_dir,
+            index_type=request.index_type, nlist=request.nlist, pq_m=request.pq_m,
+            hnsw_m=request.hnsw_m, nprobe=request.nprobe, ef_search=request.ef_search,
+        )
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    # Explicitly requested type forces a rebuild even when documents did not change
+    type_requested = request.index_type is not None
+
     try:
         loop = asyncio.get_event_loop()
 
@@ -617,7 +764,7 @@ async def build_rag_index(request: RAGBuildRequest) -> dict:
 
             # Only rebuild if files changed, force is true, or index missing
             rebuilt = False
-            if indexer.has_changes or request.force or not index_exists:
+            if indexer.has_changes or request.force or not index_exists or type_requested:
                 # Attempt to load existing index to reuse vectors for unchanged chunks
                 existing_index = None
                 if index_exists and not request.force:
@@ -627,14 +774,23 @@ async def build_rag_index(request: RAGBuildRequest) -> dict:
                         pass
                 
                 indexer.create_embeddings(existing_index=existing_index)
-                indexer.save_index(output_dir)
+                indexer.save_index(output_dir, index_params=index_params)
                 rebuilt = True
             
             return len(indexer.chunks), rebuilt
 
         chunks_count, was_rebuilt = await loop.run_in_executor(None, _run)
+        if was_rebuilt:
+            rag_system.evict_profile(str(output_dir))
 
-        meta = {
+        meta_file = output_dir / "meta.json"
+        meta: Dict[str, Any] = {}
+        if meta_file.exists():
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8"))
+            except Exception:
+                meta = {}
+        meta.update({
             "name": docs_dir.name, 
             "safe_name": safe_name, 
             "source_dir": str(docs_dir), 
@@ -642,8 +798,8 @@ async def build_rag_index(request: RAGBuildRequest) -> dict:
             "chunks": chunks_count, 
             "model": request.model, 
             "updated_at": datetime.now().isoformat()
-        }
-        (output_dir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        })
+        meta_file.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
         readme_path = output_dir / "README.md"
         if not readme_path.exists():
             readme_path.write_text(
@@ -776,8 +932,8 @@ def _get_indexer():
 
 
 async def _reload_active_rag_index() -> None:
-    """Reload the active FAISS index after an incremental write."""
-    await rag_system.reload_index(str(Path(app_config.rag_index_dir).expanduser()))
+    """Refresh the incremental profile after a write (shared index: cache reset only)."""
+    await rag_system.refresh_profile(str(Path(app_config.rag_index_dir).expanduser()))
 
 
 @router.get("/documents")
@@ -817,7 +973,6 @@ async def add_document(request: DocumentAddRequest) -> dict:
         lambda: _get_indexer().add_document(request.title, request.content, request.source_path),
     )
     if result["success"]:
-        rag_system._search_cache = {}
         await _reload_active_rag_index()
     return result
 
@@ -857,7 +1012,6 @@ async def update_document(doc_id: int, request: DocumentUpdateRequest) -> dict:
         lambda: _get_indexer().update_document(doc_id, request.title, request.content),
     )
     if result.get("success") and result.get("changed"):
-        rag_system._search_cache = {}
         await _reload_active_rag_index()
     return result
 
@@ -876,7 +1030,6 @@ async def delete_document(doc_id: int) -> dict:
     loop = asyncio.get_event_loop()
     result = await loop.run_in_executor(None, lambda: _get_indexer().delete_document(doc_id))
     if result.get("success"):
-        rag_system._search_cache = {}
         await _reload_active_rag_index()
     return result
 
@@ -902,7 +1055,7 @@ async def reindex_document(doc_id: int) -> dict:
         None,
         lambda: indexer.update_document(doc_id, doc["title"], doc["content"]),
     )
-    rag_system._search_cache = {}
+    rag_system.invalidate_cache(app_config.rag_index_dir)
     if result.get("success"):
         await _reload_active_rag_index()
     return result
@@ -910,15 +1063,24 @@ async def reindex_document(doc_id: int) -> dict:
 
 @router.post("/compact")
 @api_response_handler
-async def compact_index() -> dict:
+async def compact_index(background: bool = False) -> dict:
     """Перестроить FAISS индекс из активных чанков (удалить мёртвые векторы).
 
+    Векторы копируются из SQLite без повторного кодирования; запись документов
+    и поиск во время сборки не блокируются.
+
+    Args:
+        background (bool): Запустить в фоне и сразу вернуть ответ.
+
     Returns:
-        dict: success, vectors_before, vectors_after.
+        dict: success, vectors_before, vectors_after (или started при background=true).
     """
+    if background:
+        return {"success": True, "started": _get_indexer().start_compaction()}
+
     loop = asyncio.get_event_loop()
     result = await loop.run_in_executor(None, lambda: _get_indexer().compact())
-    rag_system._search_cache = {}
+    rag_system.invalidate_cache(app_config.rag_index_dir)
     if result.get("success"):
         await _reload_active_rag_index()
     return result
@@ -931,7 +1093,9 @@ async def migrate_to_index_id_map() -> dict:
     loop = asyncio.get_event_loop()
     result = await loop.run_in_executor(None, lambda: get_pipeline().migrate_to_index_id_map())
     if result.get("success"):
-        await _reload_active_rag_index()
+        # Тип индекса изменился — полная перезагрузка профиля
+        # The index type changed — full profile reload
+        await rag_system.reload_index(str(Path(app_config.rag_index_dir).expanduser()))
     return result
 
 
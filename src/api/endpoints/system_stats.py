@@ -6,10 +6,23 @@
 #   Returns RAM, CPU, disk and GPU usage.
 #   Uses psutil for RAM/CPU/disk; pynvml for NVIDIA GPU (optional).
 #   Also reports per-process stats for the current Python process.
+#   GET /system/http-pool — utilisation of the shared backend HTTP pool.
+#   GET /system/models    — resident models (LRU order), limits and evictions.
+#   GET /system/response-cache, POST /system/response-cache/clear — model response cache.
+#   GET /system/context-window — tokenizer cache, context windows, chat trimming.
+#   GET /system/admission — generation slots, priority queues, queue wait time.
+#   GET /system/chat-sessions — hot chat session LRU in front of ChatDB.
 #
 # File: src/api/endpoints/system_stats.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - GET /system/http-pool: per-backend connection pool utilisation
+#   - GET /system/models: model residency (LRU / TTL / RAM limits)
+#   - GET /system/response-cache, POST /system/response-cache/clear
+#   - GET /system/context-window
+#   - GET /system/admission
+#   - GET /system/chat-sessions
 # Changes in 0.6.1:
 #   - Added ram_available_mb, ram_pct
 #   - Added disk_used_gb, disk_total_gb, disk_pct
@@ -23,6 +36,14 @@ import os
 import logging
 from fastapi import APIRouter
 
+from ...db.session_store import get_session_store
+from ...models.admission import get_admission
+from ...models.residency import get_residency_manager
+from ...models.chat_context import get_chat_context
+from ...models.context_window import get_context_window
+from ...models.response_cache import get_response_cache
+from ...utils.http_pool import http_pool
+
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/system", tags=["system"])
 
@@ -131,3 +152,99 @@ async def system_stats() -> dict:
         # GPU
         "gpus":             _gpu_stats(),
     }
+
+
+@router.get("/http-pool")
+async def http_pool_stats() -> dict:
+    """Utilisation of the shared HTTP connection pool, per backend.
+
+    Returns:
+        dict: success, backends — {name: {limit, limit_per_host, active_connections,
+              idle_connections, utilization, requests, in_flight, errors,
+              connections_created, connections_reused, queued,
+              queue_wait_ms_total, queue_wait_ms_max}}.
+    """
+    return {"success": True, **http_pool.stats()}
+
+
+@router.get("/models")
+async def resident_models() -> dict:
+    """Models held in memory across HF, llama.cpp and Foundry.
+
+    Returns:
+        dict: success, max_loaded_models, ttl_seconds, max_ram_percent, ram_percent,
+              loading, models — [{kind, model_id, in_use, uses, idle_seconds,
+              resident_seconds}] least recently used first, loads, load_failures,
+              deduplicated_loads, evictions_lru, evictions_ram, evictions_ttl,
+              unload_failures.
+    """
+    return {"success": True, **get_residency_manager().stats()}
+
+
+@router.get("/response-cache")
+async def response_cache_stats() -> dict:
+    """Model response cache: settings, tier sizes, hits and misses.
+
+    Returns:
+        dict: success, enabled, max_entries, ttl_seconds, max_temperature, db_path,
+              memory_entries, disk_entries, namespaces ({model: entries}), hit_rate,
+              memory_hits, disk_hits, misses, stores, expirations, evictions,
+              bypassed, disk_errors.
+    """
+    return {"success": True, **await get_response_cache().stats()}
+
+
+@router.post("/response-cache/clear")
+async def response_cache_clear(request: dict | None = None) -> dict:
+    """Drop cached responses of one model ({"namespace": "ollama::qwen2.5"}) or all.
+
+    Returns:
+        dict: success, removed (memory + disk entries).
+    """
+    namespace = (request or {}).get("namespace") or None
+    return {"success": True, "removed": await get_response_cache().invalidate(namespace)}
+
+
+@router.get("/context-window")
+async def context_window_stats(model: str | None = None) -> dict:
+    """Token counting and prompt budgets.
+
+    Args:
+        model: Optional model ("llama::qwen") whose context window is resolved.
+
+    Returns:
+        dict: success, tokenizer (cached_counts, tokenized, approximated, ...),
+              chat (max_tokens, trim_to, trims, dropped_messages, ...),
+              context_window (when model is given).
+    """
+    window = get_context_window()
+    result = {"success": True, "tokenizer": window.stats(), "chat": get_chat_context().stats()}
+    if model:
+        result["context_window"] = await window.context_window(model)
+    return result
+
+
+@router.get("/admission")
+async def admission_stats() -> dict:
+    """Generation admission control: limits, in-flight requests and queues.
+
+    Returns:
+        dict: success, enabled, backend_limits, model_limits, queue_depth,
+              max_queue_wait_seconds, inflight ({backend: n}), inflight_models,
+              waiting ({class: n}), service_seconds, queue_wait ({class: {count,
+              avg_ms, p50_ms, p95_ms, p99_ms, max_ms}}), admitted, queued,
+              rejected_queue_full, rejected_tier, timeouts.
+    """
+    return {"success": True, **get_admission().stats()}
+
+
+@router.get("/chat-sessions")
+async def chat_session_stats() -> dict:
+    """Hot chat sessions kept in this worker in front of ChatDB.
+
+    Returns:
+        dict: success, hot_sessions, max_hot, load_turns, hits, loads,
+              invalidations (stale copies reloaded after another worker wrote),
+              evictions, db_errors.
+    """
+    return {"success": True, **get_session_store().stats()}
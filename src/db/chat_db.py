@@ -9,15 +9,40 @@
 # File: src/db/chat_db.py
 # Project: AI Assistant (ai_assist)
 # Version: 0.8.0
+# Changes in 0.8.0:
+#   - get_message_count(): session write version for the session store
+#   - get_recent_messages(): last N messages of a session
+#   - Group-commit write path: save_message() queues the message; a writer
+#     task flushes all queued messages every chat_history.write_batch_ms in
+#     one transaction (executemany INSERT + session metadata upsert)
+#   - save_message() creates a missing session row (no session_exists /
+#     create_session round-trips before the first message)
+#   - close_chat_db(): flush queued messages and close on shutdown
+#   - create_session() / delete_session() write under the group-commit write
+#     lock (a batch commit never interleaves with them)
+#   - Indexes on chat_messages(session_id, timestamp), chat_messages(timestamp)
+#     and chat_sessions(updated_at, session_id)
+#   - FTS5 index chat_messages_fts (external content, kept by triggers;
+#     backfilled once for existing databases) and search_messages()
+#   - Keyset pagination: list_sessions_page(), get_messages_page(),
+#     get_messages_since(after_id=, limit=)
+#   - Retention primitives: select_expired_sessions(), select_oldest_sessions(),
+#     archive_sessions() (export + delete in one IMMEDIATE transaction),
+#     reclaim_space() (incremental VACUUM + wal_checkpoint(TRUNCATE)),
+#     size_bytes(); new databases use auto_vacuum=INCREMENTAL
+#   - reclaim_space() runs under the group-commit write lock
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # License: MIT
 # =============================================================================
 
+import asyncio
 import logging
+import os
 import time
+from collections import defaultdict
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 import aiosqlite
 
@@ -30,6 +55,7 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 _SQL_INIT = """
+PRAGMA auto_vacuum=INCREMENTAL;
 PRAGMA journal_mode=WAL;
 PRAGMA foreign_keys=ON;
 
@@ -53,6 +79,52 @@ CREATE TABLE IF NOT EXISTS chat_messages (
 );
 
 CREATE INDEX IF NOT EXISTS idx_messages_session_id ON chat_messages(session_id);
+CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON chat_messages(session_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp  ON chat_messages(timestamp);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated    ON chat_sessions(updated_at, session_id);
+"""
+
+# Full-text index over chat_messages.content (external content table: the
+# text is stored once, in chat_messages; triggers keep the index in sync,
+# including ON DELETE CASCADE from chat_sessions).
+_SQL_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+    content,
+    content='chat_messages',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+    INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+    INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF content ON chat_messages BEGIN
+    INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+    INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+# Group-commit statements: constant text, so sqlite3 reuses the prepared
+# statements from its per-connection cache on every flush.
+_SQL_UPSERT_SESSION = """
+INSERT INTO chat_sessions
+    (session_id, model, title, created_at, updated_at, message_count, aborted)
+VALUES (?, '', '', ?, ?, ?, 0)
+ON CONFLICT(session_id) DO UPDATE SET
+    message_count = message_count + excluded.message_count,
+    updated_at    = excluded.updated_at
+"""
+
+_SQL_INSERT_MESSAGE = """
+INSERT INTO chat_messages (session_id, role, content, timestamp)
+VALUES (?, ?, ?, ?)
 """
 
 
@@ -80,25 +152,41 @@ class ChatDB:
     All public methods are coroutines and must be awaited.  The underlying
     connection is created lazily on the first call to :meth:`initialize`.
 
+    Messages are written with group commit: :meth:`save_message` queues the
+    row and a writer task flushes everything queued within ``batch_delay_ms``
+    in a single transaction.  Reads flush the queue first, so a caller always
+    sees its own writes.
+
     Attributes:
         _db_path: Absolute path to the SQLite database file.
         _db: Active :class:`aiosqlite.Connection`, or ``None`` before
             :meth:`initialize` is called.
+        _pending: Queued ``(session_id, role, content, timestamp, future)``
+            rows not yet written.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, batch_delay_ms: float = 5.0, batch_max: int = 500) -> None:
         """Store the database path and prepare the connection slot.
 
         Args:
             db_path: Path to the SQLite file.  ``~`` is expanded to the
                 current user's home directory.  Use ``":memory:"`` for an
                 in-memory database (useful in tests).
+            batch_delay_ms: How long queued messages wait for more writers
+                before they are committed together.
+            batch_max: Queue length that triggers an immediate flush.
         """
         if db_path == ":memory:":
             self._db_path: str = db_path
         else:
             self._db_path = str(Path(db_path).expanduser())
         self._db: Optional[aiosqlite.Connection] = None
+        self._batch_delay = max(0.0, batch_delay_ms) / 1000
+        self._batch_max = max(1, batch_max)
+        self._pending: list[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self._fts = False
 
     # ------------------------------------------------------------------
     # Lifecycle
@@ -121,6 +209,7 @@ class ChatDB:
             self._db.row_factory = aiosqlite.Row
             await self._db.executescript(_SQL_INIT)
             await self._db.commit()
+            await self._init_fts()
             logger.debug("ChatDB initialised at %s", self._db_path)
         except Exception as exc:
             logger.error("ChatDB initialisation failed: %s", exc)
@@ -128,12 +217,41 @@ class ChatDB:
                 f"Cannot initialise database at '{self._db_path}': {exc}"
             ) from exc
 
+    async def _init_fts(self) -> None:
+        """Create the FTS5 index; backfill it once for an existing database.
+
+        Without FTS5 in the SQLite build, :meth:`search_messages` falls back
+        to a ``LIKE`` scan.
+        """
+        async with self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'chat_messages_fts'"
+        ) as cursor:
+            existed = await cursor.fetchone() is not None
+        try:
+            await self._db.executescript(_SQL_FTS)
+            if not existed:
+                await self._db.execute(
+                    "INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')"
+                )
+            await self._db.commit()
+            self._fts = True
+        except Exception as exc:
+            logger.warning("ChatDB: FTS5 unavailable, message search uses LIKE: %s", exc)
+
     async def close(self) -> None:
         """Close the underlying database connection.
 
-        Safe to call even if :meth:`initialize` was never called or the
-        connection is already closed.
+        Queued messages are flushed first.  Safe to call even if
+        :meth:`initialize` was never called or the connection is already
+        closed.
         """
+        if self._db is not None:
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.error("ChatDB: queued messages lost on close: %s", exc)
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
         if self._db is not None:
             try:
                 await self._db.close()
@@ -168,15 +286,18 @@ class ChatDB:
                 ``session_id`` already exists.
         """
         now = int(time.time())
-        await self._db.execute(
-            """
-            INSERT INTO chat_sessions
-                (session_id, model, title, created_at, updated_at, message_count, aborted)
-            VALUES (?, ?, ?, ?, ?, 0, 0)
-            """,
-            (session_id, model, title, now, now),
-        )
-        await self._db.commit()
+        # Under the write lock: a concurrent batch commit must not commit half of this write
+        async with self._write_lock:
+            await self._flush_locked()
+            await self._db.execute(
+                """
+                INSERT INTO chat_sessions
+                    (session_id, model, title, created_at, updated_at, message_count, aborted)
+                VALUES (?, ?, ?, ?, ?, 0, 0)
+                """,
+                (session_id, model, title, now, now),
+            )
+            await self._db.commit()
         return SessionRecord(
             session_id=session_id,
             model=model,
@@ -196,6 +317,7 @@ class ChatDB:
         Returns:
             ``True`` if the session exists, ``False`` otherwise.
         """
+        await self._drain()
         async with self._db.execute(
             "SELECT 1 FROM chat_sessions WHERE session_id = ?",
             (session_id,),
@@ -203,6 +325,26 @@ class ChatDB:
             row = await cursor.fetchone()
         return row is not None
 
+    async def get_message_count(self, session_id: str) -> Optional[int]:
+        """Return the ``message_count`` of a session (its write version).
+
+        Used by the session store to detect messages written by another
+        worker since the session was cached.
+
+        Args:
+            session_id: The UUID v4 string identifying the session.
+
+        Returns:
+            The message count, or ``None`` if the session does not exist.
+        """
+        await self._drain()
+        async with self._db.execute(
+            "SELECT message_count FROM chat_sessions WHERE session_id = ?",
+            (session_id,),
+        ) as cursor:
+            row = await cursor.fetchone()
+        return None if row is None else row[0]
+
     async def list_sessions(
         self,
         limit: int = 50,
@@ -210,6 +352,10 @@ class ChatDB:
     ) -> tuple[list[SessionRecord], int]:
         """Return a paginated list of sessions ordered by last update.
 
+        OFFSET pagination plus a full ``COUNT(*)``: the cost grows with the
+        page number and the table size.  Prefer :meth:`list_sessions_page`
+        for browsing.
+
         Args:
             limit: Maximum number of sessions to return.
             offset: Number of sessions to skip (for pagination).
@@ -220,6 +366,7 @@ class ChatDB:
             ``updated_at`` descending, and *total* is the total count of
             sessions in the database.
         """
+        await self._drain()
         async with self._db.execute(
             "SELECT COUNT(*) FROM chat_sessions"
         ) as cursor:
@@ -252,6 +399,68 @@ class ChatDB:
         ]
         return sessions, total
 
+    async def list_sessions_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[SessionRecord], Optional[str]]:
+        """Return one page of sessions, most recently updated first (keyset).
+
+        Seeks along ``idx_sessions_updated`` from the cursor, so every page
+        costs the same regardless of how deep the caller has browsed.
+
+        Args:
+            limit: Maximum number of sessions to return.
+            cursor: ``next_cursor`` of the previous page; ``None`` for the
+                first page.
+
+        Returns:
+            A tuple ``(sessions, next_cursor)``; *next_cursor* is ``None`` on
+            the last page.
+
+        Raises:
+            ValueError: If *cursor* is malformed.
+        """
+        await self._drain()
+        if cursor is None:
+            where, params = "", ()
+        else:
+            updated_at, _, session_id = cursor.partition(":")
+            if not session_id:
+                raise ValueError(f"Invalid session cursor: {cursor!r}")
+            where, params = "WHERE (updated_at, session_id) < (?, ?)", (int(updated_at), session_id)
+
+        async with self._db.execute(
+            f"""
+            SELECT session_id, model, title, created_at, updated_at,
+                   message_count, aborted
+            FROM chat_sessions
+            {where}
+            ORDER BY updated_at DESC, session_id DESC
+            LIMIT ?
+            """,
+            (*params, limit),
+        ) as cur:
+            rows = await cur.fetchall()
+
+        sessions = [
+            SessionRecord(
+                session_id=r["session_id"],
+                model=r["model"],
+                title=r["title"],
+                created_at=r["created_at"],
+                updated_at=r["updated_at"],
+                message_count=r["message_count"],
+                aborted=bool(r["aborted"]),
+            )
+            for r in rows
+        ]
+        next_cursor = None
+        if len(rows) == limit:
+            last = sessions[-1]
+            next_cursor = f"{last.updated_at}:{last.session_id}"
+        return sessions, next_cursor
+
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session and all its messages (cascade).
 
@@ -262,11 +471,14 @@ class ChatDB:
             ``True`` if the session was found and deleted, ``False`` if no
             session with the given ``session_id`` existed.
         """
-        cursor = await self._db.execute(
-            "DELETE FROM chat_sessions WHERE session_id = ?",
-            (session_id,),
-        )
-        await self._db.commit()
+        # Queued messages must not re-create the session after the delete
+        async with self._write_lock:
+            await self._flush_locked()
+            cursor = await self._db.execute(
+                "DELETE FROM chat_sessions WHERE session_id = ?",
+                (session_id,),
+            )
+            await self._db.commit()
         return cursor.rowcount > 0
 
     # ------------------------------------------------------------------
@@ -279,12 +491,15 @@ class ChatDB:
         role: str,
         content: str,
         timestamp: Optional[int] = None,
+        wait: bool = True,
     ) -> MessageRecord:
-        """Persist a single message and atomically update session metadata.
+        """Queue a message for the next group commit.
 
-        Inserts the message into ``chat_messages`` and, in the same
-        transaction, increments ``message_count`` and refreshes
-        ``updated_at`` in the parent ``chat_sessions`` row.
+        The message is inserted into ``chat_messages`` and, in the same
+        transaction, ``message_count`` / ``updated_at`` of the parent
+        ``chat_sessions`` row are updated (the row is created when missing).
+        Messages of all sessions queued within ``batch_delay_ms`` share one
+        transaction and one fsync.
 
         Args:
             session_id: The UUID v4 string identifying the target session.
@@ -293,36 +508,92 @@ class ChatDB:
             content: Text content of the message.
             timestamp: Unix timestamp for the message.  Defaults to
                 ``int(time.time())`` when ``None``.
+            wait: Return only after the batch is committed.  With ``False``
+                the call returns at once and a failed batch is only logged.
 
         Returns:
             A :class:`~src.db.schemas.MessageRecord` representing the saved
             message.
 
         Raises:
-            aiosqlite.Error: On any SQLite-level failure.
+            aiosqlite.Error: On any SQLite-level failure of the batch
+                (``wait=True`` only).
         """
         if timestamp is None:
             timestamp = int(time.time())
 
-        await self._db.execute(
-            """
-            INSERT INTO chat_messages (session_id, role, content, timestamp)
-            VALUES (?, ?, ?, ?)
-            """,
-            (session_id, role, content, timestamp),
-        )
-        await self._db.execute(
-            """
-            UPDATE chat_sessions
-            SET message_count = message_count + 1,
-                updated_at    = ?
-            WHERE session_id = ?
-            """,
-            (int(time.time()), session_id),
-        )
-        await self._db.commit()
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._pending.append((session_id, role, content, timestamp, future))
+        if len(self._pending) >= self._batch_max:
+            # Full batch: the producer pays for the flush (backpressure)
+            try:
+                await self.flush()
+            except Exception:
+                pass  # delivered through the future below / logged by flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        if future is not None:
+            await future
         return MessageRecord(role=role, content=content, timestamp=timestamp)
 
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._batch_delay)
+        try:
+            await self.flush()
+        except Exception:
+            pass  # already delivered to the waiters / logged by flush()
+
+    async def _drain(self) -> None:
+        """Commit queued messages before a read or a direct write."""
+        if self._pending or self._write_lock.locked():
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all queued messages now, one transaction per batch.
+
+        Raises:
+            aiosqlite.Error: If the last batch failed (its waiters get the
+                same exception).
+        """
+        async with self._write_lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[: self._batch_max], self._pending[self._batch_max:]
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: list[tuple]) -> None:
+        now = int(time.time())
+        per_session: dict[str, int] = defaultdict(int)
+        for session_id, *_ in batch:
+            per_session[session_id] += 1
+        try:
+            # Sessions first: chat_messages.session_id is a foreign key
+            await self._db.executemany(
+                _SQL_UPSERT_SESSION,
+                [(sid, now, now, count) for sid, count in per_session.items()],
+            )
+            await self._db.executemany(
+                _SQL_INSERT_MESSAGE,
+                [(sid, role, content, ts) for sid, role, content, ts, _ in batch],
+            )
+            await self._db.commit()
+        except Exception as exc:
+            try:
+                await self._db.rollback()
+            except Exception:  # pragma: no cover
+                pass
+            waiters = [future for *_, future in batch if future is not None and not future.done()]
+            if len(waiters) < len(batch):
+                logger.error("ChatDB: %d queued messages lost: %s", len(batch) - len(waiters), exc)
+            for future in waiters:
+                future.set_exception(exc)
+            raise
+        for *_, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
     async def get_session_history(
         self,
         session_id: str,
@@ -337,6 +608,7 @@ class ChatDB:
             by ``timestamp`` ascending.  Returns an empty list if the session
             has no messages or does not exist.
         """
+        await self._drain()
         async with self._db.execute(
             """
             SELECT role, content, timestamp
@@ -357,47 +629,223 @@ class ChatDB:
             for r in rows
         ]
 
+    async def get_recent_messages(
+        self,
+        session_id: str,
+        limit: int,
+    ) -> list[MessageRecord]:
+        """Retrieve the last *limit* messages of a session in chronological order.
+
+        Reads backwards along ``idx_messages_session_id`` (insertion order), so
+        the cost does not depend on the length of the session.
+
+        Args:
+            session_id: The UUID v4 string identifying the session.
+            limit: Maximum number of messages to return.
+
+        Returns:
+            A list of :class:`~src.db.schemas.MessageRecord` objects, oldest
+            first.
+        """
+        await self._drain()
+        async with self._db.execute(
+            """
+            SELECT role, content, timestamp
+            FROM chat_messages
+            WHERE session_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (session_id, limit),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        return [
+            MessageRecord(
+                role=r["role"],
+                content=r["content"],
+                timestamp=r["timestamp"],
+            )
+            for r in reversed(rows)
+        ]
+
+    async def get_messages_page(
+        self,
+        session_id: str,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+    ) -> tuple[list[dict], Optional[int]]:
+        """Return one page of a session's messages, walking back in time (keyset).
+
+        Args:
+            session_id: The UUID v4 string identifying the session.
+            limit: Maximum number of messages to return.
+            before_id: ``next_cursor`` of the previous page (only older
+                messages are returned); ``None`` for the newest page.
+
+        Returns:
+            A tuple ``(messages, next_cursor)``.  *messages* are dicts with
+            keys ``id``, ``role``, ``content`` and ``timestamp``, oldest
+            first; *next_cursor* is ``None`` when there are no older messages.
+        """
+        await self._drain()
+        async with self._db.execute(
+            """
+            SELECT id, role, content, timestamp
+            FROM chat_messages
+            WHERE session_id = ? AND id < ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (session_id, before_id if before_id is not None else 2**63 - 1, limit),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        messages = [
+            {"id": r["id"], "role": r["role"], "content": r["content"], "timestamp": r["timestamp"]}
+            for r in reversed(rows)
+        ]
+        next_cursor = rows[-1]["id"] if len(rows) == limit else None
+        return messages, next_cursor
+
+    async def search_messages(
+        self,
+        query: str,
+        limit: int = 20,
+        session_id: Optional[str] = None,
+        before_id: Optional[int] = None,
+        order: str = "recent",
+    ) -> tuple[list[dict], Optional[int]]:
+        """Full-text search over message content (FTS5).
+
+        Every whitespace-separated word of *query* must occur in a message
+        (words are matched as literal tokens, so FTS5 operators in user input
+        are not interpreted).
+
+        Args:
+            query: Words to search for.
+            limit: Maximum number of hits to return.
+            session_id: Restrict the search to one session.
+            before_id: ``next_cursor`` of the previous page (``order="recent"``).
+            order: ``"recent"`` — newest first, keyset-paginated;
+                ``"relevance"`` — best BM25 matches first, single page.
+
+        Returns:
+            A tuple ``(hits, next_cursor)``.  *hits* are dicts with keys
+            ``id``, ``session_id``, ``role``, ``content``, ``snippet`` and
+            ``timestamp``; *next_cursor* is ``None`` on the last page.
+        """
+        words = query.split()
+        if not words:
+            return [], None
+        await self._drain()
+        params: list = []
+        where: list[str] = []
+        # FTS5 walks rowids in either direction and seeks on rowid bounds,
+        # so newest-first pages never sort the full match set
+        key = "f.rowid" if self._fts else "m.id"
+        if self._fts:
+            source = "chat_messages_fts f JOIN chat_messages m ON m.id = f.rowid"
+            snippet = "snippet(chat_messages_fts, 0, '[', ']', '…', 12)"
+            where.append("chat_messages_fts MATCH ?")
+            params.append(" ".join('"' + word.replace('"', '""') + '"' for word in words))
+        else:
+            source, snippet = "chat_messages m", "substr(m.content, 1, 200)"
+            for word in words:
+                where.append("m.content LIKE ? ESCAPE '\\'")
+                escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                params.append(f"%{escaped}%")
+        if session_id is not None:
+            where.append("m.session_id = ?")
+            params.append(session_id)
+        relevance = order == "relevance" and self._fts
+        if before_id is not None and not relevance:
+            where.append(f"{key} < ?")
+            params.append(before_id)
+
+        async with self._db.execute(
+            f"""
+            SELECT m.id, m.session_id, m.role, m.content, m.timestamp,
+                   {snippet} AS snippet
+            FROM {source}
+            WHERE {" AND ".join(where)}
+            ORDER BY {"f.rank" if relevance else key + " DESC"}
+            LIMIT ?
+            """,
+            (*params, limit),
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        hits = [
+            {
+                "id": r["id"],
+                "session_id": r["session_id"],
+                "role": r["role"],
+                "content": r["content"],
+                "snippet": r["snippet"],
+                "timestamp": r["timestamp"],
+            }
+            for r in rows
+        ]
+        next_cursor = hits[-1]["id"] if len(hits) == limit and not relevance else None
+        return hits, next_cursor
+
     async def get_messages_since(
         self,
         since_timestamp: int,
         session_ids: Optional[list[str]] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
     ) -> list[dict]:
         """Return messages created after a given Unix timestamp.
 
+        Uses ``idx_messages_timestamp`` (or ``idx_messages_session_ts`` per
+        session).  Large ranges are read page by page: pass the
+        ``timestamp`` and ``id`` of the last row returned as
+        *since_timestamp* / *after_id* to continue after it.
+
         Args:
             since_timestamp: Only messages with ``timestamp`` strictly
-                greater than this value are returned.
+                greater than this value are returned (or equal to it with an
+                ``id`` greater than *after_id*).
             session_ids: Optional list of session IDs to restrict the query.
                 When ``None``, messages from all sessions are considered.
+            after_id: Keyset cursor: ``id`` of the last message of the
+                previous page.
+            limit: Maximum number of messages to return (``None`` — all).
 
         Returns:
-            A list of dicts with keys ``session_id``, ``role``, ``content``,
-            and ``timestamp``, ordered by ``timestamp`` ascending.
+            A list of dicts with keys ``id``, ``session_id``, ``role``,
+            ``content``, and ``timestamp``, ordered by ``timestamp`` and
+            ``id`` ascending.
         """
+        if after_id is None:
+            conditions = ["timestamp > ?"]
+            params: list = [since_timestamp]
+        else:
+            conditions = ["(timestamp, id) > (?, ?)"]
+            params = [since_timestamp, after_id]
         if session_ids is not None:
             placeholders = ",".join("?" * len(session_ids))
-            query = f"""
-                SELECT session_id, role, content, timestamp
-                FROM chat_messages
-                WHERE timestamp > ?
-                  AND session_id IN ({placeholders})
-                ORDER BY timestamp ASC
-            """
-            params: tuple = (since_timestamp, *session_ids)
-        else:
-            query = """
-                SELECT session_id, role, content, timestamp
-                FROM chat_messages
-                WHERE timestamp > ?
-                ORDER BY timestamp ASC
-            """
-            params = (since_timestamp,)
+            conditions.append(f"session_id IN ({placeholders})")
+            params.extend(session_ids)
+        query = f"""
+            SELECT id, session_id, role, content, timestamp
+            FROM chat_messages
+            WHERE {" AND ".join(conditions)}
+            ORDER BY timestamp ASC, id ASC
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
 
+        await self._drain()
         async with self._db.execute(query, params) as cursor:
             rows = await cursor.fetchall()
 
         return [
             {
+                "id": r["id"],
                 "session_id": r["session_id"],
                 "role": r["role"],
                 "content": r["content"],
@@ -407,6 +855,166 @@ class ChatDB:
         ]
 
 
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    async def select_expired_sessions(self, cutoff: int, limit: int) -> list[str]:
+        """Return up to *limit* sessions not updated since *cutoff*, oldest first.
+
+        Args:
+            cutoff: Unix timestamp; sessions with ``updated_at`` below it
+                are expired.
+            limit: Batch size.
+
+        Returns:
+            Session IDs.
+        """
+        await self._drain()
+        async with self._db.execute(
+            """
+            SELECT session_id FROM chat_sessions
+            WHERE updated_at < ?
+            ORDER BY updated_at ASC, session_id ASC
+            LIMIT ?
+            """,
+            (cutoff, limit),
+        ) as cursor:
+            return [r[0] for r in await cursor.fetchall()]
+
+    async def select_oldest_sessions(self, keep: int, limit: int) -> list[str]:
+        """Return up to *limit* sessions beyond the *keep* most recently updated.
+
+        Args:
+            keep: Number of newest sessions that are kept.
+            limit: Batch size.
+
+        Returns:
+            Session IDs (empty when the table holds at most *keep* sessions).
+        """
+        await self._drain()
+        async with self._db.execute(
+            """
+            SELECT session_id FROM chat_sessions
+            ORDER BY updated_at DESC, session_id DESC
+            LIMIT ? OFFSET ?
+            """,
+            (limit, keep),
+        ) as cursor:
+            return [r[0] for r in await cursor.fetchall()]
+
+    async def archive_sessions(
+        self,
+        session_ids: list[str],
+        sink: Optional[Callable[[list[dict]], Awaitable[None]]] = None,
+    ) -> dict:
+        """Export and delete a batch of sessions in one ``IMMEDIATE`` transaction.
+
+        The batch is re-read inside the transaction, so workers pruning the
+        same database concurrently never export a session twice.  The
+        sessions are deleted only after *sink* returned; if it raises, the
+        transaction is rolled back and nothing is deleted.
+
+        Args:
+            session_ids: Sessions to remove.
+            sink: Coroutine receiving the exported sessions
+                (``{"session": {...}, "messages": [...]}``) before the delete;
+                ``None`` deletes without archiving.
+
+        Returns:
+            dict: ``sessions`` and ``messages`` removed.
+
+        Raises:
+            aiosqlite.Error: On any SQLite-level failure.
+        """
+        if not session_ids:
+            return {"sessions": 0, "messages": 0}
+        placeholders = ",".join("?" * len(session_ids))
+        async with self._write_lock:
+            await self._flush_locked()
+            await self._db.execute("BEGIN IMMEDIATE")
+            try:
+                async with self._db.execute(
+                    f"""
+                    SELECT session_id, model, title, created_at, updated_at,
+                           message_count, aborted
+                    FROM chat_sessions WHERE session_id IN ({placeholders})
+                    """,
+                    session_ids,
+                ) as cursor:
+                    sessions = {r["session_id"]: dict(r) for r in await cursor.fetchall()}
+                messages: dict[str, list[dict]] = defaultdict(list)
+                count = 0
+                if sessions:
+                    async with self._db.execute(
+                        f"""
+                        SELECT session_id, role, content, timestamp
+                        FROM chat_messages WHERE session_id IN ({placeholders})
+                        ORDER BY session_id, id
+                        """,
+                        session_ids,
+                    ) as cursor:
+                        async for r in cursor:
+                            messages[r["session_id"]].append(
+                                {"role": r["role"], "content": r["content"], "timestamp": r["timestamp"]}
+                            )
+                            count += 1
+                    if sink is not None:
+                        await sink([
+                            {"session": {**row, "aborted": bool(row["aborted"])}, "messages": messages[sid]}
+                            for sid, row in sessions.items()
+                        ])
+                    await self._db.execute(
+                        f"DELETE FROM chat_sessions WHERE session_id IN ({placeholders})",
+                        session_ids,
+                    )
+                await self._db.commit()
+            except BaseException:
+                await self._db.rollback()
+                raise
+        return {"sessions": len(sessions), "messages": count}
+
+    async def reclaim_space(self, max_pages: int = 0) -> dict:
+        """Return free pages to the file system and truncate the WAL.
+
+        ``PRAGMA incremental_vacuum`` only works for databases created with
+        ``auto_vacuum=INCREMENTAL`` (every database created by this version);
+        older files keep their free pages for reuse.
+
+        Args:
+            max_pages: Pages released per call (``0`` — all free pages).
+
+        Returns:
+            dict: ``freed_pages``, ``free_pages`` (left), ``wal_busy``
+            (``True`` when readers prevented a full checkpoint).
+        """
+        async with self._write_lock:
+            await self._flush_locked()
+            async with self._db.execute("PRAGMA freelist_count") as cursor:
+                before = (await cursor.fetchone())[0]
+            async with self._db.execute("PRAGMA auto_vacuum") as cursor:
+                incremental = (await cursor.fetchone())[0] == 2
+            if incremental and before:
+                async with self._db.execute(f"PRAGMA incremental_vacuum({int(max_pages)})") as cursor:
+                    await cursor.fetchall()
+                await self._db.commit()
+            async with self._db.execute("PRAGMA freelist_count") as cursor:
+                after = (await cursor.fetchone())[0]
+            async with self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                busy = (await cursor.fetchone())[0]
+        return {"freed_pages": before - after, "free_pages": after, "wal_busy": bool(busy)}
+
+    def size_bytes(self) -> int:
+        """Size of the database file plus its WAL (``0`` for ``:memory:``)."""
+        if self._db_path == ":memory:":
+            return 0
+        return sum(
+            os.path.getsize(path)
+            for path in (self._db_path, self._db_path + "-wal")
+            if os.path.exists(path)
+        )
+
+
 # ---------------------------------------------------------------------------
 # Module-level singleton
 # ---------------------------------------------------------------------------
@@ -432,6 +1040,18 @@ async def get_chat_db() -> ChatDB:
     if _chat_db_instance is None:
         from src.core.config import config
 
-        _chat_db_instance = ChatDB(config.chat_history_db_path)
+        _chat_db_instance = ChatDB(
+            config.chat_history_db_path,
+            batch_delay_ms=config.chat_history_write_batch_ms,
+            batch_max=config.chat_history_write_batch_max,
+        )
         await _chat_db_instance.initialize()
     return _chat_db_instance
+
+
+async def close_chat_db() -> None:
+    """Flush queued messages and close the singleton (application shutdown)."""
+    global _chat_db_instance
+    if _chat_db_instance is not None:
+        await _chat_db_instance.close()
+        _chat_db_instance = None
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Data Access Layer — Chat History Retention and Archival
+# =============================================================================
+# Description:
+#   chat_history.retention_days / max_sessions and dialogs.retention_days were
+#   configured but never applied: ChatDB and its WAL grew forever. The
+#   retention job prunes them in the background (every
+#   chat_history.retention_interval_hours, in every worker — safe, see
+#   ChatDB.archive_sessions):
+#
+#     sessions not updated for retention_days ─┐
+#     oldest sessions beyond max_sessions ─────┴─► batches of retention_batch_size
+#         │
+#         ├─► archive_dir/chat_history_<time>_<pid>.jsonl.gz
+#         │   (one {"session", "messages"} line per session; chat_history.archive)
+#         └─► DELETE in the same IMMEDIATE transaction (FTS rows via triggers)
+#
+#     then: incremental VACUUM + wal_checkpoint(TRUNCATE)
+#           dialogs/*.json older than dialogs.retention_days / over max_size_mb
+#
+#   Each run returns a report: sessions / messages removed, archive file,
+#   database bytes before / after / reclaimed, dialog files and bytes freed.
+#
+# Examples:
+#   >>> job = get_retention_job()
+#   >>> report = await job.run_once()
+#   >>> report["bytes_reclaimed"], report["messages_deleted"]
+#
+# File: src/db/retention.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# License: MIT
+# =============================================================================
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.db.chat_db import ChatDB, get_chat_db
+
+logger = logging.getLogger(__name__)
+
+
+def prune_dialogs(dialogs_dir: str, retention_days: int, max_size_mb: int) -> Dict[str, int]:
+    """Delete saved dialog files older than *retention_days*, then oldest first over *max_size_mb*.
+
+    Args:
+        dialogs_dir: Directory with ``*.json`` dialogs.
+        retention_days: Age limit in days.
+        max_size_mb: Total size limit of the directory.
+
+    Returns:
+        dict: deleted, freed_bytes, remaining.
+    """
+    history_dir = Path(dialogs_dir)
+    if not history_dir.is_dir():
+        return {"deleted": 0, "freed_bytes": 0, "remaining": 0}
+    cutoff = time.time() - retention_days * 86400
+    max_bytes = max_size_mb * 1024 * 1024
+    deleted = 0
+    freed = 0
+
+    # Delete files older than retention_days
+    for f in sorted(history_dir.glob("*.json"), key=lambda f: f.stat().st_mtime):
+        if f.stat().st_mtime < cutoff:
+            freed += f.stat().st_size
+            f.unlink()
+            deleted += 1
+            logger.info(f"🗑️ cleanup: removed old dialog {f.name}")
+
+    # If total size still exceeds limit, remove oldest first
+    files = sorted(history_dir.glob("*.json"), key=lambda f: f.stat().st_mtime)
+    total_size = sum(f.stat().st_size for f in files)
+    for f in files:
+        if total_size <= max_bytes:
+            break
+        freed += f.stat().st_size
+        total_size -= f.stat().st_size
+        f.unlink()
+        deleted += 1
+        logger.info(f"🗑️ cleanup: removed oversized dialog {f.name}")
+
+    return {"deleted": deleted, "freed_bytes": freed, "remaining": len(list(history_dir.glob("*.json")))}
+
+
+class ChatHistoryRetention:
+    """Background pruning and archival of ChatDB sessions and saved dialogs.
+
+    Attributes:
+        retention_days: Session age limit (``0`` — unlimited).
+        max_sessions: Session count limit (``0`` — unlimited).
+        batch_size: Sessions archived and deleted per transaction.
+        interval_hours: Pause between background runs (``0`` — no background job).
+        archive: Write removed sessions to ``archive_dir`` before deleting them.
+        archive_dir: Directory of the ``.jsonl.gz`` archives.
+    """
+
+    def __init__(
+        self,
+        retention_days: Optional[int] = None,
+        max_sessions: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        interval_hours: Optional[float] = None,
+        archive: Optional[bool] = None,
+        archive_dir: Optional[str] = None,
+        db: Optional[ChatDB] = None,
+        prune_dialog_files: bool = True,
+    ) -> None:
+        """Configure the job (every argument defaults to the chat_history config).
+
+        Args:
+            retention_days: ``chat_history.retention_days``.
+            max_sessions: ``chat_history.max_sessions``.
+            batch_size: ``chat_history.retention_batch_size``.
+            interval_hours: ``chat_history.retention_interval_hours``.
+            archive: ``chat_history.archive``.
+            archive_dir: ``chat_history.archive_dir``.
+            db: ChatDB to prune (default: the :func:`get_chat_db` singleton).
+            prune_dialog_files: Also apply ``dialogs.retention_days`` /
+                ``max_size_mb`` to the saved dialog files.
+        """
+        from src.core.config import config
+
+        self.retention_days = int(config.chat_history_retention_days if retention_days is None else retention_days)
+        self.max_sessions = int(config.chat_history_max_sessions if max_sessions is None else max_sessions)
+        self.batch_size = max(1, int(config.chat_history_retention_batch_size if batch_size is None else batch_size))
+        self.interval_hours = float(config.chat_history_retention_interval_hours if interval_hours is None else interval_hours)
+        self.archive = bool(config.chat_history_archive if archive is None else archive)
+        self.archive_dir = str(Path(config.chat_history_archive_dir if archive_dir is None else archive_dir).expanduser())
+        self.prune_dialog_files = prune_dialog_files
+        self._db = db
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.runs = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    async def _chat_db(self) -> ChatDB:
+        return self._db or await get_chat_db()
+
+    # ── Archive ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _append_archive(path: Path, records: List[Dict[str, Any]]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One gzip member per batch: concatenated members are one valid .gz stream
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+        with open(path, "rb") as f:
+            os.fsync(f.fileno())
+
+    # ── Run ───────────────────────────────────────────────────────────────────
+
+    async def _drain(self, db: ChatDB, select, report: Dict[str, Any], sink) -> None:
+        while True:
+            session_ids = await select()
+            if not session_ids:
+                return
+            removed = await db.archive_sessions(session_ids, sink)
+            report["sessions_deleted"] += removed["sessions"]
+            report["messages_deleted"] += removed["messages"]
+            if removed["sessions"] == 0:
+                return  # another worker took this batch
+            await asyncio.sleep(0)  # let chat requests in between batches
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Apply the retention limits now.
+
+        Returns:
+            dict: sessions_deleted, messages_deleted, archive_file,
+                  db_bytes_before, db_bytes_after, bytes_reclaimed,
+                  freed_pages, free_pages, wal_busy, dialogs_deleted,
+                  dialogs_freed_bytes, duration_seconds.
+        """
+        async with self._lock:
+            started = time.monotonic()
+            db = await self._chat_db()
+            report: Dict[str, Any] = {
+                "sessions_deleted": 0,
+                "messages_deleted": 0,
+                "archive_file": None,
+                "db_bytes_before": db.size_bytes(),
+            }
+
+            sink = None
+            if self.archive:
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                path = Path(self.archive_dir) / f"chat_history_{stamp}_{os.getpid()}.jsonl.gz"
+
+                async def sink(records: List[Dict[str, Any]]) -> None:
+                    await asyncio.to_thread(self._append_archive, path, records)
+                    report["archive_file"] = str(path)
+
+            if self.retention_days > 0:
+                cutoff = int(time.time()) - self.retention_days * 86400
+                await self._drain(db, lambda: db.select_expired_sessions(cutoff, self.batch_size), report, sink)
+            if self.max_sessions > 0:
+                await self._drain(db, lambda: db.select_oldest_sessions(self.max_sessions, self.batch_size), report, sink)
+
+            report.update(await db.reclaim_space())
+            report["db_bytes_after"] = db.size_bytes()
+            report["bytes_reclaimed"] = max(0, report["db_bytes_before"] - report["db_bytes_after"])
+
+            report["dialogs_deleted"] = report["dialogs_freed_bytes"] = 0
+            if self.prune_dialog_files:
+                from src.core.config import config
+
+                dialogs = await asyncio.to_thread(
+                    prune_dialogs, config.dir_dialogs, config.dialogs_retention_days, config.dialogs_max_size_mb,
+                )
+                report["dialogs_deleted"] = dialogs["deleted"]
+                report["dialogs_freed_bytes"] = dialogs["freed_bytes"]
+
+            report["duration_seconds"] = round(time.monotonic() - started, 3)
+            report["finished_at"] = int(time.time())
+            self.runs += 1
+            self.last_report = report
+            if report["sessions_deleted"] or report["dialogs_deleted"] or report["bytes_reclaimed"]:
+                logger.info(
+                    "🗄️ Chat history retention: %d sessions / %d messages removed, %d bytes reclaimed, %d dialogs deleted",
+                    report["sessions_deleted"], report["messages_deleted"],
+                    report["bytes_reclaimed"], report["dialogs_deleted"],
+                )
+            return report
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the periodic job on the running loop (no-op when interval_hours is 0)."""
+        if self.interval_hours <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run_forever(), name="chat-history-retention")
+
+    async def _run_forever(self) -> None:
+        # First run shortly after startup, not in the middle of it
+        delay = 60.0
+        while True:
+            await asyncio.sleep(delay)
+            delay = self.interval_hours * 3600
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("⚠️ Chat history retention failed: %s", e)
+
+    async def stop(self) -> None:
+        """Stop the periodic job (a batch in progress is rolled back)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, run count and the report of the last run."""
+        return {
+            "retention_days": self.retention_days,
+            "max_sessions": self.max_sessions,
+            "batch_size": self.batch_size,
+            "interval_hours": self.interval_hours,
+            "archive": self.archive,
+            "archive_dir": self.archive_dir,
+            "running": self._task is not None and not self._task.done(),
+            "runs": self.runs,
+            "last_report": self.last_report,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Module-level singleton
+# ---------------------------------------------------------------------------
+
+_job: Optional[ChatHistoryRetention] = None
+
+
+def get_retention_job() -> ChatHistoryRetention:
+    """Return (or lazily create) the module-level :class:`ChatHistoryRetention`."""
+    global _job
+    if _job is None:
+        _job = ChatHistoryRetention()
+    return _job
+
+
+async def shutdown_retention_job() -> None:
+    """Stop the background job (application shutdown)."""
+    if _job is not None:
+        await _job.stop()
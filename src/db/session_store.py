@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Data Access Layer — Chat Session Store (ChatDB + hot LRU)
+# =============================================================================
+# Description:
+#   Chat session state used to live in a module-level dict of chat_endpoints:
+#   invisible to other uvicorn workers (api_workers > 1) and never shrinking.
+#   ChatSessionStore keeps ChatDB as the source of truth and a bounded LRU of
+#   hot sessions in front of it:
+#
+#     get(session_id)
+#       ├─ hot + DB message_count unchanged ──► cached messages (one PK lookup)
+#       ├─ hot, count changed (another worker wrote) ──► reload, refreshed=True
+#       └─ cold ──► last chat_history.load_turns turns from ChatDB, refreshed=True
+#
+#     append(session_id, role, content) ──► ChatDB.save_message + hot copy;
+#                                           the cached count follows own writes;
+#                                           past 2 × load_turns × 2 messages the
+#                                           hot copy drops its oldest half
+#                                           (refreshed=True)
+#
+#   refreshed means "list positions changed": chat trim cut points computed
+#   on the previous list no longer apply (the caller forgets them and clears
+#   the flag).
+#
+#   A session stays sticky to the worker that serves it: its cached copy is
+#   reused as long as nobody else wrote to the session; a foreign write
+#   invalidates it on the next access. When ChatDB is unavailable, the hot copy
+#   keeps serving (best effort, as before).
+#
+# Examples:
+#   >>> store = get_session_store()
+#   >>> await store.create(session_id, model="ollama::qwen2.5")
+#   >>> await store.append(session_id, "user", "Hi")
+#   >>> state = await store.get(session_id)
+#   >>> state.messages
+#
+# File: src/db/session_store.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# License: MIT
+# =============================================================================
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.db.chat_db import ChatDB, get_chat_db
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionState:
+    """Hot copy of one chat session.
+
+    Attributes:
+        messages: Recent messages (``{"role", "content"}``), oldest first.
+        count: ``message_count`` of the DB row this copy matches.
+        persisted: Whether the session row exists in ChatDB.
+        refreshed: Set whenever the list was (re)loaded from ChatDB or its
+            oldest messages were dropped, so positions in it changed; the
+            consumer of trim cut points clears it.
+    """
+
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    count: int = 0
+    persisted: bool = False
+    refreshed: bool = False
+
+
+class ChatSessionStore:
+    """ChatDB-backed chat sessions with a bounded in-process LRU of hot sessions.
+
+    Attributes:
+        max_hot: Sessions kept in memory.
+        load_turns: Turns (user + assistant pairs) loaded for a cold session.
+    """
+
+    def __init__(self, max_hot: Optional[int] = None, load_turns: Optional[int] = None, db: Optional[ChatDB] = None) -> None:
+        """Configure the store.
+
+        Args:
+            max_hot: LRU size (default: ``chat_history.hot_sessions``).
+            load_turns: Turns loaded on a cold start (default: ``chat_history.load_turns``).
+            db: ChatDB to use (default: the :func:`get_chat_db` singleton).
+        """
+        from src.core.config import config
+
+        self.max_hot = max(1, int(config.chat_history_hot_sessions if max_hot is None else max_hot))
+        self.load_turns = max(1, int(config.chat_history_load_turns if load_turns is None else load_turns))
+        self._db = db
+        self._hot: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.counters = {"hits": 0, "loads": 0, "invalidations": 0, "evictions": 0, "db_errors": 0}
+
+    async def _chat_db(self) -> ChatDB:
+        return self._db or await get_chat_db()
+
+    def _remember(self, session_id: str, state: SessionState) -> None:
+        self._hot[session_id] = state
+        self._hot.move_to_end(session_id)
+        while len(self._hot) > self.max_hot:
+            evicted, _ = self._hot.popitem(last=False)
+            self._locks.pop(evicted, None)
+            self.counters["evictions"] += 1
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        """Return the current state of a session, loading or refreshing it.
+
+        Args:
+            session_id: Chat session UUID.
+
+        Returns:
+            The session state, or ``None`` if the session is unknown.
+        """
+        async with self._lock(session_id):
+            hot = self._hot.get(session_id)
+            try:
+                db = await self._chat_db()
+                count = await db.get_message_count(session_id)
+            except Exception as exc:
+                self.counters["db_errors"] += 1
+                logger.warning("Chat session store: ChatDB unavailable for %s: %s", session_id, exc)
+                if hot is None:
+                    self._locks.pop(session_id, None)
+                    return None
+                self._hot.move_to_end(session_id)
+                return hot
+
+            if hot is not None and (count == hot.count or (count is None and not hot.persisted)):
+                self._hot.move_to_end(session_id)
+                self.counters["hits"] += 1
+                return hot
+            if count is None:
+                # Unknown, or deleted by another worker
+                self._hot.pop(session_id, None)
+                self._locks.pop(session_id, None)
+                return None
+
+            records = await db.get_recent_messages(session_id, self.load_turns * 2)
+            state = SessionState(
+                messages=[{"role": msg.role, "content": msg.content} for msg in records],
+                count=count,
+                persisted=True,
+                refreshed=True,
+            )
+            self.counters["invalidations" if hot is not None else "loads"] += 1
+            self._remember(session_id, state)
+            return state
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def create(self, session_id: str, model: str = "", title: str = "") -> SessionState:
+        """Start an empty session (hot at once, persisted when ChatDB is reachable).
+
+        Args:
+            session_id: New chat session UUID.
+            model: Model ID of the session.
+            title: Human-readable title.
+
+        Returns:
+            The new session state.
+        """
+        state = SessionState()
+        try:
+            db = await self._chat_db()
+            await db.create_session(session_id=session_id, model=model, title=title)
+            state.persisted = True
+        except Exception as exc:
+            self.counters["db_errors"] += 1
+            logger.warning("Could not persist chat session %s: %s", session_id, exc)
+        self._remember(session_id, state)
+        return state
+
+    async def append(self, session_id: str, role: str, content: str) -> None:
+        """Add a message to the hot copy and persist it (best effort).
+
+        Args:
+            session_id: Chat session UUID (must have been loaded or created).
+            role: ``user`` / ``assistant`` / ``system``.
+            content: Message text.
+        """
+        async with self._lock(session_id):
+            state = self._hot.get(session_id)
+            if state is None:
+                state = SessionState()
+                self._remember(session_id, state)
+            state.messages.append({"role": role, "content": content})
+            keep = self.load_turns * 2
+            if len(state.messages) > keep * 2:
+                # Bounded hot copy; dropping in halves keeps positions stable between drops
+                del state.messages[: len(state.messages) - keep]
+                state.refreshed = True
+            try:
+                db = await self._chat_db()
+                # Group commit; creates the session row if create() could not
+                await db.save_message(session_id=session_id, role=role, content=content)
+                state.persisted = True
+                state.count += 1
+            except Exception as exc:
+                self.counters["db_errors"] += 1
+                logger.warning("Could not persist chat message for %s: %s", session_id, exc)
+
+    async def delete(self, session_id: str) -> bool:
+        """Delete a session from memory and ChatDB.
+
+        Args:
+            session_id: Chat session UUID.
+
+        Returns:
+            ``True`` if the session existed in memory or in the database.
+        """
+        existed = self._hot.pop(session_id, None) is not None
+        self._locks.pop(session_id, None)
+        try:
+            db = await self._chat_db()
+            existed = await db.delete_session(session_id) or existed
+        except Exception as exc:
+            self.counters["db_errors"] += 1
+            logger.warning("Could not delete chat session %s: %s", session_id, exc)
+        return existed
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop the hot copy; the next :meth:`get` reloads from ChatDB."""
+        self._hot.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """LRU size, settings and hit / load / invalidation counters."""
+        return {"hot_sessions": len(self._hot), "max_hot": self.max_hot, "load_turns": self.load_turns, **self.counters}
+
+
+# ---------------------------------------------------------------------------
+# Module-level singleton
+# ---------------------------------------------------------------------------
+
+_store: Optional[ChatSessionStore] = None
+
+
+def get_session_store() -> ChatSessionStore:
+    """Return (or lazily create) the module-level :class:`ChatSessionStore`."""
+    global _store
+    if _store is None:
+        _store = ChatSessionStore()
+    return _store
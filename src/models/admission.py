@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Admission Control — per-backend / per-model limits, priority queues
+# =============================================================================
+# Description:
+#   Nothing used to bound concurrent generations: every request went straight
+#   to its backend, and under load they all piled up inside llama-server slots,
+#   the Ollama runner or the HF scheduler, each getting slower together.
+#   route_generate() / route_generate_stream() now take a slot first:
+#
+#     request ─► priority class (route prefix, API-key tier, explicit priority)
+#                     │
+#                     ├─ API key over its tier max_inflight ─► 429 + Retry-After
+#                     ├─ backend and model below their limit ─► run now
+#                     ├─ class queue full ───────────────────► 503 + Retry-After
+#                     └─ wait in the class queue (bounded) ──► slot freed: highest
+#                          class first, FIFO within a class;
+#                          max_queue_wait_seconds exceeded ──► 503 + Retry-After
+#
+#   Classes: interactive (chat UI) > default > batch (agents, bulk jobs).
+#   Limits: admission.backend_limits {"llama": 8, ...}, admission.model_limits
+#   {"hf::Qwen/Qwen2.5-0.5B": 1, ...}; 0 or missing — no limit.
+#   Retry-After is estimated from the backend's average service time and the
+#   queue ahead. Queue wait time per class is kept as a rolling latency metric.
+#
+#   The class and API key of the current HTTP request travel in a ContextVar
+#   set by the app middleware, so endpoints do not pass them explicitly.
+#
+# Examples:
+#   >>> admission = get_admission()
+#   >>> async with admission.slot("llama", "qwen", priority="interactive"):
+#   ...     result = await _generate_llama(...)
+#   >>> admission.stats()["queue_wait"]["interactive"]["p95_ms"]
+#
+# File: src/models/admission.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - The configured hf limit is never below huggingface.batch_max_size
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from ..rag.retrieval_executor import LatencyStats
+from ..utils.api_utils import ServiceOverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+PRIORITY_CLASSES = ("interactive", "default", "batch")
+
+# Priority class and API key of the HTTP request being served
+_request_class: ContextVar[Tuple[str, Optional[str]]] = ContextVar("admission_request", default=("default", None))
+
+# Service time assumed for a backend before the first request finished
+_INITIAL_SERVICE_SECONDS = 2.0
+
+_MAX_RETRY_AFTER = 60.0
+
+
+def set_request_class(priority: str, api_key: Optional[str] = None) -> Token:
+    """Bind the priority class and API key of the current request (app middleware)."""
+    return _request_class.set((priority, api_key or None))
+
+
+def reset_request_class(token: Token) -> None:
+    _request_class.reset(token)
+
+
+@dataclass
+class _Waiter:
+    backend: str
+    namespace: str
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class AdmissionController:
+    """Concurrency limits and bounded priority queues in front of the backends.
+
+    Args:
+        enabled (bool | None): Off — every request runs at once (default: config).
+        backend_limits (dict | None): backend → max in-flight requests (default: config).
+        model_limits (dict | None): "backend::model" → max in-flight requests (default: config).
+        queue_depth (dict | None): class → max waiting requests (default: config).
+        max_queue_wait (float | None): Seconds a request may wait for a slot (default: config).
+        tiers (dict | None): API key → {"name", "priority", "max_inflight"} (default: config).
+        route_priorities (dict | None): URL path prefix → class (default: config).
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        backend_limits: Optional[Dict[str, int]] = None,
+        model_limits: Optional[Dict[str, int]] = None,
+        queue_depth: Optional[Dict[str, int]] = None,
+        max_queue_wait: Optional[float] = None,
+        tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+        route_priorities: Optional[Dict[str, str]] = None,
+    ) -> None:
+        from ..core.config import config
+
+        self.enabled = bool(config.admission_enabled if enabled is None else enabled)
+        self.backend_limits = dict(config.admission_backend_limits if backend_limits is None else backend_limits)
+        hf_limit = int(self.backend_limits.get("hf") or 0)
+        if backend_limits is None and 0 < hf_limit < config.hf_batch_max_size:
+            # Fewer slots than the batch size would keep the HF scheduler from ever filling a batch
+            logger.warning(
+                "⚠️ admission.backend_limits.hf=%d < huggingface.batch_max_size=%d, raised to the batch size",
+                hf_limit, config.hf_batch_max_size,
+            )
+            self.backend_limits["hf"] = config.hf_batch_max_size
+        self.model_limits = dict(config.admission_model_limits if model_limits is None else model_limits)
+        depth = config.admission_queue_depth if queue_depth is None else queue_depth
+        self.queue_depth = {cls: max(0, int(depth.get(cls, 0))) for cls in PRIORITY_CLASSES}
+        self.max_queue_wait = float(config.admission_max_queue_wait_seconds if max_queue_wait is None else max_queue_wait)
+        self.tiers = dict(config.admission_tiers if tiers is None else tiers)
+        routes = config.admission_route_priorities if route_priorities is None else route_priorities
+        # Longest prefix first
+        self.route_priorities = sorted(routes.items(), key=lambda item: len(item[0]), reverse=True)
+
+        self._queues: Dict[str, Deque[_Waiter]] = {cls: deque() for cls in PRIORITY_CLASSES}
+        self._backend_inflight: Dict[str, int] = {}
+        self._model_inflight: Dict[str, int] = {}
+        self._key_active: Dict[str, int] = {}
+        self._service: Dict[str, float] = {}
+        self.queue_wait = LatencyStats()
+        self.counters = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_tier": 0, "timeouts": 0}
+
+    # ── Classification ────────────────────────────────────────────────────────
+
+    def classify(self, path: str) -> str:
+        """Priority class of a URL path (admission.route_priorities, longest prefix)."""
+        for prefix, cls in self.route_priorities:
+            if path.startswith(prefix):
+                return cls if cls in PRIORITY_CLASSES else "default"
+        return "default"
+
+    def _resolve(self, priority: Optional[str], api_key: Optional[str]) -> Tuple[str, Optional[str], int]:
+        """(class, API key, tier max_inflight) of a request.
+
+        An explicit priority wins over the API-key tier, which wins over the
+        route class bound by the middleware.
+        """
+        route_cls, context_key = _request_class.get()
+        api_key = api_key or context_key
+        tier = self.tiers.get(api_key, {}) if api_key else {}
+        cls = priority or tier.get("priority") or route_cls
+        if cls not in PRIORITY_CLASSES:
+            cls = "default"
+        return cls, api_key, int(tier.get("max_inflight") or 0)
+
+    # ── Slots ─────────────────────────────────────────────────────────────────
+
+    def _fits(self, backend: str, namespace: str) -> bool:
+        backend_limit = int(self.backend_limits.get(backend) or 0)
+        model_limit = int(self.model_limits.get(namespace) or 0)
+        return (
+            (not backend_limit or self._backend_inflight.get(backend, 0) < backend_limit)
+            and (not model_limit or self._model_inflight.get(namespace, 0) < model_limit)
+        )
+
+    def _waiting_ahead(self, cls: str, backend: str) -> int:
+        """Queued requests for the backend in this class or a higher one."""
+        ahead = 0
+        for queued_cls in PRIORITY_CLASSES[: PRIORITY_CLASSES.index(cls) + 1]:
+            ahead += sum(1 for waiter in self._queues[queued_cls] if waiter.backend == backend)
+        return ahead
+
+    def _take(self, backend: str, namespace: str) -> None:
+        self._backend_inflight[backend] = self._backend_inflight.get(backend, 0) + 1
+        self._model_inflight[namespace] = self._model_inflight.get(namespace, 0) + 1
+
+    def _release(self, backend: str, namespace: str) -> None:
+        self._backend_inflight[backend] = max(0, self._backend_inflight.get(backend, 0) - 1)
+        self._model_inflight[namespace] = max(0, self._model_inflight.get(namespace, 0) - 1)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand freed slots to waiters: highest class first, FIFO within a class."""
+        for cls in PRIORITY_CLASSES:
+            queue = self._queues[cls]
+            for waiter in list(queue):
+                if waiter.future.done():
+                    queue.remove(waiter)
+                elif self._fits(waiter.backend, waiter.namespace):
+                    queue.remove(waiter)
+                    self._take(waiter.backend, waiter.namespace)
+                    waiter.future.set_result(None)
+
+    def retry_after(self, backend: str) -> float:
+        """Seconds until a slot is likely free: average service time × queue ahead / limit."""
+        service = self._service.get(backend, _INITIAL_SERVICE_SECONDS)
+        limit = int(self.backend_limits.get(backend) or 0) or 1
+        queued = sum(1 for queue in self._queues.values() for waiter in queue if waiter.backend == backend)
+        return min(_MAX_RETRY_AFTER, max(1.0, service * (queued + 1) / limit))
+
+    def _reject(self, reason: str, message: str, backend: str, status_code: int = 503) -> ServiceOverloadedError:
+        self.counters[reason] += 1
+        logger.warning("Generation rejected (%s): %s", reason, message)
+        return ServiceOverloadedError(message, retry_after=self.retry_after(backend), status_code=status_code)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        backend: str,
+        model: str,
+        priority: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> AsyncIterator[None]:
+        """Hold one generation slot of a backend / model for the duration of the block.
+
+        Args:
+            backend (str): Backend name (detect_backend()).
+            model (str): Model ID without prefix.
+            priority (str | None): interactive / default / batch (default: request context).
+            api_key (str | None): API key whose tier applies (default: request context).
+
+        Raises:
+            ServiceOverloadedError: 429 when the API key is over its tier quota,
+                503 when the class queue is full or the wait exceeded
+                max_queue_wait_seconds.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        cls, key, key_limit = self._resolve(priority, api_key)
+        namespace = f"{backend}::{model}"
+        if key and key_limit and self._key_active.get(key, 0) >= key_limit:
+            raise self._reject(
+                "rejected_tier", f"API key is over its limit of {key_limit} concurrent generations", backend, 429
+            )
+
+        started = time.monotonic()
+        if self._fits(backend, namespace) and not self._waiting_ahead(cls, backend):
+            self._take(backend, namespace)
+        else:
+            queue = self._queues[cls]
+            if len(queue) >= self.queue_depth[cls]:
+                raise self._reject(
+                    "rejected_queue_full", f"{backend} is busy: {cls} queue is full ({len(queue)})", backend
+                )
+            waiter = _Waiter(backend, namespace, asyncio.get_running_loop().create_future())
+            queue.append(waiter)
+            self.counters["queued"] += 1
+            if key:
+                self._key_active[key] = self._key_active.get(key, 0) + 1
+            # Free capacity the waiters ahead cannot use (their model is at its limit)
+            self._dispatch()
+            try:
+                await asyncio.wait_for(waiter.future, timeout=self.max_queue_wait or None)
+            except BaseException as exc:
+                if waiter in queue:
+                    queue.remove(waiter)
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Granted in the same loop iteration the wait was abandoned
+                    self._release(backend, namespace)
+                if isinstance(exc, asyncio.TimeoutError):
+                    raise self._reject(
+                        "timeouts", f"{backend} is busy: no slot within {self.max_queue_wait:.0f}s", backend
+                    ) from None
+                raise
+            finally:
+                if key:
+                    self._key_active[key] -= 1
+
+        self.counters["admitted"] += 1
+        self.queue_wait.record(cls, time.monotonic() - started)
+        if key:
+            self._key_active[key] = self._key_active.get(key, 0) + 1
+        running = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - running
+            previous = self._service.get(backend)
+            self._service[backend] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            if key:
+                self._key_active[key] -= 1
+            self._release(backend, namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, in-flight and queued requests, rejections and queue wait per class."""
+        return {
+            "enabled": self.enabled,
+            "backend_limits": dict(self.backend_limits),
+            "model_limits": dict(self.model_limits),
+            "queue_depth": dict(self.queue_depth),
+            "max_queue_wait_seconds": self.max_queue_wait,
+            "inflight": {name: n for name, n in self._backend_inflight.items() if n},
+            "inflight_models": {name: n for name, n in self._model_inflight.items() if n},
+            "waiting": {cls: len(queue) for cls, queue in self._queues.items()},
+            "service_seconds": {name: round(value, 3) for name, value in self._service.items()},
+            "queue_wait": self.queue_wait.snapshot(),
+            **self.counters,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """Return the shared admission controller (created on first use)."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
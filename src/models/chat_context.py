@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Chat Context — messages arrays, token-budget trimming, prefix reuse
+# =============================================================================
+# Description:
+#   Multi-turn chat sessions are sent to backends as proper messages arrays
+#   instead of one flattened "role: content" prompt, so every backend can reuse
+#   the already prefilled prefix of the conversation:
+#
+#     llama.cpp  — cache_prompt + the session pinned to one slot (id_slot)
+#     LM Studio  — previous_response_id: only the new user turn is sent
+#     HF         — past_key_values kept per session (hf_client)
+#     Ollama     — /api/chat (the runner reuses the KV cache of a common prefix)
+#     Foundry    — /chat/completions messages
+#
+#   ChatContextManager.trim() keeps a session within chat_context.max_tokens
+#   and the prompt budget of the target model (context_window.py, real
+#   tokenizer counts). When the history overflows, the oldest turns are dropped
+#   down to trim_to × budget and the cut point is remembered: the kept prefix
+#   stays identical for the next turns, which is what prefix caches need,
+#   instead of sliding by one message on every request. Dropped turns are
+#   condensed into one system note (first sentence of each, newest first, up
+#   to chat_context.summary_tokens).
+#
+# Examples:
+#   >>> ctx = get_chat_context()
+#   >>> messages = ctx.trim(session_id, history)
+#   >>> await route_generate(flatten_messages(messages), model, messages=messages, session_id=session_id)
+#
+# File: src/models/chat_context.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.text_utils import count_tokens_approx
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+# Per-message overhead of chat templates (role markers, separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+# Characters of a dropped message kept in the condensed history note
+_SUMMARY_LINE_CHARS = 200
+
+
+def flatten_messages(messages: List[Message]) -> str:
+    """Legacy single-prompt form of a conversation ("role: content" lines).
+
+    Used by backends without a chat API and as the response-cache key.
+    """
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+
+
+def messages_digest(messages: List[Message]) -> str:
+    """Stable hash of a messages list (role + content only)."""
+    raw = json.dumps([[msg.get("role"), msg.get("content")] for msg in messages], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def session_slot(session_id: str, slots: int, salt: str = "") -> int:
+    """llama.cpp slot a session is pinned to (stable across processes).
+
+    A different *salt* gives an independent assignment (replica vs. slot
+    within the replica), so the two choices do not correlate.
+    """
+    return int(hashlib.sha1((salt + session_id).encode("utf-8")).hexdigest(), 16) % max(1, slots)
+
+
+@dataclass
+class SessionContext:
+    """Per-session prefix-reuse state."""
+
+    start: int = 0                      # first non-system message kept by trim()
+    response_id: Optional[str] = None   # LM Studio response covering `covered`
+    covered: str = ""                   # messages_digest() of that conversation
+
+
+class ChatContextManager:
+    """Token-budget trimming and prefix-reuse state of chat sessions.
+
+    Args:
+        max_tokens (int | None): Prompt budget of a session (default: config).
+        trim_to (float | None): Fraction of the budget kept after a trim (default: config).
+        count_tokens (callable | None): Token counter of one text (default: approximate).
+        max_sessions (int): Sessions whose state is kept (LRU).
+        summary_tokens (int | None): Size of the condensed-history note, 0 — plain
+            truncation (default: config).
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        trim_to: Optional[float] = None,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        max_sessions: int = 4096,
+        summary_tokens: Optional[int] = None,
+    ) -> None:
+        from ..core.config import config
+
+        self.max_tokens = int(config.chat_context_max_tokens if max_tokens is None else max_tokens)
+        self.trim_to = min(1.0, max(0.1, float(config.chat_context_trim_to if trim_to is None else trim_to)))
+        self.summary_tokens = max(0, int(config.chat_context_summary_tokens if summary_tokens is None else summary_tokens))
+        self.count_tokens = count_tokens or count_tokens_approx
+        self.max_sessions = max(1, int(max_sessions))
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"trims": 0, "dropped_messages": 0, "lmstudio_continuations": 0}
+
+    # ── Session state ─────────────────────────────────────────────────────────
+
+    def state(self, session_id: str) -> SessionContext:
+        """Prefix-reuse state of a session (created on first use)."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._sessions[session_id] = SessionContext()
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return state
+
+    def forget(self, session_id: str) -> None:
+        """Drop the state of a deleted session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    # ── Trimming ──────────────────────────────────────────────────────────────
+
+    def message_tokens(self, message: Message, count: Optional[Callable[[str], int]] = None) -> int:
+        return (count or self.count_tokens)(str(message.get("content") or "")) + _MESSAGE_OVERHEAD_TOKENS
+
+    def _limit(self, budget: Optional[int]) -> int:
+        """Effective budget: the tighter of chat_context.max_tokens and the model budget."""
+        limits = [limit for limit in (self.max_tokens, budget or 0) if limit > 0]
+        return min(limits) if limits else 0
+
+    def trim(
+        self,
+        session_id: Optional[str],
+        messages: List[Message],
+        budget: Optional[int] = None,
+        count: Optional[Callable[[str], int]] = None,
+    ) -> List[Message]:
+        """Fit a conversation into the token budget.
+
+        System messages are always kept; the oldest turns are dropped down to
+        trim_to × budget, and the kept history never starts with an assistant
+        reply. The newest message is always kept. Dropped turns are replaced by
+        a condensed note when summary_tokens > 0.
+
+        Args:
+            session_id (str | None): Session whose cut point is reused (None — stateless).
+            messages (list): Full history, oldest first.
+            budget (int | None): Prompt budget of the target model (context_window.py).
+            count (callable | None): Token counter of the target model.
+
+        Returns:
+            list: Messages to send.
+        """
+        system = [msg for msg in messages if msg.get("role") == "system"]
+        history = [msg for msg in messages if msg.get("role") != "system"]
+        limit = self._limit(budget)
+        if limit <= 0 or not history:
+            return list(messages)
+
+        state = self.state(session_id) if session_id else SessionContext()
+        start = min(state.start, len(history) - 1)
+        fixed = sum(self.message_tokens(msg, count) for msg in system)
+        tokens = fixed + sum(self.message_tokens(msg, count) for msg in history[start:])
+        reserve = self.summary_tokens
+
+        if tokens + (reserve if start else 0) > limit:
+            target = limit * self.trim_to - reserve
+            before = start
+            while start < len(history) - 1 and (
+                tokens > target or history[start].get("role") == "assistant"
+            ):
+                tokens -= self.message_tokens(history[start], count)
+                start += 1
+            self.counters["trims"] += 1
+            self.counters["dropped_messages"] += start - before
+            logger.debug("Chat context trimmed for %s: %d messages dropped", session_id, start - before)
+        state.start = start
+        if start and reserve:
+            note = self._condensed(history[:start], reserve, count or self.count_tokens)
+            if note:
+                system = [*system, note]
+        return system + history[start:]
+
+    @staticmethod
+    def _condensed(dropped: List[Message], limit: int, count: Callable[[str], int]) -> Optional[Message]:
+        """System note with the first sentence of dropped turns (newest first while they fit)."""
+        header = "Earlier in this conversation (condensed):"
+        lines: List[str] = []
+        used = count(header)
+        for msg in reversed(dropped):
+            text = " ".join(str(msg.get("content") or "").split())
+            sentence = text.split(". ", 1)[0][:_SUMMARY_LINE_CHARS]
+            if not sentence:
+                continue
+            line = f"- {msg.get('role')}: {sentence}"
+            cost = count(line)
+            if used + cost > limit:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return None
+        return {"role": "system", "content": "\n".join([header, *reversed(lines)])}
+
+    # ── LM Studio previous_response_id ────────────────────────────────────────
+
+    def continuation(self, session_id: Optional[str], messages: List[Message]) -> Optional[str]:
+        """Stored LM Studio response ID when only the last message is new.
+
+        Returns:
+            str | None: previous_response_id to send, or None for a full resend
+            (first turn, history trimmed or edited).
+        """
+        if not session_id or len(messages) < 2:
+            return None
+        state = self.state(session_id)
+        if state.response_id and state.covered == messages_digest(messages[:-1]):
+            self.counters["lmstudio_continuations"] += 1
+            return state.response_id
+        return None
+
+    def remember_response(
+        self, session_id: Optional[str], messages: List[Message], reply: str, response_id: Optional[str]
+    ) -> None:
+        """Record the stored LM Studio response that covers messages + reply."""
+        if not session_id or not response_id:
+            return
+        state = self.state(session_id)
+        state.response_id = response_id
+        state.covered = messages_digest([*messages, {"role": "assistant", "content": reply}])
+
+    def stats(self) -> Dict[str, Any]:
+        """Budget settings, tracked sessions and trim counters."""
+        return {
+            "max_tokens": self.max_tokens,
+            "trim_to": self.trim_to,
+            "summary_tokens": self.summary_tokens,
+            "sessions": len(self._sessions),
+            **self.counters,
+        }
+
+
+_manager: Optional[ChatContextManager] = None
+
+
+def get_chat_context() -> ChatContextManager:
+    """Return the shared chat context manager (created on first use)."""
+    global _manager
+    if _manager is None:
+        _manager = ChatContextManager()
+    return _manager
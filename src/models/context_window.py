@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Context Window Manager — real token counts and prompt budgets
+# =============================================================================
+# Description:
+#   Prompts used to reach the backends unchecked: oversized chat histories or
+#   RAG contexts came back as HTTP 400 from llama.cpp, or as a very slow prefill.
+#   This module sizes prompts against the target model before the call:
+#
+#     count(model, text)       — tokens by the model's own tokenizer:
+#                                  hf::    loaded tokenizer (worker thread)
+#                                  llama:: llama-server POST /tokenize per text
+#                                          (bounded concurrency)
+#                                  others  count_tokens_approx()
+#                                results cached per (tokenizer, text hash), LRU
+#     context_window(model)    — hf: tokenizer / model config, llama: ctx_size or
+#                                GET /props, others: context_window.models or
+#                                context_window.default_window
+#     prompt_budget(model, n)  — window - n completion tokens - safety margin
+#     pack_chunks(...)         — RAG chunks in rank order while they fit
+#     counter(model, texts)    — pre-tokenizes texts, returns a sync counter for
+#                                ChatContextManager.trim()
+#
+# Examples:
+#   >>> window = get_context_window()
+#   >>> budget = await window.prompt_budget("llama::qwen", max_tokens=512)
+#   >>> chunks = await window.pack_chunks("llama::qwen", chunks, budget - 200)
+#
+# File: src/models/context_window.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - HF tokenization runs in a worker thread; llama /tokenize requests for
+#     uncached texts run with bounded concurrency
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from ..utils.http_pool import pooled_session
+from ..utils.text_utils import count_tokens_approx
+from .router import detect_backend
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer key of backends without a real tokenizer
+_APPROX = "approx"
+
+# Concurrent /tokenize requests per count_many() call (keeps llama-server free for generation)
+_TOKENIZE_CONCURRENCY = 4
+
+
+def _chunk_text(chunk: Dict[str, Any]) -> str:
+    return chunk.get("text") or chunk.get("content") or ""
+
+
+class ContextWindowManager:
+    """Token counting with the target model's tokenizer, and prompt budgets.
+
+    Args:
+        default_window (int | None): Context size of models that report none (default: config).
+        safety_margin (int | None): Tokens kept free for template overhead (default: config).
+        models (dict | None): "backend::model" → context size overrides (default: config).
+        cache_size (int): Cached token counts.
+    """
+
+    def __init__(
+        self,
+        default_window: Optional[int] = None,
+        safety_margin: Optional[int] = None,
+        models: Optional[Dict[str, int]] = None,
+        cache_size: int = 8192,
+    ) -> None:
+        from ..core.config import config
+
+        self.default_window = int(config.context_window_default if default_window is None else default_window)
+        self.safety_margin = int(config.context_window_safety_margin if safety_margin is None else safety_margin)
+        self.models = dict(config.context_window_models if models is None else models)
+        self.cache_size = max(0, int(cache_size))
+        self._counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._windows: Dict[str, int] = {}
+        self.counters = {"cache_hits": 0, "tokenized": 0, "approximated": 0, "tokenizer_errors": 0}
+
+    # ── Tokenizers ────────────────────────────────────────────────────────────
+
+    def _tokenizer_key(self, model: Optional[str]) -> str:
+        """Identity of the tokenizer that counts for a model (cache namespace)."""
+        backend, clean = detect_backend(model)
+        if backend == "hf" and self._hf_tokenizer(clean) is not None:
+            return f"hf::{clean}"
+        if backend == "llama":
+            server = self._llama_server(clean)
+            if server is not None:
+                return f"llama::{server.url}"
+        return _APPROX
+
+    @staticmethod
+    def _hf_tokenizer(model_id: str) -> Any:
+        from .hf_client import _loaded_models
+
+        entry = _loaded_models.get(model_id)
+        return entry.get("tokenizer") if entry else None
+
+    @staticmethod
+    def _llama_server(model_id: str) -> Any:
+        from .llama_registry import resolve_llama_server
+
+        return resolve_llama_server(model_id or None)
+
+    async def _tokenize(self, key: str, texts: List[str]) -> List[int]:
+        """Token counts of texts by one tokenizer (approximate on failure)."""
+        if key == _APPROX:
+            self.counters["approximated"] += len(texts)
+            return [count_tokens_approx(text) for text in texts]
+        try:
+            if key.startswith("hf::"):
+                tokenizer = self._hf_tokenizer(key[len("hf::"):])
+                # Tokenizing long histories takes milliseconds: keep it off the event loop
+                encoded = await asyncio.to_thread(lambda: tokenizer(texts, add_special_tokens=False)["input_ids"])
+                counts = [len(ids) for ids in encoded]
+            else:
+                counts = await self._llama_tokenize(key[len("llama::"):], texts)
+            self.counters["tokenized"] += len(texts)
+            return counts
+        except Exception as e:
+            self.counters["tokenizer_errors"] += 1
+            logger.debug("Tokenizer %s unavailable (%s) — approximate counts", key, e)
+            self.counters["approximated"] += len(texts)
+            return [count_tokens_approx(text) for text in texts]
+
+    @staticmethod
+    async def _llama_tokenize(url: str, texts: List[str]) -> List[int]:
+        """Exact count of every text: one POST /tokenize each, a few in flight at a time."""
+        limit = asyncio.Semaphore(_TOKENIZE_CONCURRENCY)
+        async with pooled_session("llama", timeout=aiohttp.ClientTimeout(total=10)) as session:
+            async def _one(text: str) -> int:
+                async with limit:
+                    async with session.post(f"{url}/tokenize", json={"content": text}) as resp:
+                        resp.raise_for_status()
+                        return len((await resp.json()).get("tokens") or [])
+            return list(await asyncio.gather(*(_one(text) for text in texts)))
+
+    async def count_many(self, model: Optional[str], texts: Iterable[str]) -> List[int]:
+        """Token counts of several texts, tokenizing only uncached ones.
+
+        Args:
+            model (str | None): Target model with backend prefix.
+            texts (iterable): Texts to count.
+
+        Returns:
+            list: Counts in input order.
+        """
+        texts = list(texts)
+        key = self._tokenizer_key(model)
+        digests = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+        counts: List[Optional[int]] = []
+        missing: Dict[str, str] = {}
+        for text, digest in zip(texts, digests):
+            cached = self._counts.get((key, digest))
+            if cached is not None:
+                self._counts.move_to_end((key, digest))
+                self.counters["cache_hits"] += 1
+            else:
+                missing[digest] = text
+            counts.append(cached)
+        if missing:
+            fresh = dict(zip(missing, await self._tokenize(key, list(missing.values()))))
+            for digest, count in fresh.items():
+                self._remember((key, digest), count)
+            counts = [fresh[d] if c is None else c for c, d in zip(counts, digests)]
+        return counts  # type: ignore[return-value]
+
+    async def count(self, model: Optional[str], text: str) -> int:
+        """Token count of one text for the target model."""
+        return (await self.count_many(model, [text]))[0]
+
+    async def counter(self, model: Optional[str], texts: Iterable[str]) -> Callable[[str], int]:
+        """Pre-tokenize texts and return a synchronous counter over the results.
+
+        Texts not seen here are counted approximately.
+        """
+        texts = list(texts)
+        counts = dict(zip(texts, await self.count_many(model, texts)))
+        return lambda text: counts[text] if text in counts else count_tokens_approx(text)
+
+    def _remember(self, key: Tuple[str, str], count: int) -> None:
+        if not self.cache_size:
+            return
+        self._counts[key] = count
+        while len(self._counts) > self.cache_size:
+            self._counts.popitem(last=False)
+
+    # ── Windows and budgets ───────────────────────────────────────────────────
+
+    async def context_window(self, model: Optional[str]) -> int:
+        """Context size of the target model in tokens."""
+        backend, clean = detect_backend(model)
+        configured = self.models.get(f"{backend}::{clean}")
+        if configured:
+            return int(configured)
+        if backend == "hf":
+            window = self._hf_window(clean)
+            if window:
+                return window
+        elif backend == "llama":
+            server = self._llama_server(clean)
+            if server is not None:
+                if server.ctx_size:
+                    return int(server.ctx_size)
+                window = await self._llama_window(server.url)
+                if window:
+                    return window
+        return self.default_window
+
+    def _hf_window(self, model_id: str) -> Optional[int]:
+        from .hf_client import _loaded_models
+
+        entry = _loaded_models.get(model_id)
+        if not entry:
+            return None
+        try:
+            window = getattr(entry["pipeline"].model.config, "max_position_embeddings", None)
+        except Exception:
+            window = None
+        limit = getattr(entry.get("tokenizer"), "model_max_length", None)
+        # Tokenizers without a limit report a huge sentinel (int(1e30))
+        candidates = [int(v) for v in (window, limit) if v and int(v) < 10_000_000]
+        return min(candidates) if candidates else None
+
+    async def _llama_window(self, url: str) -> Optional[int]:
+        """n_ctx of a running llama-server (GET /props, cached per server)."""
+        if url in self._windows:
+            return self._windows[url]
+        try:
+            async with pooled_session("llama", timeout=aiohttp.ClientTimeout(total=5)) as session:
+                async with session.get(f"{url}/props") as resp:
+                    props = await resp.json() if resp.status == 200 else {}
+        except Exception:
+            return None
+        settings = props.get("default_generation_settings") or {}
+        n_ctx = settings.get("n_ctx") or props.get("n_ctx")
+        if not n_ctx:
+            return None
+        self._windows[url] = int(n_ctx)
+        return int(n_ctx)
+
+    async def prompt_budget(self, model: Optional[str], max_tokens: Optional[int] = None) -> int:
+        """Prompt tokens that fit next to the completion in the model's context.
+
+        Args:
+            model (str | None): Target model with backend prefix.
+            max_tokens (int | None): Completion limit (default: router default).
+
+        Returns:
+            int: Budget (at least a quarter of the window).
+        """
+        if max_tokens is None:
+            from .router import _default_max_tokens
+            max_tokens = _default_max_tokens()
+        window = await self.context_window(model)
+        return max(window // 4, window - int(max_tokens) - self.safety_margin)
+
+    # ── Packing ───────────────────────────────────────────────────────────────
+
+    async def pack_chunks(
+        self,
+        model: Optional[str],
+        chunks: List[Dict[str, Any]],
+        budget: int,
+        overhead: int = 8,
+    ) -> List[Dict[str, Any]]:
+        """Keep RAG chunks in rank order while they fit into the budget.
+
+        A chunk that does not fit is skipped, smaller lower-ranked chunks may
+        still be taken.
+
+        Args:
+            model (str | None): Target model.
+            chunks (list): Retrieved chunks, best first.
+            budget (int): Tokens available for the context block.
+            overhead (int): Tokens of the per-chunk header ("[n] source=...").
+
+        Returns:
+            list: Chunks to put into the prompt.
+        """
+        if not chunks:
+            return []
+        counts = await self.count_many(model, [_chunk_text(chunk) for chunk in chunks])
+        packed, used = [], 0
+        for chunk, tokens in zip(chunks, counts):
+            if used + tokens + overhead <= budget:
+                packed.append(chunk)
+                used += tokens + overhead
+        if len(packed) < len(chunks):
+            logger.info("✂️ RAG context packed: %d of %d chunks fit %d tokens", len(packed), len(chunks), budget)
+        return packed
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings, cached counts and tokenizer counters."""
+        return {
+            "default_window": self.default_window,
+            "safety_margin": self.safety_margin,
+            "cached_counts": len(self._counts),
+            "llama_windows": dict(self._windows),
+            **self.counters,
+        }
+
+
+_manager: Optional[ContextWindowManager] = None
+
+
+def get_context_window() -> ContextWindowManager:
+    """Return the shared context window manager (created on first use)."""
+    global _manager
+    if _manager is None:
+        _manager = ContextWindowManager()
+    return _manager
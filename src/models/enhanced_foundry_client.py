@@ -8,7 +8,9 @@
 #
 # File: enhanced_foundry_client.py
 # Project: Ai Assistant (Docker)
-# Version: 0.2.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - HTTP session taken from the shared per-backend pool (src/utils/http_pool.py)
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # Copyright: © 2026 hypo69
@@ -22,13 +24,14 @@ import time
 from datetime import datetime
 from typing import Dict, List, Optional, AsyncGenerator
 
+from ..utils.http_pool import http_pool
+
 class EnhancedFoundryClient:
     """Расширенный клиент для работы с Foundry API"""
     
     def __init__(self, base_url: str | None = None) -> None:
         self.base_url = base_url or self._find_foundry_url()
         self.timeout = aiohttp.ClientTimeout(total=60)
-        self.session = None
         self.available_models = []
         self.model_cache = {}
         
@@ -72,9 +75,7 @@ class EnhancedFoundryClient:
         Returns:
             aiohttp.ClientSession: Active HTTP session.
         """
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(timeout=self.timeout)
-        return self.session
+        return http_pool.session("foundry", timeout=self.timeout)
     
     async def close(self) -> None:
         """Закрыть HTTP сессию.
@@ -82,8 +83,8 @@ class EnhancedFoundryClient:
         Returns:
             None
         """
-        if self.session and not self.session.closed:
-            await self.session.close()
+        # Сессии принадлежат общему пулу HTTP (закрывается в lifespan приложения)
+        return None
     
     async def health_check(self) -> Dict:
         """Проверка здоровья Foundry.
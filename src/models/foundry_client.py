@@ -28,6 +28,8 @@ from urllib.parse import urlparse
 import aiohttp
 
 from ..utils.foundry_utils import find_foundry_url
+from ..utils.http_pool import http_pool, pooled_session
+from .residency import get_residency_manager, register_unloader
 
 logger = logging.getLogger(__name__)
 
@@ -41,24 +43,20 @@ class FoundryClient:
             f"http://127.0.0.1:{env_port}/v1/" if env_port else None
         )
         self.timeout = aiohttp.ClientTimeout(total=30)
-        self.session: aiohttp.ClientSession | None = None
         logger.info("Foundry client: %s", self.base_url or "waiting for URL...")
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(timeout=self.timeout)
-        return self.session
+        return http_pool.session("foundry", timeout=self.timeout)
 
     async def close(self) -> None:
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """No-op: sessions belong to the shared HTTP pool (closed in the app lifespan)."""
 
     async def _url_ok(self, base_url: str | None) -> bool:
         if not base_url:
             return False
         try:
             timeout = aiohttp.ClientTimeout(total=2)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with pooled_session("foundry", timeout=timeout) as session:
                 async with session.get(f"{base_url.rstrip('/')}/models") as response:
                     return response.status == 200
         except Exception:
@@ -181,8 +179,13 @@ class FoundryClient:
         """Load model into memory using native /openai/load/{name} endpoint.
 
         Uses Foundry's native load endpoint instead of inference warm-up.
-        Supports TTL and execution provider parameters.
+        Supports TTL and execution provider parameters. Goes through the
+        residency manager: concurrent loads of one model share a request and
+        the least recently used idle model is unloaded when limits are hit.
         """
+        return await get_residency_manager().ensure_loaded("foundry", model_id, lambda: self._load_model(model_id))
+
+    async def _load_model(self, model_id: str) -> dict:
         logger.info("Loading Foundry model via native API: %s", model_id)
         
         # GET /openai/load/{name}?ttl=3600
@@ -200,6 +203,7 @@ class FoundryClient:
         Uses Foundry's native unload endpoint instead of SDK.
         """
         logger.info("Unloading Foundry model via native API: %s", model_id)
+        get_residency_manager().discard("foundry", model_id)
         
         # GET /openai/unload/{name}
         status, data = await self._request_json("GET", f"/openai/unload/{model_id}")
@@ -240,6 +244,7 @@ class FoundryClient:
         model: str | None = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        messages: list[dict] | None = None,
         **kwargs: object,
     ) -> dict:
         model = model or await self._default_model()
@@ -247,7 +252,7 @@ class FoundryClient:
             return {"success": False, "error": "Нет доступных моделей Foundry"}
 
         status, data = await self._chat_completion(
-            [{"role": "user", "content": prompt}],
+            messages or [{"role": "user", "content": prompt}],
             model=model,
             temperature=temperature,
             max_tokens=max_tokens,
@@ -275,6 +280,7 @@ class FoundryClient:
         model: str | None = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        messages: list[dict] | None = None,
         **kwargs: object,
     ) -> AsyncIterator[dict]:
         model = model or await self._default_model()
@@ -291,7 +297,7 @@ class FoundryClient:
         url = f"{self.base_url.rstrip('/')}/chat/completions"
         payload = {
             "model": model,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": messages or [{"role": "user", "content": prompt}],
             "temperature": temperature,
             "max_tokens": max_tokens,
             "stream": True,
@@ -354,3 +360,4 @@ class FoundryClient:
 
 
 foundry_client = FoundryClient()
+register_unloader("foundry", foundry_client.unload_model)
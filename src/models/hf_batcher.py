@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: HuggingFace Batch Scheduler — dynamic batching per loaded model
+# =============================================================================
+# Description:
+#   Concurrent hf:: requests used to run one pipeline() call each, batch size 1,
+#   all competing for the same cores. A BatchScheduler per loaded model queues
+#   incoming prompts and runs them through one padded model.generate() call.
+#
+#   Workflow:
+#     generate() ─┐
+#     generate() ─┼─ submit() → queue ─→ worker: first request + whatever arrives
+#     generate() ─┘                      within max_wait_ms (up to max_batch_size,
+#                                        same sampling settings) → run_batch() in
+#                                        executor → results back to each future
+#
+#   The queue keeps filling while a batch runs; the next batch starts as soon as
+#   the previous one returns, so the model never idles while requests wait.
+#   Requests whose caller went away (cancelled future) are dropped before the
+#   batch is formed.
+#
+#   Metrics per model: queue depth, batch-size histogram, queue wait and
+#   generated tokens/sec (see BatchScheduler.stats()).
+#
+# Examples:
+#   >>> scheduler = BatchScheduler("Qwen/Qwen2.5-0.5B-Instruct", run_batch, max_batch_size=8)
+#   >>> text, tokens = await scheduler.submit(prompt, max_new_tokens=256, temperature=0.7)
+#   >>> scheduler.stats()["batch_size_histogram"]
+#   {'1': 2, '4': 5}
+#
+# File: src/models/hf_batcher.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchRequest:
+    """One queued prompt and the future its caller awaits."""
+
+    prompt: str
+    max_new_tokens: int
+    temperature: float
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def sampling_key(self) -> Tuple[bool, float]:
+        """Requests sharing a batch must share sampling settings."""
+        return (self.temperature > 0, round(self.temperature, 3))
+
+
+# run_batch(prompts, max_new_tokens_per_prompt, temperature) -> [(text, completion_tokens)]
+RunBatch = Callable[[List[str], List[int], float], List[Tuple[str, int]]]
+
+
+class BatchScheduler:
+    """Queue + worker that runs one model's prompts in dynamic batches.
+
+    Args:
+        model_id (str): Model the scheduler serves (metrics label).
+        run_batch (RunBatch): Blocking batch generation, called in an executor.
+        max_batch_size (int): Upper bound of prompts per generate() call.
+        max_wait_ms (float): How long the first request waits for companions.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        run_batch: RunBatch,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10,
+    ) -> None:
+        self.model_id = model_id
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._queue: Deque[BatchRequest] = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._histogram: Dict[int, int] = {}
+        self.counters = {
+            "requests": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "batches": 0,
+            "tokens_generated": 0,
+            "busy_seconds": 0.0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+        }
+        self._last_tokens_per_sec = 0.0
+        self._running_batch = 0
+
+    async def submit(self, prompt: str, max_new_tokens: int, temperature: float) -> Tuple[str, int]:
+        """Queue a prompt and wait for its batch to finish.
+
+        Returns:
+            tuple: (generated text, completion tokens).
+
+        Raises:
+            RuntimeError: Scheduler was stopped (model unloaded).
+            Exception: Whatever run_batch raised for the batch.
+        """
+        if self._closed:
+            raise RuntimeError(f"Batch scheduler for {self.model_id} is stopped")
+        self._loop = asyncio.get_running_loop()
+        future = self._loop.create_future()
+        self._queue.append(BatchRequest(prompt, int(max_new_tokens), float(temperature), future))
+        self.counters["requests"] += 1
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._serve(), name=f"hf-batch-{self.model_id}")
+        return await future
+
+    def _drop_abandoned(self) -> None:
+        """Drop requests whose caller is no longer waiting from the queue head."""
+        while self._queue and self._queue[0].future.done():
+            self._queue.popleft()
+            self.counters["cancelled"] += 1
+
+    def _take_batch(self) -> List[BatchRequest]:
+        """Pop up to max_batch_size live requests compatible with the queue head."""
+        self._drop_abandoned()
+        if not self._queue:
+            return []
+        key = self._queue[0].sampling_key
+        batch: List[BatchRequest] = []
+        rest: Deque[BatchRequest] = deque()
+        while self._queue:
+            request = self._queue.popleft()
+            if request.future.done():
+                self.counters["cancelled"] += 1
+            elif len(batch) < self.max_batch_size and request.sampling_key == key:
+                batch.append(request)
+            else:
+                rest.append(request)
+        self._queue = rest
+        return batch
+
+    def _live(self) -> int:
+        return sum(1 for request in self._queue if not request.future.done())
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._closed:
+            self._drop_abandoned()
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Batching window: the oldest request waits at most max_wait for companions
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while self._live() < self.max_batch_size and time.perf_counter() < deadline:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), deadline - time.perf_counter())
+                except asyncio.TimeoutError:
+                    break
+            batch = self._take_batch()
+            if batch:
+                await self._run(loop, batch)
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, batch: List[BatchRequest]) -> None:
+        started = time.perf_counter()
+        for request in batch:
+            waited = (started - request.enqueued_at) * 1000
+            self.counters["queue_wait_ms_total"] += waited
+            self.counters["queue_wait_ms_max"] = max(self.counters["queue_wait_ms_max"], waited)
+        self._histogram[len(batch)] = self._histogram.get(len(batch), 0) + 1
+        self.counters["batches"] += 1
+        self._running_batch = len(batch)
+        try:
+            results = await loop.run_in_executor(
+                None,
+                self.run_batch,
+                [r.prompt for r in batch],
+                [r.max_new_tokens for r in batch],
+                batch[0].temperature,
+            )
+        except Exception as e:
+            logger.error("❌ HF batch of %d failed for %s: %s", len(batch), self.model_id, e)
+            self.counters["failed"] += len(batch)
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        finally:
+            self._running_batch = 0
+            elapsed = time.perf_counter() - started
+            self.counters["busy_seconds"] += elapsed
+
+        tokens = sum(count for _, count in results)
+        self.counters["tokens_generated"] += tokens
+        self._last_tokens_per_sec = tokens / elapsed if elapsed > 0 else 0.0
+        for request, result in zip(batch, results):
+            if request.future.done():
+                self.counters["cancelled"] += 1
+            else:
+                request.future.set_result(result)
+                self.counters["completed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch-size histogram, queue wait and throughput."""
+        counters = dict(self.counters)
+        busy = counters["busy_seconds"]
+        done = counters["completed"] + counters["failed"]
+        return {
+            "model_id": self.model_id,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._live(),
+            "running_batch": self._running_batch,
+            "batch_size_histogram": {str(size): n for size, n in sorted(self._histogram.items())},
+            "avg_batch_size": round(sum(s * n for s, n in self._histogram.items()) / counters["batches"], 2)
+            if counters["batches"] else 0.0,
+            "avg_queue_wait_ms": round(counters["queue_wait_ms_total"] / done, 2) if done else 0.0,
+            "tokens_per_sec": round(counters["tokens_generated"] / busy, 2) if busy else 0.0,
+            "last_batch_tokens_per_sec": round(self._last_tokens_per_sec, 2),
+            **counters,
+        }
+
+    def close(self) -> None:
+        """Stop accepting requests and fail those still queued (thread-safe).
+
+        A batch already running in the executor still delivers its results.
+        """
+        self._closed = True
+        if self._loop is None or self._loop.is_closed():
+            # Nothing can be resolved on a closed loop (asyncio.run already cancelled the worker)
+            self._queue.clear()
+            self._worker = None
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._fail_queued)
+        except RuntimeError:
+            pass  # loop already stopped
+
+    def _fail_queued(self) -> None:
+        while self._queue:
+            request = self._queue.popleft()
+            if not request.future.done():
+                request.future.set_exception(RuntimeError(f"Model {self.model_id} was unloaded"))
+        self._wakeup.set()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Event loop the scheduler is bound to (set by the first submit())."""
+        return self._loop
@@ -15,7 +15,9 @@
 #     Workflow:
 #       download_model()  →  snapshot_download() → ~/.cache/huggingface/hub/
 #       load_model()      →  AutoModelForCausalLM.from_pretrained() → RAM/VRAM
-#       generate()        →  pipeline(formatted_prompt) → response
+#       generate()        →  BatchScheduler → model.generate(batch) → response
+#                            (pipeline(formatted_prompt) when batching is disabled)
+#       generate_stream() →  model.generate(streamer=TextIteratorStreamer) → chunks
 #       list_downloaded() →  scan_cache_dir() → list of cached repos
 #
 #   Key design decisions:
@@ -31,7 +33,20 @@
 #
 # File: src/models/hf_client.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - generate(): concurrent requests to one model are queued and run as
+#     padded batches by a per-model BatchScheduler (hf_batcher.py);
+#     batch_stats() exposes queue depth, batch sizes and tokens/sec; the
+#     scheduler of a previous event loop is closed when it is replaced
+#   - ensure_loaded(): loads go through the residency manager (single flight,
+#     LRU / TTL / RAM eviction); generation marks the model busy
+#   - generate_stream(): token streaming via TextIteratorStreamer; generation
+#     stops when the consumer goes away (client disconnect)
+#   - Chat-template formatting shared by generate() and generate_stream()
+#   - messages / session_id: chat sessions are rendered with the chat template
+#     from their messages; past_key_values are kept per session (LRU,
+#     chat_context.hf_kv_sessions) so the next turn only prefills new tokens
 # Changes in 0.7.1:
 #   - list_downloaded(): replaced manual filesystem scan with scan_cache_dir()
 #     (official HF API); filesystem scan kept as fallback
@@ -46,8 +61,13 @@
 import asyncio
 import logging
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from .hf_batcher import BatchScheduler
+from .residency import get_residency_manager, register_unloader
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +105,80 @@ HF_CACHE_DIR = Path.home() / ".cache" / "huggingface" / "hub"
 # Stored at module level — one instance for the entire FastAPI process.
 _loaded_models: dict = {}
 
+# Batch schedulers of loaded models: {model_id: BatchScheduler}
+_schedulers: dict = {}
+
+# KV caches of chat sessions: {(model_id, session_id): (token ids, past_key_values)}, LRU
+_session_kv: "OrderedDict[Tuple[str, str], Tuple[List[int], Any]]" = OrderedDict()
+_session_kv_lock = threading.Lock()
+_session_kv_counters = {"hits": 0, "misses": 0, "reused_tokens": 0}
+
+
+def _session_kv_limit() -> int:
+    try:
+        from ..core.config import config
+        return int(config.chat_context_hf_kv_sessions)
+    except Exception:
+        return 0
+
+
+def _take_session_kv(model_id: str, session_id: str, input_ids: List[int]) -> Optional[Any]:
+    """Pop a session's KV cache, cropped to the prefix it shares with input_ids.
+
+    The entry is removed while in use, so two concurrent requests of one
+    session never extend the same cache.
+
+    Returns:
+        Cache | None: Reusable past_key_values, or None (no entry / no common prefix).
+    """
+    with _session_kv_lock:
+        entry = _session_kv.pop((model_id, session_id), None)
+    if entry is None:
+        _session_kv_counters["misses"] += 1
+        return None
+    cached_ids, cache = entry
+    common = 0
+    for cached, new in zip(cached_ids, input_ids):
+        if cached != new:
+            break
+        common += 1
+    # generate() needs at least one uncached token to process
+    common = min(common, len(input_ids) - 1)
+    if common <= 0:
+        _session_kv_counters["misses"] += 1
+        return None
+    try:
+        cache.crop(common)
+    except Exception as e:
+        logger.debug("KV cache of %s/%s not reusable: %s", model_id, session_id, e)
+        _session_kv_counters["misses"] += 1
+        return None
+    _session_kv_counters["hits"] += 1
+    _session_kv_counters["reused_tokens"] += common
+    return cache
+
+
+def _keep_session_kv(model_id: str, session_id: str, sequence: List[int], cache: Any) -> None:
+    """Store the KV cache left by generate() for the session's next turn."""
+    limit = _session_kv_limit()
+    if limit <= 0 or cache is None:
+        return
+    try:
+        ids = sequence[:cache.get_seq_length()]
+    except Exception:
+        return
+    with _session_kv_lock:
+        _session_kv[(model_id, session_id)] = (ids, cache)
+        _session_kv.move_to_end((model_id, session_id))
+        while len(_session_kv) > limit:
+            _session_kv.popitem(last=False)
+
+
+def _drop_session_kv(model_id: str) -> None:
+    with _session_kv_lock:
+        for key in [key for key in _session_kv if key[0] == model_id]:
+            del _session_kv[key]
+
 
 def _check_transformers() -> bool:
     """Check availability of the transformers library.
@@ -317,6 +411,11 @@ class HFClient:
         try:
             import gc
             import torch
+            get_residency_manager().discard("hf", model_id)
+            _drop_session_kv(model_id)
+            scheduler = _schedulers.pop(model_id, None)
+            if scheduler is not None:
+                scheduler.close()
             del _loaded_models[model_id]
             gc.collect()
             if torch.cuda.is_available():
@@ -326,9 +425,170 @@ class HFClient:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @staticmethod
+    def _format_prompt(tokenizer, prompt: str, model_id: str, messages: Optional[list] = None) -> str:
+        """Wrap the prompt (or a whole conversation) in the model's chat template.
+
+        Instruction-tuned models require the prompt to be wrapped in their
+        specific chat format (e.g. <|im_start|>user\n...<|im_end|>).
+        apply_chat_template() handles this correctly for all supported models.
+        Raw prompt is used as fallback for base models without a template.
+        """
+        if hasattr(tokenizer, "apply_chat_template") and tokenizer.chat_template:
+            messages = messages or [{"role": "user", "content": prompt}]
+            logger.debug("Chat template applied for %s", model_id)
+            return tokenizer.apply_chat_template(
+                messages,
+                tokenize=False,
+                add_generation_prompt=True,
+            )
+        logger.debug("No chat template for %s — using raw prompt", model_id)
+        return prompt
+
+    async def ensure_loaded(self, model_id: str, device: str = "auto") -> dict:
+        """Load a model through the residency manager.
+
+        Concurrent calls for the same model share one load; the least recently
+        used idle model is unloaded first when model_manager.max_loaded_models
+        (or max_ram_percent) would be exceeded.
+
+        Args:
+            model_id: Model ID (e.g. 'Qwen/Qwen2.5-0.5B-Instruct') or local path.
+            device:   'auto', 'cpu', or 'cuda'.
+
+        Returns:
+            dict: load_model() result, or {"success": True, "status": "already_loaded"}.
+        """
+        loop = asyncio.get_running_loop()
+        return await get_residency_manager().ensure_loaded(
+            "hf", model_id, lambda: loop.run_in_executor(None, self.load_model, model_id, device)
+        )
+
+    def _scheduler(self, model_id: str) -> Optional[BatchScheduler]:
+        """Return the batch scheduler of a loaded model (None when batching is off).
+
+        Schedulers are bound to the event loop of their first request; a new
+        loop (tests, worker restart) gets a fresh scheduler and the old one is
+        closed (its worker exits, queued requests fail).
+        """
+        from ..core.config import config
+
+        if not config.hf_batching_enabled:
+            return None
+        scheduler = _schedulers.get(model_id)
+        loop = asyncio.get_running_loop()
+        if scheduler is None or (scheduler.loop is not None and scheduler.loop is not loop):
+            if scheduler is not None:
+                scheduler.close()
+            scheduler = BatchScheduler(
+                model_id,
+                lambda prompts, limits, temperature: self._generate_batch(model_id, prompts, limits, temperature),
+                max_batch_size=config.hf_batch_max_size,
+                max_wait_ms=config.hf_batch_max_wait_ms,
+            )
+            _schedulers[model_id] = scheduler
+        return scheduler
+
+    def _generate_batch(self, model_id: str, prompts: List[str],
+                        max_new_tokens: List[int], temperature: float) -> List[Tuple[str, int]]:
+        """Run one padded model.generate() over several prompts (blocking).
+
+        Decoder-only models are padded on the left so every row continues from
+        its last real token. The batch runs to the largest max_new_tokens; each
+        row is then cut at its own limit and at the first EOS/pad token.
+
+        Args:
+            model_id:       Loaded model.
+            prompts:        Formatted prompts (chat template already applied).
+            max_new_tokens: Per-prompt token limits.
+            temperature:    Shared sampling temperature (0 = greedy).
+
+        Returns:
+            list: [(generated text, completion tokens)] in prompt order.
+        """
+        import torch
+
+        entry = _loaded_models[model_id]
+        tokenizer = entry["tokenizer"]
+        model = entry["pipeline"].model
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+        sampling = {"do_sample": True, "temperature": temperature} if temperature > 0 else {"do_sample": False}
+        with torch.inference_mode():
+            output = model.generate(
+                **inputs,
+                max_new_tokens=max(max_new_tokens),
+                pad_token_id=tokenizer.pad_token_id,
+                **sampling,
+            )
+
+        stop_ids = {tokenizer.eos_token_id, tokenizer.pad_token_id}
+        results = []
+        for row, limit in zip(output[:, inputs["input_ids"].shape[1]:].tolist(), max_new_tokens):
+            tokens = row[:limit]
+            for i, token in enumerate(tokens):
+                if token in stop_ids:
+                    tokens = tokens[:i]
+                    break
+            results.append((tokenizer.decode(tokens, skip_special_tokens=True), len(tokens)))
+        return results
+
+    def _generate_session(self, model_id: str, session_id: str, formatted_prompt: str,
+                          max_new_tokens: int, temperature: float) -> str:
+        """Generate for a chat session, reusing its past_key_values (blocking).
+
+        The conversation so far is already in the session's KV cache; only the
+        tokens after the shared prefix are prefilled. Session requests bypass
+        the batch scheduler (a batch cannot share per-row caches).
+        """
+        import torch
+        from transformers import DynamicCache
+
+        entry = _loaded_models[model_id]
+        tokenizer = entry["tokenizer"]
+        model = entry["pipeline"].model
+        inputs = tokenizer(formatted_prompt, return_tensors="pt").to(model.device)
+        input_ids = inputs["input_ids"][0].tolist()
+        cache = _take_session_kv(model_id, session_id, input_ids) or DynamicCache()
+        sampling = {"do_sample": True, "temperature": temperature} if temperature > 0 else {"do_sample": False}
+        with torch.inference_mode():
+            output = model.generate(
+                **inputs,
+                past_key_values=cache,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=tokenizer.eos_token_id,
+                return_dict_in_generate=True,
+                **sampling,
+            )
+        sequence = output.sequences[0].tolist()
+        _keep_session_kv(model_id, session_id, sequence, output.past_key_values)
+        return tokenizer.decode(sequence[len(input_ids):], skip_special_tokens=True)
+
+    def session_cache_stats(self) -> dict:
+        """Per-session KV caches held in memory and their reuse counters."""
+        with _session_kv_lock:
+            sessions = [
+                {"model_id": model_id, "session_id": session_id, "tokens": len(ids)}
+                for (model_id, session_id), (ids, _) in _session_kv.items()
+            ]
+        return {"max_sessions": _session_kv_limit(), "sessions": sessions, **_session_kv_counters}
+
+    def batch_stats(self) -> dict:
+        """Batching metrics of every model with a scheduler.
+
+        Returns:
+            dict: {model_id: {queue_depth, batch_size_histogram, tokens_per_sec, ...}}
+        """
+        return {model_id: scheduler.stats() for model_id, scheduler in _schedulers.items()}
+
     async def generate(self, prompt: str, model_id: str,
                        max_new_tokens: int = 512,
-                       temperature: float = 0.7) -> dict:
+                       temperature: float = 0.7,
+                       messages: Optional[list] = None,
+                       session_id: Optional[str] = None) -> dict:
         """Generate text via a loaded HuggingFace model.
 
         Applies ``tokenizer.apply_chat_template()`` when the tokenizer supports it
@@ -341,6 +601,8 @@ class HFClient:
             model_id:       ID of the model to use (must be loaded).
             max_new_tokens: Maximum number of new tokens to generate.
             temperature:    Sampling temperature (0 = greedy, >0 = sampling).
+            messages:       Chat messages rendered with the chat template instead of the prompt.
+            session_id:     Chat session whose past_key_values are reused across turns.
 
         Returns:
             dict: {"success": bool, "content": str, "model": str}
@@ -353,33 +615,34 @@ class HFClient:
             >>> result["content"]
             'Quantum entanglement is...'
         """
-        if model_id not in _loaded_models:
-            load_result = await asyncio.get_event_loop().run_in_executor(
-                None, self.load_model, model_id
-            )
-            if not load_result["success"]:
-                return {"success": False, "error": f"Model not loaded: {load_result['error']}"}
-
+        load_result = await self.ensure_loaded(model_id)
+        if not load_result["success"]:
+            return {"success": False, "error": f"Model not loaded: {load_result['error']}"}
+
+        async with get_residency_manager().using("hf", model_id):
+            return await self._generate_loaded(prompt, model_id, max_new_tokens, temperature, messages, session_id)
+
+    async def _generate_loaded(self, prompt: str, model_id: str,
+                               max_new_tokens: int, temperature: float,
+                               messages: Optional[list] = None,
+                               session_id: Optional[str] = None) -> dict:
+        """generate() body for a model that is already resident."""
         try:
             pipe      = _loaded_models[model_id]["pipeline"]
             tokenizer = _loaded_models[model_id]["tokenizer"]
 
-            # ── Apply chat template ───────────────────────────────────────────
-            # Instruction-tuned models require the prompt to be wrapped in their
-            # specific chat format (e.g. <|im_start|>user\n...<|im_end|>).
-            # apply_chat_template() handles this correctly for all supported models.
-            # Raw prompt is used as fallback for base models without a template.
-            if hasattr(tokenizer, "apply_chat_template") and tokenizer.chat_template:
-                messages = [{"role": "user", "content": prompt}]
-                formatted_prompt = tokenizer.apply_chat_template(
-                    messages,
-                    tokenize=False,
-                    add_generation_prompt=True,
+            formatted_prompt = self._format_prompt(tokenizer, prompt, model_id, messages)
+
+            if session_id and _session_kv_limit() > 0:
+                content = await asyncio.get_running_loop().run_in_executor(
+                    None, self._generate_session, model_id, session_id, formatted_prompt, max_new_tokens, temperature
                 )
-                logger.debug("Chat template applied for %s", model_id)
-            else:
-                formatted_prompt = prompt
-                logger.debug("No chat template for %s — using raw prompt", model_id)
+                return {"success": True, "content": content, "model": model_id}
+
+            scheduler = self._scheduler(model_id)
+            if scheduler is not None:
+                content, _ = await scheduler.submit(formatted_prompt, max_new_tokens, temperature)
+                return {"success": True, "content": content, "model": model_id}
 
             def _run() -> str:
                 outputs = pipe(
@@ -399,6 +662,128 @@ class HFClient:
             logger.error("❌ Error generating with %s: %s", model_id, e)
             return {"success": False, "error": str(e)}
 
+    async def generate_stream(self, prompt: str, model_id: str,
+                              max_new_tokens: int = 512,
+                              temperature: float = 0.7,
+                              messages: Optional[list] = None,
+                              session_id: Optional[str] = None) -> AsyncIterator[dict]:
+        """Stream generated text as it is decoded (TextIteratorStreamer).
+
+        ``model.generate()`` runs in a worker thread and pushes decoded text into
+        the streamer; chunks are yielded as soon as they arrive. When the consumer
+        stops iterating (client disconnect), a stopping criterion ends generation
+        at the next token instead of finishing the whole completion.
+
+        Args:
+            prompt:         User input text.
+            model_id:       ID of the model to use (loaded on demand).
+            max_new_tokens: Maximum number of new tokens to generate.
+            temperature:    Sampling temperature (0 = greedy, >0 = sampling).
+            messages:       Chat messages rendered with the chat template instead of the prompt.
+            session_id:     Chat session whose past_key_values are reused across turns.
+
+        Yields:
+            dict: ``{"success": True, "content": str, "finished": False}`` per chunk,
+            then ``{"success": True, "content": "", "finished": True, "usage": {...}}``;
+            ``{"success": False, "error": str, "finished": True}`` on failure.
+
+        Example:
+            >>> async for chunk in hf_client.generate_stream("Hi", "Qwen/Qwen2.5-0.5B-Instruct"):
+            ...     print(chunk.get("content", ""), end="")
+        """
+        load_result = await self.ensure_loaded(model_id)
+        if not load_result["success"]:
+            yield {"success": False, "error": f"Model not loaded: {load_result['error']}", "finished": True}
+            return
+
+        try:
+            from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+        except ImportError as e:
+            yield {"success": False, "error": f"transformers not available: {e}", "finished": True}
+            return
+
+        pipe      = _loaded_models[model_id]["pipeline"]
+        tokenizer = _loaded_models[model_id]["tokenizer"]
+        stop      = threading.Event()
+        errors: list = []
+
+        class _StopWhenAbandoned(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return stop.is_set()
+
+        try:
+            formatted_prompt = self._format_prompt(tokenizer, prompt, model_id, messages)
+            inputs = tokenizer(formatted_prompt, return_tensors="pt").to(pipe.model.device)
+            keep_kv = bool(session_id) and _session_kv_limit() > 0
+            if keep_kv:
+                from transformers import DynamicCache
+                cache = _take_session_kv(model_id, session_id, inputs["input_ids"][0].tolist())
+        except Exception as e:
+            logger.error("❌ Error preparing stream for %s: %s", model_id, e)
+            yield {"success": False, "error": str(e), "finished": True}
+            return
+
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        gen_kwargs = {
+            **inputs,
+            "streamer": streamer,
+            "max_new_tokens": max_new_tokens,
+            "do_sample": temperature > 0,
+            "pad_token_id": tokenizer.eos_token_id,
+            "stopping_criteria": StoppingCriteriaList([_StopWhenAbandoned()]),
+        }
+        if temperature > 0:
+            gen_kwargs["temperature"] = temperature
+        if keep_kv:
+            gen_kwargs["past_key_values"] = cache or DynamicCache()
+            gen_kwargs["return_dict_in_generate"] = True
+
+        def _run() -> None:
+            try:
+                output = pipe.model.generate(**gen_kwargs)
+                if keep_kv:
+                    _keep_session_kv(model_id, session_id, output.sequences[0].tolist(), output.past_key_values)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()  # unblock the consumer
+
+        # Busy for the whole stream: the model cannot be evicted mid-generation
+        async with get_residency_manager().using("hf", model_id):
+            loop = asyncio.get_event_loop()
+            worker = loop.run_in_executor(None, _run)
+            chunks = iter(streamer)
+            text = ""
+            try:
+                while True:
+                    piece = await loop.run_in_executor(None, next, chunks, None)
+                    if piece is None:
+                        break
+                    if piece:
+                        text += piece
+                        yield {"success": True, "content": piece, "finished": False}
+                await worker
+            finally:
+                stop.set()
+
+        if errors:
+            logger.error("❌ Error streaming with %s: %s", model_id, errors[0])
+            yield {"success": False, "error": str(errors[0]), "finished": True}
+            return
+
+        prompt_tokens = int(inputs["input_ids"].shape[-1])
+        completion_tokens = len(tokenizer(text, add_special_tokens=False)["input_ids"]) if text else 0
+        yield {
+            "success": True,
+            "content": "",
+            "finished": True,
+            "model": model_id,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
     def list_downloaded(self) -> list:
         """List models downloaded to the local HuggingFace cache.
 
@@ -524,3 +909,10 @@ class HFClient:
 
 
 hf_client = HFClient()
+
+
+async def _evict(model_id: str) -> dict:
+    return await asyncio.get_running_loop().run_in_executor(None, hf_client.unload_model, model_id)
+
+
+register_unloader("hf", _evict)
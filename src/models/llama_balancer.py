@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: llama.cpp Replica Balancer — least-outstanding / slot-aware routing
+# =============================================================================
+# Description:
+#   Several llama-server processes of one GGUF (a replica group, see
+#   llama_registry) used to get no traffic but the first one. The balancer
+#   orders the replicas of a group for every request:
+#
+#     resolve_llama_group(model) ─► healthy replicas ─► sticky session replica
+#                                                       (prefix cache locality)
+#                                        │              when it has a free slot
+#                                        ▼
+#                     least_outstanding: requests in flight from this process
+#                     slots:             max(in flight, busy slots of GET /slots)
+#                                        + llamacpp:requests_deferred (GET /metrics)
+#                     divided by the slot count (/slots, or llama_cpp.parallel)
+#                                        │
+#                                        ▼
+#                     router: call the best replica; connection error / HTTP 5xx
+#                     → eject it (eject_seconds, doubled per repeated failure)
+#                     and retry on the next one (balancer.retries)
+#
+#   Every probe_interval_seconds the replicas of a group in use are probed in
+#   the background (GET /health, /slots, /metrics); a healthy /health brings an
+#   ejected replica back early. Ejected replicas stay last-resort candidates,
+#   so a group never becomes unreachable by ejection alone.
+#
+# Examples:
+#   >>> balancer = get_llama_balancer()
+#   >>> for server in balancer.candidates("coder", session_id)[: balancer.retries + 1]:
+#   ...     with balancer.using(server):
+#   ...         ...
+#   >>> balancer.stats()["groups"]["coder"][0]["outstanding"]
+#
+# File: src/models/llama_balancer.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+import aiohttp
+
+from ..utils.http_pool import pooled_session
+from .chat_context import session_slot
+from .llama_registry import LlamaServerConfig, get_configured_llama_servers, resolve_llama_group
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least_outstanding", "slots")
+
+# Longest ejection after repeated failures: eject_seconds × 2**_MAX_BACKOFF_STEPS
+_MAX_BACKOFF_STEPS = 4
+
+
+@dataclass
+class ReplicaState:
+    """Load and health of one llama-server replica."""
+
+    outstanding: int = 0                # requests in flight from this process
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0          # time.monotonic() deadline
+    slots_total: Optional[int] = None   # GET /slots
+    slots_busy: Optional[int] = None
+    deferred: int = 0                   # llamacpp:requests_deferred
+    probed_at: float = 0.0
+    last_error: Optional[str] = None
+
+    def ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+
+def parse_slots(slots: Any) -> tuple:
+    """(slot count, busy slots) of a llama-server GET /slots response."""
+    if not isinstance(slots, list):
+        return None, None
+    # is_processing — current servers; state != 0 — older builds
+    busy = sum(1 for slot in slots if slot.get("is_processing", slot.get("state", 0) != 0))
+    return len(slots), busy
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """llamacpp:* samples of a Prometheus text exposition (GET /metrics)."""
+    values: Dict[str, float] = {}
+    for line in text.splitlines():
+        if not line.startswith("llamacpp:"):
+            continue
+        name, _, value = line.partition(" ")
+        try:
+            values[name[len("llamacpp:"):]] = float(value.split()[0])
+        except (ValueError, IndexError):
+            continue
+    return values
+
+
+class LlamaBalancer:
+    """Orders the replicas of a llama.cpp model and tracks their health.
+
+    Args:
+        strategy (str | None): least_outstanding or slots (default: config).
+        probe_interval (float | None): Seconds between background probes of a group (default: config).
+        eject_seconds (float | None): Ejection after the first failure (default: config).
+        retries (int | None): Extra replicas tried after a failed call (default: config).
+        sticky_sessions (bool | None): Keep a chat session on one replica (default: config).
+    """
+
+    def __init__(
+        self,
+        strategy: Optional[str] = None,
+        probe_interval: Optional[float] = None,
+        eject_seconds: Optional[float] = None,
+        retries: Optional[int] = None,
+        sticky_sessions: Optional[bool] = None,
+    ) -> None:
+        from ..core.config import config
+
+        cfg = config.get_section("llama_cpp").get("balancer") or {}
+        strategy = strategy or cfg.get("strategy") or "least_outstanding"
+        self.strategy = strategy if strategy in STRATEGIES else "least_outstanding"
+        self.probe_interval = float(cfg.get("probe_interval_seconds", 2.0) if probe_interval is None else probe_interval)
+        self.eject_seconds = float(cfg.get("eject_seconds", 10.0) if eject_seconds is None else eject_seconds)
+        self.retries = max(0, int(cfg.get("retries", 1) if retries is None else retries))
+        self.sticky_sessions = bool(cfg.get("sticky_sessions", True) if sticky_sessions is None else sticky_sessions)
+        self._states: Dict[str, ReplicaState] = {}
+        self._probing: Dict[str, asyncio.Task] = {}
+        self._turn = 0
+
+    def state(self, server: LlamaServerConfig) -> ReplicaState:
+        return self._states.setdefault(server.url, ReplicaState())
+
+    # ── Selection ─────────────────────────────────────────────────────────────
+
+    def _load(self, server: LlamaServerConfig, now: float) -> float:
+        """Occupied share of the replica's slots (above 1.0 — requests queue there)."""
+        state = self.state(server)
+        busy = state.outstanding
+        fresh = now - state.probed_at <= max(self.probe_interval * 2, 1.0)
+        if self.strategy == "slots" and fresh:
+            busy = max(busy, state.slots_busy or 0) + state.deferred
+        capacity = (state.slots_total if fresh and state.slots_total else None) or server.parallel or 1
+        return busy / capacity
+
+    def candidates(self, model_id: Optional[str], session_id: Optional[str] = None) -> List[LlamaServerConfig]:
+        """Replicas of a model, best first; ejected replicas last.
+
+        Args:
+            model_id (str | None): Requested model (alias, path or file name).
+            session_id (str | None): Chat session kept on one replica while it has a free slot.
+
+        Returns:
+            list: Servers to try in order (empty — model not configured).
+        """
+        group = resolve_llama_group(model_id)
+        if len(group) < 2:
+            return group
+        self._probe_later(group)
+        now = time.monotonic()
+        self._turn += 1
+        # Rotating tie-break: equal load spreads round-robin
+        order = {server.url: (index - self._turn) % len(group) for index, server in enumerate(group)}
+        healthy = [server for server in group if not self.state(server).ejected(now)]
+        ejected = [server for server in group if self.state(server).ejected(now)]
+        healthy.sort(key=lambda server: (self._load(server, now), order[server.url]))
+        ejected.sort(key=lambda server: self.state(server).ejected_until)
+
+        if session_id and self.sticky_sessions:
+            # Salted: independent of the id_slot pinned inside the replica
+            home = group[session_slot(session_id, len(group), salt="replica:")]
+            if home in healthy and self._load(home, now) < 1.0:
+                healthy.remove(home)
+                healthy.insert(0, home)
+        return healthy + ejected
+
+    @contextmanager
+    def using(self, server: LlamaServerConfig) -> Iterator[ReplicaState]:
+        """Count a request as outstanding on the replica for the duration of the block."""
+        state = self.state(server)
+        state.outstanding += 1
+        state.requests += 1
+        try:
+            yield state
+        finally:
+            state.outstanding -= 1
+
+    # ── Health ────────────────────────────────────────────────────────────────
+
+    def report_success(self, server: LlamaServerConfig) -> None:
+        state = self.state(server)
+        state.consecutive_failures = 0
+        state.ejected_until = 0.0
+
+    def report_failure(self, server: LlamaServerConfig, error: str) -> None:
+        """Eject a replica after a connection error or HTTP 5xx (backoff doubles per repeat)."""
+        state = self.state(server)
+        state.failures += 1
+        state.consecutive_failures += 1
+        state.last_error = error[:300]
+        backoff = 2 ** min(state.consecutive_failures - 1, _MAX_BACKOFF_STEPS)
+        state.ejected_until = time.monotonic() + self.eject_seconds * backoff
+        logger.warning("llama.cpp replica %s ejected for %.0fs: %s", server.url, self.eject_seconds * backoff, error)
+
+    def _probe_later(self, group: List[LlamaServerConfig]) -> None:
+        """Refresh a group in the background when its probe is older than probe_interval."""
+        key = group[0].alias
+        task = self._probing.get(key)
+        if task is not None and not task.done():
+            return
+        if all(time.monotonic() - self.state(server).probed_at < self.probe_interval for server in group):
+            return
+        try:
+            self._probing[key] = asyncio.get_running_loop().create_task(self.refresh(group))
+        except RuntimeError:
+            pass  # no running loop (sync caller): probes happen on the next async request
+
+    async def refresh(self, group: List[LlamaServerConfig]) -> None:
+        """Probe every replica of a group now."""
+        await asyncio.gather(*(self.probe(server) for server in group), return_exceptions=True)
+
+    async def probe(self, server: LlamaServerConfig) -> None:
+        """GET /health, /slots and /metrics of one replica."""
+        state = self.state(server)
+        timeout = aiohttp.ClientTimeout(total=2)
+        try:
+            async with pooled_session("llama", timeout=timeout) as session:
+                async with session.get(f"{server.url}/health") as resp:
+                    healthy = resp.status == 200
+                    if not healthy:
+                        error = f"/health HTTP {resp.status}"
+                if healthy:
+                    async with session.get(f"{server.url}/slots") as resp:
+                        if resp.status == 200:
+                            state.slots_total, state.slots_busy = parse_slots(await resp.json())
+                    async with session.get(f"{server.url}/metrics") as resp:
+                        if resp.status == 200:
+                            metrics = parse_metrics(await resp.text())
+                            state.deferred = int(metrics.get("requests_deferred", 0))
+                            if state.slots_busy is None and "requests_processing" in metrics:
+                                state.slots_busy = int(metrics["requests_processing"])
+        except Exception as exc:
+            healthy, error = False, str(exc) or type(exc).__name__
+        state.probed_at = time.monotonic()
+        if healthy:
+            if state.ejected(state.probed_at):
+                logger.info("llama.cpp replica %s is healthy again", server.url)
+            self.report_success(server)
+        elif not state.ejected(state.probed_at):
+            self.report_failure(server, error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings and per-replica load / health, grouped by model alias."""
+        now = time.monotonic()
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for server in get_configured_llama_servers():
+            state = self.state(server)
+            groups.setdefault(server.alias, []).append({
+                "url": server.url,
+                "outstanding": state.outstanding,
+                "requests": state.requests,
+                "failures": state.failures,
+                "healthy": not state.ejected(now),
+                "ejected_seconds": round(max(0.0, state.ejected_until - now), 1),
+                "slots_total": state.slots_total,
+                "slots_busy": state.slots_busy,
+                "deferred": state.deferred,
+                "probe_age_seconds": round(now - state.probed_at, 1) if state.probed_at else None,
+                "last_error": state.last_error,
+            })
+        return {
+            "strategy": self.strategy,
+            "probe_interval_seconds": self.probe_interval,
+            "eject_seconds": self.eject_seconds,
+            "retries": self.retries,
+            "sticky_sessions": self.sticky_sessions,
+            "groups": groups,
+        }
+
+
+_balancer: Optional[LlamaBalancer] = None
+
+
+def get_llama_balancer() -> LlamaBalancer:
+    """Return the shared llama.cpp replica balancer (created on first use)."""
+    global _balancer
+    if _balancer is None:
+        _balancer = LlamaBalancer()
+    return _balancer
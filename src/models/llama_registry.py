@@ -2,12 +2,14 @@
 """llama.cpp model registry built from config.json.
 
 This module keeps the mapping between a configured GGUF model and the
-dedicated llama-server port that serves it.
+dedicated llama-server port that serves it. Several servers of one model
+(same alias / path, or an entry with ``replicas``) form a replica group that
+``llama_balancer`` spreads requests over.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any
 
@@ -26,6 +28,7 @@ class LlamaServerConfig:
     ctx_size: int | None = None
     threads: int | None = None
     n_gpu_layers: int | None = None
+    parallel: int | None = None
 
     @property
     def model_name(self) -> str:
@@ -61,14 +64,22 @@ def get_configured_llama_servers() -> list[LlamaServerConfig]:
     "llama_cpp": {
       "host": "127.0.0.1",
       "port": 9780,
+      "parallel": 4,
       "models": [
         {"alias": "coder", "model_path": "D:/models/coder.gguf", "port": 9781},
+        {"alias": "chat", "model_path": "D:/models/chat.gguf", "port": 9790, "replicas": 3},
+        {"alias": "big", "model_path": "D:/models/big.gguf",
+         "replicas": [{"port": 9795, "threads": 16}, {"host": "10.0.0.2", "port": 9795}]},
         "D:/models/general.gguf"
       ]
     }
     ```
 
     If `models` is empty, the legacy single `model_path`/`port` pair is used.
+    `parallel` is the server's slot count (`--parallel`); chat sessions are
+    pinned to one slot so its prompt cache is reused across turns.
+    `replicas` expands an entry into several servers of the same model: a count
+    (consecutive ports from `port`) or a list of per-replica overrides.
     """
     from ..core.config import config
 
@@ -81,9 +92,9 @@ def get_configured_llama_servers() -> list[LlamaServerConfig]:
     servers: list[LlamaServerConfig] = []
     if entries:
         for index, entry in enumerate(entries):
-            parsed = _parse_entry(entry, index, base_host, base_port)
+            parsed = _parse_entry(entry, index, base_host, base_port, cfg.get("parallel"))
             if parsed:
-                servers.append(parsed)
+                servers.extend(_expand_replicas(parsed, entry))
     else:
         model_path = str(cfg.get("model_path") or "").strip()
         if model_path:
@@ -97,6 +108,7 @@ def get_configured_llama_servers() -> list[LlamaServerConfig]:
                     ctx_size=_optional_int(cfg.get("ctx_size")),
                     threads=_optional_int(cfg.get("threads")),
                     n_gpu_layers=_optional_int(cfg.get("n_gpu_layers")),
+                    parallel=_optional_int(cfg.get("parallel")),
                 )
             )
 
@@ -116,7 +128,21 @@ def resolve_llama_server(model_id: str | None = None) -> LlamaServerConfig | Non
     return None
 
 
-def _parse_entry(entry: Any, index: int, base_host: str, base_port: int) -> LlamaServerConfig | None:
+def resolve_llama_group(model_id: str | None = None) -> list[LlamaServerConfig]:
+    """All configured servers (replicas) that serve a requested model ID.
+
+    The first entry is the one :func:`resolve_llama_server` returns.
+    """
+    first = resolve_llama_server(model_id)
+    if first is None:
+        return []
+    group = [server for server in get_configured_llama_servers() if server.matches(model_id or first.alias)]
+    return group if first in group else [first]
+
+
+def _parse_entry(
+    entry: Any, index: int, base_host: str, base_port: int, base_parallel: Any = None
+) -> LlamaServerConfig | None:
     if isinstance(entry, str):
         model_path = entry.strip()
         if not model_path:
@@ -126,6 +152,7 @@ def _parse_entry(entry: Any, index: int, base_host: str, base_port: int) -> Llam
             model_path=model_path,
             host=base_host,
             port=base_port + index,
+            parallel=_optional_int(base_parallel),
         )
 
     if not isinstance(entry, dict):
@@ -144,9 +171,31 @@ def _parse_entry(entry: Any, index: int, base_host: str, base_port: int) -> Llam
         ctx_size=_optional_int(entry.get("ctx_size")),
         threads=_optional_int(entry.get("threads")),
         n_gpu_layers=_optional_int(entry.get("n_gpu_layers")),
+        parallel=_optional_int(entry.get("parallel", base_parallel)),
     )
 
 
+def _expand_replicas(server: LlamaServerConfig, entry: Any) -> list[LlamaServerConfig]:
+    replicas = entry.get("replicas") if isinstance(entry, dict) else None
+    if not replicas:
+        return [server]
+    if isinstance(replicas, int):
+        return [replace(server, port=server.port + offset) for offset in range(replicas)]
+    expanded = []
+    for override in replicas:
+        if not isinstance(override, dict):
+            continue
+        expanded.append(replace(
+            server,
+            host=str(override.get("host") or server.host),
+            port=int(override.get("port") or server.port),
+            threads=_optional_int(override.get("threads", server.threads)),
+            n_gpu_layers=_optional_int(override.get("n_gpu_layers", server.n_gpu_layers)),
+            parallel=_optional_int(override.get("parallel", server.parallel)),
+        ))
+    return expanded or [server]
+
+
 def _optional_int(value: Any) -> int | None:
     if value in (None, ""):
         return None
@@ -18,6 +18,8 @@ from typing import Any, AsyncGenerator, Optional
 
 import aiohttp
 
+from ..utils.http_pool import http_pool
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_BASE_URL = "http://localhost:1234"
@@ -67,17 +69,11 @@ def _extract_message_content(data: dict) -> str:
 class LMStudioClient:
     """Async LM Studio REST API v1 client."""
 
-    def __init__(self) -> None:
-        self._session: Optional[aiohttp.ClientSession] = None
-
     async def _get_session(self) -> aiohttp.ClientSession:
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=_get_timeout_seconds()))
-        return self._session
+        return http_pool.session("lmstudio", timeout=aiohttp.ClientTimeout(total=_get_timeout_seconds()))
 
     async def close(self) -> None:
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """No-op: sessions belong to the shared HTTP pool (closed in the app lifespan)."""
 
     def _headers(self) -> dict:
         headers = {"Content-Type": "application/json"}
@@ -185,8 +181,13 @@ class LMStudioClient:
         context_length: Optional[int] = None,
         reasoning: Optional[str] = None,
         previous_response_id: Optional[str] = None,
+        store: Optional[bool] = None,
     ) -> dict:
-        """Generate text with LM Studio /api/v1/chat."""
+        """Generate text with LM Studio /api/v1/chat.
+
+        ``store`` keeps the response server-side so the next turn can pass its
+        ``response_id`` as ``previous_response_id`` (default: only when continuing).
+        """
         model_id = model or _get_default_model()
         if not model_id:
             return {"success": False, "error": "model is required"}
@@ -197,7 +198,7 @@ class LMStudioClient:
             "temperature": temperature,
             "max_output_tokens": max_tokens,
             "stream": False,
-            "store": bool(previous_response_id),
+            "store": bool(previous_response_id) if store is None else store,
         }
         if context_length is not None:
             payload["context_length"] = context_length
@@ -232,6 +233,7 @@ class LMStudioClient:
         context_length: Optional[int] = None,
         reasoning: Optional[str] = None,
         previous_response_id: Optional[str] = None,
+        store: Optional[bool] = None,
     ) -> AsyncGenerator[dict, None]:
         """Stream message.delta chunks from LM Studio /api/v1/chat SSE."""
         model_id = model or _get_default_model()
@@ -245,7 +247,7 @@ class LMStudioClient:
             "temperature": temperature,
             "max_output_tokens": max_tokens,
             "stream": True,
-            "store": bool(previous_response_id),
+            "store": bool(previous_response_id) if store is None else store,
         }
         if context_length is not None:
             payload["context_length"] = context_length
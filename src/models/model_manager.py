@@ -8,7 +8,9 @@
 #
 # File: model_manager.py
 # Project: Ai Assistant (Docker)
-# Version: 0.5.5
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - _test_* connection probes use the shared per-backend HTTP pool
 # Changes in 0.5.5:
 #   - Added try/except with logging in load_config, save_config,
 #     connect_model, disconnect_model, update_model, test_model_connection,
@@ -29,6 +31,7 @@ from typing import Any, Dict, List, Optional
 import aiohttp
 
 from config_manager import config
+from ..utils.http_pool import pooled_session
 from ..utils.logging_system import get_logger
 
 logger = get_logger('model-manager')
@@ -247,7 +250,7 @@ class ModelManager:
     async def _test_foundry_model(self, cfg: Dict[str, Any], prompt: str) -> Dict[str, Any]:
         endpoint = cfg.get('endpoint_url') or config.foundry_base_url
         try:
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("foundry") as session:
                 async with session.post(
                     f"{endpoint.rstrip('/')}/chat/completions",
                     json={'model': cfg['model_id'], 'messages': [{'role': 'user', 'content': prompt}], 'max_tokens': 50},
@@ -265,7 +268,7 @@ class ModelManager:
 
     async def _test_ollama_model(self, cfg: Dict[str, Any], prompt: str) -> Dict[str, Any]:
         try:
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("ollama") as session:
                 async with session.post(
                     f"{cfg['endpoint_url'].rstrip('/')}/generate",
                     json={'model': cfg['model_id'], 'prompt': prompt, 'stream': False},
@@ -284,7 +287,7 @@ class ModelManager:
         if not cfg.get('api_key'):
             return {'success': False, 'model_id': cfg['model_id'], 'error': 'API key required for OpenAI'}
         try:
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("external") as session:
                 async with session.post(
                     f"{cfg['endpoint_url'].rstrip('/')}/chat/completions",
                     headers={'Authorization': f"Bearer {cfg['api_key']}"},
@@ -305,7 +308,7 @@ class ModelManager:
         if not cfg.get('api_key'):
             return {'success': False, 'model_id': cfg['model_id'], 'error': 'API key required for Anthropic'}
         try:
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("external") as session:
                 async with session.post(
                     f"{cfg['endpoint_url'].rstrip('/')}/messages",
                     headers={'x-api-key': cfg['api_key'], 'anthropic-version': '2023-06-01'},
@@ -328,7 +331,7 @@ class ModelManager:
         if cfg.get('api_key') or config.lmstudio_api_key:
             headers['Authorization'] = f"Bearer {cfg.get('api_key') or config.lmstudio_api_key}"
         try:
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("lmstudio") as session:
                 async with session.post(
                     f"{endpoint}/api/v1/chat",
                     headers=headers,
@@ -352,7 +355,7 @@ class ModelManager:
             headers = {'Content-Type': 'application/json'}
             if cfg.get('api_key'):
                 headers['Authorization'] = f"Bearer {cfg['api_key']}"
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("external") as session:
                 async with session.post(
                     cfg['endpoint_url'],
                     headers=headers,
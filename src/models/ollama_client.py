@@ -5,27 +5,37 @@
 # Description:
 #   Async client for Ollama — a local AI model server with OpenAI-compatible API.
 #   Supports listing available models, pulling new models from Ollama Hub,
-#   deleting models, and text generation via /api/generate.
+#   deleting models, and text generation via /api/generate (blocking or
+#   NDJSON streaming).
 #
 # Examples:
 #   >>> from src.models.ollama_client import ollama_client
 #   >>> await ollama_client.list_models()
 #   >>> await ollama_client.pull_model("qwen2.5:0.5b")
 #   >>> result = await ollama_client.generate("Hello", model="qwen2.5:0.5b")
+#   >>> async for chunk in ollama_client.generate_stream("Hello", model="qwen2.5:0.5b"): ...
 #
 # File: src/models/ollama_client.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.0
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - HTTP session taken from the shared per-backend pool (src/utils/http_pool.py)
+#   - generate_stream(): token streaming over /api/generate NDJSON
+#   - generate() / generate_stream(messages=...): chat sessions go to /api/chat
+#     as messages arrays (the runner reuses the KV cache of the common prefix)
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
 
+import json
 import logging
 import os
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import aiohttp
 
+from ..utils.http_pool import http_pool
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_HOST = "http://localhost:11434"
@@ -48,6 +58,20 @@ def _get_base_url() -> str:
         return DEFAULT_HOST
 
 
+def _request(prompt: str, model: str, max_tokens: int, temperature: float,
+             messages: Optional[list], stream: bool) -> tuple[str, dict]:
+    """Endpoint and body: /api/chat for a conversation, /api/generate otherwise."""
+    body = {"model": model, "stream": stream, "options": {"num_predict": max_tokens, "temperature": temperature}}
+    if messages:
+        return "/api/chat", {**body, "messages": messages}
+    return "/api/generate", {**body, "prompt": prompt}
+
+
+def _text(data: dict) -> str:
+    """Generated text of an /api/generate or /api/chat response line."""
+    return data.get("response") or (data.get("message") or {}).get("content") or ""
+
+
 class OllamaClient:
     """Async client for Ollama local model server.
 
@@ -62,19 +86,14 @@ class OllamaClient:
     """
 
     def __init__(self) -> None:
-        self._session: Optional[aiohttp.ClientSession] = None
         self._timeout = aiohttp.ClientTimeout(total=300)
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Lazy-init aiohttp session."""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=self._timeout)
-        return self._session
+        """Pooled keep-alive session for the Ollama backend."""
+        return http_pool.session("ollama", timeout=self._timeout)
 
     async def close(self) -> None:
-        """Close the HTTP session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """No-op: sessions belong to the shared HTTP pool (closed in the app lifespan)."""
 
     async def get_status(self) -> dict:
         """Check if Ollama server is reachable.
@@ -178,14 +197,16 @@ class OllamaClient:
         model: str,
         max_tokens: int = 512,
         temperature: float = 0.7,
+        messages: Optional[list] = None,
     ) -> dict:
-        """Generate text via Ollama /api/generate.
+        """Generate text via Ollama /api/generate (/api/chat for messages).
 
         Args:
             prompt:      Input text.
             model:       Model name, e.g. "qwen2.5:0.5b".
             max_tokens:  Maximum tokens to generate.
             temperature: Sampling temperature.
+            messages:    Chat messages; sent to /api/chat instead of the prompt.
 
         Returns:
             dict: {"success": bool, "content": str, "model": str}
@@ -193,22 +214,77 @@ class OllamaClient:
         url = _get_base_url()
         try:
             session = await self._get_session()
-            async with session.post(
-                f"{url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {"num_predict": max_tokens, "temperature": temperature},
-                },
-            ) as r:
+            path, body = _request(prompt, model, max_tokens, temperature, messages, stream=False)
+            async with session.post(f"{url}{path}", json=body) as r:
                 data = await r.json()
                 if r.status != 200:
                     return {"success": False, "error": data.get("error", f"HTTP {r.status}")}
-                return {"success": True, "content": data.get("response", ""), "model": model}
+                return {"success": True, "content": _text(data), "model": model}
         except Exception as e:
             logger.error(f"❌ Ollama generate error ({model}): {e}")
             return {"success": False, "error": str(e)}
 
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: str,
+        max_tokens: int = 512,
+        temperature: float = 0.7,
+        messages: Optional[list] = None,
+    ) -> AsyncIterator[dict]:
+        """Stream text from Ollama /api/generate or /api/chat (NDJSON, one object per line).
+
+        Args:
+            prompt:      Input text.
+            model:       Model name, e.g. "qwen2.5:0.5b".
+            max_tokens:  Maximum tokens to generate.
+            temperature: Sampling temperature.
+            messages:    Chat messages; sent to /api/chat instead of the prompt.
+
+        Yields:
+            dict: {"success": True, "content": str, "finished": False} per chunk, then
+            {"success": True, "content": "", "finished": True, "usage": {...}};
+            {"success": False, "error": str, "finished": True} on failure.
+        """
+        url = _get_base_url()
+        try:
+            session = await self._get_session()
+            path, body = _request(prompt, model, max_tokens, temperature, messages, stream=True)
+            async with session.post(f"{url}{path}", json=body) as r:
+                if r.status != 200:
+                    yield {"success": False, "error": f"HTTP {r.status}: {await r.text()}", "finished": True}
+                    return
+                async for line in r.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("error"):
+                        yield {"success": False, "error": data["error"], "finished": True}
+                        return
+                    text = _text(data)
+                    if text:
+                        yield {"success": True, "content": text, "finished": False}
+                    if data.get("done"):
+                        prompt_tokens = data.get("prompt_eval_count", 0)
+                        completion_tokens = data.get("eval_count", 0)
+                        yield {
+                            "success": True,
+                            "content": "",
+                            "finished": True,
+                            "usage": {
+                                "prompt_tokens": prompt_tokens,
+                                "completion_tokens": completion_tokens,
+                                "total_tokens": prompt_tokens + completion_tokens,
+                            },
+                        }
+                        return
+        except Exception as e:
+            logger.error(f"❌ Ollama stream error ({model}): {e}")
+            yield {"success": False, "error": str(e), "finished": True}
+
 ollama_client = OllamaClient()
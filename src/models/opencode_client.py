@@ -16,6 +16,7 @@ from typing import Any, Dict, Optional
 import aiohttp
 
 from src.core.config import config
+from src.utils.http_pool import pooled_session
 from src.logger import logger
 
 
@@ -139,7 +140,7 @@ class OpenCodeClient:
         s = self.settings()
         url = f"{s['base_url']}/{path.lstrip('/')}"
         timeout = aiohttp.ClientTimeout(total=120)
-        async with aiohttp.ClientSession(timeout=timeout, headers=self._headers()) as session:
+        async with pooled_session("opencode", timeout=timeout, headers=self._headers()) as session:
             async with session.request(method, url, json=json_body) as resp:
                 text = await resp.text()
                 if resp.status >= 400:
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Model Residency Manager — LRU / TTL / RAM limits for loaded models
+# =============================================================================
+# Description:
+#   Keeps the set of models held in memory (HF models in this process, the
+#   managed llama.cpp server, Foundry loads) within config.json → model_manager:
+#
+#     max_loaded_models — resident models across all backends; the least
+#                         recently used idle model is evicted to make room
+#     ttl_seconds       — idle models are unloaded by a background sweep
+#     max_ram_percent   — after a load (and on every sweep) idle models are
+#                         evicted in LRU order while system RAM is above it
+#
+#   Workflow:
+#     hf_client / foundry_client / llama_start
+#         └─ ensure_loaded(kind, model_id, load) ── single flight per model:
+#              concurrent callers await the same load
+#              ├─ make room (count limit, LRU)   → unloader(kind)(model_id)
+#              ├─ load()
+#              └─ RAM limit (LRU)                → unloader(kind)(model_id)
+#     generation
+#         └─ async with using(kind, model_id) — marks the model busy (never
+#            evicted mid-request) and refreshes its last use
+#
+#   Backends register how to unload their models with register_unloader();
+#   models unloaded elsewhere (API, process exit) are dropped with discard().
+#
+# Examples:
+#   >>> manager = get_residency_manager()
+#   >>> await manager.ensure_loaded("hf", model_id, load=_load)
+#   >>> async with manager.using("hf", model_id):
+#   ...     ...
+#   >>> manager.stats()["models"]
+#
+# File: src/models/residency.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - Evictions in progress are tracked: a model re-requested during its unload
+#     is loaded again only after the unload finishes; _make_room waits for
+#     pending unloads instead of evicting more models
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+LoadFn = Callable[[], Awaitable[Dict[str, Any]]]
+UnloadFn = Callable[[str], Awaitable[Any]]
+
+_unloaders: Dict[str, UnloadFn] = {}
+
+
+def register_unloader(kind: str, unload: UnloadFn) -> None:
+    """Register how models of a backend are evicted.
+
+    Args:
+        kind (str): Backend name ("hf", "llama", "foundry").
+        unload (UnloadFn): Coroutine function taking the model ID.
+    """
+    _unloaders[kind] = unload
+
+
+def _system_ram_percent() -> float:
+    import psutil
+
+    return float(psutil.virtual_memory().percent)
+
+
+@dataclass
+class ResidentModel:
+    """A model currently held in memory."""
+
+    kind: str
+    model_id: str
+    loaded_at: float
+    last_used: float
+    in_use: int = 0
+    uses: int = 0
+
+
+class ModelResidencyManager:
+    """LRU residency of loaded models with count, idle-TTL and RAM limits.
+
+    Args:
+        max_loaded (int | None): Resident models across backends (0 — unlimited).
+        ttl_seconds (float | None): Idle time before unload (0 — never).
+        max_ram_percent (float | None): System RAM threshold (0 — ignored).
+        ram_percent (callable | None): RAM usage probe (default: psutil).
+        clock (callable | None): Monotonic clock (tests).
+    """
+
+    def __init__(
+        self,
+        max_loaded: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        max_ram_percent: Optional[float] = None,
+        ram_percent: Optional[Callable[[], float]] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        from ..core.config import config
+
+        self.max_loaded = int(config.model_manager_max_loaded if max_loaded is None else max_loaded)
+        self.ttl_seconds = float(config.model_manager_ttl_seconds if ttl_seconds is None else ttl_seconds)
+        self.max_ram_percent = float(
+            config.model_manager_max_ram_percent if max_ram_percent is None else max_ram_percent
+        )
+        self._ram_percent = ram_percent or _system_ram_percent
+        self._clock = clock or time.monotonic
+        self._models: "OrderedDict[Key, ResidentModel]" = OrderedDict()
+        self._loading: Dict[Key, asyncio.Future] = {}
+        # Evictions whose unloader is still running (the model still holds memory)
+        self._unloading: Dict[Key, asyncio.Future] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.counters = {
+            "loads": 0,
+            "load_failures": 0,
+            "deduplicated_loads": 0,
+            "evictions_lru": 0,
+            "evictions_ram": 0,
+            "evictions_ttl": 0,
+            "unload_failures": 0,
+        }
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    async def ensure_loaded(self, kind: str, model_id: str, load: Optional[LoadFn] = None) -> Dict[str, Any]:
+        """Make a model resident, loading it once even under concurrent calls.
+
+        Args:
+            kind (str): Backend name.
+            model_id (str): Model ID within the backend.
+            load (LoadFn | None): Loader returning {"success": bool, ...}; None when
+                the backend loads on demand and the model only needs tracking.
+
+        Returns:
+            dict: Loader result ({"success": True, "status": "already_loaded"} when resident).
+        """
+        key = (kind, model_id)
+        # Re-requested while being evicted: let the unload finish, then load again
+        # (a backend still holding the model would report it loaded, then lose it)
+        while (unloading := self._unloading.get(key)) is not None:
+            await asyncio.shield(unloading)
+
+        entry = self._models.get(key)
+        if entry is not None:
+            self._touch(entry)
+            return {"success": True, "model_id": model_id, "status": "already_loaded"}
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            self.counters["deduplicated_loads"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark the outcome retrieved: nobody else may be waiting for it
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._loading[key] = future
+        try:
+            await self._make_room(exclude=key)
+            result = await load() if load is not None else {"success": True, "model_id": model_id}
+            if result.get("success"):
+                now = self._clock()
+                self._models[key] = ResidentModel(kind, model_id, loaded_at=now, last_used=now)
+                self.counters["loads"] += 1
+                logger.info("📥 Resident model: %s::%s (%d loaded)", kind, model_id, len(self._models))
+                await self._enforce_ram(exclude=key)
+            else:
+                self.counters["load_failures"] += 1
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.counters["load_failures"] += 1
+            future.set_exception(e)
+            raise
+        finally:
+            self._loading.pop(key, None)
+
+    # ── Usage tracking ────────────────────────────────────────────────────────
+
+    def _touch(self, entry: ResidentModel) -> None:
+        entry.last_used = self._clock()
+        self._models.move_to_end((entry.kind, entry.model_id))
+
+    def touch(self, kind: str, model_id: str) -> None:
+        """Refresh the last use of a resident model (no-op for unknown models)."""
+        entry = self._models.get((kind, model_id))
+        if entry is not None:
+            self._touch(entry)
+
+    @asynccontextmanager
+    async def using(self, kind: str, model_id: str) -> AsyncIterator[None]:
+        """Mark a resident model busy for the duration of a request.
+
+        Busy models are never evicted; unknown models are not tracked.
+        """
+        entry = self._models.get((kind, model_id))
+        if entry is None:
+            yield
+            return
+        entry.in_use += 1
+        entry.uses += 1
+        self._touch(entry)
+        try:
+            yield
+        finally:
+            entry.in_use -= 1
+            if (kind, model_id) in self._models:
+                self._touch(entry)
+
+    def discard(self, kind: str, model_id: str) -> None:
+        """Forget a model that was unloaded outside the manager."""
+        self._models.pop((kind, model_id), None)
+
+    def is_resident(self, kind: str, model_id: str) -> bool:
+        return (kind, model_id) in self._models
+
+    # ── Eviction ──────────────────────────────────────────────────────────────
+
+    def _lru_idle(self, exclude: Optional[Key] = None) -> Optional[ResidentModel]:
+        """Least recently used model that is not busy (OrderedDict keeps LRU order)."""
+        for key, entry in self._models.items():
+            if entry.in_use == 0 and key != exclude:
+                return entry
+        return None
+
+    async def _evict(self, entry: ResidentModel, reason: str) -> None:
+        key = (entry.kind, entry.model_id)
+        if self._models.pop(key, None) is None:
+            return
+        self.counters[f"evictions_{reason}"] += 1
+        logger.info("📤 Evicting %s::%s (%s)", entry.kind, entry.model_id, reason)
+        unload = _unloaders.get(entry.kind)
+        if unload is None:
+            return
+        done = asyncio.get_running_loop().create_future()
+        self._unloading[key] = done
+        try:
+            result = await unload(entry.model_id)
+            if isinstance(result, dict) and not result.get("success", True):
+                raise RuntimeError(result.get("error"))
+        except Exception as e:
+            self.counters["unload_failures"] += 1
+            logger.warning("⚠️ Unload of %s::%s failed: %s", entry.kind, entry.model_id, e)
+        finally:
+            if self._unloading.get(key) is done:
+                del self._unloading[key]
+            done.set_result(None)
+
+    async def _make_room(self, exclude: Key) -> None:
+        """Evict LRU idle models until one more fits under max_loaded."""
+        if self.max_loaded <= 0:
+            return
+        while True:
+            # Models still unloading hold their memory: count them once, wait rather than evict more
+            unloading = [f for k, f in self._unloading.items() if k != exclude]
+            if len(self._models) + len(unloading) < self.max_loaded:
+                return
+            if unloading:
+                await asyncio.wait(unloading, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            victim = self._lru_idle(exclude)
+            if victim is None:
+                logger.warning("⚠️ %d models busy — loading above max_loaded_models", len(self._models))
+                return
+            await self._evict(victim, "lru")
+
+    async def _enforce_ram(self, exclude: Optional[Key] = None) -> None:
+        """Evict LRU idle models while system RAM is above max_ram_percent."""
+        if self.max_ram_percent <= 0:
+            return
+        while self._ram_percent() > self.max_ram_percent:
+            victim = self._lru_idle(exclude)
+            if victim is None:
+                return
+            await self._evict(victim, "ram")
+
+    async def sweep(self) -> List[Key]:
+        """Unload idle models past the TTL, then re-apply count and RAM limits.
+
+        Returns:
+            list: (kind, model_id) of every evicted model.
+        """
+        before = set(self._models)
+        if self.ttl_seconds > 0:
+            now = self._clock()
+            for entry in list(self._models.values()):
+                if entry.in_use == 0 and now - entry.last_used >= self.ttl_seconds:
+                    await self._evict(entry, "ttl")
+        if self.max_loaded > 0:
+            while len(self._models) > self.max_loaded:
+                victim = self._lru_idle()
+                if victim is None:
+                    break
+                await self._evict(victim, "lru")
+        await self._enforce_ram()
+        return [key for key in before if key not in self._models]
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the background TTL / RAM sweep on the running loop."""
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever(), name="model-residency")
+
+    async def _sweep_forever(self) -> None:
+        interval = min(60.0, max(5.0, self.ttl_seconds / 4 if self.ttl_seconds > 0 else 60.0))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning("⚠️ Model residency sweep failed: %s", e)
+
+    async def stop(self) -> None:
+        """Stop the background sweep (resident models stay loaded)."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, resident models in LRU order (oldest first) and counters."""
+        now = self._clock()
+        try:
+            ram = round(self._ram_percent(), 1)
+        except Exception:
+            ram = None
+        return {
+            "max_loaded_models": self.max_loaded,
+            "ttl_seconds": self.ttl_seconds,
+            "max_ram_percent": self.max_ram_percent,
+            "ram_percent": ram,
+            "loading": [f"{kind}::{model_id}" for kind, model_id in self._loading],
+            "unloading": [f"{kind}::{model_id}" for kind, model_id in self._unloading],
+            "models": [
+                {
+                    "kind": entry.kind,
+                    "model_id": entry.model_id,
+                    "in_use": entry.in_use,
+                    "uses": entry.uses,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                    "resident_seconds": round(now - entry.loaded_at, 1),
+                }
+                for entry in self._models.values()
+            ],
+            **self.counters,
+        }
+
+
+_manager: Optional[ModelResidencyManager] = None
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    """Return the shared residency manager (created on first use)."""
+    global _manager
+    if _manager is None:
+        _manager = ModelResidencyManager()
+    return _manager
+
+
+async def shutdown_residency_manager() -> None:
+    """Stop the background sweep (application lifespan)."""
+    if _manager is not None:
+        await _manager.stop()
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Response Cache — memory LRU + SQLite cache of deterministic generations
+# =============================================================================
+# Description:
+#   Opt-in cache in front of every backend (router.route_generate /
+#   route_generate_stream). Only deterministic requests are cached:
+#   temperature <= response_cache.max_temperature (0 by default).
+#
+#   Key:        sha256(normalized prompt, temperature, max_tokens, RAG context hash)
+#   Namespace:  "<backend>::<model>" — per-model TTL / enable overrides in
+#               response_cache.namespaces, invalidate(namespace) drops one model;
+#               requests without a model use "<backend>::@default"
+#   Tiers:      memory LRU (max_entries) → SQLite file (db_path, "" = memory only);
+#               a disk hit is promoted to memory
+#   TTL:        ttl_seconds (or the namespace override); 0 = no expiry
+#
+#   Cache-Control request header (parse_cache_control()):
+#     no-cache → skip the lookup, store the fresh response
+#     no-store → neither read nor write
+#
+#   A hit is replayed as a stream by replay_chunks() with the same chunk shape
+#   as a live backend, so SSE clients cannot tell the difference (except the
+#   "cached": true flag on the terminal chunk).
+#
+# Examples:
+#   >>> cache = get_response_cache()
+#   >>> key = cache.make_key("What are your hours?", 0.0, 256)
+#   >>> await cache.put("ollama::qwen2.5", key, {"content": "9-18", "model": "ollama::qwen2.5"})
+#   >>> await cache.get("ollama::qwen2.5", key)
+#
+# File: src/models/response_cache.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - stats() is async (disk COUNT in a thread); namespace_of() gives requests
+#     without a model their own "@default" namespace
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SQL_INIT = """
+PRAGMA journal_mode=WAL;
+
+CREATE TABLE IF NOT EXISTS responses (
+    namespace  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    response   TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses(expires_at);
+"""
+
+# Fields of a route_generate() result that are worth replaying
+_STORED_FIELDS = ("content", "model", "usage")
+
+# Expired disk rows are purged every N writes
+_PURGE_EVERY = 100
+
+# Model part of the namespace of requests that name no model (the backend picks one)
+DEFAULT_MODEL = "@default"
+
+
+def namespace_of(backend: str, model: Optional[str]) -> str:
+    """Cache namespace of a request: "<backend>::<model>" or "<backend>::@default".
+
+    Args:
+        backend (str): Backend name.
+        model (str | None): Model ID without prefix.
+
+    Returns:
+        str: Namespace (requests without a model never share "<backend>::").
+    """
+    return f"{backend}::{model or DEFAULT_MODEL}"
+
+
+def parse_cache_control(header: Optional[str]) -> Tuple[bool, bool]:
+    """Interpret a Cache-Control request header.
+
+    Args:
+        header (str | None): Raw header value.
+
+    Returns:
+        tuple: (may read from cache, may write to cache).
+    """
+    directives = {d.strip().split("=", 1)[0].lower() for d in (header or "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives:
+        return False, True
+    return True, True
+
+
+def context_hash(chunks: List[Dict[str, Any]]) -> str:
+    """Stable hash of the RAG context a prompt was built from.
+
+    Args:
+        chunks (list): Retrieved chunks (document_id / chunk_id / text).
+
+    Returns:
+        str: Hex digest ("" for no context).
+    """
+    if not chunks:
+        return ""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        ident = (chunk.get("document_id"), chunk.get("chunk_id"), chunk.get("text") or chunk.get("content") or "")
+        digest.update(json.dumps(ident, ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def replay_chunks(result: Dict[str, Any], words_per_chunk: int = 4) -> Iterator[Dict[str, Any]]:
+    """Turn a cached response into the chunk sequence of route_generate_stream().
+
+    Args:
+        result (dict): Cached response (content, model, usage).
+        words_per_chunk (int): Words per delta chunk.
+
+    Yields:
+        dict: Delta chunks, then the terminal chunk (flagged "cached").
+    """
+    # Split after whitespace so joining the deltas restores the text exactly
+    words = re.findall(r"\S+\s*|\s+", result.get("content") or "")
+    for i in range(0, len(words), words_per_chunk):
+        yield {"success": True, "content": "".join(words[i:i + words_per_chunk]), "finished": False}
+    yield {
+        "success": True,
+        "content": "",
+        "finished": True,
+        "model": result.get("model", ""),
+        "usage": result.get("usage") or {},
+        "cached": True,
+    }
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) cache of deterministic generations.
+
+    Args:
+        enabled (bool | None): Master switch (default: config).
+        max_entries (int | None): Memory tier size (default: config).
+        ttl_seconds (float | None): Default entry lifetime, 0 — none (default: config).
+        db_path (str | None): SQLite file, "" — memory only (default: config).
+        max_temperature (float | None): Highest cacheable temperature (default: config).
+        namespaces (dict | None): namespace → {"enabled": bool, "ttl_seconds": float}.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        db_path: Optional[str] = None,
+        max_temperature: Optional[float] = None,
+        namespaces: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        from ..core.config import config
+
+        self.enabled = bool(config.response_cache_enabled if enabled is None else enabled)
+        self.max_entries = max(0, int(config.response_cache_max_entries if max_entries is None else max_entries))
+        self.ttl_seconds = max(0.0, float(config.response_cache_ttl_seconds if ttl_seconds is None else ttl_seconds))
+        self.max_temperature = float(
+            config.response_cache_max_temperature if max_temperature is None else max_temperature
+        )
+        self.namespaces = dict(config.response_cache_namespaces if namespaces is None else namespaces)
+        raw_path = config.response_cache_db_path if db_path is None else db_path
+        self.db_path = str(Path(raw_path).expanduser()) if raw_path and raw_path != ":memory:" else raw_path
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expirations": 0,
+            "evictions": 0,
+            "bypassed": 0,
+            "disk_errors": 0,
+        }
+
+    # ── Policy and keys ───────────────────────────────────────────────────────
+
+    def _namespace_ttl(self, namespace: str) -> float:
+        override = self.namespaces.get(namespace, {})
+        return max(0.0, float(override.get("ttl_seconds", self.ttl_seconds)))
+
+    def cacheable(self, namespace: str, temperature: Optional[float]) -> bool:
+        """Whether a request may use the cache (enabled, deterministic, namespace allowed)."""
+        if not self.enabled or temperature is None or float(temperature) > self.max_temperature:
+            return False
+        return bool(self.namespaces.get(namespace, {}).get("enabled", True))
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Collapse whitespace so trivially different spellings share one entry."""
+        return " ".join(prompt.split())
+
+    @classmethod
+    def make_key(cls, prompt: str, temperature: float, max_tokens: int, context: Optional[str] = None) -> str:
+        """Build the cache key of a request (the model is the namespace).
+
+        Args:
+            prompt (str): Prompt sent to the model.
+            temperature (float): Sampling temperature.
+            max_tokens (int): Token limit.
+            context (str | None): RAG context hash (see context_hash()).
+
+        Returns:
+            str: Hex digest.
+        """
+        raw = json.dumps(
+            [cls.normalize_prompt(prompt), round(float(temperature), 4), int(max_tokens), context or ""],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ── Disk tier ─────────────────────────────────────────────────────────────
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        if self._db is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.executescript(_SQL_INIT)
+        return self._db
+
+    def _disk_get(self, namespace: str, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT expires_at, response FROM responses WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _disk_put(self, namespace: str, key: str, expires_at: float, response: Dict[str, Any]) -> None:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, created_at, expires_at, response) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, time.time(), expires_at, json.dumps(response, ensure_ascii=False)),
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                db.execute("DELETE FROM responses WHERE expires_at > 0 AND expires_at < ?", (time.time(),))
+            db.commit()
+
+    def _disk_delete(self, namespace: Optional[str]) -> int:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return 0
+            if namespace is None:
+                cursor = db.execute("DELETE FROM responses")
+            else:
+                cursor = db.execute("DELETE FROM responses WHERE namespace = ?", (namespace,))
+            db.commit()
+            return cursor.rowcount
+
+    def _disk_count(self) -> Optional[int]:
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return None
+            return db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _expired(expires_at: float) -> bool:
+        return bool(expires_at) and expires_at < time.time()
+
+    def _remember(self, namespace: str, key: str, expires_at: float, response: Dict[str, Any]) -> None:
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._memory[(namespace, key)] = (expires_at, response)
+            self._memory.move_to_end((namespace, key))
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    async def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response (memory first, then disk) or None.
+
+        Args:
+            namespace (str): "<backend>::<model>".
+            key (str): Key from make_key().
+
+        Returns:
+            dict | None: {"content", "model", "usage"} copy.
+        """
+        with self._lock:
+            entry = self._memory.get((namespace, key))
+            if entry is not None:
+                if self._expired(entry[0]):
+                    del self._memory[(namespace, key)]
+                    self.counters["expirations"] += 1
+                else:
+                    self._memory.move_to_end((namespace, key))
+                    self.counters["memory_hits"] += 1
+                    return dict(entry[1])
+
+        if self.db_path:
+            try:
+                stored = await asyncio.to_thread(self._disk_get, namespace, key)
+            except Exception as e:
+                self.counters["disk_errors"] += 1
+                logger.warning("⚠️ Response cache read failed: %s", e)
+                stored = None
+            if stored is not None and not self._expired(stored[0]):
+                self.counters["disk_hits"] += 1
+                self._remember(namespace, key, *stored)
+                return dict(stored[1])
+            if stored is not None:
+                self.counters["expirations"] += 1
+
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, namespace: str, key: str, result: Dict[str, Any]) -> None:
+        """Store a successful response in both tiers.
+
+        Args:
+            namespace (str): "<backend>::<model>".
+            key (str): Key from make_key().
+            result (dict): route_generate() result.
+        """
+        response = {field: result.get(field) for field in _STORED_FIELDS if result.get(field) is not None}
+        ttl = self._namespace_ttl(namespace)
+        expires_at = time.time() + ttl if ttl else 0.0
+        self._remember(namespace, key, expires_at, response)
+        self.counters["stores"] += 1
+        if self.db_path:
+            try:
+                await asyncio.to_thread(self._disk_put, namespace, key, expires_at, response)
+            except Exception as e:
+                self.counters["disk_errors"] += 1
+                logger.warning("⚠️ Response cache write failed: %s", e)
+
+    def bypass(self) -> None:
+        """Count a request that skipped the lookup (Cache-Control)."""
+        self.counters["bypassed"] += 1
+
+    async def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Drop one model's entries (or everything when namespace is None).
+
+        Returns:
+            int: Removed entries (memory + disk).
+        """
+        with self._lock:
+            stale = [k for k in self._memory if namespace is None or k[0] == namespace]
+            for k in stale:
+                del self._memory[k]
+        removed = len(stale)
+        if self.db_path:
+            removed += await asyncio.to_thread(self._disk_delete, namespace)
+        return removed
+
+    async def stats(self) -> Dict[str, Any]:
+        """Settings, tier sizes and hit / miss counters (disk count off the event loop)."""
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        with self._lock:
+            per_namespace: Dict[str, int] = {}
+            for namespace, _ in self._memory:
+                per_namespace[namespace] = per_namespace.get(namespace, 0) + 1
+        try:
+            disk_entries = await asyncio.to_thread(self._disk_count)
+        except Exception:
+            disk_entries = None
+        return {
+            "enabled": self.enabled,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "max_temperature": self.max_temperature,
+            "db_path": self.db_path or None,
+            "memory_entries": sum(per_namespace.values()),
+            "disk_entries": disk_entries,
+            "namespaces": per_namespace,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            **self.counters,
+        }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the shared response cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def close_response_cache() -> None:
+    """Close the shared cache (application lifespan)."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -27,9 +27,31 @@
 #
 #   No prefix → legacy bare ID forwarded to Foundry with deprecation warning.
 #
+#   Streaming (route_generate_stream) — same routing, native token streams:
+#     foundry  → /chat/completions SSE       hf     → TextIteratorStreamer
+#     llama    → /chat/completions SSE       ollama → /api/generate NDJSON
+#     lmstudio → /api/v1/chat SSE
+#   Chunks: {"success": True, "content": str, "finished": False} ...
+#           {"success": True, "content": "", "finished": True, "model": str, "usage": {...}}
+#           {"success": False, "error": str, "finished": True}
+#
 # File: src/models/router.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - llama.cpp requests reuse the shared keep-alive pool (src/utils/http_pool.py)
+#   - route_generate_stream(): native token streaming for every backend
+#   - Foundry / llama.cpp requests mark their model busy in the residency
+#     manager (LRU / TTL eviction never unloads a model mid-request)
+#   - Opt-in response cache (response_cache.py) for deterministic requests in
+#     route_generate() / route_generate_stream(); hits replay as streams
+#   - messages / session_id: chat sessions are sent as messages arrays with
+#     backend prefix reuse (llama.cpp cache_prompt + slot pinning, LM Studio
+#     previous_response_id, HF past_key_values, Ollama /api/chat)
+#   - Admission control (admission.py): per-backend / per-model in-flight
+#     limits and priority queues; overload → ServiceOverloadedError (429 / 503)
+#   - llama.cpp replica groups: replica chosen by llama_balancer.py, failed
+#     replica ejected and the request retried on another one
 # Changes in 0.7.1:
 #   - Added workflow diagram to header
 #   - Enriched docstrings with examples
@@ -42,9 +64,19 @@
 # Copyright: © 2026 hypo69
 # =============================================================================
 
+import json
 import logging
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional, Tuple
+
 import aiohttp
-from typing import Optional
+
+from ..utils.api_utils import ServiceOverloadedError
+from ..utils.http_pool import pooled_session
+from .admission import get_admission
+from .chat_context import flatten_messages, get_chat_context, session_slot
+from .residency import get_residency_manager
+from .response_cache import get_response_cache, namespace_of, parse_cache_control, replay_chunks
 
 logger = logging.getLogger(__name__)
 
@@ -144,11 +176,43 @@ def _default_max_tokens() -> int:
         return 2048
 
 
+async def _cache_lookup(
+    backend: str,
+    model: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    context_hash: Optional[str],
+    cache_control: Optional[str],
+) -> Tuple[Optional[dict], Optional[str], bool]:
+    """Response-cache lookup shared by route_generate() and route_generate_stream().
+
+    Returns:
+        tuple: (cached response or None, cache key or None when the request is
+        not cacheable, whether the fresh response may be stored).
+    """
+    cache = get_response_cache()
+    namespace = namespace_of(backend, model)
+    if not cache.cacheable(namespace, temperature):
+        return None, None, False
+    may_read, may_store = parse_cache_control(cache_control)
+    key = cache.make_key(prompt, temperature, max_tokens, context_hash)
+    if not may_read:
+        cache.bypass()
+        return None, key, may_store
+    return await cache.get(namespace, key), key, may_store
+
+
 async def route_generate(
     prompt: str,
     model: Optional[str] = None,
     temperature: Optional[float] = None,
     max_tokens: Optional[int] = None,
+    context_hash: Optional[str] = None,
+    cache_control: Optional[str] = None,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+    priority: Optional[str] = None,
 ) -> dict:
     """Route a generation request to the correct backend.
 
@@ -161,12 +225,23 @@ async def route_generate(
                      If ``None``, routes to Foundry and uses its first loaded model.
         temperature: Sampling temperature (0.0–2.0, default from config.defaults.temperature).
         max_tokens:  Maximum tokens to generate (default from config.defaults.max_tokens).
+        context_hash: Hash of the RAG context the prompt was built from (cache key part).
+        cache_control: ``Cache-Control`` request header (``no-cache`` / ``no-store``
+                     bypass the response cache).
+        messages:    Chat messages (``[{"role", "content"}]``) sent as such to the
+                     backend; ``prompt`` is then their flattened form (cache key,
+                     fallback). Built by :mod:`chat_context` for chat sessions.
+        session_id:  Chat session, enables backend prefix reuse across turns.
+        priority:    Admission class (``interactive`` / ``default`` / ``batch``);
+                     default — class of the current HTTP request (admission.py).
 
     Returns:
         dict: On success::
 
             {"success": True, "content": "...", "model": "foundry::...", "usage": {...}}
 
+        Served from the response cache: the same shape plus ``"cached": True``.
+
         On failure::
 
             {"success": False, "error": "description"}
@@ -175,6 +250,10 @@ async def route_generate(
 
             {"success": False, "error": "...", "error_code": "model_not_loaded", "model_id": "..."}
 
+    Raises:
+        ServiceOverloadedError: No admission slot (429 — API key over its tier
+            limit, 503 — queue full or wait timed out), with ``retry_after``.
+
     Example:
         >>> result = await route_generate("Hello", model="foundry::qwen3-0.6b")
         >>> result["success"]
@@ -188,6 +267,8 @@ async def route_generate(
 
         >>> result = await route_generate("Summarize", model="lmstudio::ibm/granite-4-micro")
     """
+    if not prompt and messages:
+        prompt = flatten_messages(messages)
     if not prompt:
         return {"success": False, "error": "Prompt is required"}
 
@@ -199,20 +280,30 @@ async def route_generate(
 
     backend, clean_model = detect_backend(model)
 
-    try:
-        if backend == "hf":
-            result = await _generate_hf(prompt, clean_model, temperature, max_tokens)
-        elif backend == "llama":
-            result = await _generate_llama(prompt, clean_model, temperature, max_tokens)
-        elif backend == "ollama":
-            result = await _generate_ollama(prompt, clean_model, temperature, max_tokens)
-        elif backend == "lmstudio":
-            result = await _generate_lmstudio(prompt, clean_model, temperature, max_tokens)
-        else:
-            result = await _generate_foundry(prompt, clean_model or None, temperature, max_tokens)
-    except Exception as exc:
-        logger.error("Model generation crashed for backend=%s model=%s: %s", backend, clean_model, exc, exc_info=True)
-        return {"success": False, "error": str(exc), "backend": backend}
+    cached, cache_key, may_store = await _cache_lookup(
+        backend, clean_model, prompt, temperature, max_tokens, context_hash, cache_control
+    )
+    if cached is not None:
+        return {"success": True, **cached, "cached": True}
+
+    # Chat arguments are only passed when there is a conversation
+    chat = {"messages": messages, "session_id": session_id} if messages else {}
+    # Admission: ServiceOverloadedError (429 / 503 + Retry-After) reaches the caller
+    async with get_admission().slot(backend, clean_model, priority):
+        try:
+            if backend == "hf":
+                result = await _generate_hf(prompt, clean_model, temperature, max_tokens, **chat)
+            elif backend == "llama":
+                result = await _generate_llama(prompt, clean_model, temperature, max_tokens, **chat)
+            elif backend == "ollama":
+                result = await _generate_ollama(prompt, clean_model, temperature, max_tokens, **chat)
+            elif backend == "lmstudio":
+                result = await _generate_lmstudio(prompt, clean_model, temperature, max_tokens, **chat)
+            else:
+                result = await _generate_foundry(prompt, clean_model or None, temperature, max_tokens, **chat)
+        except Exception as exc:
+            logger.error("Model generation crashed for backend=%s model=%s: %s", backend, clean_model, exc, exc_info=True)
+            return {"success": False, "error": str(exc), "backend": backend}
 
     if not result.get("success"):
         logger.error(
@@ -221,9 +312,129 @@ async def route_generate(
             clean_model,
             result.get("error", "unknown error"),
         )
+    elif cache_key and may_store:
+        await get_response_cache().put(namespace_of(backend, clean_model), cache_key, result)
     return result
 
 
+async def route_generate_stream(
+    prompt: str,
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    context_hash: Optional[str] = None,
+    cache_control: Optional[str] = None,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+    priority: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Streaming counterpart of :func:`route_generate`.
+
+    Workflow:
+        prompt + model → detect_backend() → backend token stream → unified chunks
+
+    Args:
+        prompt:      Input text (required, non-empty).
+        model:       Model ID with prefix (see :func:`detect_backend`).
+        temperature: Sampling temperature (default from config.defaults.temperature).
+        max_tokens:  Maximum tokens to generate (default from config.defaults.max_tokens).
+        context_hash: Hash of the RAG context (response cache key part).
+        cache_control: ``Cache-Control`` request header (cache bypass).
+        messages:    Chat messages (see :func:`route_generate`).
+        session_id:  Chat session (backend prefix reuse).
+        priority:    Admission class (see :func:`route_generate`).
+
+    Yields:
+        dict: Text chunks::
+
+            {"success": True, "content": "...", "finished": False}
+
+        then exactly one terminal chunk::
+
+            {"success": True, "content": "", "finished": True, "model": "ollama::...", "usage": {...}}
+            {"success": False, "error": "description", "finished": True}
+
+        A response-cache hit is replayed with the same shape; its terminal chunk
+        carries ``"cached": True``.
+
+        Without an admission slot the only chunk is an error with
+        ``"error_code": "overloaded"``, ``status_code`` (429 / 503) and ``retry_after``.
+
+    Example:
+        >>> async for chunk in route_generate_stream("Hello", model="ollama::qwen2.5:0.5b"):
+        ...     print(chunk.get("content", ""), end="")
+    """
+    if not prompt and messages:
+        prompt = flatten_messages(messages)
+    if not prompt:
+        yield {"success": False, "error": "Prompt is required", "finished": True}
+        return
+
+    if temperature is None:
+        temperature = _default_temperature()
+    if max_tokens is None:
+        max_tokens = _default_max_tokens()
+
+    backend, clean_model = detect_backend(model)
+
+    cached, cache_key, may_store = await _cache_lookup(
+        backend, clean_model, prompt, temperature, max_tokens, context_hash, cache_control
+    )
+    if cached is not None:
+        for chunk in replay_chunks(cached):
+            yield chunk
+        return
+    # Only a stream that reaches its terminal chunk is stored
+    text_parts: list = []
+    chat = {"messages": messages, "session_id": session_id} if messages else {}
+
+    streams = {
+        "hf": _stream_hf,
+        "llama": _stream_llama,
+        "ollama": _stream_ollama,
+        "lmstudio": _stream_lmstudio,
+    }
+    stream = streams.get(backend, _stream_foundry)
+
+    try:
+        # The admission slot is held until the stream ends or the client disconnects
+        async with get_admission().slot(backend, clean_model, priority):
+            # aclosing: when the consumer stops early (client disconnect) the backend
+            # stream is closed right away, which drops the upstream HTTP connection
+            # (llama.cpp / Ollama / Foundry / LM Studio abort) or stops HF generation.
+            async with aclosing(stream(prompt, clean_model, temperature, max_tokens, **chat)) as chunks:
+                async for chunk in chunks:
+                    if not chunk.get("success"):
+                        logger.error(
+                            "Model stream failed for backend=%s model=%s: %s",
+                            backend, clean_model, chunk.get("error", "unknown error"),
+                        )
+                        yield {**chunk, "finished": True}
+                        return
+                    if cache_key and may_store:
+                        text_parts.append(chunk.get("content") or "")
+                        if chunk.get("finished"):
+                            await get_response_cache().put(
+                                namespace_of(backend, clean_model), cache_key, {**chunk, "content": "".join(text_parts)}
+                            )
+                    yield chunk
+                    if chunk.get("finished"):
+                        return
+    except ServiceOverloadedError as exc:
+        # Rejected before the first chunk: callers may still answer 429 / 503
+        yield {
+            "success": False, "error": str(exc), "error_code": "overloaded",
+            "status_code": exc.status_code, "retry_after": exc.retry_after, "finished": True,
+        }
+        return
+    except Exception as exc:
+        logger.error("Model stream crashed for backend=%s model=%s: %s", backend, clean_model, exc, exc_info=True)
+        yield {"success": False, "error": str(exc), "backend": backend, "finished": True}
+        return
+    # Backend closed the stream without a terminal chunk
+    yield {"success": True, "content": "", "finished": True, "model": f"{backend}::{clean_model}", "usage": {}}
+
+
 # ── Backend implementations ───────────────────────────────────────────────────
 
 async def _generate_foundry(
@@ -231,6 +442,8 @@ async def _generate_foundry(
     model: Optional[str],
     temperature: float,
     max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
 ) -> dict:
     """Call Foundry Local backend.
 
@@ -239,15 +452,22 @@ async def _generate_foundry(
         model: Foundry model ID (without prefix), or None to use first loaded.
         temperature: Sampling temperature.
         max_tokens: Max tokens to generate.
+        messages: Chat messages sent instead of a single user message.
+        session_id: Unused (Foundry has no prefix-reuse API).
 
     Returns:
         dict: Unified response with ``model`` prefixed as ``foundry::<id>``.
     """
     from .foundry_client import foundry_client
 
-    result = await foundry_client.generate_text(
-        prompt, model=model, temperature=temperature, max_tokens=max_tokens
-    )
+    manager = get_residency_manager()
+    if model:
+        # Foundry loads on demand: track the model so it counts toward the limits
+        await manager.ensure_loaded("foundry", model)
+    async with manager.using("foundry", model or ""):
+        result = await foundry_client.generate_text(
+            prompt, model=model, temperature=temperature, max_tokens=max_tokens, messages=messages
+        )
 
     # Propagate model_not_loaded error to caller
     if result.get("error_code") == "model_not_loaded":
@@ -274,6 +494,8 @@ async def _generate_hf(
     model: str,
     temperature: float,
     max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
 ) -> dict:
     """Call HuggingFace Transformers backend.
 
@@ -282,6 +504,8 @@ async def _generate_hf(
         model: HuggingFace model ID (without prefix), e.g. ``'Qwen/Qwen2.5-0.5B'``.
         temperature: Sampling temperature.
         max_tokens: Max new tokens to generate.
+        messages: Chat messages rendered with the model's chat template.
+        session_id: Session whose past_key_values are reused (see hf_client).
 
     Returns:
         dict: Unified response with ``model`` prefixed as ``hf::<id>``.
@@ -289,7 +513,8 @@ async def _generate_hf(
     from .hf_client import hf_client
 
     result = await hf_client.generate(
-        prompt, model_id=model, temperature=temperature, max_new_tokens=max_tokens
+        prompt, model_id=model, temperature=temperature, max_new_tokens=max_tokens,
+        messages=messages, session_id=session_id,
     )
 
     if not result.get("content"):
@@ -308,6 +533,8 @@ async def _generate_llama(
     model: str,
     temperature: float,
     max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
 ) -> dict:
     """Call llama.cpp backend via its OpenAI-compatible HTTP API.
 
@@ -318,37 +545,75 @@ async def _generate_llama(
         model: Path to GGUF file (without prefix), used only for response labeling.
         temperature: Sampling temperature.
         max_tokens: Max tokens to generate.
+        messages: Chat messages (default: the prompt as one user message).
+        session_id: Session pinned to one server slot (see :func:`_llama_chat_fields`).
 
     Returns:
         dict: Unified response with ``model`` prefixed as ``llama::<path>``.
+
+    With several replicas of the model (llama_registry), the request goes to the
+    replica chosen by :mod:`llama_balancer`; a connection error or HTTP 5xx
+    ejects it and the request is retried on the next one.
     """
-    from .llama_registry import resolve_llama_server
+    from .llama_balancer import get_llama_balancer
 
-    server = resolve_llama_server(model)
-    if not server:
+    balancer = get_llama_balancer()
+    replicas = balancer.candidates(model, session_id)
+    if not replicas:
         return {
             "success": False,
             "error": f"llama.cpp model is not configured: {model}",
             "model": f"{PREFIX_LLAMA}{model}",
         }
 
-    openai_url = server.openai_url
+    result: dict = {}
+    for server in replicas[: balancer.retries + 1]:
+        result = await _llama_chat_once(server, prompt, temperature, max_tokens, messages, session_id)
+        if not result.pop("retryable", False):
+            return result
+        logger.warning("llama.cpp replica %s failed: %s", server.url, result.get("error"))
+    return result
+
 
+async def _llama_chat_once(
+    server,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Optional[List[dict]],
+    session_id: Optional[str],
+) -> dict:
+    """One non-streaming /chat/completions call to one replica.
+
+    Returns:
+        dict: Unified response; failures of the replica itself (connection
+        error, HTTP 5xx) carry ``"retryable": True``.
+    """
+    from .llama_balancer import get_llama_balancer
+
+    balancer = get_llama_balancer()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{openai_url.rstrip('/')}/chat/completions",
-                json={
-                    "model": "llama",  # llama.cpp ignores model name, uses loaded model
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "stream": False,
-                },
-            ) as resp:
-                if resp.status != 200:
-                    return {"success": False, "error": f"llama.cpp HTTP {resp.status}: {await resp.text()}"}
-                data = await resp.json()
+        with balancer.using(server):
+            async with get_residency_manager().using("llama", server.model_name), \
+                    pooled_session("llama") as session:
+                async with session.post(
+                    f"{server.openai_url.rstrip('/')}/chat/completions",
+                    json={
+                        "model": "llama",  # llama.cpp ignores model name, uses loaded model
+                        **_llama_chat_fields(server, prompt, messages, session_id),
+                        "temperature": temperature,
+                        "max_tokens": max_tokens,
+                        "stream": False,
+                    },
+                ) as resp:
+                    if resp.status != 200:
+                        error = f"llama.cpp HTTP {resp.status}: {await resp.text()}"
+                        if resp.status >= 500:
+                            balancer.report_failure(server, error)
+                            return {"success": False, "error": error, "retryable": True}
+                        return {"success": False, "error": error}
+                    data = await resp.json()
+        balancer.report_success(server)
 
         choices = data.get("choices") or []
         if not choices:
@@ -364,7 +629,21 @@ async def _generate_llama(
         }
     except Exception as e:
         logger.error(f"❌ llama.cpp request failed: {e}")
-        return {"success": False, "error": str(e)}
+        balancer.report_failure(server, str(e) or type(e).__name__)
+        return {"success": False, "error": str(e), "retryable": True}
+
+
+def _llama_chat_fields(server, prompt: str, messages: Optional[List[dict]], session_id: Optional[str]) -> dict:
+    """Messages and prompt-cache fields of a llama.cpp /chat/completions body.
+
+    ``cache_prompt`` lets the server skip the prefill of the prefix it already
+    holds in the slot's KV cache. With several slots (``llama_cpp.parallel``)
+    a session is pinned to one slot, so its next turn lands where its prefix is.
+    """
+    fields = {"messages": messages or [{"role": "user", "content": prompt}], "cache_prompt": True}
+    if session_id and (server.parallel or 0) > 1:
+        fields["id_slot"] = session_slot(session_id, server.parallel)
+    return fields
 
 
 async def _generate_ollama(
@@ -372,6 +651,8 @@ async def _generate_ollama(
     model: str,
     temperature: float,
     max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
 ) -> dict:
     """Call Ollama backend.
 
@@ -382,6 +663,8 @@ async def _generate_ollama(
         model: Ollama model name (without prefix), e.g. ``'qwen2.5:0.5b'``.
         temperature: Sampling temperature.
         max_tokens: Max tokens to generate.
+        messages: Chat messages (sent to /api/chat instead of /api/generate).
+        session_id: Unused (Ollama reuses the KV cache of a common prefix itself).
 
     Returns:
         dict: Unified response with ``model`` prefixed as ``ollama::<name>``.
@@ -389,7 +672,7 @@ async def _generate_ollama(
     from .ollama_client import ollama_client
 
     result = await ollama_client.generate(
-        prompt, model=model, temperature=temperature, max_tokens=max_tokens
+        prompt, model=model, temperature=temperature, max_tokens=max_tokens, messages=messages
     )
 
     if not result.get("content"):
@@ -408,6 +691,8 @@ async def _generate_lmstudio(
     model: str,
     temperature: float,
     max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
 ) -> dict:
     """Call LM Studio backend via native REST API v1.
 
@@ -418,18 +703,28 @@ async def _generate_lmstudio(
         model: LM Studio model key (without prefix), e.g. ``'ibm/granite-4-micro'``.
         temperature: Sampling temperature.
         max_tokens: Max output tokens.
+        messages: Chat messages of the session.
+        session_id: Session whose previous LM Studio response is continued:
+            when only the last message is new, just that message is sent with
+            ``previous_response_id`` instead of the whole transcript.
 
     Returns:
         dict: Unified response with ``model`` prefixed as ``lmstudio::<key>``.
     """
     from .lmstudio_client import lmstudio_client
 
+    request_input, previous = _lmstudio_input(prompt, messages, session_id)
     result = await lmstudio_client.generate(
-        prompt, model=model, temperature=temperature, max_tokens=max_tokens
+        request_input, model=model, temperature=temperature, max_tokens=max_tokens,
+        previous_response_id=previous, store=True if session_id else None,
     )
 
     if not result.get("success"):
         return {"success": False, "error": result.get("error") or "LM Studio generation error"}
+    if messages:
+        get_chat_context().remember_response(
+            session_id, messages, result.get("content", ""), result.get("response_id")
+        )
 
     return {
         "success": True,
@@ -438,3 +733,206 @@ async def _generate_lmstudio(
         "usage": result.get("usage") or {},
         "response_id": result.get("response_id"),
     }
+
+
+def _lmstudio_input(prompt: str, messages: Optional[List[dict]], session_id: Optional[str]) -> Tuple[str, Optional[str]]:
+    """LM Studio input and previous_response_id for a (possibly chat) request."""
+    previous = get_chat_context().continuation(session_id, messages) if messages else None
+    if previous:
+        return str(messages[-1]["content"]), previous
+    return prompt, None
+
+
+# ── Streaming backend implementations ─────────────────────────────────────────
+
+def _finished(chunk: dict, model: str) -> dict:
+    """Terminal chunk with the prefixed model name and usage."""
+    result = {"success": True, "content": "", "finished": True, "model": model, "usage": chunk.get("usage") or {}}
+    if chunk.get("response_id"):
+        result["response_id"] = chunk["response_id"]
+    return result
+
+
+async def _relay(chunks: AsyncIterator[dict], model: str) -> AsyncIterator[dict]:
+    """Pass client chunks through, stamping the terminal one; closing the relay closes the client stream."""
+    async with aclosing(chunks) as stream:
+        async for chunk in stream:
+            yield _finished(chunk, model) if chunk.get("finished") and chunk.get("success") else chunk
+
+
+async def _held(kind: str, model_id: str, chunks: AsyncIterator[dict], on_demand: bool = False) -> AsyncIterator[dict]:
+    """Relay chunks while the model is marked busy, so it is not evicted mid-stream."""
+    manager = get_residency_manager()
+    async with aclosing(chunks) as stream:
+        if on_demand:
+            await manager.ensure_loaded(kind, model_id)
+        async with manager.using(kind, model_id):
+            async for chunk in stream:
+                yield chunk
+
+
+def _stream_foundry(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Stream from Foundry Local (/chat/completions, SSE)."""
+    from .foundry_client import foundry_client
+
+    label = f"{PREFIX_FOUNDRY}{model}" if model else PREFIX_FOUNDRY.rstrip(":")
+    return _relay(
+        _held(
+            "foundry",
+            model,
+            foundry_client.generate_stream(
+                prompt, model=model or None, temperature=temperature, max_tokens=max_tokens, messages=messages
+            ),
+            on_demand=bool(model),
+        ),
+        label,
+    )
+
+
+def _stream_hf(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Stream from HuggingFace Transformers (TextIteratorStreamer)."""
+    from .hf_client import hf_client
+
+    return _relay(
+        hf_client.generate_stream(
+            prompt, model_id=model, temperature=temperature, max_new_tokens=max_tokens,
+            messages=messages, session_id=session_id,
+        ),
+        f"{PREFIX_HF}{model}",
+    )
+
+
+async def _stream_llama(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Stream from llama.cpp server (OpenAI /chat/completions with ``stream: true``, SSE).
+
+    A failed replica is retried on the next one only before the first token.
+    """
+    from .llama_balancer import get_llama_balancer
+
+    balancer = get_llama_balancer()
+    replicas = balancer.candidates(model, session_id)[: balancer.retries + 1]
+    if not replicas:
+        yield {"success": False, "error": f"llama.cpp model is not configured: {model}", "finished": True}
+        return
+
+    # No total timeout: a long completion is fine as long as tokens keep arriving
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=300)
+    for attempt, server in enumerate(replicas):
+        last = attempt == len(replicas) - 1
+        usage: dict = {}
+        started = False
+        try:
+            with balancer.using(server):
+                async with get_residency_manager().using("llama", server.model_name), \
+                        pooled_session("llama", timeout=timeout) as session:
+                    async with session.post(
+                        f"{server.openai_url.rstrip('/')}/chat/completions",
+                        json={
+                            "model": "llama",  # llama.cpp ignores model name, uses loaded model
+                            **_llama_chat_fields(server, prompt, messages, session_id),
+                            "temperature": temperature,
+                            "max_tokens": max_tokens,
+                            "stream": True,
+                            "stream_options": {"include_usage": True},
+                        },
+                    ) as resp:
+                        if resp.status != 200:
+                            error = f"llama.cpp HTTP {resp.status}: {await resp.text()}"
+                            if resp.status >= 500:
+                                balancer.report_failure(server, error)
+                                if not last:
+                                    continue
+                            yield {"success": False, "error": error, "finished": True}
+                            return
+                        async for line in resp.content:
+                            line_str = line.decode("utf-8", errors="replace").strip()
+                            if not line_str.startswith("data: "):
+                                continue
+                            data_str = line_str[6:]
+                            if data_str == "[DONE]":
+                                break
+                            try:
+                                data = json.loads(data_str)
+                            except json.JSONDecodeError:
+                                continue
+                            usage = data.get("usage") or usage
+                            choices = data.get("choices") or []
+                            content = (choices[0].get("delta") or {}).get("content") if choices else None
+                            if content:
+                                started = True
+                                yield {"success": True, "content": content, "finished": False}
+        except Exception as exc:
+            balancer.report_failure(server, str(exc) or type(exc).__name__)
+            if started or last:
+                raise
+            logger.warning("llama.cpp replica %s failed before the first token: %s", server.url, exc)
+            continue
+        balancer.report_success(server)
+        yield _finished({"usage": usage}, f"{PREFIX_LLAMA}{server.alias}")
+        return
+
+
+def _stream_ollama(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Stream from Ollama (/api/generate, NDJSON)."""
+    from .ollama_client import ollama_client
+
+    return _relay(
+        ollama_client.generate_stream(
+            prompt, model=model, temperature=temperature, max_tokens=max_tokens, messages=messages
+        ),
+        f"{PREFIX_OLLAMA}{model}",
+    )
+
+
+async def _stream_lmstudio(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: Optional[List[dict]] = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Stream from LM Studio (/api/v1/chat, SSE), continuing the session's previous response."""
+    from .lmstudio_client import lmstudio_client
+
+    request_input, previous = _lmstudio_input(prompt, messages, session_id)
+    parts: List[str] = []
+    chunks = lmstudio_client.stream_generate(
+        request_input, model=model, temperature=temperature, max_tokens=max_tokens,
+        previous_response_id=previous, store=True if session_id else None,
+    )
+    async with aclosing(_relay(chunks, f"{PREFIX_LMSTUDIO}{model}")) as stream:
+        async for chunk in stream:
+            if not chunk.get("finished"):
+                parts.append(chunk.get("content") or "")
+            elif chunk.get("success") and messages:
+                get_chat_context().remember_response(session_id, messages, "".join(parts), chunk.get("response_id"))
+            yield chunk
@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG ANN Index Factory — Flat / IVF-Flat / IVF-PQ / HNSW
+# =============================================================================
+# Description:
+#   Builds FAISS indexes of a configurable type for RAG profiles, trains
+#   IVF/PQ quantizers on a sample, applies query-time parameters
+#   (nprobe, efSearch) and records the index type in index_info.json and
+#   meta.json so RAGSystem.reload_index can pick matching search params.
+#   read_index() loads an index memory-mapped (IO_FLAG_MMAP_IFC / IO_FLAG_MMAP).
+#
+#   Index types (all inner product on L2-normalised vectors):
+#     flat      — IndexFlatIP, exact brute force (default, small profiles)
+#     ivf_flat  — IndexIVFFlat, clusters + exact vectors
+#     ivf_pq    — IndexIVFPQ, clusters + product-quantised vectors (low RAM)
+#     hnsw      — IndexHNSWFlat, graph search, no training
+#
+#   Per-profile settings live in meta.json ("index_type", "index_params");
+#   missing values fall back to config.json → rag_system.ann_*.
+#
+# Examples:
+#   >>> from src.rag.ann_index import build_index, resolve_index_params
+#   >>> params = resolve_index_params(Path("~/.aiassistant/rag/support"))
+#   >>> index = build_index(vectors, ids=ids, params=params)
+#   >>> apply_search_params(index, params)
+#
+#   CLI (convert an existing profile in place):
+#   python -m src.rag.indexer --convert support --index-type hnsw
+#
+# File: src/rag/ann_index.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from src.core.config import config
+from src.logger import logger
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS recommends at least 39 training points per IVF centroid / PQ code
+MIN_POINTS_PER_CENTROID = 39
+PQ_NBITS = 8
+
+
+def default_index_params() -> Dict[str, Any]:
+    """Return index parameters from config.json (rag_system.ann_*).
+
+    Returns:
+        dict: index_type, nlist, pq_m, hnsw_m, ef_construction, nprobe, ef_search, train_sample.
+    """
+    return {
+        "index_type": config.rag_ann_index_type,
+        "nlist": config.rag_ann_nlist,
+        "pq_m": config.rag_ann_pq_m,
+        "hnsw_m": config.rag_ann_hnsw_m,
+        "ef_construction": config.rag_ann_ef_construction,
+        "nprobe": config.rag_ann_nprobe,
+        "ef_search": config.rag_ann_ef_search,
+        "train_sample": config.rag_ann_train_sample,
+    }
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        logger.debug(f"Could not read {path}")
+        return {}
+
+
+def resolve_index_params(index_dir: Optional[Path] = None, **overrides: Any) -> Dict[str, Any]:
+    """Merge config defaults, the profile's meta.json settings and explicit overrides.
+
+    Args:
+        index_dir (Path | None): Profile directory (meta.json is read from it).
+        **overrides: Explicit values (None values are ignored).
+
+    Returns:
+        dict: Effective index parameters.
+
+    Raises:
+        ValueError: When index_type is not one of INDEX_TYPES.
+    """
+    params = default_index_params()
+    if index_dir is not None:
+        meta = _read_json(Path(index_dir).expanduser() / "meta.json")
+        stored = meta.get("index_params") or {}
+        params.update({k: v for k, v in stored.items() if v is not None})
+        # index_params.index_type — запрошенный тип; index_type — фактический (может быть flat до обучения)
+        # index_params.index_type is the requested type; index_type is the one on disk (flat until trainable)
+        if not stored.get("index_type") and meta.get("index_type"):
+            params["index_type"] = meta["index_type"]
+    params.update({k: v for k, v in overrides.items() if v is not None})
+
+    params["index_type"] = str(params["index_type"]).lower().replace("-", "_")
+    if params["index_type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{params['index_type']}', expected one of {INDEX_TYPES}")
+    return params
+
+
+# ── Building ──────────────────────────────────────────────────────────────────
+
+def _auto_nlist(n: int, requested: int) -> int:
+    """Pick nlist: requested value or 4·√N, capped so every centroid gets enough training points."""
+    nlist = int(requested) if requested else int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_m_for(dim: int, requested: int) -> int:
+    """Largest divisor of dim not greater than the requested PQ M."""
+    for m in range(max(1, min(int(requested), dim)), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def _create_empty(dim: int, index_type: str, n: int, params: Dict[str, Any]) -> Tuple[faiss.Index, str]:
+    """Create an untrained index of the requested type for n vectors.
+
+    Falls back to flat when there are too few vectors to train IVF/PQ.
+
+    Returns:
+        tuple: (index, effective index type).
+    """
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, int(params["hnsw_m"]), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = int(params["ef_construction"])
+        return index, "hnsw"
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        min_points = MIN_POINTS_PER_CENTROID * (2 ** PQ_NBITS if index_type == "ivf_pq" else 8)
+        if n < min_points:
+            logger.warning(
+                f"⚠️ {index_type}: {n} vectors is too few to train (need ≥ {min_points}), using flat"
+            )
+            return faiss.IndexFlatIP(dim), "flat"
+
+        nlist = _auto_nlist(n, params["nlist"])
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer, dim, nlist, _pq_m_for(dim, params["pq_m"]), PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+            )
+        return index, index_type
+
+    return faiss.IndexFlatIP(dim), "flat"
+
+
+def build_index(
+    vectors: np.ndarray,
+    ids: Optional[np.ndarray] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> faiss.Index:
+    """Build, train and fill an index of the configured type.
+
+    Args:
+        vectors (np.ndarray): L2-normalised float32 vectors, shape (N, dim).
+        ids (np.ndarray | None): int64 vector ids. When given the index is wrapped
+            in IndexIDMap (incremental profiles, ids = chunks.id).
+        params (dict | None): Result of resolve_index_params(); config defaults when None.
+
+    Returns:
+        faiss.Index: Filled index with query-time parameters applied.
+    """
+    params = params or resolve_index_params()
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    n, dim = vectors.shape
+    index, effective_type = _create_empty(dim, params["index_type"], n, params)
+
+    if not index.is_trained:
+        sample = vectors
+        train_sample = int(params.get("train_sample") or 0)
+        if train_sample and n > train_sample:
+            rng = np.random.default_rng(0)
+            sample = vectors[np.sort(rng.choice(n, train_sample, replace=False))]
+        logger.info(f"Training {effective_type} index on {len(sample)} of {n} vectors")
+        index.train(sample)
+
+    if ids is not None:
+        index = faiss.IndexIDMap(index)
+        index.add_with_ids(vectors, np.ascontiguousarray(ids, dtype="int64"))
+    else:
+        index.add(vectors)
+
+    apply_search_params(index, params)
+    logger.info(f"✅ Built {effective_type} index: {index.ntotal} vectors (dim={dim})")
+    return index
+
+
+def empty_index(dim: int, with_ids: bool = True) -> faiss.Index:
+    """Create an empty flat index (used until a profile has enough vectors to train).
+
+    Args:
+        dim (int): Vector dimension.
+        with_ids (bool): Wrap in IndexIDMap.
+
+    Returns:
+        faiss.Index: Empty index.
+    """
+    index = faiss.IndexFlatIP(dim)
+    return faiss.IndexIDMap(index) if with_ids else index
+
+
+# ── Inspection / search parameters ────────────────────────────────────────────
+
+def _base_index(index: faiss.Index) -> faiss.Index:
+    """Unwrap IndexIDMap / IndexIDMap2 and downcast to the concrete type."""
+    if "IDMap" in type(index).__name__:
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Detect the index type of a loaded FAISS index.
+
+    Args:
+        index (faiss.Index): Index (optionally wrapped in IndexIDMap).
+
+    Returns:
+        str: flat, ivf_flat, ivf_pq or hnsw.
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf_flat"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def describe_index(index: faiss.Index) -> Dict[str, Any]:
+    """Return the structural parameters of an index for index_info.json / meta.json.
+
+    Args:
+        index (faiss.Index): Loaded index.
+
+    Returns:
+        dict: index_type, vectors, dimension and type-specific fields.
+    """
+    base = _base_index(index)
+    info: Dict[str, Any] = {
+        "index_type": index_type_of(index),
+        "vectors": int(index.ntotal),
+        "dimension": int(index.d),
+    }
+    if isinstance(base, faiss.IndexIVF):
+        info["nlist"] = int(base.nlist)
+        info["nprobe"] = int(base.nprobe)
+    if isinstance(base, faiss.IndexIVFPQ):
+        info["pq_m"] = int(base.pq.M)
+    if isinstance(base, faiss.IndexHNSW):
+        info["ef_search"] = int(base.hnsw.efSearch)
+    return info
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, Any]) -> None:
+    """Set query-time parameters (nprobe for IVF, efSearch for HNSW) on an index.
+
+    Args:
+        index (faiss.Index): Loaded index.
+        params (dict): Must contain nprobe / ef_search.
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = max(1, min(int(params["nprobe"]), int(base.nlist)))
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = max(1, int(params["ef_search"]))
+
+
+def read_index(path: Path, use_mmap: bool = True) -> Tuple[faiss.Index, bool]:
+    """Read a FAISS index, memory-mapping its vectors when possible.
+
+    IO_FLAG_MMAP_IFC (faiss ≥ 1.9) maps flat / HNSW / IDMap storage without a copy;
+    older builds only map IVF inverted lists via IO_FLAG_MMAP. Falls back to a
+    regular read when the index type does not support mapping.
+
+    Args:
+        path (Path): faiss.index file.
+        use_mmap (bool): Try a memory-mapped read first.
+
+    Returns:
+        tuple: (index, True if memory-mapped). A mapped index is read-only.
+    """
+    if use_mmap:
+        flag = getattr(faiss, "IO_FLAG_MMAP_IFC", None) or faiss.IO_FLAG_MMAP
+        try:
+            return faiss.read_index(str(path), flag), True
+        except Exception as e:
+            logger.debug(f"mmap read of {path} failed, reading into RAM: {e}")
+    return faiss.read_index(str(path)), False
+
+
+def enable_reconstruct(index: faiss.Index) -> faiss.Index:
+    """Make index.reconstruct() usable (IVF indexes need a direct map).
+
+    Args:
+        index (faiss.Index): Loaded index (optionally wrapped in IndexIDMap).
+
+    Returns:
+        faiss.Index: Unwrapped base index that supports reconstruct(position).
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.make_direct_map()
+    return base
+
+
+def extract_vectors(index: faiss.Index) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Read all stored vectors (and ids for IndexIDMap) back from an index.
+
+    IVF-PQ vectors are decoded approximations — converting away from ivf_pq is lossy.
+
+    Args:
+        index (faiss.Index): Loaded index.
+
+    Returns:
+        tuple: (vectors float32 (N, dim), ids int64 (N,) or None).
+    """
+    ids = None
+    if "IDMap" in type(index).__name__:
+        ids = faiss.vector_to_array(index.id_map).astype("int64")
+    base = enable_reconstruct(index)
+    vectors = base.reconstruct_n(0, base.ntotal) if base.ntotal else np.zeros((0, base.d), dtype="float32")
+    return np.ascontiguousarray(vectors, dtype="float32"), ids
+
+
+# ── Metadata ──────────────────────────────────────────────────────────────────
+
+def record_index_type(index_dir: Path, index: faiss.Index, params: Optional[Dict[str, Any]] = None) -> None:
+    """Record index type and parameters in index_info.json and meta.json.
+
+    index_type holds the type actually on disk; meta.json index_params keeps the
+    requested type so a later rebuild trains it once enough vectors exist.
+
+    Args:
+        index_dir (Path): Profile directory.
+        index (faiss.Index): Index that was just written.
+        params (dict | None): Effective build params; stored as the profile's index_params.
+    """
+    index_dir = Path(index_dir).expanduser()
+    info = describe_index(index)
+    profile_params = {k: params[k] for k in ("index_type", "nlist", "pq_m", "hnsw_m", "ef_construction", "nprobe", "ef_search")
+                      if params and k in params}
+
+    for name in ("index_info.json", "meta.json"):
+        path = index_dir / name
+        if name == "index_info.json" and not path.exists():
+            continue
+        data = _read_json(path)
+        data["index_type"] = info["index_type"]
+        data["index"] = info
+        if name == "meta.json":
+            if profile_params:
+                data["index_params"] = profile_params
+            data.setdefault("name", index_dir.name)
+            data["updated_at"] = datetime.now().isoformat()
+        try:
+            path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not record index type in {path}: {e}")
+
+
+def convert_index_dir(index_dir: Path, **overrides: Any) -> Dict[str, Any]:
+    """Rebuild a profile's faiss.index in place with another index type.
+
+    Stored vectors (and IndexIDMap ids) are reused, no re-embedding is done.
+
+    Args:
+        index_dir (Path): Profile directory containing faiss.index.
+        **overrides: index_type, nlist, pq_m, hnsw_m, ef_construction, nprobe, ef_search.
+
+    Returns:
+        dict: success, index_dir, before, after.
+
+    Raises:
+        FileNotFoundError: When the profile has no faiss.index.
+    """
+    index_dir = Path(index_dir).expanduser()
+    index_path = index_dir / "faiss.index"
+    if not index_path.exists():
+        raise FileNotFoundError(f"faiss.index not found in {index_dir}")
+
+    old_index = faiss.read_index(str(index_path))
+    before = describe_index(old_index)
+    if before["index_type"] == "ivf_pq":
+        logger.warning("⚠️ Source index is ivf_pq — vectors are PQ approximations, conversion is lossy")
+
+    params = resolve_index_params(index_dir, **overrides)
+    vectors, ids = extract_vectors(old_index)
+    new_index = build_index(vectors, ids=ids, params=params)
+
+    tmp_path = index_path.with_suffix(".index.tmp")
+    faiss.write_index(new_index, str(tmp_path))
+    tmp_path.replace(index_path)
+    record_index_type(index_dir, new_index, params)
+
+    after = describe_index(new_index)
+    logger.info(f"✅ Converted {index_dir}: {before['index_type']} → {after['index_type']} ({after['vectors']} vectors)")
+    return {"success": True, "index_dir": str(index_dir), "before": before, "after": after}
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG Bulk Ingestion — many uploads in one indexing pass
+# =============================================================================
+# Description:
+#   Bulk mode for /rag/index/batch and /rag/index/bulk. Stages:
+#     upload   — uploads spooled to temp files
+#     extract  — text extraction in a dedicated ExtractionEngine (per-family
+#                process pools, worker limits and per-file timeouts)
+#     chunk    — all documents chunked
+#     embed    — one embedding pass in large batches (bulk_embed_batch_size)
+#     store    — documents + chunks inserted in one SQLite transaction
+#     index    — vectors added to the shared FAISS index, faiss.index written once
+#     done     — summary (per-file results and failures)
+#   Each stage reports progress events in the same shape as /rag/index/stream.
+#
+# Examples:
+#   >>> ingestor = BulkIngestor()
+#   >>> async for event in ingestor.ingest_stream(files):
+#   ...     print(event["stage"], event.get("done"), event.get("total"))
+#
+# File: src/rag/bulk_ingest.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - Extraction runs on ExtractionEngine instead of its own process pool:
+#     per-file timeouts, crash restarts, failures reported with the file name
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+from src.core.config import config
+from src.logger import logger
+
+from .incremental_indexer import get_indexer
+from .rag_system import rag_system
+
+# ── Extraction worker (runs in a child process) ───────────────────────────────
+
+_worker_ingestor = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _extract_in_worker(path: str, source_name: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract, clean and language-tag one file inside a pool process.
+
+    Errors are returned as data: HTTPException and extractor exceptions do not
+    always survive pickling back to the parent.
+
+    Args:
+        path (str): Temp file with the upload bytes.
+        source_name (str): Original file name (used as title / source path).
+        settings (dict): text_extractor settings.
+
+    Returns:
+        dict: source, content, method, metadata — or source, error.
+    """
+    global _worker_ingestor, _worker_loop
+    try:
+        if _worker_ingestor is None:
+            from .document_ingestor import DocumentIngestor
+            _worker_ingestor = DocumentIngestor(settings=settings)
+            # One loop per worker: client sessions created by extractors stay on their loop
+            _worker_loop = asyncio.new_event_loop()
+
+        async def _run() -> Tuple[str, str, str, Dict[str, Any]]:
+            content, method, meta = await _worker_ingestor._process_file_recursive(path, source_name)
+            return await _worker_ingestor._finalize_and_detect(content, source_name, method, meta)
+
+        content, source, method, metadata = _worker_loop.run_until_complete(_run())
+        return {"source": source, "content": content, "method": method, "metadata": metadata}
+    except Exception as e:
+        return {"source": source_name, "error": str(getattr(e, "detail", None) or e)}
+
+
+# ── Extraction engine ─────────────────────────────────────────────────────────
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_bulk_extraction_engine():
+    """Return (or create) the ExtractionEngine used for bulk extraction.
+
+    A separate instance from the interactive one, so a bulk job does not take
+    every worker of the upload endpoints. Family timeouts, restarts of hung or
+    crashed pools and worker recycling come from the engine; with
+    rag_system.bulk_extract_workers > 0 every family gets that many processes.
+
+    Returns:
+        ExtractionEngine: Shared bulk engine.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from .text_extractors.text_extractor_4_rag.process_pool import FAMILIES, ExtractionEngine
+
+            workers = config.rag_bulk_extract_workers
+            _engine = ExtractionEngine(workers={name: workers for name in FAMILIES} if workers else None)
+            logger.info(f"RAG bulk extraction engine: {_engine.stats()['families']}")
+    return _engine
+
+
+def shutdown_bulk_extraction_engine() -> None:
+    """Shut the bulk engine down (application lifespan)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown(wait=False)
+            _engine = None
+
+
+# ── Bulk ingestor ─────────────────────────────────────────────────────────────
+
+
+class BulkIngestor:
+    """Ingest many uploads with parallel extraction and a single indexing pass.
+
+    Args:
+        index_dir (str | Path | None): Profile directory (default: config.rag_index_dir).
+    """
+
+    def __init__(self, index_dir: str | Path | None = None) -> None:
+        self.index_dir = Path(index_dir or config.rag_index_dir).expanduser()
+        self.settings: Dict[str, Any] = config.get_section("text_extractor")
+
+    def _spool(self, upload: UploadFile, tmp_dir: str, n: int) -> str:
+        """Copy an upload to a temp file (extractors need a path on disk)."""
+        source_name = upload.filename or f"upload-{n}"
+        max_mb = self.settings.get("max_file_size_mb", 20)
+        if upload.size and upload.size > max_mb * 1024 * 1024:
+            raise ValueError(f"File too large (max {max_mb} MB)")
+        suffix = os.path.splitext(os.path.basename(source_name))[1] or ".tmp"
+        path = os.path.join(tmp_dir, f"{n}{suffix}")
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(upload.file, buffer)
+        return path
+
+    async def ingest_stream(self, uploads: List[UploadFile]) -> AsyncIterator[Dict[str, Any]]:
+        """Run all stages, yielding progress events.
+
+        Args:
+            uploads (List[UploadFile]): Files and archives to index.
+
+        Returns:
+            AsyncIterator[dict]: Events with stage, done, total, message; the last one
+            is {"stage": "done", ...} or {"stage": "error", ...}.
+        """
+        started = time.perf_counter()
+        total = len(uploads)
+        failed: List[Dict[str, str]] = []
+        extracted: List[Dict[str, Any]] = []
+
+        with tempfile.TemporaryDirectory(prefix="rag-bulk-") as tmp_dir:
+            # Stage 1: spool uploads to disk
+            spooled: List[Tuple[str, str]] = []
+            for n, upload in enumerate(uploads):
+                name = upload.filename or f"upload-{n}"
+                try:
+                    spooled.append((await asyncio.to_thread(self._spool, upload, tmp_dir, n), name))
+                except Exception as e:
+                    failed.append({"file": name, "error": str(e)})
+            yield {"stage": "upload", "done": len(spooled), "total": total,
+                   "message": f"Received {len(spooled)}/{total} files"}
+            loop = asyncio.get_running_loop()
+
+            # Stage 2: extraction in the engine's per-family process pools
+            from .text_extractors.text_extractor_4_rag.process_pool import format_family
+
+            engine = get_bulk_extraction_engine()
+            pending = {
+                asyncio.wrap_future(engine.submit(format_family(name), _extract_in_worker, path, name, self.settings)): name
+                for path, name in spooled
+            }
+            done = 0
+            while pending:
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    name = pending.pop(future)
+                    done += 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Family timeout (pool restarted) or crashed worker
+                        result = {"source": name, "error": str(e) or type(e).__name__}
+                    if result.get("error"):
+                        failed.append({"file": result["source"], "error": result["error"]})
+                    elif not result["content"].strip():
+                        failed.append({"file": result["source"], "error": "No text extracted"})
+                    else:
+                        extracted.append(result)
+                    yield {"stage": "extract", "done": done, "total": len(spooled), "file": result["source"],
+                           "message": f"Extracted {done}/{len(spooled)}: {result['source']}"}
+
+        if not extracted:
+            yield {"stage": "error", "message": "No text extracted from any file", "failed": failed}
+            return
+
+        # Stages 3–6: chunk → embed → store → index (in a worker thread, events via queue)
+        queue: asyncio.Queue = asyncio.Queue()
+        last_sent: Dict[str, int] = {}
+
+        def _progress(stage: str, done: int, total_items: int) -> None:
+            # Throttle to ~100 events per stage
+            step = max(1, total_items // 100)
+            if done != total_items and done - last_sent.get(stage, -step) < step:
+                return
+            last_sent[stage] = done
+            event = {"stage": stage, "done": done, "total": total_items,
+                     "message": f"{stage.capitalize()} {done}/{total_items}"}
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        documents = [{"title": r["source"], "content": r["content"], "source_path": r["source"]} for r in extracted]
+        indexer = get_indexer(self.index_dir)
+        task = asyncio.ensure_future(asyncio.to_thread(indexer.add_documents, documents, _progress))
+        while not task.done() or not queue.empty():
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+
+        try:
+            result = task.result()
+        except Exception as e:
+            logger.error(f"Bulk indexing failed: {e}", exc_info=True)
+            yield {"stage": "error", "message": str(e), "failed": failed}
+            return
+
+        await rag_system.refresh_profile(str(self.index_dir))
+
+        results = [
+            {"file": r["source"], "length": len(r["content"]), "method": r["method"],
+             "doc_id": d["doc_id"], "chunks": d["chunks"]}
+            for r, d in zip(extracted, result["documents"])
+        ]
+        seconds = round(time.perf_counter() - started, 2)
+        logger.info(f"✅ Bulk ingest: {len(results)}/{total} files, {result['chunks_added']} chunks in {seconds}s")
+        yield {"stage": "done", "success": True, "indexed": len(results), "total": total,
+               "chunks": result["chunks_added"], "results": results, "failed": failed, "seconds": seconds,
+               "message": f"Done: {len(results)} files, {result['chunks_added']} chunks indexed"}
+
+    async def ingest(self, uploads: List[UploadFile]) -> Dict[str, Any]:
+        """Run ingest_stream() to completion and return its final event.
+
+        Args:
+            uploads (List[UploadFile]): Files and archives to index.
+
+        Returns:
+            dict: The final "done" or "error" event.
+        """
+        final: Dict[str, Any] = {"stage": "error", "message": "No files"}
+        async for event in self.ingest_stream(uploads):
+            if event["stage"] in ("done", "error"):
+                final = event
+        return final
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG Chunk Store — offset-indexed on-disk chunk metadata
+# =============================================================================
+# Description:
+#   Compact replacement for loading chunks.json into RAM. Chunks are stored
+#   one JSON object per line in chunks.jsonl; chunks.offsets.npy holds the
+#   N+1 byte offsets so chunk i is data[offsets[i]:offsets[i+1]].
+#   Both files are memory-mapped, so opening a profile costs O(1) and only the
+#   top-k hits returned by FAISS are decoded.
+#
+#   Layout (index_dir):
+#     chunks.json         — legacy list (still written by RAGIndexer for tools)
+#     chunks.jsonl        — chunk i on line i (position == FAISS vector id)
+#     chunks.offsets.npy  — uint64[N + 1] line offsets
+#
+# Examples:
+#   >>> from src.rag.chunk_store import ChunkStore, ensure_chunk_store
+#   >>> store = ensure_chunk_store(Path("~/.aiassistant/rag/support"))
+#   >>> store.get_many([12, 7, 3])
+#
+# File: src/rag/chunk_store.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import json
+import mmap
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.logger import logger
+
+DATA_FILE = "chunks.jsonl"
+OFFSETS_FILE = "chunks.offsets.npy"
+LEGACY_FILE = "chunks.json"
+
+
+def write_chunk_store(index_dir: Path, chunks: Iterable[Dict[str, Any]]) -> int:
+    """Write chunks.jsonl + chunks.offsets.npy atomically.
+
+    Args:
+        index_dir (Path): Profile directory.
+        chunks (Iterable[dict]): Chunks in FAISS position order.
+
+    Returns:
+        int: Number of chunks written.
+    """
+    index_dir = Path(index_dir).expanduser()
+    data_path = index_dir / DATA_FILE
+    offsets_path = index_dir / OFFSETS_FILE
+    tmp_data = data_path.with_suffix(".jsonl.tmp")
+    tmp_offsets = index_dir / (OFFSETS_FILE + ".tmp")
+
+    offsets: List[int] = [0]
+    with open(tmp_data, "wb") as f:
+        for chunk in chunks:
+            line = json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    with open(tmp_offsets, "wb") as f:
+        np.save(f, np.asarray(offsets, dtype="uint64"))
+
+    # Смещения заменяются последними: читатель всегда видит согласованную пару
+    # Offsets are replaced last so a reader never sees offsets for a shorter data file
+    tmp_data.replace(data_path)
+    tmp_offsets.replace(offsets_path)
+    return len(offsets) - 1
+
+
+class ChunkStore:
+    """Read-only random access to chunks by FAISS position.
+
+    Args:
+        index_dir (Path): Profile directory with chunks.jsonl and chunks.offsets.npy.
+        use_mmap (bool): Memory-map both files. When False, offsets are loaded into
+            RAM and each lookup opens the data file (no file stays mapped or open,
+            so writers can replace it on Windows).
+    """
+
+    def __init__(self, index_dir: Path, use_mmap: bool = True) -> None:
+        self.index_dir = Path(index_dir).expanduser()
+        self.data_path = self.index_dir / DATA_FILE
+        self.use_mmap = use_mmap
+        self._offsets = np.load(self.index_dir / OFFSETS_FILE, mmap_mode="r" if use_mmap else None)
+        self._data: Optional[mmap.mmap] = None
+        self._file = None
+        self._lock = threading.Lock()
+        if use_mmap and len(self) > 0:
+            self._file = open(self.data_path, "rb")
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return max(0, int(self._offsets.shape[0]) - 1)
+
+    def _read_ranges(self, positions: List[int]) -> Dict[int, bytes]:
+        ranges = {p: (int(self._offsets[p]), int(self._offsets[p + 1])) for p in positions}
+        if self._data is not None:
+            return {p: self._data[start:end] for p, (start, end) in ranges.items()}
+
+        raw: Dict[int, bytes] = {}
+        with open(self.data_path, "rb") as f:
+            for p, (start, end) in sorted(ranges.items(), key=lambda item: item[1][0]):
+                f.seek(start)
+                raw[p] = f.read(end - start)
+        return raw
+
+    def get(self, position: int) -> Optional[Dict[str, Any]]:
+        """Return chunk at a FAISS position (None when out of range).
+
+        Args:
+            position (int): Vector position.
+
+        Returns:
+            dict | None: Decoded chunk.
+        """
+        return self.get_many([position]).get(int(position))
+
+    def get_many(self, positions: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Decode only the requested chunks.
+
+        Args:
+            positions (Iterable[int]): FAISS positions (invalid ones are skipped).
+
+        Returns:
+            dict: position → chunk dict (a fresh copy the caller may modify).
+        """
+        total = len(self)
+        wanted = sorted({int(p) for p in positions if 0 <= int(p) < total})
+        if not wanted:
+            return {}
+        with self._lock:
+            raw = self._read_ranges(wanted)
+        return {p: json.loads(raw[p]) for p in wanted}
+
+    def close(self) -> None:
+        """Release the memory maps."""
+        with self._lock:
+            if self._data is not None:
+                self._data.close()
+                self._data = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._offsets = np.zeros(1, dtype="uint64")
+
+
+def ensure_chunk_store(index_dir: Path, use_mmap: bool = True) -> Optional[ChunkStore]:
+    """Open the profile's chunk store, converting legacy chunks.json once if needed.
+
+    The conversion is repeated only when chunks.json is newer than the store.
+
+    Args:
+        index_dir (Path): Profile directory.
+        use_mmap (bool): See ChunkStore.
+
+    Returns:
+        ChunkStore | None: Store, or None when the profile has no chunk metadata.
+    """
+    index_dir = Path(index_dir).expanduser()
+    legacy = index_dir / LEGACY_FILE
+    offsets = index_dir / OFFSETS_FILE
+    data = index_dir / DATA_FILE
+
+    stale = not offsets.exists() or not data.exists()
+    if not stale and legacy.exists():
+        stale = legacy.stat().st_mtime > offsets.stat().st_mtime
+
+    if stale:
+        if not legacy.exists():
+            return None
+        logger.info(f"Converting {legacy} to offset-indexed chunk store (one-time)")
+        count = write_chunk_store(index_dir, json.loads(legacy.read_text(encoding="utf-8")))
+        logger.info(f"✅ Chunk store written: {count} chunks → {data}")
+
+    return ChunkStore(index_dir, use_mmap=use_mmap)
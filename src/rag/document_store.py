@@ -7,11 +7,31 @@
 #   Tracks file hashes for incremental indexing.
 #   Schema:
 #     documents(id, title, content, source_path, content_hash, created_at, updated_at)
-#     chunks(id, document_id, vector_id, chunk_no, text, active)
+#     chunks(id, document_id, vector_id, chunk_no, text, active, embedding)
+#   embedding holds the chunk vector as float16 bytes so compaction copies live
+#   vectors instead of re-encoding the corpus.
 #
 # File: src/rag/document_store.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - get_store keeps one store per index directory (was a single global store
+#     that ignored index_dir after the first call)
+#   - chunks.embedding (float16 BLOB) stores each chunk's vector; get_active_vectors()
+#     returns live vectors for compaction. Chunk queries no longer select the blob.
+#   - add_documents_bulk(): many documents and chunks in one transaction
+#   - Thread-local connection pool: one read-write and one read-only
+#     (mode=ro) connection per thread, PRAGMAs applied once per connection;
+#     sqlite3 statement cache holds the prepared statements (chunk lookups
+#     bucket their IN lists to a few fixed sizes so they stay cached)
+#   - Schema DDL runs once per database file and process (was every
+#     DocumentStore() construction); a replaced or deleted file is detected
+#     and reopened
+#   - get_active_chunks_by_ids() (RAG search) reads over the read-only
+#     connection; close() / close_store() release the pooled connections
+#   - Connections of a finished thread are closed (weakref.finalize on its
+#     thread-local holder); the file identity is re-checked at most every
+#     _FILE_CHECK_INTERVAL seconds instead of on every query; get_store is locked
 # Changes in 0.7.1:
 #   - Initial implementation
 # Author: hypo69
@@ -19,20 +39,105 @@
 # =============================================================================
 
 import hashlib
+import os
 import sqlite3
+import threading
+import time
+import weakref
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+import numpy as np
 
 from src.logger import logger
 
+# Chunk columns returned to callers (the embedding blob is read only by get_active_vectors)
+CHUNK_COLUMNS = "c.id, c.document_id, c.vector_id, c.chunk_no, c.text, c.active"
+
+_SQL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        id           INTEGER PRIMARY KEY AUTOINCREMENT,
+        title        TEXT    NOT NULL,
+        content      TEXT    NOT NULL DEFAULT '',
+        source_path  TEXT    NOT NULL DEFAULT '',
+        content_hash TEXT    NOT NULL DEFAULT '',
+        created_at   TEXT    NOT NULL,
+        updated_at   TEXT    NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS chunks (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+        vector_id   INTEGER NOT NULL DEFAULT -1,
+        chunk_no    INTEGER NOT NULL DEFAULT 0,
+        text        TEXT    NOT NULL,
+        active      INTEGER NOT NULL DEFAULT 1,
+        embedding   BLOB
+    );
+    CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(document_id);
+    CREATE INDEX IF NOT EXISTS idx_chunks_active ON chunks(active);
+    CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash);
+"""
+
+# Prepared statements per connection (sqlite3 caches them by SQL text)
+_STATEMENT_CACHE = 256
+
+# get_active_chunks_by_ids pads its IN list to one of these sizes (then to a
+# multiple of the largest), so search reuses a handful of cached statements
+_IN_BUCKETS = (8, 16, 32, 64, 128, 256)
+
+# A thread re-checks the file identity (os.stat) at most this often; close()
+# and close_store() make every thread reopen immediately
+_FILE_CHECK_INTERVAL = 2.0
+
+# Database files (path, device, inode) whose schema this process has ensured
+_schema_ready: set = set()
+_schema_lock = threading.Lock()
+
+
+def _file_id(path: Path) -> Optional[Tuple[str, int, int]]:
+    """Identity of a database file; changes when the file is replaced (None if missing)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return str(path), st.st_dev, st.st_ino
+
+
+class _ThreadConnections:
+    """Connections of one thread for one store, valid for one file identity and epoch."""
+
+    __slots__ = ("rw", "ro", "ro_refused", "file_id", "epoch", "checked", "opened", "__weakref__")
+
+    def __init__(self) -> None:
+        self.opened: List[sqlite3.Connection] = []  # shared with the thread's finalizer
+        self.checked = 0.0
+        self.reset(None, -1)
+
+    def reset(self, file_id: Optional[Tuple[str, int, int]], epoch: int) -> None:
+        self.rw = self.ro = None
+        self.ro_refused = False
+        self.file_id = file_id
+        self.epoch = epoch
+        self.opened.clear()
+
+
+def _in_bucket(n: int) -> int:
+    for size in _IN_BUCKETS:
+        if n <= size:
+            return size
+    return -(-n // _IN_BUCKETS[-1]) * _IN_BUCKETS[-1]
+
 
 class DocumentStore:
     """SQLite-backed store for RAG documents and chunk metadata.
 
     Provides CRUD for documents and tracks which FAISS vector IDs
     belong to which document so incremental updates are possible.
+    Each thread reuses its own connections (read-write and read-only), so
+    the store can be shared by the indexer, its compaction thread and the
+    retrieval executor workers.
 
     Args:
         db_path (str | Path): Path to the SQLite database file.
@@ -44,54 +149,146 @@ class DocumentStore:
             db_path = Path(config.rag_index_dir) / "documents.db"
         self.db_path = Path(db_path).expanduser()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: List[sqlite3.Connection] = []
+        self._epoch = 0
         self._init_schema()
 
     # ── Internal helpers ──────────────────────────────────────────────────────
 
+    def _open_connection(self, read_only: bool) -> sqlite3.Connection:
+        if read_only:
+            conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True, timeout=30,
+                check_same_thread=False, cached_statements=_STATEMENT_CACHE,
+            )
+        else:
+            conn = sqlite3.connect(
+                str(self.db_path), timeout=30,
+                check_same_thread=False, cached_statements=_STATEMENT_CACHE,
+            )
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._open.append(conn)
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn in self._open:
+                self._open.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _release_thread(store_ref: "weakref.ref[DocumentStore]", conns: List[sqlite3.Connection]) -> None:
+        """Close the connections of a finished thread (weakref.finalize callback)."""
+        store = store_ref()
+        for conn in conns:
+            if store is not None:
+                store._discard(conn)
+            else:
+                conn.close()
+
+    def _thread_connections(self) -> _ThreadConnections:
+        holder = getattr(self._local, "conns", None)
+        if holder is None:
+            holder = self._local.conns = _ThreadConnections()
+            # threading.local drops the holder when its thread ends: close its connections
+            weakref.finalize(holder, DocumentStore._release_thread, weakref.ref(self), holder.opened)
+        return holder
+
+    def _connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """Pooled connection of the calling thread (reopened if the file was replaced)."""
+        holder = self._thread_connections()
+        now = time.monotonic()
+        if holder.epoch == self._epoch and now - holder.checked < _FILE_CHECK_INTERVAL:
+            file_id = holder.file_id  # stat at most once per interval, not per query
+        else:
+            file_id = _file_id(self.db_path)
+            holder.checked = now
+        if (file_id, self._epoch) != (holder.file_id, holder.epoch):
+            for conn in holder.opened:
+                self._discard(conn)
+            holder.reset(file_id, self._epoch)
+
+        slot = "ro" if read_only else "rw"
+        conn = getattr(holder, slot)
+        if conn is not None:
+            return conn
+        if read_only and holder.ro_refused:
+            return self._connection()
+        if file_id is None or file_id not in _schema_ready:
+            self._init_schema()
+            holder.file_id = _file_id(self.db_path)
+        try:
+            conn = self._open_connection(read_only)
+        except sqlite3.OperationalError:
+            if not read_only:
+                raise
+            # Read-only open refused: reads use the read-write connection (not cached as "ro")
+            holder.ro_refused = True
+            return self._connection()
+        setattr(holder, slot, conn)
+        holder.opened.append(conn)
+        return conn
+
     @contextmanager
     def _conn(self) -> Generator[sqlite3.Connection, None, None]:
-        """Context manager that yields an open SQLite connection."""
-        conn = sqlite3.connect(str(self.db_path), timeout=30)
-        conn.execute("PRAGMA foreign_keys = ON")
-        conn.execute("PRAGMA journal_mode = WAL")
-        conn.execute("PRAGMA synchronous = NORMAL")
-        conn.row_factory = sqlite3.Row
+        """Context manager that yields the thread's read-write connection (commit on exit)."""
+        conn = self._connection()
         try:
             yield conn
             conn.commit()
-        finally:
-            conn.close()
+        except BaseException:
+            conn.rollback()
+            raise
 
     def _init_schema(self) -> None:
-        """Create tables if they do not exist yet."""
-        with self._conn() as conn:
-            conn.executescript("""
-                CREATE TABLE IF NOT EXISTS documents (
-                    id           INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title        TEXT    NOT NULL,
-                    content      TEXT    NOT NULL DEFAULT '',
-                    source_path  TEXT    NOT NULL DEFAULT '',
-                    content_hash TEXT    NOT NULL DEFAULT '',
-                    created_at   TEXT    NOT NULL,
-                    updated_at   TEXT    NOT NULL
-                );
-                CREATE TABLE IF NOT EXISTS chunks (
-                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
-                    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
-                    vector_id   INTEGER NOT NULL DEFAULT -1,
-                    chunk_no    INTEGER NOT NULL DEFAULT 0,
-                    text        TEXT    NOT NULL,
-                    active      INTEGER NOT NULL DEFAULT 1
-                );
-                CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(document_id);
-                CREATE INDEX IF NOT EXISTS idx_chunks_active ON chunks(active);
-                CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash);
-            """)
+        """Create tables if they do not exist yet (once per database file and process)."""
+        with _schema_lock:
+            if _file_id(self.db_path) in _schema_ready:
+                return
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.executescript(_SQL_SCHEMA)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+                if "embedding" not in columns:
+                    # Databases created before 0.8.0: vectors are filled in by the next compaction
+                    conn.execute("ALTER TABLE chunks ADD COLUMN embedding BLOB")
+                conn.commit()
+            finally:
+                conn.close()
+            _schema_ready.add(_file_id(self.db_path))
+
+    def close(self) -> None:
+        """Close the pooled connections of every thread (they reopen on next use)."""
+        with self._lock:
+            conns, self._open = self._open, []
+            self._epoch += 1
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
 
     @staticmethod
     def _hash(text: str) -> str:
         return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
+    @staticmethod
+    def _pack_vector(vector: Any) -> Optional[bytes]:
+        """Encode a vector as float16 bytes (None stays None)."""
+        if vector is None:
+            return None
+        return np.asarray(vector, dtype="<f2").tobytes()
+
     # ── Documents CRUD ────────────────────────────────────────────────────────
 
     def add_document(self, title: str, content: str, source_path: str = "") -> int:
@@ -196,15 +393,104 @@ class DocumentStore:
 
         Args:
             doc_id (int): Document id.
-            chunks (List[dict]): Each dict must have 'text', 'vector_id', 'chunk_no'.
+            chunks (List[dict]): Each dict must have 'text', 'vector_id', 'chunk_no'
+                and may have 'embedding' (the chunk vector, stored as float16).
         """
         with self._conn() as conn:
             conn.execute("UPDATE chunks SET active = 0 WHERE document_id = ?", (doc_id,))
             conn.executemany(
-                "INSERT INTO chunks(document_id, vector_id, chunk_no, text, active) VALUES (?,?,?,?,1)",
-                [(doc_id, c["vector_id"], c["chunk_no"], c["text"]) for c in chunks],
+                "INSERT INTO chunks(document_id, vector_id, chunk_no, text, active, embedding) VALUES (?,?,?,?,1,?)",
+                [
+                    (doc_id, c["vector_id"], c["chunk_no"], c["text"], self._pack_vector(c.get("embedding")))
+                    for c in chunks
+                ],
             )
 
+    def add_documents_bulk(self, documents: List[Dict[str, Any]]) -> List[Tuple[int, List[int]]]:
+        """Insert many documents with their chunks in one transaction.
+
+        Args:
+            documents (List[dict]): Each dict has 'title', 'content', 'source_path' and
+                'chunks' (dicts with 'text', 'chunk_no' and optional 'embedding').
+
+        Returns:
+            List[tuple]: (doc_id, chunk ids in chunk order) per input document.
+        """
+        now = datetime.now().isoformat()
+        inserted: List[Tuple[int, List[int]]] = []
+        with self._conn() as conn:
+            for doc in documents:
+                cur = conn.execute(
+                    "INSERT INTO documents(title, content, source_path, content_hash, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc["title"], doc["content"], doc.get("source_path", ""), self._hash(doc["content"]), now, now),
+                )
+                doc_id = int(cur.lastrowid)
+                chunk_ids: List[int] = []
+                for c in doc["chunks"]:
+                    cur = conn.execute(
+                        "INSERT INTO chunks(document_id, vector_id, chunk_no, text, active, embedding) VALUES (?,?,?,?,1,?)",
+                        (doc_id, -1, c["chunk_no"], c["text"], self._pack_vector(c.get("embedding"))),
+                    )
+                    chunk_ids.append(int(cur.lastrowid))
+                inserted.append((doc_id, chunk_ids))
+        return inserted
+
+    def save_chunk_vectors(self, chunk_ids: List[int], vectors: np.ndarray) -> None:
+        """Store vectors for existing chunks (backfill for chunks indexed before 0.8.0).
+
+        Args:
+            chunk_ids (List[int]): Chunk primary keys.
+            vectors (np.ndarray): Vectors in the same order, shape (n, dim).
+        """
+        with self._conn() as conn:
+            conn.executemany(
+                "UPDATE chunks SET embedding = ? WHERE id = ?",
+                [(self._pack_vector(v), int(i)) for i, v in zip(chunk_ids, vectors)],
+            )
+
+    def max_chunk_id(self) -> int:
+        """Return the largest chunk id (0 for an empty store)."""
+        with self._conn() as conn:
+            return int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM chunks").fetchone()[0])
+
+    def get_active_vectors(
+        self, dim: int, min_id: int = 0, max_id: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """Return stored vectors of active chunks with min_id < id <= max_id.
+
+        Args:
+            dim (int): Expected vector dimension (blobs of another size count as missing).
+            min_id (int): Exclusive lower bound of chunk ids.
+            max_id (int | None): Inclusive upper bound (None = no bound).
+
+        Returns:
+            tuple: ids (int64[n]), vectors (float32[n, dim]) and the chunks without a
+            usable stored vector as [{'id', 'text'}] (to be re-embedded).
+        """
+        query = (
+            "SELECT id, embedding, CASE WHEN embedding IS NULL OR length(embedding) != ? THEN text END AS text "
+            "FROM chunks WHERE active = 1 AND id > ?"
+        )
+        args: List[Any] = [dim * 2, min_id]
+        if max_id is not None:
+            query += " AND id <= ?"
+            args.append(max_id)
+
+        ids: List[int] = []
+        blobs: List[bytes] = []
+        missing: List[Dict[str, Any]] = []
+        with self._conn() as conn:
+            for row in conn.execute(query + " ORDER BY id", args):
+                if row["text"] is not None:
+                    missing.append({"id": int(row["id"]), "text": row["text"]})
+                else:
+                    ids.append(int(row["id"]))
+                    blobs.append(row["embedding"])
+
+        vectors = np.frombuffer(b"".join(blobs), dtype="<f2").reshape(len(ids), dim).astype("float32")
+        return np.asarray(ids, dtype="int64"), vectors, missing
+
     def get_active_chunks(self, doc_id: int) -> List[Dict[str, Any]]:
         """Return active chunks for a document.
 
@@ -216,7 +502,7 @@ class DocumentStore:
         """
         with self._conn() as conn:
             rows = conn.execute(
-                "SELECT * FROM chunks WHERE document_id = ? AND active = 1 ORDER BY chunk_no",
+                f"SELECT {CHUNK_COLUMNS} FROM chunks c WHERE c.document_id = ? AND c.active = 1 ORDER BY c.chunk_no",
                 (doc_id,),
             ).fetchall()
         return [dict(r) for r in rows]
@@ -229,7 +515,7 @@ class DocumentStore:
         """
         with self._conn() as conn:
             rows = conn.execute(
-                "SELECT c.*, d.title AS doc_title FROM chunks c "
+                f"SELECT {CHUNK_COLUMNS}, d.title AS doc_title FROM chunks c "
                 "JOIN documents d ON d.id = c.document_id WHERE c.active = 1 ORDER BY c.id"
             ).fetchall()
         return [dict(r) for r in rows]
@@ -246,14 +532,15 @@ class DocumentStore:
         if not chunk_ids:
             return {}
 
-        placeholders = ",".join("?" for _ in chunk_ids)
-        with self._conn() as conn:
-            rows = conn.execute(
-                f"SELECT c.*, d.title AS doc_title, d.source_path AS source_path "
-                f"FROM chunks c JOIN documents d ON d.id = c.document_id "
-                f"WHERE c.active = 1 AND c.id IN ({placeholders})",
-                tuple(chunk_ids),
-            ).fetchall()
+        # Padding repeats the first id: same result, one cached statement per bucket
+        size = _in_bucket(len(chunk_ids))
+        params = list(chunk_ids) + [chunk_ids[0]] * (size - len(chunk_ids))
+        rows = self._connection(read_only=True).execute(
+            f"SELECT {CHUNK_COLUMNS}, d.title AS doc_title, d.source_path AS source_path "
+            f"FROM chunks c JOIN documents d ON d.id = c.document_id "
+            f"WHERE c.active = 1 AND c.id IN ({','.join('?' * size)})",
+            params,
+        ).fetchall()
         return {int(r["id"]): dict(r) for r in rows}
 
     def stats(self) -> Dict[str, int]:
@@ -269,20 +556,34 @@ class DocumentStore:
         return {"documents": docs, "active_chunks": active, "inactive_chunks": inactive}
 
 
-# Module-level singleton — index_dir resolved at runtime
-_store: Optional[DocumentStore] = None
+# One store per index directory — index_dir resolved at runtime
+_stores: Dict[str, DocumentStore] = {}
+_stores_lock = threading.Lock()
 
 
 def get_store(index_dir: str = "rag_index") -> DocumentStore:
-    """Return (or create) the module-level DocumentStore singleton.
+    """Return (or create) the DocumentStore for an index directory.
 
     Args:
         index_dir (str): Directory that contains the FAISS index.
 
     Returns:
-        DocumentStore: Singleton instance.
+        DocumentStore: Instance shared by all callers for that directory.
+    """
+    key = str(Path(index_dir).expanduser())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = DocumentStore(db_path=Path(key) / "documents.db")
+        return store
+
+
+def close_store(index_dir: str) -> None:
+    """Release the pooled connections of an index directory (before deleting it).
+
+    Args:
+        index_dir (str): Directory that contains the FAISS index.
     """
-    global _store
-    if _store is None:
-        _store = DocumentStore(db_path=Path(index_dir) / "documents.db")
-    return _store
+    store = _stores.get(str(Path(index_dir).expanduser()))
+    if store is not None:
+        store.close()
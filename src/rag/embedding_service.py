@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG Embedding Service — shared encoder with query cache
+# =============================================================================
+# Description:
+#   One SentenceTransformer instance per model name, shared by RAGSystem,
+#   IncrementalIndexer and RAGIndexer.
+#   Query vectors are kept in an LRU cache. Concurrent async query encodes
+#   are collected for a short window and run as one encode() call in a
+#   worker thread, so N parallel searches share one forward pass.
+#
+#   Workflow (encode_query):
+#     cache hit → return vector
+#     miss      → enqueue (text, future)
+#               → flush after batch_window_ms or when max_batch is reached
+#               → model.encode(unique texts) in the RAG retrieval pool
+#               → resolve futures + fill cache
+#
+# Examples:
+#   >>> from src.rag.embedding_service import get_embedding_service
+#   >>> service = get_embedding_service()
+#   >>> vec = await service.encode_query("how to reset password")
+#   >>> vecs = service.encode_documents(["chunk 1", "chunk 2"])
+#
+# File: src/rag/embedding_service.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from src.core.config import config
+from src.logger import logger
+from .retrieval_executor import get_retrieval_executor
+
+
+class EmbeddingService:
+    """Shared sentence-transformer encoder with query-vector LRU cache and micro-batching.
+
+    Args:
+        model_name (str): SentenceTransformer model name or path.
+        cache_size (int): Number of query vectors kept in the LRU cache (0 disables it).
+        batch_window_ms (float): How long concurrent query encodes are collected.
+        max_batch (int): Flush immediately once this many queries are pending.
+        model (Any): Optional preloaded model (used by tests and callers that own one).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_size: int = 4096,
+        batch_window_ms: float = 5.0,
+        max_batch: int = 32,
+        model: Any = None,
+    ) -> None:
+        self.model_name = model_name
+        self.cache_size = max(0, int(cache_size))
+        self.batch_window = max(0.0, float(batch_window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._model: Any = model
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._stats: Dict[str, int] = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "batches": 0,
+            "batched_queries": 0,
+            "documents_encoded": 0,
+        }
+
+    # ── Model ─────────────────────────────────────────────────────────────────
+
+    def get_model(self) -> Any:
+        """Lazy-load the SentenceTransformer model (thread-safe, loaded once).
+
+        Returns:
+            SentenceTransformer: Loaded embedding model.
+        """
+        if self._model is not None:
+            return self._model
+
+        with self._model_lock:
+            if self._model is None:
+                # Импорт внутри метода для предотвращения задержек при инициализации модуля
+                # Import inside the method to prevent initialization delays
+                from sentence_transformers import SentenceTransformer
+
+                logger.info(f"Загрузка модели эмбеддингов: {self.model_name}")
+                self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def dimension(self) -> int:
+        """Return the embedding dimension of the model.
+
+        Returns:
+            int: Vector dimension.
+        """
+        return int(self.get_model().get_sentence_embedding_dimension())
+
+    # ── Documents ─────────────────────────────────────────────────────────────
+
+    def encode_documents(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        progress_cb: Optional[Callable[[int, int], None]] = None,
+        normalize: bool = True,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """Encode document chunks in batches (not cached — chunks are unique).
+
+        Args:
+            texts (List[str]): Texts to embed.
+            batch_size (int): Texts per encode() call.
+            progress_cb (callable | None): Optional callback(done, total) called per batch.
+            normalize (bool): L2-normalise vectors for inner-product search.
+            show_progress_bar (bool): Forwarded to SentenceTransformer.encode.
+
+        Returns:
+            np.ndarray: Float32 array of shape (len(texts), dim).
+        """
+        model = self.get_model()
+        if not texts:
+            return np.zeros((0, self.dimension()), dtype="float32")
+
+        parts: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            parts.append(np.asarray(model.encode(batch, show_progress_bar=show_progress_bar), dtype="float32"))
+            if progress_cb:
+                progress_cb(min(start + batch_size, len(texts)), len(texts))
+
+        vecs = np.ascontiguousarray(np.vstack(parts), dtype="float32")
+        if normalize:
+            faiss.normalize_L2(vecs)
+        self._stats["documents_encoded"] += len(texts)
+        return vecs
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def _cache_get(self, text: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vec = self._cache.get(text)
+            if vec is None:
+                self._stats["cache_misses"] += 1
+                return None
+            self._cache.move_to_end(text)
+            self._stats["cache_hits"] += 1
+            return vec
+
+    def _cache_put(self, text: str, vec: np.ndarray) -> None:
+        if not self.cache_size:
+            return
+        vec.setflags(write=False)
+        with self._cache_lock:
+            self._cache[text] = vec
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _encode_queries_sync(self, texts: List[str]) -> np.ndarray:
+        """Run one encode() call for a batch of query texts and normalise the result."""
+        vecs = np.ascontiguousarray(self.get_model().encode(texts, show_progress_bar=False), dtype="float32")
+        faiss.normalize_L2(vecs)
+        return vecs
+
+    def encode_query_sync(self, text: str) -> np.ndarray:
+        """Encode one query in the calling thread, using the cache.
+
+        Args:
+            text (str): Query text.
+
+        Returns:
+            np.ndarray: Read-only L2-normalised float32 vector of shape (dim,).
+        """
+        vec = self._cache_get(text)
+        if vec is not None:
+            return vec
+        vec = self._encode_queries_sync([text])[0]
+        self._cache_put(text, vec)
+        return vec
+
+    async def encode_query(self, text: str) -> np.ndarray:
+        """Encode one query off the event loop, sharing a forward pass with concurrent callers.
+
+        Args:
+            text (str): Query text.
+
+        Returns:
+            np.ndarray: Read-only L2-normalised float32 vector of shape (dim,).
+        """
+        vec = self._cache_get(text)
+        if vec is not None:
+            return vec
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the pending batch to a worker thread."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            # Храним ссылку на задачу, чтобы её не собрал GC до завершения
+            # Keep a reference so the task is not garbage-collected mid-flight
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Encode a batch of pending queries and resolve their futures."""
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self._stats["batches"] += 1
+        self._stats["batched_queries"] += len(batch)
+
+        try:
+            vecs = await get_retrieval_executor().run(self._encode_queries_sync, unique_texts)
+        except Exception as e:
+            logger.error(f"Ошибка кодирования пакета запросов ({len(unique_texts)}): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text: Dict[str, np.ndarray] = {}
+        for text, vec in zip(unique_texts, vecs):
+            self._cache_put(text, vec)
+            by_text[text] = vec
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    # ── Stats ─────────────────────────────────────────────────────────────────
+
+    def clear_cache(self) -> None:
+        """Drop all cached query vectors."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache and batching counters.
+
+        Returns:
+            dict: cache_hits, cache_misses, cache_entries, batches, avg_batch_size, documents_encoded.
+        """
+        with self._cache_lock:
+            entries = len(self._cache)
+        batches = self._stats["batches"]
+        return {
+            "model": self.model_name,
+            "model_loaded": self._model is not None,
+            **self._stats,
+            "cache_entries": entries,
+            "cache_size": self.cache_size,
+            "avg_batch_size": round(self._stats["batched_queries"] / batches, 2) if batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+
+# Module-level registry — one service per model name
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingService:
+    """Return (or create) the shared EmbeddingService for a model.
+
+    Args:
+        model_name (str | None): Model name. Defaults to config.rag_model.
+
+    Returns:
+        EmbeddingService: Shared instance.
+    """
+    name = model_name or config.rag_model
+    with _services_lock:
+        service = _services.get(name)
+        if service is None:
+            service = EmbeddingService(
+                name,
+                cache_size=config.rag_embedding_cache_size,
+                batch_window_ms=config.rag_embedding_batch_window_ms,
+                max_batch=config.rag_embedding_max_batch,
+            )
+            _services[name] = service
+    return service
@@ -8,13 +8,37 @@
 #     add_document    → chunk → embed → add vectors to FAISS → save chunks to DB
 #     update_document → deactivate old chunks → re-embed → add new vectors
 #     delete_document → deactivate chunks in DB (FAISS vectors stay, filtered at search)
-#     compact         → rebuild FAISS from active chunks only (run when inactive > 20%)
+#     compact         → rebuild FAISS from the stored vectors of active chunks
+#                       (background thread when inactive > 20%, online swap)
 #
 #   Uses IndexIDMap so each vector has a stable integer ID matching chunks.id.
+#   The wrapped index type (flat, ivf_flat, ivf_pq, hnsw) comes from the
+#   profile's meta.json / config (see ann_index); new profiles start flat and
+#   compact() trains the configured type once there are enough vectors.
+#
+#   One IncrementalIndexer per profile directory (get_indexer registry) owns the
+#   in-memory index; RAGSystem searches that same object under a read lock, so
+#   added vectors are searchable immediately without reload_index.
+#   Adds are persisted to an append-only delta log (faiss.delta) replayed on
+#   load; faiss.index is rewritten only at checkpoints (delta over
+#   rag_system.delta_checkpoint_vectors, compact, shutdown).
 #
 # File: src/rag/incremental_indexer.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Model loading and embedding delegated to the shared EmbeddingService
+#   - Rebuilds (compact, migration) use the profile's ANN index type via ann_index;
+#     the type on disk is recorded in meta.json / index_info.json
+#   - In-memory index shared with RAGSystem (read/write lock); adds go to the
+#     faiss.delta log instead of a full faiss.index rewrite per document
+#   - get_indexer keeps one indexer per profile directory; checkpoint_all_indexers();
+#     release_indexer() drops an idle one when the RAG pool evicts its profile
+#   - Chunk vectors are stored in SQLite (float16); compact() copies them instead of
+#     re-embedding and builds outside the writer lock, then catches up and swaps.
+#     Automatic compaction runs in a background thread.
+#   - add_documents(): bulk add with one embedding pass, one SQLite transaction and
+#     one faiss.index write
 # Changes in 0.7.1:
 #   - Initial implementation
 # Author: hypo69
@@ -23,15 +47,63 @@
 
 import json
 import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import faiss
 import numpy as np
 
 from src.logger import logger
 from src.core.config import config
+from .ann_index import apply_search_params, build_index, empty_index, index_type_of, record_index_type, resolve_index_params
+from .delta_log import VectorDeltaLog
 from .document_store import DocumentStore, get_store
+from .embedding_service import get_embedding_service
+
+DELTA_FILE = "faiss.delta"
+
+
+class _ReadWriteLock:
+    """Many concurrent searches or one writer (add_with_ids / index swap).
+
+    Writers are preferred: once a writer waits, new readers queue behind it.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
 
 
 class IncrementalIndexer:
@@ -46,67 +118,130 @@ class IncrementalIndexer:
         self.index_dir.mkdir(parents=True, exist_ok=True)
         self.index_path: Path = self.index_dir / "faiss.index"
         self.store: DocumentStore = get_store(str(self.index_dir))
-        self._model: Any = None
         self._index: Optional[faiss.Index] = None
-        self._lock = threading.RLock()
+        self._recorded_type: Optional[str] = None
+        self._lock = threading.RLock()  # serialises writers (documents, compact, checkpoint)
+        self._rw = _ReadWriteLock()  # guards the in-memory index against concurrent searches
+        self.delta = VectorDeltaLog(self.index_dir / DELTA_FILE)
+        self.checkpoint_vectors: int = config.rag_delta_checkpoint_vectors
+        self._compact_lock = threading.Lock()  # one compaction at a time
+        self._compact_thread: Optional[threading.Thread] = None
 
     # ── Model ─────────────────────────────────────────────────────────────────
 
     def _get_model(self) -> Any:
-        """Lazy-load the sentence-transformer model.
+        """Lazy-load the sentence-transformer model (shared with RAGSystem).
 
         Returns:
             SentenceTransformer: Loaded embedding model.
         """
-        if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer(config.rag_model)
-        return self._model
+        return get_embedding_service(config.rag_model).get_model()
 
     # ── FAISS index ───────────────────────────────────────────────────────────
 
+    def _index_params(self) -> Dict[str, Any]:
+        """Return the profile's ANN index parameters (meta.json over config defaults)."""
+        return resolve_index_params(self.index_dir)
+
     def _load_or_create_index(self) -> faiss.Index:
-        """Load existing IndexIDMap or create a new one.
+        """Load existing IndexIDMap (plus the delta log) or create a new one.
 
         Returns:
-            faiss.Index: IndexIDMap wrapping IndexFlatIP.
+            faiss.Index: IndexIDMap wrapping the profile's index type.
         """
+        # Lock-free fast path: searches never wait for a document write
         if self._index is not None:
             return self._index
 
-        if self.index_path.exists():
-            try:
-                self._index = faiss.read_index(str(self.index_path))
-                if "IDMap" not in type(self._index).__name__:
-                    logger.warning("⚠️ Existing FAISS index is not IndexIDMap; rebuilding incremental index from SQLite chunks")
-                    self._index = self._build_index_from_store()
-                    self._save_index(self._index)
-                logger.info(f"✅ Loaded FAISS index: {self._index.ntotal} vectors")
+        with self._lock:
+            if self._index is not None:
                 return self._index
-            except Exception as e:
-                logger.warning(f"⚠️ Could not load index, creating new: {e}")
 
-        dim = self._get_model().get_sentence_embedding_dimension()
-        self._index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
-        logger.info(f"✅ Created new FAISS IndexIDMap (dim={dim})")
-        return self._index
+            idx: Optional[faiss.Index] = None
+            if self.index_path.exists():
+                try:
+                    idx = faiss.read_index(str(self.index_path))
+                    if "IDMap" not in type(idx).__name__:
+                        logger.warning("⚠️ Existing FAISS index is not IndexIDMap; rebuilding incremental index from SQLite chunks")
+                        idx = self._build_index_from_store()
+                        self._save_index(idx)
+                    self._recorded_type = index_type_of(idx)
+                    logger.info(f"✅ Loaded FAISS index ({self._recorded_type}): {idx.ntotal} vectors")
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not load index, creating new: {e}")
+                    idx = None
+
+            if idx is None:
+                dim = self._get_model().get_sentence_embedding_dimension()
+                idx = empty_index(dim)
+                logger.info(f"✅ Created new FAISS IndexIDMap (dim={dim})")
+
+            self._replay_delta(idx)
+            apply_search_params(idx, self._index_params())
+            self._index = idx
+            return self._index
+
+    def _replay_delta(self, idx: faiss.Index) -> None:
+        """Apply vectors appended since the last checkpoint.
+
+        Ids already present in the base index (checkpoint written, log not yet
+        truncated) are skipped.
+
+        Args:
+            idx (faiss.Index): Freshly loaded IndexIDMap.
+        """
+        known = faiss.vector_to_array(idx.id_map) if idx.ntotal else np.empty(0, dtype="int64")
+        replayed = 0
+        for ids, vecs in self.delta.replay():
+            if vecs.shape[1] != idx.d:
+                logger.warning(f"⚠️ Skipping delta batch with dim={vecs.shape[1]} (index dim={idx.d})")
+                continue
+            fresh = ~np.isin(ids, known)
+            if fresh.any():
+                idx.add_with_ids(vecs[fresh], ids[fresh])
+                replayed += int(fresh.sum())
+        if replayed:
+            logger.info(f"✅ Replayed {replayed} vectors from {self.delta.path.name}")
+
+    def _dimension(self) -> int:
+        """Vector dimension of the live index (or of the model before the first load)."""
+        if self._index is not None:
+            return int(self._index.d)
+        return self._get_model().get_sentence_embedding_dimension()
+
+    def _active_vectors(self, min_id: int = 0, max_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (ids, vectors) of active chunks from the store.
+
+        Chunks without a stored vector (indexed before vectors were persisted, or
+        with another model dimension) are embedded once and written back.
+
+        Args:
+            min_id (int): Exclusive lower bound of chunk ids.
+            max_id (int | None): Inclusive upper bound.
+
+        Returns:
+            tuple: ids int64[n], vectors float32[n, dim].
+        """
+        dim = self._dimension()
+        ids, vecs, missing = self.store.get_active_vectors(dim, min_id=min_id, max_id=max_id)
+        if missing:
+            logger.info(f"Embedding {len(missing)} chunks without stored vectors (one-time backfill)")
+            missing_ids = np.array([c["id"] for c in missing], dtype="int64")
+            missing_vecs = self._embed([c["text"] for c in missing])
+            self.store.save_chunk_vectors(missing_ids.tolist(), missing_vecs)
+            ids = np.concatenate([ids, missing_ids])
+            vecs = np.vstack([vecs, missing_vecs]).astype("float32") if len(vecs) else missing_vecs
+        return ids, vecs
 
     def _build_index_from_store(self) -> faiss.Index:
-        """Build a fresh IndexIDMap from active SQLite chunks."""
-        active = self.store.get_all_active_chunks()
-        if not active:
-            dim = self._get_model().get_sentence_embedding_dimension()
-            return faiss.IndexIDMap(faiss.IndexFlatIP(dim))
-
-        texts = [c["text"] for c in active]
-        ids = np.array([c["id"] for c in active], dtype="int64")
-        vecs = self._embed(texts)
-        idx = faiss.IndexIDMap(faiss.IndexFlatIP(vecs.shape[1]))
-        idx.add_with_ids(vecs, ids)
-        return idx
+        """Build a fresh IndexIDMap from the stored vectors of active chunks."""
+        ids, vecs = self._active_vectors()
+        if not len(ids):
+            return empty_index(self._dimension())
+        return build_index(vecs, ids=ids, params=self._index_params())
 
     def _save_index(self, idx: faiss.Index) -> None:
-        """Persist FAISS index to disk.
+        """Persist the full FAISS index to disk and truncate the delta log.
 
         Args:
             idx (faiss.Index): Index to save.
@@ -114,14 +249,80 @@ class IncrementalIndexer:
         tmp_path = self.index_path.with_suffix(".index.tmp")
         faiss.write_index(idx, str(tmp_path))
         tmp_path.replace(self.index_path)
+        self.delta.truncate()
+
+        index_type = index_type_of(idx)
+        if index_type != self._recorded_type:
+            record_index_type(self.index_dir, idx, self._index_params())
+            self._recorded_type = index_type
         logger.debug(f"💾 FAISS index saved: {idx.ntotal} vectors → {self.index_path}")
 
+    def _swap_index(self, idx: faiss.Index) -> None:
+        """Replace the in-memory index seen by searches."""
+        with self._rw.write():
+            self._index = idx
+
+    @property
+    def index(self) -> faiss.Index:
+        """The live in-memory index (loaded on first access)."""
+        return self._load_or_create_index()
+
+    @contextmanager
+    def reading(self) -> Iterator[faiss.Index]:
+        """Hold the read lock and yield the current index for one search.
+
+        Yields:
+            faiss.Index: Index that is not modified until the block exits.
+        """
+        idx = self._load_or_create_index()
+        with self._rw.read():
+            yield self._index if self._index is not None else idx
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Write faiss.index once and truncate the delta log.
+
+        Returns:
+            dict: success, vectors, delta_vectors (flushed from the log).
+        """
+        with self._lock:
+            if self._index is None or not self.delta.vectors:
+                return {"success": True, "vectors": self._index.ntotal if self._index else 0, "delta_vectors": 0}
+            flushed = self.delta.vectors
+            with self._rw.read():
+                self._save_index(self._index)
+            logger.info(f"💾 Checkpoint {self.index_dir.name}: {self._index.ntotal} vectors, {flushed} from delta")
+            return {"success": True, "vectors": self._index.ntotal, "delta_vectors": flushed}
+
     def _maybe_compact(self) -> None:
-        """Compact automatically when inactive chunks exceed the recommended threshold."""
+        """Start a background compaction when inactive chunks exceed the recommended threshold."""
         stats = self.store.stats()
         total = stats["active_chunks"] + stats["inactive_chunks"]
         if total > 0 and (stats["inactive_chunks"] / total) > 0.2:
-            self.compact()
+            self.start_compaction()
+
+    @property
+    def compacting(self) -> bool:
+        """True while a background compaction is running."""
+        return self._compact_thread is not None and self._compact_thread.is_alive()
+
+    def start_compaction(self) -> bool:
+        """Run compact() in a daemon thread; writes and searches continue meanwhile.
+
+        Returns:
+            bool: False when a background compaction is already running.
+        """
+        if self.compacting:
+            return False
+
+        def _run() -> None:
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"❌ Background compaction failed for {self.index_dir}: {e}", exc_info=True)
+
+        self._compact_thread = threading.Thread(target=_run, name=f"rag-compact-{self.index_dir.name}", daemon=True)
+        self._compact_thread.start()
+        return True
 
     # ── Chunking ──────────────────────────────────────────────────────────────
 
@@ -150,39 +351,33 @@ class IncrementalIndexer:
 
     # ── Embedding ─────────────────────────────────────────────────────────────
 
-    def _embed(self, texts: List[str], progress_cb=None) -> np.ndarray:
+    def _embed(self, texts: List[str], progress_cb=None, batch_size: Optional[int] = None) -> np.ndarray:
         """Compute L2-normalised embeddings for a list of texts.
 
         Args:
             texts (List[str]): Texts to embed.
             progress_cb (callable | None): Optional callback(done, total) called per batch.
+            batch_size (int | None): Texts per encode call (default: 16 with progress, else 256).
 
         Returns:
             np.ndarray: Float32 array of shape (len(texts), dim).
         """
-        model = self._get_model()
-        if progress_cb:
-            # Encode in small batches so we can report progress
-            batch = 16
-            parts = []
-            for i in range(0, len(texts), batch):
-                parts.append(model.encode(texts[i:i + batch], show_progress_bar=False).astype("float32"))
-                progress_cb(min(i + batch, len(texts)), len(texts))
-            vecs = np.vstack(parts) if parts else model.encode([], show_progress_bar=False).astype("float32")
-        else:
-            vecs = model.encode(texts, show_progress_bar=False).astype("float32")
-        faiss.normalize_L2(vecs)
-        return vecs
+        # Encode in small batches when progress is reported, otherwise in large ones
+        batch_size = batch_size or (16 if progress_cb else 256)
+        return get_embedding_service(config.rag_model).encode_documents(
+            texts, batch_size=batch_size, progress_cb=progress_cb
+        )
 
     # ── Public API ────────────────────────────────────────────────────────────
 
-    def add_document(self, title: str, content: str, source_path: str = "") -> Dict[str, Any]:
+    def add_document(self, title: str, content: str, source_path: str = "", progress_cb=None) -> Dict[str, Any]:
         """Add a new document: chunk → embed → insert into FAISS + DB.
 
         Args:
             title (str): Document title.
             content (str): Full text.
             source_path (str): Optional origin path.
+            progress_cb (callable | None): Optional callback(done, total) for embed progress.
 
         Returns:
             dict: success, doc_id, chunks_added.
@@ -192,10 +387,84 @@ class IncrementalIndexer:
                 return {"success": False, "error": "Content is empty"}
 
             doc_id = self.store.add_document(title, content, source_path)
-            chunks_added = self._index_document(doc_id, content)
+            chunks_added = self._index_document(doc_id, content, progress_cb=progress_cb)
             self._maybe_compact()
             return {"success": True, "doc_id": doc_id, "chunks_added": chunks_added}
 
+    def add_documents(
+        self,
+        documents: List[Dict[str, str]],
+        progress_cb: Optional[Callable[[str, int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """Bulk add: chunk all documents, embed in one pass, one SQLite transaction,
+        one FAISS write.
+
+        Chunking and embedding run without the writer lock; only the insert, the
+        in-memory add and the final faiss.index write hold it.
+
+        Args:
+            documents (List[dict]): Dicts with 'title', 'content' and optional 'source_path'.
+            progress_cb (callable | None): Optional callback(stage, done, total) with
+                stage in chunk, embed, store, index.
+
+        Returns:
+            dict: success, documents (doc_id, title, chunks per document), chunks_added.
+        """
+        report = progress_cb or (lambda stage, done, total: None)
+        docs = [d for d in documents if d.get("content", "").strip()]
+        if not docs:
+            return {"success": False, "error": "Content is empty", "documents": [], "chunks_added": 0}
+
+        chunked: List[List[str]] = []
+        for i, doc in enumerate(docs, start=1):
+            chunked.append(self._chunk_text(doc["content"]))
+            report("chunk", i, len(docs))
+
+        texts = [text for chunks in chunked for text in chunks]
+        vecs = self._embed(
+            texts,
+            progress_cb=lambda done, total: report("embed", done, total),
+            batch_size=config.rag_bulk_embed_batch_size,
+        )
+
+        rows: List[Dict[str, Any]] = []
+        offset = 0
+        for doc, chunks in zip(docs, chunked):
+            rows.append({
+                "title": doc["title"],
+                "content": doc["content"],
+                "source_path": doc.get("source_path", ""),
+                "chunks": [
+                    {"chunk_no": n, "text": text, "embedding": vecs[offset + n]}
+                    for n, text in enumerate(chunks)
+                ],
+            })
+            offset += len(chunks)
+
+        with self._lock:
+            idx = self._load_or_create_index()
+            report("store", 0, len(rows))
+            inserted = self.store.add_documents_bulk(rows)
+            report("store", len(rows), len(rows))
+
+            ids = np.array([cid for _, chunk_ids in inserted for cid in chunk_ids], dtype="int64")
+            report("index", 0, len(ids))
+            if len(ids):
+                with self._rw.write():
+                    idx.add_with_ids(vecs, ids)
+                self._save_index(idx)
+            report("index", len(ids), len(ids))
+
+        logger.info(f"✅ Bulk indexed {len(rows)} documents: {len(ids)} chunks, {idx.ntotal} total vectors")
+        return {
+            "success": True,
+            "documents": [
+                {"doc_id": doc_id, "title": row["title"], "chunks": len(chunk_ids)}
+                for row, (doc_id, chunk_ids) in zip(rows, inserted)
+            ],
+            "chunks_added": int(len(ids)),
+        }
+
     def update_document(self, doc_id: int, title: str, content: str) -> Dict[str, Any]:
         """Update document: deactivate old chunks, re-embed new content.
 
@@ -241,43 +510,45 @@ class IncrementalIndexer:
             return {"success": True}
 
     def compact(self) -> Dict[str, Any]:
-        """Rebuild FAISS index from active chunks only.
+        """Rebuild FAISS index from the stored vectors of active chunks.
 
-        Should be called when inactive_chunks / total_chunks > 0.2.
+        Should be called when inactive_chunks / total_chunks > 0.2. The rebuilt
+        index uses the profile's configured type (trained on the active vectors).
+        Vectors are copied from the store (no re-embedding) and the build runs
+        without the writer lock; chunks added meanwhile are caught up under the
+        lock just before the new index is saved and swapped in.
 
         Returns:
             dict: success, vectors_before, vectors_after.
         """
-        with self._lock:
-            active = self.store.get_all_active_chunks()
-            if not active:
+        with self._compact_lock:
+            params = self._index_params()
+            snapshot_id = self.store.max_chunk_id()
+            ids, vecs = self._active_vectors(max_id=snapshot_id)
+            if len(ids):
+                new_idx = build_index(vecs, ids=ids, params=params)
+            else:
+                new_idx = empty_index(self._dimension())
+
+            with self._lock:
+                late_ids, late_vecs = self._active_vectors(min_id=snapshot_id)
+                if len(late_ids):
+                    new_idx.add_with_ids(late_vecs, late_ids)
+                apply_search_params(new_idx, params)
+
                 old_total = self._index.ntotal if self._index else 0
-                dim = self._get_model().get_sentence_embedding_dimension()
-                new_idx = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
                 self._save_index(new_idx)
-                self._index = new_idx
-                return {"success": True, "vectors_before": old_total, "vectors_after": 0}
+                self._swap_index(new_idx)
 
-            texts = [c["text"] for c in active]
-            ids = np.array([c["id"] for c in active], dtype="int64")
-            vecs = self._embed(texts)
-
-            dim = vecs.shape[1]
-            new_idx = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
-            new_idx.add_with_ids(vecs, ids)
-
-            old_total = self._index.ntotal if self._index else 0
-            self._save_index(new_idx)
-            self._index = new_idx
-
-            logger.info(f"✅ Compact: {old_total} → {new_idx.ntotal} vectors")
+            logger.info(f"✅ Compact: {old_total} → {new_idx.ntotal} vectors ({len(late_ids)} caught up)")
             return {"success": True, "vectors_before": old_total, "vectors_after": new_idx.ntotal}
 
     def get_stats(self) -> Dict[str, Any]:
         """Return index and store statistics.
 
         Returns:
-            dict: documents, active_chunks, inactive_chunks, faiss_vectors, compact_recommended.
+            dict: documents, active_chunks, inactive_chunks, faiss_vectors, delta_vectors,
+            compact_recommended, compacting.
         """
         with self._lock:
             db_stats = self.store.stats()
@@ -287,7 +558,9 @@ class IncrementalIndexer:
         return {
             **db_stats,
             "faiss_vectors": idx.ntotal,
+            "delta_vectors": self.delta.vectors,
             "compact_recommended": compact_recommended,
+            "compacting": self.compacting,
         }
 
     # ── Internal ──────────────────────────────────────────────────────────────
@@ -315,36 +588,83 @@ class IncrementalIndexer:
         # Actually we use chunk DB ids: insert first, get ids, then add to FAISS
         chunk_rows: List[Dict[str, Any]] = []
         for i, text in enumerate(texts):
-            chunk_rows.append({"vector_id": -1, "chunk_no": i, "text": text})
+            chunk_rows.append({"vector_id": -1, "chunk_no": i, "text": text, "embedding": vecs[i]})
 
-        # Save with placeholder vector_id=-1 to get real DB ids
+        # Save with placeholder vector_id=-1 to get real DB ids (vectors kept for compaction)
         self.store.save_chunks(doc_id, chunk_rows)
         db_chunks = self.store.get_active_chunks(doc_id)
 
-        # Now we have real chunk ids — add to FAISS with those ids
+        # Now we have real chunk ids — log first, then add to the shared index
         ids = np.array([c["id"] for c in db_chunks], dtype="int64")
-        idx.add_with_ids(vecs, ids)
-        self._save_index(idx)
-        self._index = idx
+        self.delta.append(ids, vecs)
+        with self._rw.write():
+            idx.add_with_ids(vecs, ids)
+
+        # Checkpoint when the log grows large, or create faiss.index for a new profile
+        if self.delta.vectors >= self.checkpoint_vectors or not self.index_path.exists():
+            self.checkpoint()
 
         logger.info(f"✅ Indexed doc_id={doc_id}: {len(texts)} chunks, {idx.ntotal} total vectors")
         return len(texts)
 
 
-# Module-level singleton
-_indexer: Optional[IncrementalIndexer] = None
+# One indexer per profile directory (shared with RAGSystem searches)
+_indexers: Dict[str, IncrementalIndexer] = {}
+_indexers_lock = threading.Lock()
+
+
+def get_indexer(index_dir: str | Path | None = None) -> IncrementalIndexer:
+    """Return (or create) the IncrementalIndexer for a profile directory.
+
+    Args:
+        index_dir (str | Path | None): Profile directory (default: config.rag_index_dir).
+
+    Returns:
+        IncrementalIndexer: Instance shared by all callers for that directory.
+    """
+    key = str(Path(index_dir or config.rag_index_dir).expanduser())
+    with _indexers_lock:
+        indexer = _indexers.get(key)
+        if indexer is None:
+            indexer = _indexers[key] = IncrementalIndexer(key)
+        return indexer
+
+
+def peek_indexer(index_dir: str | Path) -> Optional[IncrementalIndexer]:
+    """Return the indexer for a directory only if one was already created."""
+    return _indexers.get(str(Path(index_dir).expanduser()))
+
 
+def release_indexer(indexer: IncrementalIndexer) -> bool:
+    """Drop an idle indexer from the registry so its index can be freed.
 
-def get_indexer(index_dir: str | None = None) -> IncrementalIndexer:
-    """Return (or create) the module-level IncrementalIndexer singleton.
+    Called when its profile leaves the RAG pool. Nothing is lost: adds are
+    already in faiss.delta, and the next get_indexer() replays them. An
+    indexer that is writing or compacting stays registered.
 
     Args:
-        index_dir (str | None): Override index directory.
+        indexer (IncrementalIndexer): Indexer of the evicted profile.
 
     Returns:
-        IncrementalIndexer: Singleton instance.
+        bool: True if the indexer was removed.
     """
-    global _indexer
-    if _indexer is None:
-        _indexer = IncrementalIndexer(index_dir)
-    return _indexer
+    key = str(indexer.index_dir)
+    with _indexers_lock:
+        if _indexers.get(key) is not indexer or indexer.compacting:
+            return False
+        if not indexer._lock.acquire(blocking=False):
+            return False
+        try:
+            del _indexers[key]
+        finally:
+            indexer._lock.release()
+    return True
+
+
+def checkpoint_all_indexers() -> None:
+    """Flush every indexer's delta log into faiss.index (called on shutdown)."""
+    for indexer in list(_indexers.values()):
+        try:
+            indexer.checkpoint()
+        except Exception as e:
+            logger.error(f"❌ Checkpoint failed for {indexer.index_dir}: {e}")
@@ -13,10 +13,20 @@
 #
 #   CLI:
 #   python -m src.rag.indexer --docs-dir docs --output-dir rag_index
+#   python -m src.rag.indexer --docs-dir docs --output-dir rag_index --index-type ivf_flat
+#   python -m src.rag.indexer --convert support --index-type hnsw --ef-search 128
 #
 # File: indexer.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.5
+# Version: 0.8.0
+# Изменения в 0.8.0:
+#   - Модель и кодирование фрагментов через общий EmbeddingService
+#     (sentence_transformers проверяется через find_spec, без неиспользуемого импорта)
+#   - Тип индекса настраивается (flat, ivf_flat, ivf_pq, hnsw) через src.rag.ann_index;
+#     тип и параметры записываются в index_info.json и meta.json
+#   - CLI: --index-type/--nlist/--pq-m/--hnsw-m/--nprobe/--ef-search и --convert
+#     для перестройки существующего профиля на месте без повторного кодирования
+#   - save_index дополнительно пишет хранилище чанков (chunks.jsonl + смещения) для mmap-загрузки
 # Изменения в 0.6.5:
 #   - Полная русификация комментариев и документации
 #   - Обновление лицензии на MIT (автор: hypo69)
@@ -30,6 +40,7 @@ import faiss
 import argparse
 import json
 import hashlib
+import importlib.util
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -37,9 +48,17 @@ from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+from src.rag.ann_index import (
+    INDEX_TYPES, build_index, convert_index_dir, describe_index, enable_reconstruct,
+    record_index_type, resolve_index_params,
+)
+from src.rag.chunk_store import write_chunk_store
+
 try:
-    from sentence_transformers import SentenceTransformer
     import faiss
+    # Модель загружает EmbeddingService; здесь — только проверка наличия пакета (без импорта torch)
+    if importlib.util.find_spec('sentence_transformers') is None:
+        raise ModuleNotFoundError("No module named 'sentence_transformers'", name='sentence_transformers')
 except ImportError:
     print('Зависимости RAG не установлены: pip install sentence-transformers faiss-cpu')
     raise
@@ -61,6 +80,7 @@ class RAGIndexer:
         """
         self.model_name = model_name
         self.model = None
+        self.embedder = None
         self.chunks: List[Dict[str, Any]] = []
         self.embeddings = None
         self.docs_root: Optional[Path] = None
@@ -74,7 +94,11 @@ class RAGIndexer:
         """
         logger.info(f'Загрузка модели: {self.model_name}')
         try:
-            self.model = SentenceTransformer(self.model_name)
+            # Общий экземпляр модели с RAGSystem и IncrementalIndexer (без повторной загрузки)
+            # Model instance shared with RAGSystem and IncrementalIndexer (no second load)
+            from src.rag.embedding_service import get_embedding_service
+            self.embedder = get_embedding_service(self.model_name)
+            self.model = self.embedder.get_model()
             logger.info('✅ Модель загружена')
         except Exception as e:
             # Ошибка может возникнуть из-за отсутствия интернета или неверного имени модели
@@ -315,17 +339,25 @@ class RAGIndexer:
         to_encode_indices = []
         to_encode_texts = []
         reused_count = 0
+        reconstruct_source = None
+
+        # Проверка наличия старого индекса: IVF требует direct map для reconstruct()
+        if existing_index is not None:
+            try:
+                reconstruct_source = enable_reconstruct(existing_index)
+            except Exception:
+                reconstruct_source = None
 
         for i, chunk in enumerate(self.chunks):
             old_idx = chunk.get('_old_idx')
             reused = False
 
             # Проверка возможности повторного использования вектора
-            if existing_index is not None and old_idx is not None and old_idx < existing_index.ntotal:
+            if reconstruct_source is not None and old_idx is not None and old_idx < reconstruct_source.ntotal:
                 # Проверка совпадения размерностей
-                if existing_index.d == dimension:
+                if reconstruct_source.d == dimension:
                     try:
-                        final_embeddings[i] = existing_index.reconstruct(old_idx)
+                        final_embeddings[i] = reconstruct_source.reconstruct(old_idx)
                         reused_count += 1
                         reused = True
                     except Exception:
@@ -339,15 +371,13 @@ class RAGIndexer:
         # Проверка необходимости кодирования новых фрагментов
         if to_encode_texts:
             logger.info(f"Кодирование {len(to_encode_texts)} новых/измененных фрагментов...")
-            batch_size = 32
             try:
-                for start_idx in range(0, len(to_encode_texts), batch_size):
-                    end_idx = start_idx + batch_size
-                    batch_texts = to_encode_texts[start_idx:end_idx]
-                    batch_embeddings = self.model.encode(batch_texts, show_progress_bar=True)
-
-                    for j, emb in enumerate(batch_embeddings):
-                        final_embeddings[to_encode_indices[start_idx + j]] = emb
+                # Нормализация выполняется в save_index — здесь сырые векторы
+                # Normalisation happens in save_index — raw vectors here
+                encoded = self.embedder.encode_documents(
+                    to_encode_texts, batch_size=32, normalize=False, show_progress_bar=True
+                )
+                final_embeddings[to_encode_indices] = encoded
             except Exception as e:
                 logger.error(f'❌ Ошибка при создании эмбеддингов: {e}')
                 raise
@@ -358,23 +388,25 @@ class RAGIndexer:
         self.embeddings = final_embeddings
         logger.info(f'✅ Форма эмбеддингов: {self.embeddings.shape} (Переиспользовано: {reused_count})')
 
-    def save_index(self, output_dir: Path) -> None:
+    def save_index(self, output_dir: Path, index_params: Optional[Dict[str, Any]] = None) -> None:
         """Сборка индекса FAISS и сохранение всех артефактов.
 
         Args:
             output_dir (Path): Директория для сохранения.
+            index_params (Optional[Dict[str, Any]]): Тип индекса и параметры
+                (см. ann_index.resolve_index_params). По умолчанию — из meta.json профиля и конфигурации.
 
         Raises:
             Exception: Если не удалось создать индекс.
             OSError: Если не удалось записать файлы на диск.
         """
         output_dir.mkdir(parents=True, exist_ok=True)
+        params = index_params or resolve_index_params(output_dir)
 
         try:
             faiss.normalize_L2(self.embeddings)
             dimension = self.embeddings.shape[1]
-            index = faiss.IndexFlatIP(dimension)
-            index.add(self.embeddings)
+            index = build_index(self.embeddings, params=params)
             logger.info(f'✅ Индекс FAISS: {index.ntotal} векторов')
         except Exception as e:
             # Ошибка возникает, если эмбеддинги отсутствуют или имеют неверный тип данных
@@ -389,10 +421,14 @@ class RAGIndexer:
             logger.error(f'❌ Ошибка при записи faiss.index: {e}')
             raise
 
+        info = describe_index(index)
         try:
             (output_dir / 'chunks.json').write_text(
                 json.dumps(self.chunks, ensure_ascii=False, indent=2), encoding='utf-8'
             )
+            # Хранилище с произвольным доступом: RAGSystem читает только найденные чанки
+            # Random-access store: RAGSystem decodes only the hit chunks
+            write_chunk_store(output_dir, self.chunks)
             (output_dir / 'index_info.json').write_text(
                 json.dumps({
                     'model':        self.model_name,
@@ -400,9 +436,13 @@ class RAGIndexer:
                     'dimension':    dimension,
                     'created_at':   datetime.now().isoformat(),
                     'version':      '1.0.0',
+                    'index_type':   info['index_type'],
+                    'index':        info,
+                    'index_params': params,
                 }, ensure_ascii=False, indent=2),
                 encoding='utf-8',
             )
+            record_index_type(output_dir, index, params)
             logger.info(f'✅ Метаданные сохранены в {output_dir}')
         except OSError as e:
             # Ошибка при записи служебных файлов
@@ -410,16 +450,57 @@ class RAGIndexer:
             raise
 
 
+def _resolve_profile_dir(profile: str) -> Path:
+    """Путь к профилю: существующая директория или имя профиля в ~/.aiassistant/rag/.
+
+    Args:
+        profile (str): Путь или имя профиля.
+
+    Returns:
+        Path: Директория профиля.
+    """
+    path = Path(profile).expanduser()
+    # Проверка: передан путь к существующей директории
+    if path.is_dir():
+        return path
+    from src.core.config import config
+    return Path(config.dir_rag).expanduser() / profile
+
+
 def main() -> None:
-    """Точка входа CLI для индексации документов."""
+    """Точка входа CLI для индексации документов и конвертации типа индекса."""
     parser = argparse.ArgumentParser(description='RAG Indexer for FastAPI Foundry')
-    parser.add_argument('--docs-dir',   required=True,  help='Директория с документами')
+    parser.add_argument('--docs-dir',   help='Директория с документами')
     parser.add_argument('--output-dir', default='./rag_index', help='Директория для индекса')
     parser.add_argument('--model',      default='sentence-transformers/all-mpnet-base-v2')
     parser.add_argument('--chunk-size', type=int, default=1000, help='Размер чанка')
     parser.add_argument('--overlap',    type=int, default=50, help='Перекрытие чанков')
+    parser.add_argument('--convert',    metavar='PROFILE', help='Перестроить faiss.index профиля (путь или имя) на месте')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, help='Тип индекса (по умолчанию — из meta.json/config)')
+    parser.add_argument('--nlist',      type=int, help='Число кластеров IVF (0 — авто)')
+    parser.add_argument('--pq-m',       type=int, help='Число подвекторов PQ')
+    parser.add_argument('--hnsw-m',     type=int, help='Связей на узел HNSW')
+    parser.add_argument('--ef-construction', type=int, help='efConstruction для HNSW')
+    parser.add_argument('--nprobe',     type=int, help='nprobe при поиске (IVF)')
+    parser.add_argument('--ef-search',  type=int, help='efSearch при поиске (HNSW)')
     args = parser.parse_args()
 
+    overrides = {
+        'index_type': args.index_type, 'nlist': args.nlist, 'pq_m': args.pq_m, 'hnsw_m': args.hnsw_m,
+        'ef_construction': args.ef_construction, 'nprobe': args.nprobe, 'ef_search': args.ef_search,
+    }
+
+    # Проверка режима конвертации существующего профиля
+    if args.convert:
+        result = convert_index_dir(_resolve_profile_dir(args.convert), **overrides)
+        logger.info(f"Готово: {result['before']['index_type']} → {result['after']['index_type']}, "
+                    f"векторов: {result['after']['vectors']}")
+        return
+
+    # Проверка наличия исходной директории для режима индексации
+    if not args.docs_dir:
+        parser.error('требуется --docs-dir (или --convert PROFILE)')
+
     docs_dir = Path(args.docs_dir)
     # Проверка существования исходной директории
     if not docs_dir.exists():
@@ -436,7 +517,8 @@ def main() -> None:
         return
 
     indexer.create_embeddings()
-    indexer.save_index(Path(args.output_dir))
+    output_dir = Path(args.output_dir)
+    indexer.save_index(output_dir, index_params=resolve_index_params(output_dir, **overrides))
     logger.info(f'Готово. Всего фрагментов: {len(indexer.chunks)}')
 
 
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG Profile Pool — resident multi-profile index cache
+# =============================================================================
+# Description:
+#   Keeps several RAG profiles (FAISS index + chunk metadata) loaded at once so
+#   requests can name their profile instead of switching the global one.
+#   Profiles are loaded lazily on first use (one load per profile even under
+#   concurrent requests) and evicted in LRU order when the pool exceeds
+#   rag_system.pool_max_profiles or rag_system.pool_max_memory_mb.
+#   The active profile (set by /rag/profiles/load) is pinned and never evicted.
+#   Incremental profiles keep a reference to their IncrementalIndexer (writer)
+#   and search its live index, so document writes need no reload.
+#
+# Examples:
+#   >>> pool = ProfilePool(loader=rag_system._load_profile, max_profiles=4)
+#   >>> profile = await pool.get(Path("~/.aiassistant/rag/support"))
+#   >>> pool.stats()["profiles"]
+#
+# File: src/rag/profile_pool.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - A cancelled load cancels the shared future; eviction releases the
+#     profile's IncrementalIndexer from the registry
+#   - load(pin=True) pins before the budget runs; the profile just loaded is
+#     never evicted by its own load
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import faiss
+
+from src.logger import logger
+
+
+@dataclass
+class ResidentProfile:
+    """One loaded profile: everything a search needs.
+
+    Immutable after load, except that a profile with a ``writer`` searches the
+    writer's live index (see IncrementalIndexer.reading).
+    """
+
+    index_dir: str
+    index: faiss.Index
+    chunk_store: Any = None
+    sqlite_backed: bool = False
+    index_type: str = "flat"
+    mmapped: bool = False
+    memory_bytes: int = 0
+    chunks_count: int = 0
+    writer: Any = None  # IncrementalIndexer owning a shared, mutable index
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+    searches: int = 0
+
+
+class ProfilePool:
+    """LRU pool of resident profiles with a count and memory budget.
+
+    Args:
+        loader (Callable): async loader(index_dir: Path) -> ResidentProfile.
+        max_profiles (int): Maximum number of resident profiles.
+        max_memory_mb (int): Budget for the estimated index size of all profiles (0 = no limit).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[Path], Awaitable[ResidentProfile]],
+        max_profiles: int = 4,
+        max_memory_mb: int = 0,
+    ) -> None:
+        self.loader = loader
+        self.max_profiles = max(1, int(max_profiles))
+        self.max_bytes = max(0, int(max_memory_mb)) * 1024 * 1024
+        self._profiles: "OrderedDict[str, ResidentProfile]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._pinned: Optional[str] = None
+        self._stats: Dict[str, int] = {"hits": 0, "loads": 0, "evictions": 0, "load_errors": 0}
+
+    @staticmethod
+    def key(index_dir: Path | str) -> str:
+        """Normalised pool key for a profile directory."""
+        return str(Path(index_dir).expanduser())
+
+    # ── Lookup / load ─────────────────────────────────────────────────────────
+
+    def peek(self, index_dir: Path | str) -> Optional[ResidentProfile]:
+        """Return a resident profile without loading or touching LRU order."""
+        return self._profiles.get(self.key(index_dir))
+
+    async def get(self, index_dir: Path | str) -> ResidentProfile:
+        """Return a resident profile, loading it on first use.
+
+        Concurrent callers for the same profile share one load.
+
+        Args:
+            index_dir (Path | str): Profile directory.
+
+        Returns:
+            ResidentProfile: Loaded profile.
+
+        Raises:
+            FileNotFoundError: When the profile has no index.
+            Exception: Loader errors are propagated to every waiting caller.
+        """
+        key = self.key(index_dir)
+        profile = self._profiles.get(key)
+        if profile is not None:
+            self._stats["hits"] += 1
+            return self._touch(key, profile)
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            return self._touch(key, await asyncio.shield(pending))
+        return await self.load(key)
+
+    async def load(self, index_dir: Path | str, pin: bool = False) -> ResidentProfile:
+        """(Re)load a profile from disk and put it into the pool, replacing any resident copy.
+
+        Args:
+            index_dir (Path | str): Profile directory.
+            pin (bool): Make it the pinned (active) profile before the budget is
+                enforced, so the previously active one can be evicted instead.
+
+        Returns:
+            ResidentProfile: Freshly loaded profile.
+        """
+        key = self.key(index_dir)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            profile = await self.loader(Path(key))
+        except asyncio.CancelledError:
+            # Ожидающие get() не должны зависнуть на незавершённом future
+            # Waiting get() calls must not hang on a future nobody settles
+            future.cancel()
+            raise
+        except Exception as e:
+            self._stats["load_errors"] += 1
+            future.set_exception(e)
+            # Исключение получено ожидающими; гасим предупреждение "never retrieved"
+            # Waiters receive the exception; silence "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+        self._stats["loads"] += 1
+        self._profiles[key] = profile
+        self._profiles.move_to_end(key)
+        future.set_result(profile)
+        if pin:
+            self._pinned = key
+        self._enforce_budget(keep=key)
+        logger.info(
+            f"RAG pool: loaded {key} ({profile.index_type}, {profile.chunks_count} chunks, "
+            f"{profile.memory_bytes / 1024 / 1024:.1f} MB), resident={len(self._profiles)}"
+        )
+        return profile
+
+    def _touch(self, key: str, profile: ResidentProfile) -> ResidentProfile:
+        if key in self._profiles:
+            self._profiles.move_to_end(key)
+        profile.last_used = time.monotonic()
+        profile.searches += 1
+        return profile
+
+    # ── Eviction ──────────────────────────────────────────────────────────────
+
+    def pin(self, index_dir: Optional[Path | str]) -> None:
+        """Protect the active profile from eviction (None unpins)."""
+        self._pinned = self.key(index_dir) if index_dir else None
+
+    def _total_bytes(self) -> int:
+        return sum(p.memory_bytes for p in self._profiles.values())
+
+    def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        """Evict least recently used unpinned profiles until within budget.
+
+        Args:
+            keep (str | None): Profile just loaded for a caller; never the victim.
+        """
+        while len(self._profiles) > 1 and (
+            len(self._profiles) > self.max_profiles
+            or (self.max_bytes and self._total_bytes() > self.max_bytes)
+        ):
+            victim = next((k for k in self._profiles if k not in (self._pinned, keep)), None)
+            if victim is None:
+                break
+            self.evict(victim)
+
+    def evict(self, index_dir: Path | str) -> bool:
+        """Drop a profile from the pool.
+
+        In-flight searches keep their reference; memory maps are released once they finish.
+
+        Args:
+            index_dir (Path | str): Profile directory.
+
+        Returns:
+            bool: True if the profile was resident.
+        """
+        key = self.key(index_dir)
+        profile = self._profiles.pop(key, None)
+        if profile is None:
+            return False
+        if profile.writer is not None:
+            # The indexer registry would keep the live index alive otherwise
+            from .incremental_indexer import release_indexer
+
+            release_indexer(profile.writer)
+        self._stats["evictions"] += 1
+        logger.info(f"RAG pool: evicted {key}")
+        return True
+
+    def clear(self) -> None:
+        """Drop every resident profile."""
+        self._profiles.clear()
+        self._pinned = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool counters and resident profiles (most recently used last).
+
+        Returns:
+            dict: max_profiles, max_memory_mb, memory_mb, hits, loads, evictions, profiles.
+        """
+        now = time.monotonic()
+        return {
+            "max_profiles": self.max_profiles,
+            "max_memory_mb": self.max_bytes // (1024 * 1024),
+            "memory_mb": round(self._total_bytes() / 1024 / 1024, 2),
+            **self._stats,
+            "loading": list(self._loading),
+            "profiles": [
+                {
+                    "index_dir": key,
+                    "name": Path(key).name,
+                    "pinned": key == self._pinned,
+                    "index_type": p.index_type,
+                    "mmap": p.mmapped,
+                    "live": p.writer is not None,
+                    "chunks": p.chunks_count,
+                    "memory_mb": round(p.memory_bytes / 1024 / 1024, 2),
+                    "searches": p.searches,
+                    "idle_seconds": round(now - p.last_used, 1),
+                }
+                for key, p in self._profiles.items()
+            ],
+        }
@@ -21,7 +21,7 @@ from src.logger import logger
 from src.utils.text_extractor import TextExtractor
 
 from .document_ingestor import DocumentIngestor
-from .document_store import DocumentStore
+from .document_store import get_store
 from .incremental_indexer import IncrementalIndexer, get_indexer
 from .rag_system import rag_system
 
@@ -49,7 +49,7 @@ class RAGPipeline:
             lambda: self._indexer().add_document(title, content, source_path),
         )
         if result.get("success"):
-            await rag_system.reload_index(str(self.index_dir))
+            await rag_system.refresh_profile(str(self.index_dir))
         return result
 
     async def ingest_upload(self, file: UploadFile) -> Dict[str, Any]:
@@ -71,7 +71,7 @@ class RAGPipeline:
           extract   — text extraction from file/archive
           chunk     — text split into chunks
           embed     — embedding progress (done/total chunks)
-          index     — FAISS write + DB save
+          index     — vectors added to the shared FAISS index (delta log) + DB save
           done      — final summary
           error     — on failure
 
@@ -117,22 +117,17 @@ class RAGPipeline:
                         loop,
                     )
 
-                def _index_with_progress() -> Dict[str, Any]:
-                    indexer = self._indexer()
-                    if not content.strip():
-                        return {"success": False, "error": "Content is empty"}
-                    doc_id = indexer.store.add_document(src, content, src)
-                    chunks_added = indexer._index_document(doc_id, content, progress_cb=_progress_cb)
-                    indexer._maybe_compact()
-                    return {"success": True, "doc_id": doc_id, "chunks_added": chunks_added}
-
-                result = await loop.run_in_executor(None, _index_with_progress)
+                result = await loop.run_in_executor(
+                    None,
+                    lambda: self._indexer().add_document(src, content, src, progress_cb=_progress_cb),
+                )
 
                 if not result.get("success"):
                     await _put({"stage": "error", "message": result.get("error", "Indexing failed")})
                     return
 
-                await rag_system.reload_index(str(self.index_dir))
+                # Vectors are already in the shared in-memory index; only stale cache is dropped
+                await rag_system.refresh_profile(str(self.index_dir))
 
                 await _put({"stage": "index", "done": True,
                              "message": f"Saved to FAISS index ({result['chunks_added']} chunks)"})
@@ -175,7 +170,6 @@ class RAGPipeline:
         """
         index_path = self.index_dir / "faiss.index"
         chunks_path = self.index_dir / "chunks.json"
-        db_path = self.index_dir / "documents.db"
 
         before_type = None
         before_total = 0
@@ -187,7 +181,8 @@ class RAGPipeline:
             except Exception as exc:
                 logger.warning("Could not inspect FAISS index before migration: %s", exc)
 
-        store = DocumentStore(db_path)
+        # The indexer's pooled store: a temporary DocumentStore would leave its connections open
+        store = get_store(str(self.index_dir))
         if not store.get_all_active_chunks() and chunks_path.exists():
             chunks = json.loads(chunks_path.read_text(encoding="utf-8"))
             grouped: Dict[str, list[dict[str, Any]]] = {}
@@ -213,8 +208,7 @@ class RAGPipeline:
                     ],
                 )
 
-        indexer = IncrementalIndexer(self.index_dir)
-        result = indexer.compact()
+        result = self._indexer().compact()
         try:
             new_index = faiss.read_index(str(index_path))
             after_type = type(new_index).__name__
@@ -11,7 +11,10 @@ from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional
 
 from src.core.config import config
 from src.logger import logger
-from src.models.router import detect_backend, route_generate
+from src.models.context_window import get_context_window
+from src.models.response_cache import context_hash
+from src.models.router import route_generate, route_generate_stream
+from src.utils.api_utils import ServiceOverloadedError
 
 from .rag_system import rag_system
 
@@ -38,6 +41,8 @@ class RAGQueryRequest:
     max_tokens: Optional[int] = None
     system_prompt: str = ""
     stream: bool = False
+    profile: Optional[str] = None
+    cache_control: Optional[str] = None
 
 
 class RAGService:
@@ -56,18 +61,35 @@ class RAGService:
         top_k: int = 5,
         filters: Optional[RAGQueryFilters] = None,
         rerank: bool = True,
+        profile: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """Retrieve chunks, apply filters and optional lightweight reranking."""
+        """Retrieve chunks, apply filters and optional lightweight reranking.
+
+        profile selects a resident profile from the pool; None uses the active one.
+        """
         if not query.strip():
             return []
         filters = filters or RAGQueryFilters()
         fetch_k = max(top_k * 4, top_k)
-        results = await rag_system.search(query, top_k=fetch_k)
+        results = await rag_system.search(query, top_k=fetch_k, profile=profile)
         results = self._apply_filters(results, filters)
         if rerank:
             results = self._rerank(query, results)
         return results[:top_k]
 
+    async def fit_chunks(self, request: RAGQueryRequest, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the best-ranked chunks that fit the model's prompt budget.
+
+        The budget is what remains of the context window after the completion
+        (max_tokens) and the prompt without context (instruction + question).
+        """
+        if not chunks:
+            return chunks
+        window = get_context_window()
+        budget = await window.prompt_budget(request.model, request.max_tokens)
+        frame = await window.count(request.model, self.build_prompt(request.query, [], request.system_prompt))
+        return await window.pack_chunks(request.model, chunks, budget - frame)
+
     def build_prompt(self, query: str, chunks: List[Dict[str, Any]], system_prompt: str = "") -> str:
         """Build a grounded prompt with citations."""
         instruction = system_prompt.strip() or self.default_system_prompt
@@ -91,9 +113,11 @@ class RAGService:
             top_k=request.top_k,
             filters=request.filters,
             rerank=request.rerank,
+            profile=request.profile,
         )
+        chunks = await self.fit_chunks(request, chunks)
         prompt = self.build_prompt(request.query, chunks, request.system_prompt)
-        generation = await self._generate(prompt, request)
+        generation = await self._generate(prompt, request, context_hash(chunks))
         return {
             "success": bool(generation.get("success")),
             "answer": generation.get("content", ""),
@@ -107,16 +131,27 @@ class RAGService:
 
     async def stream_query(self, request: RAGQueryRequest) -> AsyncGenerator[Dict[str, Any], None]:
         """Stream retrieval metadata followed by generated answer deltas."""
-        chunks = await self.retrieve(
-            request.query,
-            top_k=request.top_k,
-            filters=request.filters,
-            rerank=request.rerank,
-        )
+        try:
+            chunks = await self.retrieve(
+                request.query,
+                top_k=request.top_k,
+                filters=request.filters,
+                rerank=request.rerank,
+                profile=request.profile,
+            )
+        except ServiceOverloadedError as exc:
+            # The SSE response has already started: report overload as an event
+            yield {"type": "error", "error": str(exc), "retry_after": exc.retry_after}
+            return
+        except FileNotFoundError as exc:
+            # Unknown profile requested
+            yield {"type": "error", "error": str(exc)}
+            return
+        chunks = await self.fit_chunks(request, chunks)
         prompt = self.build_prompt(request.query, chunks, request.system_prompt)
         yield {"type": "retrieval", "chunks": chunks, "citations": self._citations(chunks)}
 
-        async for event in self._generate_stream(prompt, request):
+        async for event in self._generate_stream(prompt, request, context_hash(chunks)):
             yield event
 
     def _apply_filters(self, results: List[Dict[str, Any]], filters: RAGQueryFilters) -> List[Dict[str, Any]]:
@@ -149,7 +184,7 @@ class RAGService:
             scored.append(item)
         return sorted(scored, key=lambda x: x.get("rerank_score", x.get("score", 0.0)), reverse=True)
 
-    async def _generate(self, prompt: str, request: RAGQueryRequest) -> Dict[str, Any]:
+    async def _generate(self, prompt: str, request: RAGQueryRequest, context: str = "") -> Dict[str, Any]:
         if self._wants_opencode(request.model):
             return await self._generate_opencode(prompt)
         return await route_generate(
@@ -157,9 +192,13 @@ class RAGService:
             model=request.model,
             temperature=request.temperature,
             max_tokens=request.max_tokens,
+            context_hash=context,
+            cache_control=request.cache_control,
         )
 
-    async def _generate_stream(self, prompt: str, request: RAGQueryRequest) -> AsyncGenerator[Dict[str, Any], None]:
+    async def _generate_stream(
+        self, prompt: str, request: RAGQueryRequest, context: str = ""
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         if self._wants_opencode(request.model):
             result = await self._generate_opencode(prompt)
             if result.get("success"):
@@ -169,37 +208,15 @@ class RAGService:
                 yield {"type": "error", "error": result.get("error", "opencode error")}
             return
 
-        backend, clean_model = detect_backend(request.model)
-        if backend == "foundry":
-            from src.models.foundry_client import foundry_client
-
-            async for chunk in foundry_client.generate_stream(
-                prompt,
-                model=clean_model or None,
-                temperature=request.temperature if request.temperature is not None else 0.7,
-                max_tokens=request.max_tokens or 2048,
-            ):
-                yield self._stream_event(chunk, request.model or "foundry")
-            return
-
-        if backend == "lmstudio":
-            from src.models.lmstudio_client import lmstudio_client
-
-            async for chunk in lmstudio_client.stream_generate(
-                prompt,
-                model=clean_model,
-                temperature=request.temperature if request.temperature is not None else 0.7,
-                max_tokens=request.max_tokens or 512,
-            ):
-                yield self._stream_event(chunk, request.model or "lmstudio")
-            return
-
-        result = await self._generate(prompt, request)
-        if result.get("success"):
-            yield {"type": "delta", "content": result.get("content", "")}
-            yield {"type": "done", "model": result.get("model")}
-        else:
-            yield {"type": "error", "error": result.get("error", "generation error")}
+        async for chunk in route_generate_stream(
+            prompt,
+            model=request.model,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            context_hash=context,
+            cache_control=request.cache_control,
+        ):
+            yield self._stream_event(chunk, chunk.get("model") or request.model or "")
 
     async def _generate_opencode(self, prompt: str) -> Dict[str, Any]:
         """Call opencode CLI when explicitly requested."""
@@ -233,7 +250,11 @@ class RAGService:
     @staticmethod
     def _stream_event(chunk: Dict[str, Any], model: str) -> Dict[str, Any]:
         if not chunk.get("success"):
-            return {"type": "error", "error": chunk.get("error", "generation error")}
+            event = {"type": "error", "error": chunk.get("error", "generation error")}
+            if chunk.get("retry_after") is not None:
+                # Admission rejection: same shape as a retrieval overload event
+                event["retry_after"] = chunk["retry_after"]
+            return event
         if chunk.get("finished"):
             return {"type": "done", "model": model, "usage": chunk.get("usage") or {}}
         return {"type": "delta", "content": chunk.get("content", "")}
@@ -10,7 +10,30 @@
 # Project: Ai Assistant (Docker)
 # Package: src.rag
 # Module: rag_system
-# Version: 0.6.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Search cache replaced by bounded LRU/TTL SearchCache keyed by
+#     (profile, normalized query, top_k, filters) with per-profile invalidation
+#   - search() accepts optional filters (sources, document_ids, min_score)
+#   - Query encoding goes through the shared EmbeddingService
+#     (query-vector LRU cache + micro-batched encode off the event loop)
+#   - Encode, FAISS search and SQLite metadata fetch run in the bounded
+#     RetrievalExecutor; overload raises ServiceOverloadedError (→ 503)
+#   - Per-stage latency (encode, ann, metadata, total) recorded for /rag/retrieval/stats
+#   - reload_index определяет тип ANN-индекса (flat, ivf_flat, ivf_pq, hnsw) и
+#     применяет nprobe / efSearch из meta.json профиля или конфигурации
+#   - faiss.index загружается через mmap (rag_system.index_mmap); chunks.json заменён
+#     хранилищем ChunkStore (chunks.jsonl + смещения), текст читается только для top-k
+#   - Дубликаты по тексту отбрасываются в результатах поиска, а не при загрузке
+#     (прежняя очистка списка чанков сдвигала позиции относительно векторов FAISS)
+#   - ProfilePool: несколько профилей резидентны одновременно (LRU + бюджет памяти,
+#     ленивая загрузка); search(profile=...) и search_profiles() для поиска по нескольким
+#     профилям с объединением по score; активный профиль закреплен в пуле
+#   - Инкрементальные профили (documents.db + IndexIDMap) ищут по общему с
+#     IncrementalIndexer индексу в памяти: новые векторы видны сразу, без reload_index;
+#     refresh_profile() после записи только сбрасывает кеш
+#   - Метаданные чанков при поиске читаются через общий get_store(index_dir)
+#     (пул соединений, read-only), а не через новый DocumentStore на каждый запрос
 # Changes in 0.6.1:
 #   - index_directories: fixed config access (config.get_section instead of config.rag_system.get)
 # Author: hypo69
@@ -18,7 +41,9 @@
 # License: MIT
 # =============================================================================
 
+import asyncio
 import json
+import time
 from datetime import datetime
 import logging
 from pathlib import Path
@@ -28,6 +53,15 @@ from typing import List, Dict, Any, Optional
 import faiss
 from src.logger import logger
 from src.core.config import config
+from src.utils.api_utils import ServiceOverloadedError
+from src.utils.text_utils import sanitize_for_filesystem
+from .ann_index import apply_search_params, describe_index, index_type_of, read_index, resolve_index_params
+from .chunk_store import ChunkStore, ensure_chunk_store
+from .embedding_service import EmbeddingService, get_embedding_service
+from .incremental_indexer import IncrementalIndexer, get_indexer
+from .profile_pool import ProfilePool, ResidentProfile
+from .retrieval_executor import RetrievalExecutor, get_retrieval_executor
+from .search_cache import SearchCache
 
 class RAGSystem:
     """Класс для управления жизненным циклом RAG индекса и выполнения поиска."""
@@ -35,143 +69,354 @@ class RAGSystem:
     def __init__(self) -> None:
         """Инициализация экземпляра RAG системы."""
         self.index: Optional[faiss.Index] = None
-        self.chunks: List[Dict[str, Any]] = []
+        self.chunk_store: Optional[ChunkStore] = None
         self.model: Any = None
-        self._search_cache: Dict[tuple, List[Dict[str, Any]]] = {} # Кэш для результатов поиска
+        self.search_cache: SearchCache = SearchCache(
+            max_entries=config.rag_search_cache_max_entries,
+            max_bytes=config.rag_search_cache_max_mb * 1024 * 1024,
+            ttl_seconds=config.rag_search_cache_ttl_seconds,
+        ) # Кэш для результатов поиска
         self.current_index_dir: Optional[str] = None
         self._sqlite_backed_index: bool = False
+        self._writer: Optional[IncrementalIndexer] = None # Общий индекс инкрементального профиля
         self.source_dirs: List[Path] = [] # Список исходных директорий для индексации
         self.RAG_HOME: Path = Path(config.dir_rag).expanduser()
+        self.pool: ProfilePool = ProfilePool(
+            loader=self._load_profile,
+            max_profiles=config.rag_pool_max_profiles,
+            max_memory_mb=config.rag_pool_max_memory_mb,
+        ) # Резидентные профили для поиска с явным profile
 
     def _profile_index_dir(self, safe_name: str) -> Path:
         """Получение пути к директории профиля."""
         self.RAG_HOME = Path(config.dir_rag).expanduser()
         return self.RAG_HOME / safe_name
 
+    def _embedder(self) -> EmbeddingService:
+        """Получение общего сервиса эмбеддингов для модели из конфигурации.
+
+        Returns:
+            EmbeddingService: Сервис, общий с индексаторами.
+        """
+        return get_embedding_service(config.rag_model)
+
     def _get_model(self) -> Any:
         """Инициализация и получение модели эмбеддингов.
 
         ПОЧЕМУ ВЫБРАНА ЛЕНИВАЯ ЗАГРУЗКА:
           - Модели SentenceTransformers (например, mpnet или MiniLM) занимают значительный объем RAM.
           - Загрузка при первом обращении предотвращает задержки при старте сервера, если RAG не используется.
+          - Экземпляр модели общий с IncrementalIndexer и RAGIndexer через EmbeddingService.
 
         Returns:
             Any: Экземпляр SentenceTransformer.
         """
-        if self.model is None:
-            # Импорт внутри метода для предотвращения задержек при инициализации модуля
-            # Import inside the method to prevent initialization delays
-            from sentence_transformers import SentenceTransformer
-            
-            model_name: str = config.rag_model
-            logger.info(f"Загрузка модели эмбеддингов: {model_name}")
-            self.model = SentenceTransformer(model_name)
-            
+        self.model = self._embedder().get_model()
         return self.model
 
-    async def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def resolve_profile_dir(self, profile: str) -> Path:
+        """Получение директории профиля по имени или пути.
+
+        Args:
+            profile (str): Имя профиля в ~/.aiassistant/rag/ или путь к директории.
+
+        Returns:
+            Path: Директория профиля.
+
+        Raises:
+            FileNotFoundError: Если в директории нет faiss.index.
+        """
+        path = Path(profile).expanduser()
+        # Проверка: передан путь к директории профиля
+        # Check: a profile directory path was passed
+        if not (path.is_absolute() and path.is_dir()):
+            path = self._profile_index_dir(sanitize_for_filesystem(profile))
+        if not (path / "faiss.index").exists():
+            raise FileNotFoundError(f"RAG profile '{profile}' not found or has no index")
+        return path
+
+    async def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        profile: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """Поиск релевантных фрагментов текста в векторном индексе.
 
         ПОЧЕМУ ИСПОЛЬЗУЕТСЯ ЭТА РЕАЛИЗАЦИЯ:
           - FAISS обеспечивает сверхбыстрый поиск в векторном пространстве.
           - SentenceTransformers гарантирует высокое качество семантического сопоставления.
           - Проверка наличия индекса предотвращает ошибки при пустой базе знаний.
+          - Профиль указывается явно: индексы нескольких профилей резидентны в ProfilePool,
+            запросы разных ботов не переключают общий активный профиль.
 
         Args:
             query (str): Текст поискового запроса.
             top_k (int): Количество возвращаемых результатов.
+            filters (Dict[str, Any], optional): Фильтры результатов:
+                sources (List[str]), document_ids (List[int]), min_score (float).
+            profile (str, optional): Имя или путь профиля. None — активный профиль.
 
         Returns:
             List[Dict[str, Any]]: Список найденных сегментов с контентом и оценкой схожести.
+
+        Raises:
+            FileNotFoundError: Если указанный профиль не существует.
+            ServiceOverloadedError: Если пул поиска переполнен.
         """
-        results: List[Dict[str, Any]] = []
-        query_vector: np.ndarray = None
-        distances: np.ndarray = None
-        
-        # Проверка кеша
-        # Cache check
-        cache_key = (query, top_k)
-        if cache_key in self._search_cache:
-            logger.debug(f"Возвращение результатов поиска из кеша для запроса: '{query[:50]}...'")
-            return self._search_cache[cache_key]
-        indices: np.ndarray = None
-        model: Any = None
-        
+        if profile is not None:
+            resident = await self.pool.get(self.resolve_profile_dir(profile))
+            return await self._search_in(
+                resident.index, resident.chunk_store, resident.sqlite_backed, resident.index_dir,
+                query, top_k, filters, resident.writer,
+            )
+
         # Проверка готовности системы к поиску
         # System readiness check for search
         if not self.index:
             logger.warning("Поиск невозможен: индекс не загружен.")
             return []
 
-        if not query.strip():
+        return await self._search_in(
+            self.index, self.chunk_store, self._sqlite_backed_index, self.current_index_dir,
+            query, top_k, filters, self._writer,
+        )
+
+    async def search_profiles(
+        self,
+        query: str,
+        profiles: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Поиск сразу по нескольким профилям с объединением результатов по score.
+
+        Вектор запроса кодируется один раз (кэш EmbeddingService), профили ищутся параллельно.
+        Оценки сопоставимы: все профили используют одну модель и скалярное произведение
+        нормализованных векторов.
+
+        Args:
+            query (str): Текст поискового запроса.
+            profiles (List[str]): Имена или пути профилей.
+            top_k (int): Количество результатов после объединения.
+            filters (Dict[str, Any], optional): Фильтры (применяются в каждом профиле).
+
+        Returns:
+            List[Dict[str, Any]]: Результаты с полем profile, по убыванию score.
+
+        Raises:
+            FileNotFoundError: Если один из профилей не существует.
+        """
+        names = list(dict.fromkeys(profiles))
+        dirs = [self.resolve_profile_dir(name) for name in names]
+        residents = await asyncio.gather(*(self.pool.get(d) for d in dirs))
+        per_profile = await asyncio.gather(*(
+            self._search_in(r.index, r.chunk_store, r.sqlite_backed, r.index_dir, query, top_k, filters, r.writer)
+            for r in residents
+        ))
+
+        merged: List[Dict[str, Any]] = []
+        for name, results in zip(names, per_profile):
+            merged.extend({**r, "profile": name} for r in results)
+        merged.sort(key=lambda r: r.get("score", 0.0), reverse=True)
+        return merged[:top_k]
+
+    async def _search_in(
+        self,
+        index: Optional[faiss.Index],
+        chunk_store: Optional[ChunkStore],
+        sqlite_backed_index: bool,
+        index_dir: Optional[str],
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        writer: Optional[IncrementalIndexer] = None,
+    ) -> List[Dict[str, Any]]:
+        """Поиск в одном снимке профиля: кеш, кодирование запроса, FAISS, метаданные.
+
+        Args:
+            index (faiss.Index, optional): Индекс профиля.
+            chunk_store (ChunkStore, optional): Хранилище чанков (для индексов без SQLite).
+            sqlite_backed_index (bool): Признак IndexIDMap + documents.db.
+            index_dir (str, optional): Директория профиля (ключ кеша).
+            query (str): Текст поискового запроса.
+            top_k (int): Количество результатов.
+            filters (Dict[str, Any], optional): Фильтры результатов.
+            writer (IncrementalIndexer, optional): Владелец общего индекса; поиск идет по его
+                текущему индексу под блокировкой чтения.
+
+        Returns:
+            List[Dict[str, Any]]: Найденные сегменты.
+        """
+        results: List[Dict[str, Any]] = []
+        query_vector: np.ndarray = None
+        executor: RetrievalExecutor = None
+        started: float = 0.0
+
+        if writer is not None:
+            index = writer.index
+
+        if index is None or not query.strip():
             return []
 
-        if self.index.ntotal <= 0:
+        if index.ntotal <= 0:
             return []
 
+        # Проверка кеша
+        # Cache check
+        cache_key = self.search_cache.make_key(index_dir, query, top_k, filters)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Возвращение результатов поиска из кеша для запроса: '{query[:50]}...'")
+            return cached
+
         try:
-            # Получение модели и генерация вектора запроса
-            # Retrieval of the model and generation of the query vector
-            model = self._get_model()
-            query_vector = model.encode([query]).astype('float32')
-            faiss.normalize_L2(query_vector)
-
-            # Выполнение поиска в FAISS
-            # Execution of the FAISS search
-            search_k = top_k
-            if self._sqlite_backed_index:
-                search_k = min(max(top_k * 5, top_k), self.index.ntotal)
-            distances, indices = self.index.search(query_vector, search_k)
-
-            # Сборка результатов на основе найденных индексов
-            # Assembly of results based on discovered indices
-            if self._sqlite_backed_index and self.current_index_dir:
-                from .document_store import DocumentStore
-
-                ids = [int(idx) for idx in indices[0] if idx != -1]
-                store = DocumentStore(Path(self.current_index_dir) / "documents.db")
-                chunks_by_id = store.get_active_chunks_by_ids(ids)
-
-                for i, idx in enumerate(indices[0]):
-                    chunk_row = chunks_by_id.get(int(idx))
-                    if not chunk_row:
-                        continue
-
-                    chunk = {
-                        "id": chunk_row["id"],
-                        "document_id": chunk_row["document_id"],
-                        "source": chunk_row.get("source_path") or chunk_row.get("doc_title"),
-                        "path": chunk_row.get("source_path", ""),
-                        "section": chunk_row.get("doc_title", ""),
-                        "text": chunk_row["text"],
-                        "content": chunk_row["text"],
-                        "score": float(distances[0][i]),
-                    }
-                    results.append(chunk)
-                    if len(results) >= top_k:
-                        break
-            else:
-                for i, idx in enumerate(indices[0]):
-                    if idx == -1 or idx >= len(self.chunks):
-                        continue
-
-                    chunk = self.chunks[idx].copy()
-
-                    # Конвертация расстояния в score (нормализация зависит от типа индекса)
-                    # Conversion of distance to score
-                    chunk['score'] = float(distances[0][i])
-                    results.append(chunk)
+            executor = get_retrieval_executor()
+            started = time.perf_counter()
+
+            # Генерация вектора запроса (кэш + пакетирование, в пуле поиска)
+            # Generation of the query vector (cache + batching, in the retrieval pool)
+            query_vector = await self._embedder().encode_query(self.search_cache.normalize_query(query))
+            query_vector = np.array(query_vector, dtype='float32').reshape(1, -1)
+            executor.latency.record("encode", time.perf_counter() - started)
+
+            # FAISS и SQLite выполняются в пуле поиска; снимок состояния защищает от reload_index
+            # FAISS and SQLite run in the retrieval pool; the state snapshot guards against reload_index
+            results = await executor.run(
+                self._search_sync,
+                index,
+                chunk_store,
+                sqlite_backed_index,
+                index_dir,
+                query_vector,
+                top_k,
+                writer,
+            )
+
+            # Применение фильтров до кеширования
+            # Applying filters before caching
+            results = self._apply_filters(results, filters)
 
             # Сохранение результатов в кеш
             # Saving results to cache
-            self._search_cache[cache_key] = results
+            self.search_cache.put(cache_key, results)
+            executor.latency.record("total", time.perf_counter() - started)
             logger.debug(f"Поиск завершен. Найдено результатов: {len(results)}")
             return results
 
+        except ServiceOverloadedError:
+            # Перегрузка пула поиска передается вызывающему (→ 503 + Retry-After)
+            # Retrieval pool overload is propagated to the caller (→ 503 + Retry-After)
+            raise
         except Exception as e:
             logger.error(f"Ошибка при выполнении векторного поиска: {e}")
             return []
 
+    def _search_sync(
+        self,
+        index: faiss.Index,
+        chunk_store: Optional[ChunkStore],
+        sqlite_backed_index: bool,
+        index_dir: Optional[str],
+        query_vector: np.ndarray,
+        top_k: int,
+        writer: Optional[IncrementalIndexer] = None,
+    ) -> List[Dict[str, Any]]:
+        """ANN-поиск и сборка метаданных (блокирующая часть, выполняется в пуле поиска).
+
+        Args:
+            index (faiss.Index): Снимок индекса на момент запроса.
+            chunk_store (ChunkStore, optional): Хранилище чанков (для индексов без SQLite).
+            sqlite_backed_index (bool): Признак IndexIDMap + documents.db.
+            index_dir (str, optional): Директория профиля.
+            query_vector (np.ndarray): Нормализованный вектор запроса формы (1, dim).
+            top_k (int): Количество результатов.
+            writer (IncrementalIndexer, optional): Владелец общего индекса (см. _search_in).
+
+        Returns:
+            List[Dict[str, Any]]: Найденные сегменты с оценкой схожести.
+        """
+        results: List[Dict[str, Any]] = []
+        latency = get_retrieval_executor().latency
+
+        # Выполнение поиска в FAISS
+        # Execution of the FAISS search
+        started = time.perf_counter()
+        if writer is not None:
+            # Общий индекс: добавление векторов ждет завершения поиска
+            # Shared index: vector adds wait until the search finishes
+            with writer.reading() as live_index:
+                distances, indices = self._ann_search(live_index, query_vector, top_k, sqlite_backed_index)
+        else:
+            distances, indices = self._ann_search(index, query_vector, top_k, sqlite_backed_index)
+        latency.record("ann", time.perf_counter() - started)
+
+        # Сборка результатов на основе найденных индексов
+        # Assembly of results based on discovered indices
+        started = time.perf_counter()
+        if sqlite_backed_index and index_dir:
+            from .document_store import get_store
+
+            ids = [int(idx) for idx in indices[0] if idx != -1]
+            # Shared store: pooled read-only connection, no schema DDL per search
+            store = get_store(index_dir)
+            chunks_by_id = store.get_active_chunks_by_ids(ids)
+
+            for i, idx in enumerate(indices[0]):
+                chunk_row = chunks_by_id.get(int(idx))
+                if not chunk_row:
+                    continue
+
+                chunk = {
+                    "id": chunk_row["id"],
+                    "document_id": chunk_row["document_id"],
+                    "source": chunk_row.get("source_path") or chunk_row.get("doc_title"),
+                    "path": chunk_row.get("source_path", ""),
+                    "section": chunk_row.get("doc_title", ""),
+                    "text": chunk_row["text"],
+                    "content": chunk_row["text"],
+                    "score": float(distances[0][i]),
+                }
+                results.append(chunk)
+                if len(results) >= top_k:
+                    break
+        elif chunk_store is not None:
+            # Декодирование только найденных чанков
+            # Only the hit chunks are decoded
+            chunks_by_pos = chunk_store.get_many(int(idx) for idx in indices[0] if idx != -1)
+            seen_texts: set = set()
+
+            for i, idx in enumerate(indices[0]):
+                chunk = chunks_by_pos.get(int(idx))
+                if not chunk:
+                    continue
+
+                # Пропуск дубликатов текста
+                # Skipping duplicate texts
+                text = chunk.get('text', chunk.get('content', ''))
+                if text in seen_texts:
+                    continue
+                seen_texts.add(text)
+
+                # Конвертация расстояния в score (нормализация зависит от типа индекса)
+                # Conversion of distance to score
+                chunk['score'] = float(distances[0][i])
+                results.append(chunk)
+                if len(results) >= top_k:
+                    break
+        latency.record("metadata", time.perf_counter() - started)
+
+        return results
+
+    @staticmethod
+    def _ann_search(index: faiss.Index, query_vector: np.ndarray, top_k: int, sqlite_backed_index: bool):
+        """Поиск кандидатов в FAISS с запасом под отбрасываемые результаты."""
+        # Запас кандидатов: неактивные чанки (SQLite) и дубликаты текста отбрасываются ниже
+        # Candidate headroom: inactive chunks (SQLite) and duplicate texts are dropped below
+        search_k = min(top_k * 5 if sqlite_backed_index else top_k * 2, index.ntotal)
+        return index.search(query_vector, max(1, search_k))
+
     def _check_index_integrity(self, index_file: Path) -> bool:
         """Проверка целостности и доступности файла индекса FAISS.
 
@@ -208,29 +453,6 @@ class RAGSystem:
 
         return True
 
-    def _remove_duplicate_chunks(self) -> None:
-        """Удаление дубликатов фрагментов текста из текущего набора чанков.
-
-        Обоснование:
-          - Предотвращает избыточность контекста при поиске.
-          - Уменьшает потребление памяти.
-          - Использует уникальность текста как критерий идентичности.
-        """
-        unique_chunks: List[Dict[str, Any]] = []
-        seen_texts: set = set()
-
-        for chunk in self.chunks:
-            # Получение текста из полей 'text' или 'content'
-            # Retrieval of text from 'text' or 'content' fields
-            text = chunk.get('text', chunk.get('content', ''))
-            if text and text not in seen_texts:
-                seen_texts.add(text)
-                unique_chunks.append(chunk)
-
-        if len(unique_chunks) < len(self.chunks):
-            logger.info(f"Очистка дубликатов: удалено {len(self.chunks) - len(unique_chunks)} фрагментов")
-            self.chunks = unique_chunks
-
     async def index_directories(self, source_dirs: List[str] = None) -> bool:
         """Индексация нескольких директорий и обновление векторной базы.
         
@@ -284,13 +506,93 @@ class RAGSystem:
             return False
         return await self.reload_index(index_dir)
 
+    async def _load_profile(self, path: Path) -> ResidentProfile:
+        """Загрузка профиля с диска без изменения активного состояния (загрузчик ProfilePool).
+
+        Args:
+            path (Path): Директория профиля.
+
+        Returns:
+            ResidentProfile: Индекс, хранилище чанков и параметры профиля.
+
+        Raises:
+            FileNotFoundError: Если директория или faiss.index отсутствуют/повреждены.
+            ValueError: Если размерность индекса не совпадает с моделью.
+        """
+        index_file: Path = path / "faiss.index"
+        loaded_index: Optional[faiss.Index] = None
+        loaded_store: Optional[ChunkStore] = None
+        writer: Optional[IncrementalIndexer] = None
+        mmapped: bool = False
+        model_dim: int = 0
+
+        if not path.exists(): # Проверка существования директории
+            raise FileNotFoundError(f"Директория RAG индекса не найдена: {path}")
+
+        # Проверка целостности индекса перед загрузкой
+        # Index integrity check before loading
+        if not self._check_index_integrity(index_file):
+            raise FileNotFoundError(f"Файл индекса отсутствует или поврежден: {index_file}")
+
+        # Загрузка векторной базы (mmap — без копирования векторов в RAM)
+        # Loading of the FAISS index (mmap — vectors are not copied into RAM)
+        loaded_index, mmapped = await asyncio.to_thread(read_index, index_file, config.rag_index_mmap)
+
+        # Проверка совместимости размерности векторов
+        # Verification of vector dimension compatibility
+        model_dim = self._get_model().get_sentence_embedding_dimension()
+        if model_dim != loaded_index.d:
+            raise ValueError(
+                f"Несовместимость размерности векторов! "
+                f"Модель ({config.rag_model}): {model_dim}, Индекс: {loaded_index.d}. "
+                f"Профиль: {path}"
+            )
+
+        # Метаданные чанков: SQLite для инкрементальных профилей, иначе ChunkStore
+        # (однократная конвертация chunks.json; далее — только открытие файлов)
+        # Chunk metadata: SQLite for incremental profiles, ChunkStore otherwise
+        # (chunks.json converted once; afterwards files are only opened)
+        sqlite_backed_index = (path / "documents.db").exists() and "IDMap" in type(loaded_index).__name__
+        if sqlite_backed_index:
+            # Индекс в памяти общий с IncrementalIndexer (+ воспроизведение faiss.delta)
+            # The in-memory index is shared with IncrementalIndexer (+ faiss.delta replay)
+            writer = get_indexer(path)
+            loaded_index = await asyncio.to_thread(lambda: writer.index)
+            mmapped = False
+        else:
+            loaded_store = await asyncio.to_thread(ensure_chunk_store, path, config.rag_index_mmap)
+
+            # Параметры поиска под тип индекса (nprobe для IVF, efSearch для HNSW)
+            # Search parameters matching the index type (nprobe for IVF, efSearch for HNSW)
+            apply_search_params(loaded_index, resolve_index_params(path))
+
+        # Новая версия профиля — старые результаты из кеша недействительны
+        # A new version of the profile — cached results are stale
+        self.search_cache.invalidate(str(path))
+
+        return ResidentProfile(
+            index_dir=str(path),
+            index=loaded_index,
+            chunk_store=loaded_store,
+            sqlite_backed=sqlite_backed_index,
+            index_type=index_type_of(loaded_index),
+            mmapped=mmapped,
+            memory_bytes=index_file.stat().st_size,
+            chunks_count=len(loaded_store) if loaded_store is not None else int(loaded_index.ntotal),
+            writer=writer,
+        )
+
     async def reload_index(self, index_dir: str) -> bool:
-        """Динамическая перезагрузка индекса RAG для смены профилей.
+        """Динамическая перезагрузка индекса RAG для смены активного профиля.
 
         ПОЧЕМУ ВЫБРАНО ЭТО РЕШЕНИЕ:
           - Позволяет переключать контекст знаний "на лету" без перезапуска API.
           - Использует стандартные файлы .index и .json для совместимости с индоксером.
           - Обеспечивает атомарность: состояние обновляется только после успешной загрузки файлов.
+          - faiss.index отображается в память (mmap), чанки читаются из ChunkStore по запросу:
+            время переключения и RSS не растут с размером корпуса.
+          - Профиль загружается в ProfilePool и закрепляется там как активный; остальные
+            резидентные профили остаются доступными для поиска с явным profile.
 
         Args:
             index_dir (str): Путь к директории с файлами faiss.index и chunks.json.
@@ -299,67 +601,31 @@ class RAGSystem:
             bool: True если индекс и чанки успешно загружены.
         """
         path: Path = Path(index_dir).expanduser()
-        index_file: Path = path / "faiss.index"
-        chunks_file: Path = path / "chunks.json"
-        loaded_index: Optional[faiss.Index] = None
-        loaded_chunks: List[Dict[str, Any]] = []
-
-        model: Any = None
-        model_dim: int = 0
-        index_dim: int = 0
+        resident: Optional[ResidentProfile] = None
 
         logger.info(f"Перезагрузка RAG профиля: {path}")
 
-        if not path.exists(): # Проверка существования директории
-            logger.error(f"Директория RAG индекса не найдена: {path}")
-            return False
-
-        # Проверка целостности индекса перед загрузкой
-        # Index integrity check before loading
-        if not self._check_index_integrity(index_file):
+        try:
+            # Закрепляется до проверки бюджета: вытеснить можно прежний активный профиль
+            # Pinned before the budget runs: the previously active profile may be evicted
+            resident = await self.pool.load(path, pin=True)
+        except Exception as e:
+            logger.error(f"Ошибка при смене RAG профиля: {e}")
             return False
 
         try:
-            # Загрузка векторной базы
-            # Loading of the FAISS index
-            loaded_index = faiss.read_index(str(index_file))
-            
-            # Проверка совместимости размерности векторов
-            # Verification of vector dimension compatibility
-            model = self._get_model()
-            model_dim = model.get_sentence_embedding_dimension()
-            index_dim = loaded_index.d
-            
-            if model_dim != index_dim:
-                logger.error(
-                    f"Несовместимость размерности векторов! "
-                    f"Модель ({config.rag_model}): {model_dim}, Индекс: {index_dim}. "
-                    f"Профиль: {path}"
-                )
-                return False
-            
-            # Загрузка метаданных (текстовых сегментов)
-            # Loading of the chunk metadata
-            if chunks_file.exists():
-                loaded_chunks = json.loads(chunks_file.read_text(encoding="utf-8"))
-            sqlite_backed_index = (path / "documents.db").exists() and "IDMap" in type(loaded_index).__name__
-            
             # Атомарное обновление состояния системы
             # Atomic update of the system state
-            self.index = loaded_index
-            self.chunks = loaded_chunks
-            self._sqlite_backed_index = sqlite_backed_index
-
-            # Очистка дубликатов фрагментов
-            # Removal of duplicate fragments
-            self._remove_duplicate_chunks()
+            # Прежнее хранилище не закрывается явно: его могут читать поиски в полёте
+            # The previous store is not closed explicitly: in-flight searches may still read it
+            self.index = resident.index
+            self.chunk_store = resident.chunk_store
+            self._sqlite_backed_index = resident.sqlite_backed
+            self._writer = resident.writer
+            self.current_index_dir = resident.index_dir
+            self.pool.pin(resident.index_dir)
+            index_info = describe_index(resident.index)
 
-            self.current_index_dir = str(path)
-            
-            # Очистка кеша поиска при перезагрузке индекса
-            # Clearing search cache on index reload
-            self._search_cache = {}
-            
             # Автоматическое сохранение метаданных при перезагрузке
             # Automatic saving of metadata on reload
             meta_file = path / "meta.json"
@@ -372,8 +638,10 @@ class RAGSystem:
             
             meta_data.update({
                 "index_dir": str(path),
-                "chunks": len(self.chunks),
+                "chunks": resident.chunks_count,
                 "model": config.rag_model,
+                "index_type": index_info["index_type"],
+                "index": index_info,
                 "updated_at": datetime.now().isoformat()
             })
             
@@ -382,19 +650,110 @@ class RAGSystem:
 
             meta_file.write_text(json.dumps(meta_data, ensure_ascii=False, indent=2), encoding="utf-8")
             
-            logger.info(f"RAG профиль успешно изменен. Активно чанков: {len(self.chunks)}")
+            logger.info(
+                f"RAG профиль успешно изменен. Активно чанков: {resident.chunks_count}, "
+                f"индекс: {index_info['index_type']}{' (mmap)' if resident.mmapped else ''}"
+            )
             return True
 
         except Exception as e:
             logger.error(f"Ошибка при смене RAG профиля: {e}")
             return False
 
+    def deactivate(self) -> None:
+        """Отключение активного профиля (резидентные профили остаются в пуле)."""
+        self.index = None
+        self.chunk_store = None
+        self._sqlite_backed_index = False
+        self._writer = None
+        self.current_index_dir = None
+        self.pool.pin(None)
+
+    async def refresh_profile(self, index_dir: str) -> bool:
+        """Обновление профиля после инкрементальной записи (документы, compact).
+
+        ПОЧЕМУ НЕ reload_index:
+          - Профили с documents.db ищут по общему с IncrementalIndexer индексу в памяти:
+            новые векторы уже доступны, достаточно сбросить кеш поиска.
+          - Полная перезагрузка (чтение faiss.index, проверка размерности, meta.json)
+            выполняется только для профилей, еще не подключенных к общему индексу.
+
+        Args:
+            index_dir (str): Директория профиля.
+
+        Returns:
+            bool: True если профиль доступен для поиска.
+        """
+        key = ProfilePool.key(index_dir)
+        self.invalidate_cache(key)
+
+        resident = self.pool.peek(key)
+        if key == self.current_index_dir and self._writer is not None:
+            return True
+        if resident is not None and resident.writer is not None and key != self.current_index_dir:
+            return True
+        return await self.reload_index(key)
+
+    def evict_profile(self, index_dir: str) -> bool:
+        """Выгрузка профиля из пула и сброс его кеша (после пересборки или удаления).
+
+        Активный профиль остается загруженным до следующего reload_index.
+
+        Args:
+            index_dir (str): Директория профиля.
+
+        Returns:
+            bool: True если профиль был резидентным.
+        """
+        self.invalidate_cache(index_dir)
+        if self.current_index_dir and ProfilePool.key(index_dir) == self.current_index_dir:
+            return False
+        return self.pool.evict(index_dir)
+
     def format_context(self, results: List[Dict[str, Any]]) -> str:
         """Форматирование результатов поиска в единый блок текста."""
         # Объединение текстовых фрагментов через двойной перенос строки
         # Joining of text fragments with double newline
         return "\n\n".join([r.get("text", r.get("content", "")) for r in results])
 
+    def _apply_filters(
+        self,
+        results: List[Dict[str, Any]],
+        filters: Optional[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Применение фильтров поиска (sources, document_ids, min_score).
+
+        Args:
+            results (List[Dict[str, Any]]): Список результатов поиска.
+            filters (Dict[str, Any], optional): Фильтры из запроса.
+
+        Returns:
+            List[Dict[str, Any]]: Отфильтрованные результаты.
+        """
+        if not filters:
+            return results
+
+        if filters.get("sources"):
+            results = self.filter_by_source(results, filters["sources"])
+        if filters.get("document_ids"):
+            document_ids = {int(d) for d in filters["document_ids"]}
+            results = [r for r in results if int(r.get("document_id", -1)) in document_ids]
+        if filters.get("min_score"):
+            results = self.filter_by_score(results, float(filters["min_score"]))
+        return results
+
+    def invalidate_cache(self, index_dir: Optional[str] = None) -> int:
+        """Сброс кеша поиска для профиля (по умолчанию — активного).
+
+        Args:
+            index_dir (str, optional): Директория профиля. None — текущий профиль.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        target = str(Path(index_dir).expanduser()) if index_dir else self.current_index_dir
+        return self.search_cache.invalidate(target)
+
     def filter_by_source(self, results: List[Dict[str, Any]], sources: List[str]) -> List[Dict[str, Any]]:
         """Фильтрация результатов поиска по списку источников.
 
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG Retrieval Executor — bounded thread pool for search work
+# =============================================================================
+# Description:
+#   Dedicated thread pool for CPU-bound retrieval (SentenceTransformer encode,
+#   FAISS search, SQLite metadata fetch) so the asyncio event loop stays free
+#   for /health, SSE streams and other requests.
+#   Admission is bounded: running + queued jobs never exceed
+#   retrieval_threads + retrieval_queue_depth; extra work is rejected at once
+#   with ServiceOverloadedError (→ HTTP 503 + Retry-After).
+#   Per-stage latency (encode, ann, metadata, total) is tracked in a rolling window.
+#
+# Examples:
+#   >>> from src.rag.retrieval_executor import get_retrieval_executor
+#   >>> executor = get_retrieval_executor()
+#   >>> result = await executor.run(index.search, query_vector, 5)
+#   >>> executor.stats()["stages"]["ann"]["p95_ms"]
+#
+# File: src/rag/retrieval_executor.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from src.core.config import config
+from src.logger import logger
+from src.utils.api_utils import ServiceOverloadedError
+
+
+class LatencyStats:
+    """Rolling per-stage latency statistics.
+
+    Args:
+        window (int): Number of most recent samples kept per stage for percentiles.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+        self._max: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Add one sample.
+
+        Args:
+            stage (str): Stage name (encode, ann, metadata, total ...).
+            seconds (float): Measured duration.
+        """
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._totals[stage] = self._totals.get(stage, 0.0) + seconds
+            self._max[stage] = max(self._max.get(stage, 0.0), seconds)
+
+    @staticmethod
+    def _percentile(ordered: list, pct: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return count, avg, p50, p95, p99 and max (milliseconds) per stage.
+
+        Returns:
+            dict: Stage name → statistics.
+        """
+        with self._lock:
+            result: Dict[str, Dict[str, float]] = {}
+            for stage, samples in self._samples.items():
+                ordered = sorted(samples)
+                count = self._counts[stage]
+                result[stage] = {
+                    "count": count,
+                    "avg_ms": round(self._totals[stage] / count * 1000, 3),
+                    "p50_ms": round(self._percentile(ordered, 0.50) * 1000, 3),
+                    "p95_ms": round(self._percentile(ordered, 0.95) * 1000, 3),
+                    "p99_ms": round(self._percentile(ordered, 0.99) * 1000, 3),
+                    "max_ms": round(self._max[stage] * 1000, 3),
+                }
+            return result
+
+
+class RetrievalExecutor:
+    """Bounded thread pool with fast rejection for retrieval work.
+
+    Args:
+        max_workers (int): Number of retrieval threads.
+        max_queue (int): Jobs allowed to wait for a free thread.
+        retry_after (float): Retry-After hint (seconds) for rejected requests.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, retry_after: float = 1.0) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = retry_after
+        self.latency = LatencyStats()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rag-retrieval")
+        self._active = 0
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of running + queued jobs."""
+        return self.max_workers + self.max_queue
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in the retrieval pool.
+
+        Args:
+            fn (Callable): Blocking function.
+            *args: Positional arguments for fn.
+
+        Returns:
+            Any: Return value of fn.
+
+        Raises:
+            ServiceOverloadedError: When running + queued jobs reached capacity.
+        """
+        with self._lock:
+            if self._active >= self.capacity:
+                self._rejected += 1
+                raise ServiceOverloadedError(
+                    f"RAG retrieval queue is full ({self._active}/{self.capacity})",
+                    retry_after=self.retry_after,
+                )
+            self._active += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, *args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool utilisation and per-stage latency.
+
+        Returns:
+            dict: threads, queue_depth, active, queued, completed, rejected, stages.
+        """
+        with self._lock:
+            active = self._active
+            completed = self._completed
+            rejected = self._rejected
+        return {
+            "threads": self.max_workers,
+            "queue_depth": self.max_queue,
+            "active": active,
+            "running": min(active, self.max_workers),
+            "queued": max(0, active - self.max_workers),
+            "completed": completed,
+            "rejected": rejected,
+            "stages": self.latency.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting work and release the threads."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Module-level singleton — sized from config on first use
+_executor: Optional[RetrievalExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor() -> RetrievalExecutor:
+    """Return (or create) the module-level RetrievalExecutor singleton.
+
+    Returns:
+        RetrievalExecutor: Shared instance.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = RetrievalExecutor(
+                max_workers=config.rag_retrieval_threads,
+                max_queue=config.rag_retrieval_queue_depth,
+                retry_after=config.rag_retrieval_retry_after_seconds,
+            )
+            logger.info(
+                f"RAG retrieval executor: threads={_executor.max_workers}, queue_depth={_executor.max_queue}"
+            )
+    return _executor
+
+
+def shutdown_retrieval_executor() -> None:
+    """Shut down the singleton (called from the application lifespan)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: RAG Search Cache — bounded LRU/TTL cache for search results
+# =============================================================================
+# Description:
+#   In-process cache for RAGSystem.search results.
+#   Entries are keyed by (profile, normalized query, top_k, filters) and
+#   bounded by entry count, approximate byte size and time-to-live.
+#   Eviction is least-recently-used; stale entries are dropped on access.
+#
+#   Workflow:
+#     get(key)  → hit (move to MRU end) | miss | expired (drop, count as miss)
+#     put(key)  → insert at MRU end → evict LRU until limits are satisfied
+#     invalidate(profile) → drop all entries of one RAG profile
+#
+# Examples:
+#   >>> cache = SearchCache(max_entries=512, max_bytes=32 * 1024 * 1024, ttl_seconds=600)
+#   >>> key = cache.make_key("support", "How to reset?", 5)
+#   >>> cache.put(key, [{"text": "...", "score": 0.9}])
+#   >>> cache.get(key)
+#
+# File: src/rag/search_cache.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - get() / put() copy the result dicts, so callers cannot modify cached entries
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+CacheKey = Tuple[str, str, int, str]
+
+# Fixed per-entry / per-field overhead used by the size estimate (dict, key, floats)
+_ENTRY_OVERHEAD_BYTES = 256
+_FIELD_OVERHEAD_BYTES = 64
+
+
+class SearchCache:
+    """Thread-safe LRU cache with TTL and byte budget for RAG search results.
+
+    Args:
+        max_entries (int): Maximum number of cached queries. 0 disables caching.
+        max_bytes (int): Approximate memory budget for cached results.
+        ttl_seconds (float): Entry lifetime; 0 means no expiry.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 600) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    # ── Keys ──────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Collapse whitespace so trivially different spellings share one entry.
+
+        Args:
+            query (str): Raw query text.
+
+        Returns:
+            str: Normalized query.
+        """
+        return " ".join(query.split())
+
+    @classmethod
+    def make_key(
+        cls,
+        profile: Optional[str],
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> CacheKey:
+        """Build a cache key.
+
+        Args:
+            profile (str | None): Index directory / profile of the search.
+            query (str): Query text.
+            top_k (int): Requested number of results.
+            filters (dict | None): Filters applied to the results.
+
+        Returns:
+            CacheKey: Hashable key.
+        """
+        filters_key = json.dumps(filters or {}, sort_keys=True, ensure_ascii=False, default=str)
+        return (profile or "", cls.normalize_query(query), int(top_k), filters_key)
+
+    @staticmethod
+    def _estimate_size(results: List[Dict[str, Any]]) -> int:
+        """Approximate memory footprint of a result list in bytes."""
+        size = _ENTRY_OVERHEAD_BYTES
+        for item in results:
+            for key, value in item.items():
+                size += _FIELD_OVERHEAD_BYTES + len(key)
+                if isinstance(value, str):
+                    size += len(value.encode("utf-8", errors="ignore"))
+        return size
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results or None.
+
+        Args:
+            key (CacheKey): Key from make_key().
+
+        Returns:
+            List[dict] | None: Copies of the cached results (callers may modify them).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            stored_at, size, results = entry
+            if self.ttl_seconds and (time.monotonic() - stored_at) > self.ttl_seconds:
+                del self._entries[key]
+                self._bytes -= size
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return [dict(result) for result in results]
+
+    def put(self, key: CacheKey, results: List[Dict[str, Any]]) -> None:
+        """Store results and evict least-recently-used entries over budget.
+
+        Args:
+            key (CacheKey): Key from make_key().
+            results (List[dict]): Search results to cache.
+        """
+        if not self.max_entries:
+            return
+
+        size = self._estimate_size(results)
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            # Own copies: the caller keeps annotating its results (score, profile)
+            self._entries[key] = (time.monotonic(), size, [dict(result) for result in results])
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, profile: Optional[str]) -> int:
+        """Drop every entry that belongs to one profile.
+
+        Args:
+            profile (str | None): Profile / index directory used in make_key().
+
+        Returns:
+            int: Number of removed entries.
+        """
+        profile_key = profile or ""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == profile_key]
+            for k in stale:
+                self._bytes -= self._entries.pop(k)[1]
+            self._invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and utilisation.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, expirations, entries, bytes, limits, per-profile entries.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            profiles: Dict[str, int] = {}
+            for key in self._entries:
+                profiles[key[0]] = profiles.get(key[0], 0) + 1
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "profiles": profiles,
+            }
@@ -3,16 +3,26 @@
 # Process Name: Text Extractor for RAG — Package Init
 # =============================================================================
 # Description:
-#   Exports the main TextExtractor class and Settings for use in the RAG pipeline.
+#   Exports the main TextExtractor class and Settings for use in the RAG pipeline,
+#   plus the process-pool extraction engine.
 #
 # File: src/rag/text_extractor_4_rag/__init__.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.0
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Export ExtractionEngine, get_extraction_engine, shutdown_extraction_engine
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
 
 from .config import settings
 from .extractors import TextExtractor
+from .process_pool import ExtractionEngine, get_extraction_engine, shutdown_extraction_engine
 
-__all__ = ["TextExtractor", "settings"]
+__all__ = [
+    "TextExtractor",
+    "settings",
+    "ExtractionEngine",
+    "get_extraction_engine",
+    "shutdown_extraction_engine",
+]
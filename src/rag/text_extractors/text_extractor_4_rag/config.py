@@ -12,7 +12,11 @@
 #
 # File: src/rag/text_extractors/text_extractor_4_rag/config.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Process-pool extraction settings: extraction_process_pool,
+#     extraction_workers / extraction_timeouts (per format family),
+#     extraction_max_tasks_per_child
 # Changes in 0.7.1:
 #   - Moved to src/rag/text_extractors/text_extractor_4_rag/
 #   - All settings now fully sourced from config.json text_extractor section
@@ -23,7 +27,7 @@
 # =============================================================================
 
 import os
-from typing import Any, List
+from typing import Any, Dict, List
 
 from config_manager import config as _project_config
 
@@ -92,6 +96,28 @@ class Settings:
         self.MAX_EXTRACTED_SIZE: int = _env_int("MAX_EXTRACTED_SIZE", _extracted_mb * 1024 * 1024)
         self.MAX_ARCHIVE_NESTING: int = _env_int("MAX_ARCHIVE_NESTING", _cfg("max_archive_nesting", 3))
 
+        # ── Process-pool extraction (per format family) ────────────────────
+        # Families: pdf, office, ocr, archives, text — see process_pool.format_family()
+        self.EXTRACTION_PROCESS_POOL: bool = _env_bool(
+            "EXTRACTION_PROCESS_POOL", _cfg("extraction_process_pool", True)
+        )
+        _heavy: int = max(1, (os.cpu_count() or 2) // 4)
+        self.EXTRACTION_WORKERS: Dict[str, int] = {
+            "pdf": _heavy, "office": _heavy, "ocr": _heavy, "archives": 2, "text": 2,
+            **_cfg("extraction_workers", {}),
+        }
+        self.EXTRACTION_TIMEOUTS: Dict[str, int] = {
+            "pdf": self.PROCESSING_TIMEOUT_SECONDS,
+            "office": self.PROCESSING_TIMEOUT_SECONDS,
+            "ocr": self.PROCESSING_TIMEOUT_SECONDS,
+            "archives": self.PROCESSING_TIMEOUT_SECONDS,
+            "text": 60,
+            **_cfg("extraction_timeouts", {}),
+        }
+        self.EXTRACTION_MAX_TASKS_PER_CHILD: int = _env_int(
+            "EXTRACTION_MAX_TASKS_PER_CHILD", _cfg("extraction_max_tasks_per_child", 50)
+        )
+
         # ── JS rendering (advanced) ────────────────────────────────────────
         self.ENABLE_BASE64_IMAGES: bool = _env_bool("ENABLE_BASE64_IMAGES", True)
         self.WEB_PAGE_DELAY: int = _env_int("WEB_PAGE_DELAY", 3)
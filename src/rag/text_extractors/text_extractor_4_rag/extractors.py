@@ -10,7 +10,10 @@
 #
 # File: src/rag/text_extractor_4_rag/extractors.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.0
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - extract_text_async(): runs in the per-format-family process pool
+#     (process_pool.ExtractionEngine); unused internal thread pool removed
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -120,6 +123,7 @@ except ImportError:
     sync_playwright = None
 
 from .config import settings
+from .process_pool import get_extraction_engine
 from .utils import get_file_extension, is_archive_format, is_supported_format
 
 logger = logging.getLogger(__name__)
@@ -138,7 +142,29 @@ class TextExtractor:
             tess_cmd = settings.TESSERACT_CMD
             if tess_cmd and os.path.isfile(tess_cmd):
                 pytesseract.pytesseract.tesseract_cmd = tess_cmd
-        self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+    def timeout_for(self, filename: str) -> float:
+        """Таймаут извлечения (секунды) для семейства формата файла."""
+        if settings.EXTRACTION_PROCESS_POOL:
+            return get_extraction_engine().timeout_for(filename)
+        return self.timeout
+
+    async def extract_text_async(self, file_content: bytes, filename: str) -> List[Dict[str, Any]]:
+        """Асинхронное извлечение текста.
+
+        По умолчанию выполняется в пуле процессов семейства формата (pdf, office,
+        ocr, archives, text) с собственным лимитом параллелизма и таймаутом.
+        При extraction_process_pool = false — в потоке с общим таймаутом.
+
+        Raises:
+            asyncio.TimeoutError: Превышен таймаут семейства формата.
+            ValueError: Ошибка извлечения или падение рабочего процесса.
+        """
+        if settings.EXTRACTION_PROCESS_POOL:
+            return await get_extraction_engine().extract_async(file_content, filename)
+        return await asyncio.wait_for(
+            asyncio.to_thread(self.extract_text, file_content, filename), timeout=self.timeout
+        )
 
     def extract_text(self, file_content: bytes, filename: str) -> List[Dict[str, Any]]:
         """Основной метод извлечения текста (теперь синхронный для выполнения в threadpool)."""
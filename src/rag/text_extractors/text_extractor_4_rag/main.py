@@ -15,7 +15,10 @@
 #
 # File: src/rag/text_extractor_4_rag/main.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.0
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - File endpoints extract through the per-format-family process pool with
+#     family timeouts; the pool is shut down in the lifespan
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -37,6 +40,7 @@ from pydantic import BaseModel, Field
 
 from .config import settings
 from .extractors import TextExtractor
+from .process_pool import shutdown_extraction_engine
 from .utils import (
     cleanup_recent_temp_files,
     cleanup_temp_files,
@@ -146,15 +150,14 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    # Graceful shutdown: корректно закрываем пул потоков
+    # Graceful shutdown: корректно закрываем пулы процессов извлечения
     logger.info("Завершение работы Text Extraction API")
     try:
-        if hasattr(text_extractor, "_thread_pool"):
-            logger.info("Закрытие пула потоков...")
-            text_extractor._thread_pool.shutdown(wait=True)
-            logger.info("Пул потоков успешно закрыт")
+        logger.info("Закрытие пулов процессов извлечения...")
+        shutdown_extraction_engine(wait=True)
+        logger.info("Пулы процессов успешно закрыты")
     except Exception as e:
-        logger.warning(f"Ошибка при закрытии пула потоков: {str(e)}")
+        logger.warning(f"Ошибка при закрытии пулов процессов: {str(e)}")
 
     # Финальная очистка временных файлов
     try:
@@ -290,25 +293,23 @@ async def extract_text(file: UploadFile = FILE_UPLOAD):
                 },
             )
 
-        # Извлечение текста - КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: выполняем в пуле потоков с таймаутом
+        # Извлечение текста - в пуле процессов семейства формата с его таймаутом
         start_time = time.time()
+        file_timeout = text_extractor.timeout_for(safe_filename_for_processing)
         try:
-            extracted_files = await asyncio.wait_for(
-                run_in_threadpool(
-                    text_extractor.extract_text, content, safe_filename_for_processing
-                ),
-                timeout=settings.PROCESSING_TIMEOUT_SECONDS,  # 300 секунд согласно ТЗ п.5.1
+            extracted_files = await text_extractor.extract_text_async(
+                content, safe_filename_for_processing
             )
         except asyncio.TimeoutError:
             logger.error(
-                f"Таймаут обработки файла {original_filename}: превышен лимит {settings.PROCESSING_TIMEOUT_SECONDS} секунд"
+                f"Таймаут обработки файла {original_filename}: превышен лимит {file_timeout:g} секунд"
             )
             return JSONResponse(
                 status_code=504,
                 content={
                     "status": "error",
                     "filename": original_filename,
-                    "message": f"Обработка файла превысила установленный лимит времени ({settings.PROCESSING_TIMEOUT_SECONDS} секунд).",
+                    "message": f"Обработка файла превысила установленный лимит времени ({file_timeout:g} секунд).",
                 },
             )
         finally:
@@ -438,25 +439,23 @@ async def extract_text_base64(request: Base64FileRequest):
                 },
             )
 
-        # Извлечение текста - выполняем в пуле потоков с таймаутом
+        # Извлечение текста - в пуле процессов семейства формата с его таймаутом
         start_time = time.time()
+        file_timeout = text_extractor.timeout_for(safe_filename_for_processing)
         try:
-            extracted_files = await asyncio.wait_for(
-                run_in_threadpool(
-                    text_extractor.extract_text, content, safe_filename_for_processing
-                ),
-                timeout=settings.PROCESSING_TIMEOUT_SECONDS,  # 300 секунд согласно ТЗ п.5.1
+            extracted_files = await text_extractor.extract_text_async(
+                content, safe_filename_for_processing
             )
         except asyncio.TimeoutError:
             logger.error(
-                f"Таймаут обработки файла {original_filename}: превышен лимит {settings.PROCESSING_TIMEOUT_SECONDS} секунд"
+                f"Таймаут обработки файла {original_filename}: превышен лимит {file_timeout:g} секунд"
             )
             return JSONResponse(
                 status_code=504,
                 content={
                     "status": "error",
                     "filename": original_filename,
-                    "message": f"Обработка файла превысила установленный лимит времени ({settings.PROCESSING_TIMEOUT_SECONDS} секунд).",
+                    "message": f"Обработка файла превысила установленный лимит времени ({file_timeout:g} секунд).",
                 },
             )
         finally:
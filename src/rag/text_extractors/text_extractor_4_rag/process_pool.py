@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Text Extractor for RAG — Process-Pool Extraction Engine
+# =============================================================================
+# Description:
+#   Runs TextExtractor.extract_text() in child processes, one pool per format
+#   family, so a heavy PDF / LibreOffice / Tesseract job cannot starve cheap
+#   text formats and a hung parser can actually be stopped.
+#
+#   Families (format_family()):
+#     pdf      — pdf
+#     office   — doc(x), rtf, odt, xls(x), ods, csv, ppt(x), epub, eml, msg
+#     ocr      — images
+#     archives — zip, rar, 7z, tar.*
+#     text     — everything else (txt, md, html, json, source code ...)
+#
+#   Per family:
+#     - extraction_workers[family]  — max concurrent jobs (= pool processes)
+#     - extraction_timeouts[family] — seconds of execution, not of queueing;
+#       on timeout the family pool is terminated and recreated
+#   Workers are recycled after extraction_max_tasks_per_child jobs to cap
+#   memory held by leaky native parsers.
+#
+# Examples:
+#   >>> engine = get_extraction_engine()
+#   >>> files = await engine.extract_async(content, "report.pdf")
+#   >>> engine.stats()["families"]["pdf"]["timeouts"]
+#   0
+#
+# File: src/rag/text_extractors/text_extractor_4_rag/process_pool.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import settings
+from .utils import get_file_extension, is_archive_format
+
+logger = logging.getLogger(__name__)
+
+FAMILIES = ("pdf", "office", "ocr", "archives", "text")
+
+_OFFICE_EXTRA = {"epub", "eml", "msg"}
+
+
+def format_family(filename: str) -> str:
+    """Map a file name to its extraction family.
+
+    Args:
+        filename (str): File name with extension.
+
+    Returns:
+        str: One of FAMILIES.
+    """
+    formats = settings.SUPPORTED_FORMATS
+    extension = get_file_extension(filename) or ""
+    if is_archive_format(filename, formats):
+        return "archives"
+    if extension == "pdf":
+        return "pdf"
+    if extension in formats["images_ocr"]:
+        return "ocr"
+    office = set(formats["documents"]) | set(formats["spreadsheets"]) | set(formats["presentations"])
+    if extension in office or extension in _OFFICE_EXTRA:
+        return "office"
+    return "text"
+
+
+# ── Worker side (runs in a child process) ─────────────────────────────────────
+
+_worker_extractor = None
+
+
+def _extract_job(content: bytes, filename: str) -> List[Dict[str, Any]]:
+    """Extract one file inside a pool process (extractor cached per process)."""
+    global _worker_extractor
+    if _worker_extractor is None:
+        from .extractors import TextExtractor
+        _worker_extractor = TextExtractor()
+    return _worker_extractor.extract_text(content, filename)
+
+
+# ── Engine ────────────────────────────────────────────────────────────────────
+
+
+class _Family:
+    """Process pool, dispatcher threads and counters of one format family."""
+
+    def __init__(self, name: str, workers: int, timeout: float) -> None:
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.timeout = float(timeout)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        # One dispatcher thread per process: a job reaches the pool only when a
+        # process is free, so the timeout measures execution, not queueing.
+        self.dispatcher = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"extract-{name}")
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "restarts": 0}
+
+
+class ExtractionEngine:
+    """Per-family process pools with concurrency limits, timeouts and recycling.
+
+    Args:
+        workers (dict | None): family → max concurrent jobs (default: settings).
+        timeouts (dict | None): family → seconds per job (default: settings).
+        max_tasks_per_child (int | None): Jobs before a worker process is replaced.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_tasks_per_child: Optional[int] = None,
+    ) -> None:
+        workers = {**settings.EXTRACTION_WORKERS, **(workers or {})}
+        timeouts = {**settings.EXTRACTION_TIMEOUTS, **(timeouts or {})}
+        self.max_tasks_per_child = max_tasks_per_child or settings.EXTRACTION_MAX_TASKS_PER_CHILD
+        self._families = {name: _Family(name, workers[name], timeouts[name]) for name in FAMILIES}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def timeout_for(self, filename: str) -> float:
+        """Return the job timeout (seconds) that applies to filename."""
+        return self._families[format_family(filename)].timeout
+
+    def _pool(self, family: _Family) -> ProcessPoolExecutor:
+        """Return (or create) the family pool. Spawned, not forked: the parent holds threads."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Extraction engine is shut down")
+            if family.pool is None:
+                family.pool = ProcessPoolExecutor(
+                    max_workers=family.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child,
+                )
+            return family.pool
+
+    def _restart(self, family: _Family, pool: ProcessPoolExecutor) -> None:
+        """Terminate a hung or broken pool; the next job creates a fresh one."""
+        with self._lock:
+            if family.pool is not pool:
+                return  # already replaced by a concurrent job
+            family.pool = None
+            family.counters["restarts"] += 1
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            if process.is_alive():
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"Пул извлечения '{family.name}' перезапущен")
+
+    def _run(self, family: _Family, fn: Callable[..., Any], args: tuple) -> Any:
+        """Run fn(*args) in the family pool (called on a dispatcher thread)."""
+        for attempt in range(2):
+            pool = self._pool(family)
+            future = pool.submit(fn, *args)
+            try:
+                return future.result(timeout=family.timeout)
+            except FutureTimeoutError:
+                family.counters["timeouts"] += 1
+                self._restart(family, pool)
+                raise asyncio.TimeoutError(
+                    f"Extraction exceeded {family.timeout:g}s ({family.name})"
+                ) from None
+            except BrokenProcessPool:
+                self._restart(family, pool)
+                # Often killed because another job of this family timed out: retry once
+                if attempt == 0:
+                    continue
+                raise ValueError(f"Extraction worker crashed ({family.name})") from None
+        raise ValueError(f"Extraction worker crashed ({family.name})")
+
+    def submit(self, family_name: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue fn(*args) for a family; fn must be a picklable top-level callable.
+
+        Returns:
+            Future: Resolves to fn's result, asyncio.TimeoutError or ValueError.
+        """
+        family = self._families[family_name]
+        family.counters["submitted"] += 1
+        future = family.dispatcher.submit(self._run, family, fn, args)
+
+        def _count(done: Future) -> None:
+            key = "failed" if done.cancelled() or done.exception() else "completed"
+            family.counters[key] += 1
+
+        future.add_done_callback(_count)
+        return future
+
+    def extract(self, content: bytes, filename: str) -> List[Dict[str, Any]]:
+        """Blocking TextExtractor.extract_text() in the pool of the file's family."""
+        return self.submit(format_family(filename), _extract_job, content, filename).result()
+
+    async def extract_async(self, content: bytes, filename: str) -> List[Dict[str, Any]]:
+        """Async TextExtractor.extract_text() in the pool of the file's family."""
+        return await asyncio.wrap_future(self.submit(format_family(filename), _extract_job, content, filename))
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-family limits and counters."""
+        return {
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "families": {
+                name: {"workers": f.workers, "timeout": f.timeout, "running": f.pool is not None, **f.counters}
+                for name, f in self._families.items()
+            },
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop dispatchers and pools (pending jobs are cancelled)."""
+        with self._lock:
+            self._closed = True
+            pools = [(f, f.pool) for f in self._families.values()]
+            for family in self._families.values():
+                family.pool = None
+        for family, pool in pools:
+            family.dispatcher.shutdown(wait=False, cancel_futures=True)
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_engine: Optional[ExtractionEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_extraction_engine() -> ExtractionEngine:
+    """Return the shared extraction engine (created on first use)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ExtractionEngine()
+            logger.info(f"Движок извлечения: {_engine.stats()['families']}")
+    return _engine
+
+
+def shutdown_extraction_engine(wait: bool = True) -> None:
+    """Shut the shared engine down (application lifespan)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown(wait=wait)
+            _engine = None
@@ -13,11 +13,15 @@
 #       ├─ dict with "success"    → return as-is
 #       ├─ None                   → {"success": True}
 #       ├─ HTTPException          → {"success": False, "error": detail}
+#       ├─ ServiceOverloadedError → re-raised (app handler → 503 + Retry-After)
 #       └─ Exception              → {"success": False, "error": str(e)}  + log
 #
 # File: src/utils/api_utils.py
 # Project: AI Assistant (ai_assist)
-# Version: 0.7.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - ServiceOverloadedError: load-shedding signal passed through the decorator
+#     so the client receives a real 503/429 with Retry-After
 # Changes in 0.7.1:
 #   - Added workflow diagram to header
 #   - Enriched docstring with examples
@@ -37,6 +41,24 @@ from fastapi import HTTPException
 logger = logging.getLogger(__name__)
 
 
+class ServiceOverloadedError(Exception):
+    """Raised when a bounded queue or executor rejects work (load shedding).
+
+    Not converted by api_response_handler: the application-level exception
+    handler turns it into an HTTP response with a Retry-After header.
+
+    Args:
+        message (str): Human-readable reason.
+        retry_after (float): Seconds the client should wait before retrying.
+        status_code (int): 503 (server busy) or 429 (client over quota).
+    """
+
+    def __init__(self, message: str, retry_after: float = 1.0, status_code: int = 503) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
 def api_response_handler(func: Callable) -> Callable:
     """Decorator that normalises FastAPI endpoint responses.
 
@@ -107,6 +129,10 @@ def api_response_handler(func: Callable) -> Callable:
 
             return result
 
+        except ServiceOverloadedError:
+            # Load shedding — must reach the client as a real 503/429
+            raise
+
         except HTTPException as e:
             # FastAPI HTTP errors — return as structured failure
             return {"success": False, "error": e.detail}
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Process Name: Shared HTTP Connection Pool — one keep-alive pool per backend
+# =============================================================================
+# Description:
+#   Replaces per-request aiohttp.ClientSession objects (a TCP handshake per
+#   generation and TIME_WAIT build-up under load) with one TCPConnector per
+#   backend: foundry, llama, ollama, lmstudio, opencode, translator, external
+#   (third-party APIs) and default (everything else).
+#
+#   Workflow:
+#     client → http_pool.session("llama", timeout=...) ─┐
+#                                                       ├─ ClientSession (cached per timeout)
+#     endpoint → async with pooled_session("llama") ────┘        │
+#                                                                ▼
+#                                              TCPConnector("llama"): limit, limit_per_host,
+#                                              keepalive; TraceConfig → utilisation counters
+#
+#   Sessions never own the connector; the pool is created lazily on the running
+#   event loop and closed in the application lifespan (close_http_pool()).
+#   Limits come from config.json → http_pool (per-backend overrides in
+#   http_pool.backends).
+#
+# Examples:
+#   >>> session = http_pool.session("ollama", timeout=aiohttp.ClientTimeout(total=300))
+#   >>> async with session.get(f"{url}/api/tags") as r: ...
+#   >>> async with pooled_session("llama") as s:
+#   ...     async with s.get(f"{url}/health") as r: ...
+#   >>> http_pool.stats()["backends"]["llama"]["connections_reused"]
+#
+# File: src/utils/http_pool.py
+# Project: AI Assistant (ai_assist)
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Initial implementation
+#   - Pools of a previous event loop are closed (or released) instead of dropped
+# Author: hypo69
+# Copyright: © 2026 hypo69
+# =============================================================================
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("foundry", "llama", "ollama", "lmstudio", "opencode", "translator", "external", "default")
+
+
+class _BackendPool:
+    """Connector, cached sessions and counters of one backend."""
+
+    def __init__(self, name: str, limit: int, limit_per_host: int, keepalive: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        self.connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive,
+            ttl_dns_cache=300,
+        )
+        self.sessions: Dict[Tuple[Any, ...], aiohttp.ClientSession] = {}
+        self.counters = {
+            "requests": 0,
+            "in_flight": 0,
+            "errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "queued": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+        }
+        self.trace = self._trace_config()
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        counters = self.counters
+        trace = aiohttp.TraceConfig()
+
+        async def _request_start(session, ctx, params) -> None:
+            counters["requests"] += 1
+            counters["in_flight"] += 1
+
+        async def _request_end(session, ctx, params) -> None:
+            counters["in_flight"] -= 1
+
+        async def _request_exception(session, ctx, params) -> None:
+            counters["in_flight"] -= 1
+            counters["errors"] += 1
+
+        async def _queued_start(session, ctx, params) -> None:
+            ctx.queued_at = time.perf_counter()
+            counters["queued"] += 1
+
+        async def _queued_end(session, ctx, params) -> None:
+            waited = (time.perf_counter() - getattr(ctx, "queued_at", time.perf_counter())) * 1000
+            counters["queue_wait_ms_total"] += waited
+            counters["queue_wait_ms_max"] = max(counters["queue_wait_ms_max"], waited)
+
+        async def _created(session, ctx, params) -> None:
+            counters["connections_created"] += 1
+
+        async def _reused(session, ctx, params) -> None:
+            counters["connections_reused"] += 1
+
+        trace.on_request_start.append(_request_start)
+        trace.on_request_end.append(_request_end)
+        trace.on_request_exception.append(_request_exception)
+        trace.on_connection_queued_start.append(_queued_start)
+        trace.on_connection_queued_end.append(_queued_end)
+        trace.on_connection_create_end.append(_created)
+        trace.on_connection_reuseconn.append(_reused)
+        return trace
+
+    def stats(self) -> Dict[str, Any]:
+        acquired = len(getattr(self.connector, "_acquired", ()))
+        idle = sum(len(conns) for conns in getattr(self.connector, "_conns", {}).values())
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_seconds": self.keepalive,
+            "active_connections": acquired,
+            "idle_connections": idle,
+            "utilization": round(acquired / self.limit, 3) if self.limit else None,
+            "sessions": len(self.sessions),
+            **self.counters,
+        }
+
+    async def close(self) -> None:
+        for session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+        await self.connector.close()
+
+    def abandon(self) -> None:
+        """Release the pool without awaiting (its event loop is stopped or closed)."""
+        for session in self.sessions.values():
+            session.detach()
+        self.sessions.clear()
+        # Closes the transports; nothing is left to wait for once the loop has stopped
+        self.connector._close()
+
+
+class HttpPool:
+    """Per-backend keep-alive connection pools shared by all HTTP clients."""
+
+    def __init__(self) -> None:
+        self._backends: Dict[str, _BackendPool] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _settings(self, backend: str) -> Tuple[int, int, float]:
+        from ..core.config import config
+
+        override = config.http_pool_backends.get(backend, {})
+        return (
+            int(override.get("limit", config.http_pool_limit)),
+            int(override.get("limit_per_host", config.http_pool_limit_per_host)),
+            float(override.get("keepalive_seconds", config.http_pool_keepalive_seconds)),
+        )
+
+    def _backend(self, backend: str) -> _BackendPool:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # New event loop (worker process, tests): connectors are loop-bound
+            stale, old_loop = self._backends, self._loop
+            self._backends = {}
+            self._loop = loop
+            if stale:
+                self._release(stale, old_loop)
+        pool = self._backends.get(backend)
+        if pool is None or pool.connector.closed:
+            pool = _BackendPool(backend, *self._settings(backend))
+            self._backends[backend] = pool
+        return pool
+
+    @staticmethod
+    async def _close_pools(backends: Dict[str, _BackendPool]) -> None:
+        for pool in backends.values():
+            try:
+                await pool.close()
+            except Exception as e:
+                logger.warning(f"⚠️ HTTP pool '{pool.name}' close failed: {e}")
+
+    def _release(self, backends: Dict[str, _BackendPool], loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close pools left behind on another event loop."""
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._close_pools(backends), loop)
+            return
+        for pool in backends.values():
+            try:
+                pool.abandon()
+            except Exception as e:
+                logger.warning(f"⚠️ HTTP pool '{pool.name}' release failed: {e}")
+
+    def session(
+        self,
+        backend: str = "default",
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> aiohttp.ClientSession:
+        """Return a pooled session for backend (must be called on the event loop).
+
+        Args:
+            backend (str): Pool name; unknown names share the "default" pool.
+            timeout (aiohttp.ClientTimeout | None): Session default timeout.
+            headers (dict | None): Default headers (sessions are cached per value).
+
+        Returns:
+            aiohttp.ClientSession: Session that must not be closed by the caller.
+        """
+        pool = self._backend(backend if backend in BACKENDS else "default")
+        key = (timeout, tuple(sorted((headers or {}).items())))
+        session = pool.sessions.get(key)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=pool.connector,
+                connector_owner=False,
+                timeout=timeout or aiohttp.ClientTimeout(total=300),
+                headers=headers,
+                trace_configs=[pool.trace],
+            )
+            pool.sessions[key] = session
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-backend limits, live connections and request counters."""
+        return {"backends": {name: pool.stats() for name, pool in self._backends.items()}}
+
+    async def close(self) -> None:
+        """Close every session and connector (application shutdown)."""
+        backends, self._backends = self._backends, {}
+        await self._close_pools(backends)
+
+
+http_pool = HttpPool()
+
+
+@asynccontextmanager
+async def pooled_session(
+    backend: str = "default",
+    timeout: Optional[aiohttp.ClientTimeout] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> AsyncIterator[aiohttp.ClientSession]:
+    """Drop-in for ``async with aiohttp.ClientSession() as s`` that reuses the pool.
+
+    Args:
+        backend (str): Pool name (see BACKENDS).
+        timeout (aiohttp.ClientTimeout | None): Session default timeout.
+        headers (dict | None): Default headers.
+
+    Returns:
+        AsyncIterator[aiohttp.ClientSession]: The shared session (left open on exit).
+    """
+    yield http_pool.session(backend, timeout=timeout, headers=headers)
+
+
+async def close_http_pool() -> None:
+    """Close the shared pool (called from the application lifespan)."""
+    await http_pool.close()
@@ -10,7 +10,9 @@
 #
 # File: src/utils/telegram_support_bot.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.1
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - Helpdesk requests reuse the shared keep-alive HTTP pool
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -65,12 +67,14 @@ async def _ask_model(question: str, rag_profile: str) -> str:
     """
     import aiohttp
 
+    from .http_pool import pooled_session
+
     base = f"http://localhost:{config.api_port}/api/v1"
 
     # RAG search
     context = ""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with pooled_session() as session:
             async with session.post(
                 f"{base}/rag/search",
                 json={"query": question, "top_k": 5, "profile": rag_profile},
@@ -92,7 +96,7 @@ async def _ask_model(question: str, rag_profile: str) -> str:
 
     # Generate via active model
     try:
-        async with aiohttp.ClientSession() as session:
+        async with pooled_session() as session:
             async with session.post(
                 f"{base}/ai/generate",
                 json={
@@ -20,7 +20,9 @@
 #
 # File: src/utils/translator.py
 # Project: Ai Assistant (Docker)
-# Version: 0.6.0
+# Version: 0.8.0
+# Changes in 0.8.0:
+#   - HTTP session taken from the shared per-backend pool (src/utils/http_pool.py)
 # Author: hypo69
 # Copyright: © 2026 hypo69
 # =============================================================================
@@ -28,10 +30,11 @@
 import logging
 import os
 import time
-from typing import Optional
 
 import aiohttp
 
+from .http_pool import http_pool
+
 logger = logging.getLogger(__name__)
 
 LANG_NAMES: dict[str, str] = {
@@ -64,21 +67,15 @@ class Translator:
     section "translator" at call time — no restart required after settings change.
     """
 
-    def __init__(self) -> None:
-        self._session: Optional[aiohttp.ClientSession] = None
-
     def _timeout(self) -> aiohttp.ClientTimeout:
         secs = _cfg().get("request_timeout_sec", 30)
         return aiohttp.ClientTimeout(total=secs)
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession(timeout=self._timeout())
-        return self._session
+        return http_pool.session("translator", timeout=self._timeout())
 
     async def close(self) -> None:
-        if self._session and not self._session.closed:
-            await self._session.close()
+        """No-op: sessions belong to the shared HTTP pool (closed in the app lifespan)."""
 
     async def should_translate(self, request: dict) -> bool:
         """Determine whether translation is active for this request.
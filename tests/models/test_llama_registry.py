@@ -45,3 +45,25 @@ def test_resolve_llama_server_matches_alias_path_and_filename(monkeypatch):
     assert llama_registry.resolve_llama_server("coder").port == 9791
     assert llama_registry.resolve_llama_server("D:/models/qwen-coder.gguf").port == 9791
     assert llama_registry.resolve_llama_server("qwen-coder.gguf").port == 9791
+
+
+def test_replicas_expand_into_one_group(monkeypatch):
+    dummy = DummyConfig(
+        {
+            "host": "127.0.0.1",
+            "port": 9780,
+            "models": [
+                {"alias": "chat", "model_path": "D:/models/chat.gguf", "port": 9790, "replicas": 2},
+                {"alias": "big", "model_path": "D:/models/big.gguf",
+                 "replicas": [{"port": 9795, "threads": 16}, {"host": "10.0.0.2", "port": 9795}]},
+            ],
+        }
+    )
+    monkeypatch.setattr("src.core.config.config", dummy)
+
+    assert [s.url for s in llama_registry.resolve_llama_group("chat")] == [
+        "http://127.0.0.1:9790", "http://127.0.0.1:9791",
+    ]
+    big = llama_registry.resolve_llama_group("big.gguf")
+    assert [(s.host, s.port, s.threads) for s in big] == [("127.0.0.1", 9795, 16), ("10.0.0.2", 9795, None)]
+    assert llama_registry.resolve_llama_server("big") == big[0]
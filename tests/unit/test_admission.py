@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/admission.py — in-flight limits and priority queues
+# =============================================================================
+
+import asyncio
+
+import pytest
+
+from src.models import admission as admission_module, router
+from src.models.admission import AdmissionController, reset_request_class, set_request_class
+from src.utils.api_utils import ServiceOverloadedError
+
+
+def _controller(**kwargs):
+    options = {
+        "enabled": True,
+        "backend_limits": {"ollama": 1},
+        "model_limits": {},
+        "queue_depth": {"interactive": 4, "default": 4, "batch": 4},
+        "max_queue_wait": 5,
+        "tiers": {},
+        "route_priorities": {"/api/v1/chat": "interactive", "/api/v1/agent": "batch"},
+    }
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+async def _hold(controller, order, name, priority, release):
+    async with controller.slot("ollama", "tiny", priority=priority):
+        order.append(name)
+        await release.wait()
+
+
+async def test_interactive_overtakes_queued_batch_requests():
+    controller = _controller()
+    order = []
+    release = asyncio.Event()
+
+    first = asyncio.create_task(_hold(controller, order, "first", "default", release))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(_hold(controller, order, "batch", "batch", release))
+    await asyncio.sleep(0)
+    chat = asyncio.create_task(_hold(controller, order, "chat", "interactive", release))
+    await asyncio.sleep(0)
+    assert controller.stats()["waiting"] == {"interactive": 1, "default": 0, "batch": 1}
+
+    release.set()
+    await asyncio.gather(first, batch, chat)
+
+    assert order == ["first", "chat", "batch"]
+    stats = controller.stats()
+    assert stats["admitted"] == 3 and stats["queued"] == 2
+    assert set(stats["queue_wait"]) == {"default", "interactive", "batch"}
+    assert stats["inflight"] == {}
+
+
+async def test_model_limit_and_other_backends_run_independently():
+    controller = _controller(backend_limits={"ollama": 4}, model_limits={"ollama::big": 1})
+    async with controller.slot("ollama", "big"):
+        # Another model of the same backend and another backend are not blocked
+        async with controller.slot("ollama", "tiny"):
+            pass
+        async with controller.slot("llama", "big"):
+            pass
+        assert controller.stats()["inflight_models"] == {"ollama::big": 1}
+    assert controller.stats()["queued"] == 0
+
+
+async def test_full_queue_timeout_and_tier_quota_are_rejected():
+    controller = _controller(
+        queue_depth={"interactive": 1, "default": 0, "batch": 0},
+        max_queue_wait=0.05,
+        tiers={"key-1": {"priority": "batch", "max_inflight": 1}},
+    )
+    async with controller.slot("ollama", "tiny"):
+        with pytest.raises(ServiceOverloadedError) as full:
+            async with controller.slot("ollama", "tiny", priority="default"):
+                pass
+        assert full.value.status_code == 503 and full.value.retry_after >= 1
+
+        with pytest.raises(ServiceOverloadedError) as timeout:
+            async with controller.slot("ollama", "tiny", priority="interactive"):
+                pass
+        assert timeout.value.status_code == 503
+
+    async with controller.slot("ollama", "tiny", api_key="key-1"):
+        with pytest.raises(ServiceOverloadedError) as quota:
+            async with controller.slot("llama", "other", api_key="key-1"):
+                pass
+        assert quota.value.status_code == 429
+
+    stats = controller.stats()
+    assert (stats["rejected_queue_full"], stats["timeouts"], stats["rejected_tier"]) == (1, 1, 1)
+    assert stats["inflight"] == {} and stats["waiting"] == {"interactive": 0, "default": 0, "batch": 0}
+
+
+def test_request_class_from_route_and_api_key_tier():
+    controller = _controller(tiers={"bulk-key": {"priority": "batch"}})
+    assert controller.classify("/api/v1/chat/stream") == "interactive"
+    assert controller.classify("/api/v1/agent/run") == "batch"
+    assert controller.classify("/api/v1/generate") == "default"
+
+    token = set_request_class("interactive", "bulk-key")
+    try:
+        assert controller._resolve(None, None)[0] == "batch"
+        assert controller._resolve("default", None)[0] == "default"
+    finally:
+        reset_request_class(token)
+    assert controller._resolve(None, None) == ("default", None, 0)
+
+
+async def test_router_rejects_when_backend_is_saturated(monkeypatch):
+    controller = _controller(queue_depth={"interactive": 0, "default": 0, "batch": 0})
+    monkeypatch.setattr(admission_module, "_controller", controller)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def _generate(prompt, model, temperature, max_tokens):
+        started.set()
+        await release.wait()
+        return {"success": True, "content": "ok", "model": f"ollama::{model}"}
+
+    async def _stream(prompt, model, temperature, max_tokens):
+        yield {"success": True, "content": "", "finished": True}
+
+    monkeypatch.setattr(router, "_generate_ollama", _generate)
+    monkeypatch.setattr(router, "_stream_ollama", _stream)
+
+    running = asyncio.create_task(router.route_generate("a", model="ollama::tiny", temperature=0.5))
+    await started.wait()
+    with pytest.raises(ServiceOverloadedError):
+        await router.route_generate("b", model="ollama::tiny", temperature=0.5)
+    chunks = [c async for c in router.route_generate_stream("c", model="ollama::tiny", temperature=0.5)]
+    assert chunks == [{
+        "success": False, "error": chunks[0]["error"], "error_code": "overloaded",
+        "status_code": 503, "retry_after": chunks[0]["retry_after"], "finished": True,
+    }]
+
+    release.set()
+    assert (await running)["content"] == "ok"
+    assert controller.stats()["rejected_queue_full"] == 2
+
+
+def test_configured_hf_limit_is_not_below_batch_size(monkeypatch):
+    from src.core.config import config
+
+    monkeypatch.setattr(type(config), "admission_backend_limits", property(lambda self: {"hf": 2, "llama": 1}))
+    monkeypatch.setattr(type(config), "hf_batch_max_size", property(lambda self: 8))
+
+    controller = AdmissionController(enabled=True)
+    assert controller.backend_limits == {"hf": 8, "llama": 1}
+    # Explicit limits are taken as given
+    assert _controller(backend_limits={"hf": 2}).backend_limits == {"hf": 2}
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/ann_index.py — pluggable FAISS index types for RAG profiles
+# =============================================================================
+
+import json
+
+import faiss
+import numpy as np
+import pytest
+
+from src.rag.ann_index import (
+    apply_search_params,
+    build_index,
+    convert_index_dir,
+    describe_index,
+    extract_vectors,
+    index_type_of,
+    resolve_index_params,
+)
+
+
+def _vectors(n: int = 2000, dim: int = 32) -> np.ndarray:
+    vecs = np.random.default_rng(42).standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vecs)
+    return vecs
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_build_index_types_find_exact_match(index_type):
+    vecs = _vectors()
+    params = resolve_index_params(index_type=index_type, nprobe=64, ef_search=128)
+    index = build_index(vecs, params=params)
+
+    assert index_type_of(index) == index_type
+    assert index.ntotal == len(vecs)
+    _, found = index.search(vecs[:20], 1)
+    assert (found[:, 0] == np.arange(20)).mean() >= 0.9
+
+
+def test_ivf_falls_back_to_flat_when_too_few_vectors():
+    index = build_index(_vectors(n=50), params=resolve_index_params(index_type="ivf_pq"))
+    assert index_type_of(index) == "flat"
+
+
+def test_ids_wrap_and_search_params():
+    vecs = _vectors()
+    ids = np.arange(1000, 1000 + len(vecs), dtype="int64")
+    index = build_index(vecs, ids=ids, params=resolve_index_params(index_type="ivf_flat", nlist=16))
+
+    assert "IDMap" in type(index).__name__
+    apply_search_params(index, {"nprobe": 4, "ef_search": 10})
+    info = describe_index(index)
+    assert info["index_type"] == "ivf_flat"
+    assert info["nlist"] == 16 and info["nprobe"] == 4
+
+    restored, restored_ids = extract_vectors(index)
+    assert np.array_equal(np.sort(restored_ids), ids)
+
+
+def test_unknown_index_type_rejected():
+    with pytest.raises(ValueError):
+        resolve_index_params(index_type="annoy")
+
+
+def test_convert_index_dir_in_place_records_type(tmp_path):
+    vecs = _vectors()
+    ids = np.arange(len(vecs), dtype="int64")
+    flat = faiss.IndexIDMap(faiss.IndexFlatIP(vecs.shape[1]))
+    flat.add_with_ids(vecs, ids)
+    faiss.write_index(flat, str(tmp_path / "faiss.index"))
+    (tmp_path / "meta.json").write_text(json.dumps({"name": "support", "chunks": len(vecs)}), encoding="utf-8")
+
+    result = convert_index_dir(tmp_path, index_type="hnsw", ef_search=32)
+
+    assert result["before"]["index_type"] == "flat"
+    assert result["after"]["index_type"] == "hnsw"
+    reloaded = faiss.read_index(str(tmp_path / "faiss.index"))
+    assert index_type_of(reloaded) == "hnsw"
+    meta = json.loads((tmp_path / "meta.json").read_text(encoding="utf-8"))
+    assert meta["index_type"] == "hnsw"
+    assert meta["chunks"] == len(vecs)
+    assert resolve_index_params(tmp_path)["ef_search"] == 32
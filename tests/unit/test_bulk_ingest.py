@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/bulk_ingest.py and IncrementalIndexer.add_documents —
+# bulk ingestion with one embedding pass, one transaction and one FAISS write
+# =============================================================================
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+from fastapi import UploadFile
+
+from src.rag import bulk_ingest, incremental_indexer
+from src.rag.text_extractors.text_extractor_4_rag import process_pool
+from tests.unit.test_incremental_indexer import _indexer
+
+
+def test_add_documents_single_pass(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch)
+    calls = []
+    embed = indexer._embed
+    monkeypatch.setattr(indexer, "_embed", lambda texts, **kw: calls.append(len(texts)) or embed(texts))
+    saves = []
+    save = indexer._save_index
+    monkeypatch.setattr(indexer, "_save_index", lambda idx: saves.append(idx.ntotal) or save(idx))
+
+    events = []
+    result = indexer.add_documents(
+        [{"title": f"doc{i}", "content": f"text {i}"} for i in range(5)] + [{"title": "empty", "content": " "}],
+        progress_cb=lambda stage, done, total: events.append(stage),
+    )
+
+    assert result["chunks_added"] == 5
+    assert [d["title"] for d in result["documents"]] == [f"doc{i}" for i in range(5)]
+    assert calls == [5] and saves == [5]
+    assert indexer.delta.vectors == 0
+    assert faiss.read_index(str(indexer.index_path)).ntotal == 5
+    assert {"chunk", "store", "index"} <= set(events)
+
+
+def _fake_extract(path, source_name, settings):
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    return {"source": source_name, "content": content, "method": "Plain", "metadata": {}}
+
+
+class _ThreadEngine(process_pool.ExtractionEngine):
+    """ExtractionEngine with thread pools (the fakes are not importable in a spawned child)."""
+
+    def __init__(self, timeout):
+        super().__init__(timeouts={name: timeout for name in process_pool.FAMILIES})
+
+    def _pool(self, family):
+        with self._lock:
+            if family.pool is None:
+                family.pool = ThreadPoolExecutor(max_workers=family.workers)
+            return family.pool
+
+
+def _slow_extract(path, source_name, settings):
+    if source_name == "hangs.txt":
+        time.sleep(1)
+    return _fake_extract(path, source_name, settings)
+
+
+async def test_extraction_timeout_is_reported_per_file(tmp_path, monkeypatch):
+    engine = _ThreadEngine(timeout=0.2)
+    monkeypatch.setattr(bulk_ingest, "get_bulk_extraction_engine", lambda: engine)
+    monkeypatch.setattr(bulk_ingest, "_extract_in_worker", _slow_extract)
+    monkeypatch.setattr(bulk_ingest.BulkIngestor, "__init__", lambda self: setattr(self, "settings", {}))
+
+    uploads = [UploadFile(io.BytesIO(b"x"), filename="hangs.txt"), UploadFile(io.BytesIO(b" "), filename="blank.txt")]
+    try:
+        events = [e async for e in bulk_ingest.BulkIngestor().ingest_stream(uploads)]
+    finally:
+        engine.shutdown(wait=False)
+
+    assert [e["file"] for e in events if e["stage"] == "extract"] == ["blank.txt", "hangs.txt"]
+    failed = {f["file"]: f["error"] for f in events[-1]["failed"]}
+    assert events[-1]["stage"] == "error"
+    assert "exceeded" in failed["hangs.txt"] and failed["blank.txt"] == "No text extracted"
+    assert engine.stats()["families"]["text"]["timeouts"] == 1
+
+
+async def test_bulk_ingest_stream_stages(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch)
+    embed = indexer._embed
+    monkeypatch.setattr(indexer, "_embed", lambda texts, progress_cb=None, **kw: progress_cb(len(texts), len(texts)) or embed(texts))
+    monkeypatch.setitem(incremental_indexer._indexers, str(tmp_path), indexer)
+    monkeypatch.setattr(bulk_ingest, "get_bulk_extraction_engine", lambda: _ThreadEngine(timeout=5))
+    monkeypatch.setattr(bulk_ingest, "_extract_in_worker", _fake_extract)
+
+    async def _refresh(index_dir):
+        return True
+
+    monkeypatch.setattr(bulk_ingest.rag_system, "refresh_profile", _refresh)
+
+    uploads = [UploadFile(io.BytesIO(f"file body {i}".encode()), filename=f"f{i}.txt") for i in range(3)]
+    uploads.append(UploadFile(io.BytesIO(b"   "), filename="blank.txt"))
+    events = [e async for e in bulk_ingest.BulkIngestor(tmp_path).ingest_stream(uploads)]
+
+    stages = [e["stage"] for e in events]
+    assert stages[0] == "upload" and stages[-1] == "done"
+    assert stages.count("extract") == 4
+    assert stages.index("embed") < stages.index("store") < stages.index("index")
+
+    done = events[-1]
+    assert done["indexed"] == 3 and done["chunks"] == 3
+    assert done["failed"] == [{"file": "blank.txt", "error": "No text extracted"}]
+    assert indexer.index.ntotal == 3
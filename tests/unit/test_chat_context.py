@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/chat_context.py — trimming and backend prefix reuse
+# =============================================================================
+
+import json
+
+import pytest
+from aiohttp import web
+
+from src.models import chat_context, llama_registry, ollama_client as ollama_module, router
+from src.models.chat_context import ChatContextManager, session_slot
+from src.models.lmstudio_client import lmstudio_client
+from src.models.llama_registry import LlamaServerConfig
+from src.utils.http_pool import close_http_pool
+from src.utils.text_utils import count_tokens_approx
+
+
+def _turns(n):
+    history = []
+    for i in range(n):
+        history.append({"role": "user", "content": f"question {i}"})
+        history.append({"role": "assistant", "content": f"answer {i}"})
+    return history
+
+
+def _manager(**kwargs):
+    # One token per character + 4 per message: each turn above is ~24 tokens
+    return ChatContextManager(count_tokens=len, **{"max_tokens": 100, "trim_to": 0.5, "summary_tokens": 0, **kwargs})
+
+
+def test_trim_keeps_system_and_last_message_within_budget():
+    ctx = _manager()
+    system = {"role": "system", "content": "be brief"}
+    history = [system, *_turns(5), {"role": "user", "content": "question 5"}]
+
+    kept = ctx.trim("s1", history)
+
+    assert kept[0] == system
+    assert kept[1]["role"] == "user"
+    assert kept[-1] == {"role": "user", "content": "question 5"}
+    assert sum(ctx.message_tokens(m) for m in kept) <= 50
+    assert ctx.stats()["trims"] == 1
+
+
+def test_trim_cut_point_is_stable_between_overflows():
+    ctx = _manager()
+    history = [*_turns(4), {"role": "user", "content": "question 4"}]
+    first = ctx.trim("s1", history)
+
+    history += [{"role": "assistant", "content": "answer 4"}, {"role": "user", "content": "question 5"}]
+    second = ctx.trim("s1", history)
+
+    # Same first kept message: the prefix the backend cached is still valid
+    assert second[: len(first)] == first
+    assert ctx.stats()["trims"] == 1
+
+
+def test_dropped_turns_condensed_and_model_budget_applies():
+    ctx = _manager(max_tokens=0, trim_to=0.8, summary_tokens=20)
+    history = [*_turns(6), {"role": "user", "content": "question 6"}]
+
+    kept = ctx.trim("s1", history, budget=60, count=count_tokens_approx)
+
+    note = kept[0]
+    assert note["role"] == "system"
+    assert note["content"].splitlines() == [
+        "Earlier in this conversation (condensed):", "- user: question 4", "- assistant: answer 4",
+    ]
+    assert [m["content"] for m in kept[1:]] == ["question 5", "answer 5", "question 6"]
+    # No budget from either side — nothing to trim
+    assert ctx.trim("s2", history) == history
+
+
+def test_lmstudio_continuation_only_for_unchanged_prefix():
+    ctx = _manager(max_tokens=0)
+    turn1 = [{"role": "user", "content": "hi"}]
+    ctx.remember_response("s1", turn1, "hello", "resp-1")
+
+    turn2 = [*turn1, {"role": "assistant", "content": "hello"}, {"role": "user", "content": "how are you"}]
+    assert ctx.continuation("s1", turn2) == "resp-1"
+    edited = [*turn1, {"role": "assistant", "content": "HELLO"}, {"role": "user", "content": "how are you"}]
+    assert ctx.continuation("s1", edited) is None
+    assert ctx.continuation("other", turn2) is None
+    ctx.forget("s1")
+    assert ctx.continuation("s1", turn2) is None
+
+
+async def test_lmstudio_sends_only_new_turn_with_previous_response_id(monkeypatch):
+    monkeypatch.setattr(chat_context, "_manager", _manager(max_tokens=0))
+    calls = []
+
+    async def _generate(prompt, model="", temperature=0.7, max_tokens=512, previous_response_id=None, store=None):
+        calls.append({"input": prompt, "previous": previous_response_id, "store": store})
+        return {"success": True, "content": "hello", "model": model, "response_id": f"resp-{len(calls)}"}
+
+    monkeypatch.setattr(lmstudio_client, "generate", _generate)
+
+    turn1 = [{"role": "user", "content": "hi"}]
+    await router.route_generate("", model="lmstudio::m", messages=turn1, session_id="s1")
+    turn2 = [*turn1, {"role": "assistant", "content": "hello"}, {"role": "user", "content": "and you?"}]
+    await router.route_generate("", model="lmstudio::m", messages=turn2, session_id="s1")
+
+    assert calls[0] == {"input": "user: hi", "previous": None, "store": True}
+    assert calls[1] == {"input": "and you?", "previous": "resp-1", "store": True}
+
+
+@pytest.fixture
+async def backend():
+    seen = {}
+
+    async def _llama(request):
+        seen["llama"] = await request.json()
+        return web.json_response({"choices": [{"message": {"content": "ok"}}], "usage": {}})
+
+    async def _ollama_chat(request):
+        seen["ollama"] = await request.json()
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        await resp.write(json.dumps({"message": {"role": "assistant", "content": "o"}, "done": False}).encode() + b"\n")
+        await resp.write(json.dumps({"message": {"content": "k"}, "done": True, "eval_count": 2}).encode() + b"\n")
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", _llama)
+    app.router.add_post("/api/chat", _ollama_chat)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    yield site._server.sockets[0].getsockname()[1], seen
+    await close_http_pool()
+    await runner.cleanup()
+
+
+async def test_llama_gets_messages_prompt_cache_and_pinned_slot(backend, monkeypatch):
+    port, seen = backend
+    server = LlamaServerConfig(alias="tiny", model_path="tiny.gguf", host="127.0.0.1", port=port, parallel=4)
+    monkeypatch.setattr(llama_registry, "resolve_llama_server", lambda model: server)
+    messages = [{"role": "user", "content": "hi"}]
+
+    result = await router.route_generate("", model="llama::tiny", messages=messages, session_id="s1")
+
+    assert result["content"] == "ok"
+    assert seen["llama"]["messages"] == messages
+    assert seen["llama"]["cache_prompt"] is True
+    assert seen["llama"]["id_slot"] == session_slot("s1", 4)
+
+
+async def test_ollama_streams_chat_messages(backend, monkeypatch):
+    port, seen = backend
+    monkeypatch.setattr(ollama_module, "_get_base_url", lambda: f"http://127.0.0.1:{port}")
+    messages = [{"role": "user", "content": "hi"}]
+
+    chunks = [c async for c in router.route_generate_stream("", model="ollama::tiny", messages=messages)]
+
+    assert "".join(c["content"] for c in chunks) == "ok"
+    assert seen["ollama"]["messages"] == messages
+    assert "prompt" not in seen["ollama"]
@@ -3,6 +3,7 @@
 # Tests for src/db/chat_db.py — ChatDB unit tests + property-based tests
 # =============================================================================
 
+import asyncio
 import uuid
 
 import pytest
@@ -134,6 +135,143 @@ class TestDeleteSessionCascades:
         assert result is False
 
 
+class TestGroupCommit:
+    """Batched write path of save_message()."""
+
+    async def test_concurrent_messages_share_one_transaction(self, db: ChatDB) -> None:
+        """Concurrent writers of several sessions are committed in one batch."""
+        sids = [_new_session_id() for _ in range(4)]
+        commits = 0
+        original_commit = db._db.commit
+
+        async def _counting_commit() -> None:
+            nonlocal commits
+            commits += 1
+            await original_commit()
+
+        db._db.commit = _counting_commit
+        await asyncio.gather(*(
+            db.save_message(sid, "user", f"message {i}")
+            for i in range(50) for sid in sids
+        ))
+
+        assert commits == 1
+        # Session rows are created by the upsert, no create_session() needed
+        for sid in sids:
+            assert await db.get_message_count(sid) == 50
+
+    async def test_direct_writes_wait_for_a_running_batch(self, db: ChatDB) -> None:
+        """create_session() / delete_session() do not interleave with a batch commit."""
+        sid, other = _new_session_id(), _new_session_id()
+        original_commit = db._db.commit
+        in_batch = asyncio.Event()
+        overlapped = []
+
+        async def _slow_commit() -> None:
+            overlapped.append(in_batch.is_set())
+            in_batch.set()
+            await asyncio.sleep(0.05)
+            in_batch.clear()
+            await original_commit()
+
+        db._db.commit = _slow_commit
+        await asyncio.gather(
+            *(db.save_message(sid, "user", f"message {i}") for i in range(5)),
+            db.create_session(other),
+            db.delete_session(sid),
+        )
+
+        assert overlapped and not any(overlapped)
+        assert await db.session_exists(other)
+
+    async def test_reads_and_close_flush_queued_messages(self, tmp_path) -> None:
+        """Fire-and-forget messages are visible to reads and survive close()."""
+        path = str(tmp_path / "chat.db")
+        sid = _new_session_id()
+        chat_db = ChatDB(path, batch_delay_ms=10_000)
+        await chat_db.initialize()
+        await chat_db.save_message(sid, "user", "first", wait=False)
+        assert [m.content for m in await chat_db.get_session_history(sid)] == ["first"]
+        await chat_db.save_message(sid, "assistant", "second", wait=False)
+        await chat_db.close()
+
+        reopened = ChatDB(path)
+        await reopened.initialize()
+        try:
+            assert await reopened.get_message_count(sid) == 2
+        finally:
+            await reopened.close()
+
+
+class TestSearchAndKeysetPagination:
+    """FTS5 search and cursor-based pages."""
+
+    async def test_search_messages_matches_words_and_follows_deletes(self, db: ChatDB) -> None:
+        """Every query word must match; deleted sessions drop out of the index."""
+        first, second = _new_session_id(), _new_session_id()
+        await db.save_message(first, "user", "How do I rotate the FAISS index?")
+        await db.save_message(first, "assistant", "Rebuild the index nightly.")
+        await db.save_message(second, "user", "Rotate logs with \"logrotate\" (daily)")
+
+        hits, _ = await db.search_messages("rotate index")
+        assert [h["session_id"] for h in hits] == [first]
+        assert "[" in hits[0]["snippet"]
+
+        hits, _ = await db.search_messages('rotate "daily')
+        assert [h["session_id"] for h in hits] == [second]
+
+        hits, _ = await db.search_messages("rotate", session_id=second)
+        assert len(hits) == 1
+
+        await db.delete_session(first)
+        hits, _ = await db.search_messages("index")
+        assert hits == []
+
+    async def test_search_pages_newest_first(self, db: ChatDB) -> None:
+        """order=recent walks back through matches with a rowid cursor."""
+        sid = _new_session_id()
+        for i in range(5):
+            await db.save_message(sid, "user", f"needle {i}")
+
+        seen, cursor = [], None
+        while True:
+            hits, cursor = await db.search_messages("needle", limit=2, before_id=cursor)
+            seen.extend(h["content"] for h in hits)
+            if cursor is None:
+                break
+        assert seen == [f"needle {i}" for i in range(4, -1, -1)]
+
+    async def test_sessions_and_messages_keyset_pages(self, db: ChatDB) -> None:
+        """Pages neither skip nor repeat rows, whatever the page size."""
+        sids = []
+        for i in range(5):
+            sid = _new_session_id()
+            await db.create_session(sid)
+            await db._db.execute("UPDATE chat_sessions SET updated_at = ? WHERE session_id = ?", (100 + i % 2, sid))
+            sids.append(sid)
+        await db._db.commit()
+
+        listed, cursor = [], None
+        while True:
+            page, cursor = await db.list_sessions_page(limit=2, cursor=cursor)
+            listed.extend(s.session_id for s in page)
+            if cursor is None:
+                break
+        assert sorted(listed) == sorted(sids) and len(listed) == 5
+        with pytest.raises(ValueError):
+            await db.list_sessions_page(cursor="garbage")
+
+        for i in range(7):
+            await db.save_message(sids[0], "user", f"m{i}")
+        newest, cursor = await db.get_messages_page(sids[0], limit=3)
+        older, cursor = await db.get_messages_page(sids[0], limit=3, before_id=cursor)
+        assert [m["content"] for m in older + newest] == [f"m{i}" for i in range(1, 7)]
+
+        since = await db.get_messages_since(0, limit=4)
+        rest = await db.get_messages_since(since[-1]["timestamp"], after_id=since[-1]["id"])
+        assert [m["content"] for m in since + rest] == [f"m{i}" for i in range(7)]
+
+
 class TestDatabaseInitError:
     """3.2 test_database_init_error — DatabaseInitError for invalid path."""
 
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/db/retention.py — chat history pruning and archival
+# =============================================================================
+
+import gzip
+import json
+import os
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from src.db.chat_db import ChatDB
+from src.db.retention import ChatHistoryRetention, prune_dialogs
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    """File-backed ChatDB (size and WAL checkpoints need a real file)."""
+    chat_db = ChatDB(str(tmp_path / "chat.db"))
+    await chat_db.initialize()
+    yield chat_db
+    await chat_db.close()
+
+
+async def _session(db: ChatDB, updated_at: int, messages: int = 3) -> str:
+    sid = str(uuid.uuid4())
+    for i in range(messages):
+        await db.save_message(sid, "user", f"message {i} " + "x" * 2000)
+    await db._db.execute("UPDATE chat_sessions SET updated_at = ? WHERE session_id = ?", (updated_at, sid))
+    await db._db.commit()
+    return sid
+
+
+async def test_expired_and_excess_sessions_are_archived_then_deleted(db, tmp_path):
+    now = int(time.time())
+    old = [await _session(db, now - 100 * 86400) for _ in range(3)]
+    recent = [await _session(db, now - i) for i in range(4)]
+
+    job = ChatHistoryRetention(
+        retention_days=90, max_sessions=3, batch_size=2, interval_hours=0,
+        archive=True, archive_dir=str(tmp_path / "archive"), db=db, prune_dialog_files=False,
+    )
+    report = await job.run_once()
+
+    assert (report["sessions_deleted"], report["messages_deleted"]) == (4, 12)
+    # The newest sessions survive max_sessions
+    assert [await db.session_exists(sid) for sid in recent] == [True, True, True, False]
+    hits, _ = await db.search_messages("message", limit=50)
+    assert {h["session_id"] for h in hits} == set(recent[:3])
+
+    with gzip.open(report["archive_file"], "rt", encoding="utf-8") as f:
+        archived = [json.loads(line) for line in f]
+    assert sorted(r["session"]["session_id"] for r in archived) == sorted(old + recent[3:])
+    assert all(len(r["messages"]) == 3 for r in archived)
+
+    assert report["freed_pages"] > 0
+    assert report["db_bytes_after"] < report["db_bytes_before"]
+    assert report["bytes_reclaimed"] == report["db_bytes_before"] - report["db_bytes_after"]
+    assert report["wal_busy"] is False
+    assert job.stats()["last_report"] is report
+
+    # Nothing left to do on the next run
+    assert (await job.run_once())["sessions_deleted"] == 0
+
+
+async def test_failed_archive_keeps_the_sessions(db, tmp_path):
+    sid = await _session(db, 1)
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    job = ChatHistoryRetention(
+        retention_days=1, max_sessions=0, batch_size=10, interval_hours=0,
+        archive=True, archive_dir=str(blocker), db=db, prune_dialog_files=False,
+    )
+    with pytest.raises(OSError):
+        await job.run_once()
+    assert await db.session_exists(sid)
+    assert await db.get_message_count(sid) == 3
+
+
+def test_prune_dialogs_by_age_then_size(tmp_path):
+    old, big, small = (tmp_path / name for name in ("old.json", "big.json", "small.json"))
+    old.write_text("{}")
+    big.write_bytes(b"x" * 2 * 1024 * 1024)
+    small.write_text("{}")
+    os.utime(old, (time.time() - 40 * 86400,) * 2)
+    os.utime(big, (time.time() - 86400,) * 2)
+
+    result = prune_dialogs(str(tmp_path), retention_days=30, max_size_mb=1)
+
+    assert result["deleted"] == 2 and result["remaining"] == 1
+    assert small.exists()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/chunk_store.py — offset-indexed chunk metadata for RAG
+# =============================================================================
+
+import json
+import os
+import time
+
+import faiss
+import numpy as np
+import pytest
+
+from src.rag.chunk_store import ChunkStore, ensure_chunk_store, write_chunk_store
+from src.rag.rag_system import RAGSystem
+
+
+def _chunks(n: int = 5):
+    return [{"source": f"doc{i}.md", "text": f"Текст фрагмента {i}"} for i in range(n)]
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_random_access_reads_only_requested(tmp_path, use_mmap):
+    write_chunk_store(tmp_path, _chunks())
+    store = ChunkStore(tmp_path, use_mmap=use_mmap)
+
+    assert len(store) == 5
+    assert store.get(3)["text"] == "Текст фрагмента 3"
+    assert set(store.get_many([4, 0, 99, -1])) == {0, 4}
+    store.close()
+
+
+def test_legacy_chunks_json_converted_once_and_refreshed(tmp_path):
+    legacy = tmp_path / "chunks.json"
+    legacy.write_text(json.dumps(_chunks(3), ensure_ascii=False), encoding="utf-8")
+
+    store = ensure_chunk_store(tmp_path)
+    assert len(store) == 3
+    first_mtime = (tmp_path / "chunks.offsets.npy").stat().st_mtime
+
+    assert len(ensure_chunk_store(tmp_path)) == 3
+    assert (tmp_path / "chunks.offsets.npy").stat().st_mtime == first_mtime
+
+    legacy.write_text(json.dumps(_chunks(4), ensure_ascii=False), encoding="utf-8")
+    future = time.time() + 10
+    os.utime(legacy, (future, future))
+    assert len(ensure_chunk_store(tmp_path)) == 4
+
+
+def test_missing_metadata_returns_none(tmp_path):
+    assert ensure_chunk_store(tmp_path) is None
+
+
+def test_search_materializes_top_k_and_skips_duplicates(tmp_path):
+    chunks = _chunks(4)
+    chunks[1]["text"] = chunks[0]["text"]
+    write_chunk_store(tmp_path, chunks)
+
+    vecs = np.eye(4, dtype="float32")
+    vecs[1] = vecs[0]
+    index = faiss.IndexFlatIP(4)
+    index.add(vecs)
+
+    query = np.array([[1.0, 0.0, 0.1, 0.0]], dtype="float32")
+    results = RAGSystem()._search_sync(index, ChunkStore(tmp_path), False, str(tmp_path), query, 2)
+
+    assert len(results) == 2
+    assert results[0]["source"] in {"doc0.md", "doc1.md"}
+    assert results[1]["source"] == "doc2.md"
+    assert results[0]["score"] == pytest.approx(1.0)
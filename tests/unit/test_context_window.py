@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/context_window.py — tokenizer counts and prompt budgets
+# =============================================================================
+
+import threading
+
+import pytest
+from aiohttp import web
+
+from src.models import llama_registry
+from src.models.context_window import ContextWindowManager
+from src.models.llama_registry import LlamaServerConfig
+from src.utils.http_pool import close_http_pool
+
+
+@pytest.fixture
+async def llama(monkeypatch):
+    calls = []
+
+    async def _tokenize(request):
+        content = (await request.json())["content"]
+        calls.append(content)
+        return web.json_response({"tokens": list(range(len(content.split())))})
+
+    async def _props(request):
+        return web.json_response({"default_generation_settings": {"n_ctx": 2048}})
+
+    app = web.Application()
+    app.router.add_post("/tokenize", _tokenize)
+    app.router.add_get("/props", _props)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    server = LlamaServerConfig(alias="tiny", model_path="tiny.gguf", host="127.0.0.1", port=port)
+    monkeypatch.setattr(llama_registry, "resolve_llama_server", lambda model: server)
+    yield calls
+    await close_http_pool()
+    await runner.cleanup()
+
+
+def _manager(**kwargs):
+    return ContextWindowManager(**{"default_window": 1000, "safety_margin": 10, "models": {}, **kwargs})
+
+
+async def test_llama_tokenizer_counts_are_cached(llama):
+    window = _manager()
+
+    assert await window.count_many("llama::tiny", ["one two three", "four"]) == [3, 1]
+    assert await window.count("llama::tiny", "one two three") == 3
+    assert llama == ["one two three", "four"]
+    assert window.stats()["cache_hits"] == 1
+
+    counter = await window.counter("llama::tiny", ["a b"])
+    assert counter("a b") == 2
+    assert counter("never tokenized text") == 5  # approximate fallback
+
+
+async def test_llama_counts_are_exact_per_text(llama, monkeypatch):
+    from src.models import context_window
+
+    monkeypatch.setattr(context_window, "_TOKENIZE_CONCURRENCY", 2)
+    window = _manager()
+    # Approximation (~4 chars per token) would be far off for both
+    texts = ["a b c d e f g h", "supercalifragilisticexpialidocious", "x y"]
+
+    assert await window.count_many("llama::tiny", texts) == [8, 1, 2]
+    assert sorted(llama) == sorted(texts)
+    assert window.stats()["tokenized"] == 3 and window.stats()["approximated"] == 0
+
+
+async def test_context_window_sources(llama):
+    window = _manager(models={"ollama::big": 32768})
+
+    assert await window.context_window("llama::tiny") == 2048
+    assert await window.context_window("ollama::big") == 32768
+    assert await window.context_window("ollama::small") == 1000
+    assert await window.prompt_budget("llama::tiny", max_tokens=512) == 2048 - 512 - 10
+    # Completion larger than the window still leaves a quarter for the prompt
+    assert await window.prompt_budget("ollama::small", max_tokens=5000) == 250
+
+
+async def test_pack_chunks_in_rank_order():
+    window = _manager()
+    chunks = [{"text": "x" * 400}, {"text": "y" * 2000}, {"text": "z" * 40}]
+
+    packed = await window.pack_chunks("ollama::small", chunks, budget=200)
+
+    assert packed == [chunks[0], chunks[2]]
+    assert window.stats()["approximated"] == 3
+
+
+async def test_hf_tokenizer_runs_off_the_event_loop(monkeypatch):
+    from src.models import hf_client
+
+    threads = []
+
+    def _tokenizer(texts, add_special_tokens=False):
+        threads.append(threading.get_ident())
+        return {"input_ids": [text.split() for text in texts]}
+
+    monkeypatch.setitem(hf_client._loaded_models, "tiny", {"tokenizer": _tokenizer})
+    assert await _manager().count_many("hf::tiny", ["a b c", "d"]) == [3, 1]
+    assert threads and threads[0] != threading.get_ident()
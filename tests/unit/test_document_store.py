@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/document_store.py — pooled connections and schema init
+# =============================================================================
+
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from src.rag import document_store
+from src.rag.document_store import DocumentStore
+
+
+def _store_with_chunks(tmp_path, n=3):
+    store = DocumentStore(tmp_path / "documents.db")
+    doc_id = store.add_document("doc", "content", "doc.txt")
+    store.save_chunks(doc_id, [{"text": f"chunk {i}", "vector_id": i, "chunk_no": i} for i in range(n)])
+    return store
+
+
+def test_connections_are_reused_per_thread_and_search_is_read_only(tmp_path):
+    store = _store_with_chunks(tmp_path)
+    ids = [chunk["id"] for chunk in store.get_all_active_chunks()]
+
+    assert store._connection() is store._connection()
+    read_conn = store._connection(read_only=True)
+    assert read_conn is not store._connection()
+    with pytest.raises(sqlite3.OperationalError):
+        read_conn.execute("DELETE FROM chunks")
+
+    hits = store.get_active_chunks_by_ids(ids[:2] + [10_000])
+    assert sorted(hits) == ids[:2] and hits[ids[0]]["source_path"] == "doc.txt"
+    assert store._connection(read_only=True) is read_conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(store._connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not store._connection()
+
+
+def test_schema_runs_once_per_file_and_replaced_file_is_reopened(tmp_path, monkeypatch):
+    store = _store_with_chunks(tmp_path)
+    calls = []
+    original = DocumentStore._init_schema
+
+    def _counting_init(self):
+        calls.append(document_store._file_id(self.db_path) in document_store._schema_ready)
+        original(self)
+
+    monkeypatch.setattr(DocumentStore, "_init_schema", _counting_init)
+    DocumentStore(tmp_path / "documents.db").stats()
+    assert calls == [True]  # constructor only: the file is already initialised
+
+    # Profile rebuilt from scratch: the pooled connection must not see the old file
+    store.close()
+    (tmp_path / "documents.db").unlink()
+    for suffix in ("-wal", "-shm"):
+        (tmp_path / f"documents.db{suffix}").unlink(missing_ok=True)
+    assert store.stats() == {"documents": 0, "active_chunks": 0, "inactive_chunks": 0}
+    assert store.get_active_chunks_by_ids([1]) == {}
+
+
+def test_close_releases_connections_of_all_threads(tmp_path):
+    store = _store_with_chunks(tmp_path)
+    conn = store._connection()
+    store.get_active_chunks_by_ids([1])
+    assert len(store._open) == 2
+
+    document_store._stores[str(tmp_path)] = store
+    try:
+        document_store.close_store(str(tmp_path))
+    finally:
+        document_store._stores.pop(str(tmp_path), None)
+
+    assert store._open == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert store.stats()["active_chunks"] == 3
+
+
+def test_finished_thread_connections_are_closed(tmp_path):
+    store = _store_with_chunks(tmp_path)
+    store._connection()
+    other = []
+
+    def _work():
+        other.append(store._connection())
+        store.get_active_chunks_by_ids([1])
+
+    thread = threading.Thread(target=_work)
+    thread.start()
+    thread.join()
+    del thread
+    gc.collect()
+
+    assert len(store._open) == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        other[0].execute("SELECT 1")
+
+
+def test_file_is_statted_once_per_interval_and_refused_read_only_is_not_cached(tmp_path, monkeypatch):
+    store = _store_with_chunks(tmp_path)
+    stats = []
+    file_id = document_store._file_id
+    monkeypatch.setattr(document_store, "_file_id", lambda path: stats.append(path) or file_id(path))
+    for _ in range(5):
+        store.get_active_chunks_by_ids([1])
+    assert len(stats) <= 1
+
+    store.close()
+
+    def _refuse(read_only):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    opener = store._open_connection
+    monkeypatch.setattr(store, "_open_connection", lambda read_only: _refuse(read_only) if read_only else opener(False))
+    rw = store._connection(read_only=True)
+    assert rw is store._connection() and store._thread_connections().ro is None
+    assert len(store._open) == 1
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/embedding_service.py — query cache and micro-batching
+# =============================================================================
+
+import asyncio
+
+import numpy as np
+
+from src.rag.embedding_service import EmbeddingService
+
+
+class FakeModel:
+    """Deterministic encoder that records every encode() call."""
+
+    def __init__(self, dim: int = 4) -> None:
+        self.dim = dim
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, show_progress_bar=False):
+        self.calls.append(list(texts))
+        return np.array([[len(t) + 1.0] + [1.0] * (self.dim - 1) for t in texts], dtype="float32")
+
+
+async def test_concurrent_queries_share_one_encode_call():
+    model = FakeModel()
+    service = EmbeddingService("fake", batch_window_ms=20, model=model)
+
+    vecs = await asyncio.gather(*(service.encode_query(q) for q in ["a", "bb", "a", "ccc"]))
+
+    assert len(model.calls) == 1
+    assert sorted(model.calls[0]) == ["a", "bb", "ccc"]
+    assert np.allclose(vecs[0], vecs[2])
+    assert np.isclose(np.linalg.norm(vecs[1]), 1.0)
+    assert service.stats()["batches"] == 1
+
+
+async def test_repeated_query_is_served_from_cache():
+    model = FakeModel()
+    service = EmbeddingService("fake", batch_window_ms=0, model=model)
+
+    first = await service.encode_query("reset password")
+    second = await service.encode_query("reset password")
+
+    assert len(model.calls) == 1
+    assert np.array_equal(first, second)
+    assert service.stats()["cache_hits"] == 1
+
+
+async def test_max_batch_flushes_without_waiting_for_window():
+    model = FakeModel()
+    service = EmbeddingService("fake", batch_window_ms=10_000, max_batch=2, model=model)
+
+    await asyncio.wait_for(asyncio.gather(service.encode_query("x"), service.encode_query("y")), timeout=1)
+
+    assert model.calls == [["x", "y"]]
+
+
+def test_cache_is_bounded():
+    service = EmbeddingService("fake", cache_size=2, model=FakeModel())
+    for q in ("a", "b", "c"):
+        service.encode_query_sync(q)
+
+    assert service.stats()["cache_entries"] == 2
+
+
+def test_encode_documents_batches_and_reports_progress():
+    model = FakeModel()
+    service = EmbeddingService("fake", model=model)
+    progress = []
+
+    vecs = service.encode_documents(["a", "b", "c"], batch_size=2, progress_cb=lambda d, t: progress.append((d, t)))
+
+    assert vecs.shape == (3, 4)
+    assert progress == [(2, 3), (3, 3)]
+    assert np.allclose(np.linalg.norm(vecs, axis=1), 1.0)
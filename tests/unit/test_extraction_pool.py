@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/text_extractors/text_extractor_4_rag/process_pool.py —
+# per-format-family extraction process pools
+# =============================================================================
+
+import asyncio
+import time
+
+import pytest
+
+from src.rag.text_extractors.text_extractor_4_rag.process_pool import ExtractionEngine, format_family
+
+
+@pytest.fixture
+def engine():
+    engine = ExtractionEngine(
+        workers={"text": 1},
+        timeouts={"text": 60},
+        max_tasks_per_child=2,
+    )
+    yield engine
+    engine.shutdown(wait=True)
+
+
+@pytest.mark.parametrize("filename,family", [
+    ("report.PDF", "pdf"),
+    ("slides.pptx", "office"),
+    ("book.epub", "office"),
+    ("scan.png", "ocr"),
+    ("bundle.tar.gz", "archives"),
+    ("notes.md", "text"),
+    ("main.py", "text"),
+])
+def test_format_family(filename, family):
+    assert format_family(filename) == family
+
+
+async def test_extracts_in_family_pool_with_recycled_workers(engine):
+    for n in range(3):  # 3 jobs > max_tasks_per_child: a worker is replaced
+        files = await engine.extract_async(f"hello {n}".encode(), "a.txt")
+        assert files[0]["text"] == f"hello {n}"
+
+    stats = engine.stats()["families"]["text"]
+    assert stats["completed"] == 3
+    assert stats["restarts"] == 0
+    assert stats["running"] and not engine.stats()["families"]["pdf"]["running"]
+
+
+def test_timeout_kills_pool_and_next_job_recovers(engine):
+    engine._families["text"].timeout = 1
+    with pytest.raises(asyncio.TimeoutError):
+        engine.submit("text", time.sleep, 30).result()
+    engine._families["text"].timeout = 60
+
+    assert engine.extract(b"after", "b.txt")[0]["text"] == "after"
+    stats = engine.stats()["families"]["text"]
+    assert stats["timeouts"] == 1
+    assert stats["restarts"] == 1
+    assert stats["failed"] == 1
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/hf_batcher.py — dynamic batching of HF generate() calls
+# =============================================================================
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.models.hf_batcher import BatchScheduler
+
+
+class _FakeModel:
+    """Blocking run_batch that records the size of every batch."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, prompts, limits, temperature):
+        self.release.wait(5)
+        self.batches.append((list(prompts), temperature))
+        time.sleep(self.delay)
+        return [(p.upper(), limit) for p, limit in zip(prompts, limits)]
+
+
+async def test_concurrent_requests_share_a_batch():
+    model = _FakeModel()
+    scheduler = BatchScheduler("tiny", model, max_batch_size=4, max_wait_ms=50)
+
+    results = await asyncio.gather(*(scheduler.submit(f"p{i}", 3, 0.0) for i in range(6)))
+
+    assert results == [(f"P{i}", 3) for i in range(6)]
+    assert [len(prompts) for prompts, _ in model.batches] == [4, 2]
+    stats = scheduler.stats()
+    assert stats["batch_size_histogram"] == {"2": 1, "4": 1}
+    assert stats["tokens_generated"] == 18 and stats["tokens_per_sec"] > 0
+    assert stats["completed"] == 6 and stats["queue_depth"] == 0
+
+
+async def test_different_sampling_settings_are_not_mixed():
+    model = _FakeModel()
+    scheduler = BatchScheduler("tiny", model, max_batch_size=8, max_wait_ms=30)
+
+    await asyncio.gather(
+        scheduler.submit("a", 4, 0.0), scheduler.submit("b", 4, 0.7), scheduler.submit("c", 4, 0.0),
+    )
+
+    assert sorted((sorted(p), t) for p, t in model.batches) == [(["a", "c"], 0.0), (["b"], 0.7)]
+
+
+async def test_queue_fills_while_batch_runs_and_cancelled_requests_are_dropped():
+    model = _FakeModel()
+    model.release.clear()
+    scheduler = BatchScheduler("tiny", model, max_batch_size=8, max_wait_ms=0)
+
+    first = asyncio.create_task(scheduler.submit("first", 2, 0.0))
+    await asyncio.sleep(0.05)  # first batch is now blocked in the executor
+    waiting = [asyncio.create_task(scheduler.submit(f"w{i}", 2, 0.0)) for i in range(3)]
+    gone = asyncio.create_task(scheduler.submit("gone", 2, 0.0))
+    await asyncio.sleep(0.01)
+    assert scheduler.stats()["queue_depth"] == 4
+    gone.cancel()
+    model.release.set()
+
+    assert await first == ("FIRST", 2)
+    assert [await w for w in waiting] == [("W0", 2), ("W1", 2), ("W2", 2)]
+    assert [len(p) for p, _ in model.batches] == [1, 3]
+    assert scheduler.stats()["cancelled"] == 1
+
+
+async def test_batch_error_reaches_every_caller_and_close_rejects_new_work():
+    def _broken(prompts, limits, temperature):
+        raise RuntimeError("CUDA out of memory")
+
+    scheduler = BatchScheduler("tiny", _broken, max_batch_size=4, max_wait_ms=20)
+    results = await asyncio.gather(*(scheduler.submit("x", 1, 0.0) for _ in range(2)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert scheduler.stats()["failed"] == 2
+
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        await scheduler.submit("x", 1, 0.0)
+
+
+async def test_scheduler_of_a_previous_loop_is_closed():
+    from src.models import hf_client as hf_module
+
+    async def _bind():
+        scheduler = hf_module.hf_client._scheduler("tiny")
+        scheduler._loop = asyncio.get_running_loop()  # as after a first submit()
+        return scheduler
+
+    try:
+        old = await asyncio.to_thread(asyncio.run, _bind())
+        old._queue.append(object())  # left over on the closed loop
+        new = hf_module.hf_client._scheduler("tiny")
+
+        assert new is not old and hf_module._schedulers["tiny"] is new
+        assert old._closed and not old._queue and old._worker is None
+        with pytest.raises(RuntimeError):
+            await old.submit("x", 1, 0.0)
+    finally:
+        hf_module._schedulers.pop("tiny", None)
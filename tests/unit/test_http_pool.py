@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/utils/http_pool.py — shared keep-alive pools per backend
+# =============================================================================
+
+import asyncio
+import threading
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.utils.http_pool import HttpPool, close_http_pool, pooled_session
+
+
+@pytest.fixture
+async def server():
+    async def _ok(request):
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/ok", _ok)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+async def test_requests_reuse_keepalive_connection(server):
+    pool = HttpPool()
+    for _ in range(3):
+        async with pool.session("llama").get(f"{server}/ok") as r:
+            assert (await r.json())["ok"]
+
+    stats = pool.stats()["backends"]["llama"]
+    assert stats["requests"] == 3
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["idle_connections"] == 1
+    await pool.close()
+    assert pool.stats()["backends"] == {}
+
+
+async def test_sessions_cached_per_timeout_and_share_connector():
+    pool = HttpPool()
+    short = aiohttp.ClientTimeout(total=2)
+    a = pool.session("ollama", timeout=short)
+    assert pool.session("ollama", timeout=aiohttp.ClientTimeout(total=2)) is a
+    b = pool.session("ollama", timeout=aiohttp.ClientTimeout(total=300))
+    assert b is not a and b.connector is a.connector
+    assert pool.session("no-such-backend").connector is pool.session("default").connector
+    await pool.close()
+    assert a.closed and b.closed
+
+
+async def test_pooled_session_leaves_session_open(server):
+    async with pooled_session("default") as s:
+        async with s.get(f"{server}/ok") as r:
+            assert r.status == 200
+    assert not s.closed
+    await close_http_pool()
+
+
+async def test_loop_change_closes_pools_of_the_old_loop():
+    pool = HttpPool()
+
+    async def _open():
+        return pool.session("llama")
+
+    # Old loop already closed: released without awaiting
+    stale = await asyncio.to_thread(asyncio.run, _open())
+    fresh = pool.session("llama")
+    assert stale.closed and stale.connector is None
+    assert fresh is not stale and not fresh.closed
+
+    # Old loop still running in another thread: closed on that loop
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever)
+    thread.start()
+    try:
+        running = asyncio.run_coroutine_threadsafe(_open(), other).result(5)
+        connector = running.connector
+        assert connector is not None and not connector.closed
+        pool.session("llama")
+        for _ in range(50):
+            if running.closed:
+                break
+            await asyncio.sleep(0.01)
+        assert running.closed and connector.closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
+    await pool.close()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/incremental_indexer.py + delta_log.py — shared in-memory
+# FAISS index persisted through an append-only delta log
+# =============================================================================
+
+import hashlib
+
+import faiss
+import numpy as np
+
+from src.rag import embedding_service
+from src.rag.delta_log import VectorDeltaLog
+from src.rag.incremental_indexer import IncrementalIndexer
+from src.rag.rag_system import RAGSystem
+
+DIM = 32
+
+
+def _vector(text):
+    seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+    vec = np.random.default_rng(seed).standard_normal(DIM).astype("float32")
+    return vec / np.linalg.norm(vec)
+
+
+class _FakeModel:
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, show_progress_bar=False):
+        return np.stack([_vector(t) for t in texts])
+
+
+def _indexer(path, monkeypatch, checkpoint_vectors=1000):
+    indexer = IncrementalIndexer(path)
+    indexer.checkpoint_vectors = checkpoint_vectors
+    monkeypatch.setattr(indexer, "_get_model", lambda: _FakeModel())
+    monkeypatch.setattr(indexer, "_embed", lambda texts, progress_cb=None, **kw: _FakeModel().encode(texts))
+    return indexer
+
+
+def test_delta_log_replays_batches_and_drops_torn_tail(tmp_path):
+    log = VectorDeltaLog(tmp_path / "faiss.delta", fsync=False)
+    log.append(np.array([1, 2]), np.ones((2, 4), dtype="float32"))
+    log.append(np.array([3]), np.full((1, 4), 2.0, dtype="float32"))
+    with open(log.path, "ab") as f:
+        f.write(b"FDL1\x05\x00")  # crash mid-append
+
+    batches = list(VectorDeltaLog(log.path).replay())
+
+    assert [b[0].tolist() for b in batches] == [[1, 2], [3]]
+    assert batches[1][1][0, 0] == 2.0
+    assert log.path.stat().st_size == 2 * 12 + 3 * 8 + 3 * 4 * 4
+
+
+def test_adds_go_to_delta_and_survive_restart(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch)
+    indexer.add_document("first", "alpha document")
+    base_size = indexer.index_path.stat().st_size  # new profile: base written once
+
+    indexer.add_document("second", "beta document")
+    indexer.add_document("third", "gamma document")
+
+    assert indexer.index_path.stat().st_size == base_size
+    assert indexer.delta.vectors == 2
+
+    restarted = _indexer(tmp_path, monkeypatch)
+    assert restarted.index.ntotal == 3
+
+    assert restarted.checkpoint()["delta_vectors"] == 2
+    assert restarted.delta.path.stat().st_size == 0
+    assert faiss.read_index(str(restarted.index_path)).ntotal == 3
+
+
+def test_delta_checkpoint_threshold(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch, checkpoint_vectors=2)
+    indexer.add_document("a", "one")
+    indexer.add_document("b", "two")
+    assert indexer.delta.vectors == 1
+    indexer.add_document("c", "three")
+    assert indexer.delta.vectors == 0
+    assert faiss.read_index(str(indexer.index_path)).ntotal == 3
+
+
+async def test_new_documents_searchable_without_reload(tmp_path, monkeypatch):
+    from src.rag import incremental_indexer
+
+    indexer = _indexer(tmp_path, monkeypatch)
+    monkeypatch.setitem(incremental_indexer._indexers, str(tmp_path), indexer)
+    indexer.add_document("seed", "seed document")
+
+    rag = RAGSystem()
+    service = embedding_service.EmbeddingService("fake", model=_FakeModel())
+    monkeypatch.setattr(rag, "_embedder", lambda: service)
+    monkeypatch.setattr(rag, "_get_model", lambda: _FakeModel())
+    assert await rag.reload_index(str(tmp_path))
+
+    async def _no_reload(index_dir):
+        raise AssertionError("reload_index must not be called for a shared index")
+
+    indexer.add_document("fresh", "fresh document")
+    monkeypatch.setattr(rag, "reload_index", _no_reload)
+    assert await rag.refresh_profile(str(tmp_path))
+
+    results = await rag.search("fresh document", top_k=1)
+    assert results[0]["text"] == "fresh document"
+    assert rag.index is indexer.index
+    assert rag.pool.stats()["profiles"][0]["live"] is True
+
+
+def test_compact_swaps_live_index(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch)
+    doc = indexer.add_document("a", "alpha")["doc_id"]
+    indexer.add_document("b", "beta")
+    before = indexer.index
+    indexer.delete_document(doc)
+    indexer.add_document("c", "gamma")
+    assert indexer.compact()["vectors_after"] == 2
+
+    with indexer.reading() as live:
+        assert live is not before
+        assert live.ntotal == 2
+    assert indexer.delta.vectors == 0
+
+
+def test_compact_reuses_stored_vectors(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch)
+    indexer.add_document("a", "alpha")
+    doc = indexer.add_document("b", "beta")["doc_id"]
+    indexer.update_document(doc, "b", "beta v2")  # 1 of 3 chunks inactive → background compaction
+    assert indexer._compact_thread is not None
+    indexer._compact_thread.join(timeout=10)
+    assert indexer.index.ntotal == 2
+
+    embedded = []
+    monkeypatch.setattr(indexer, "_embed", lambda texts, progress_cb=None, **kw: embedded.extend(texts) or _FakeModel().encode(texts))
+    assert indexer.compact()["vectors_after"] == 2
+    assert embedded == []
+
+    distances, ids = indexer.index.search(_vector("beta v2")[None, :], 1)
+    assert distances[0][0] > 0.99
+
+
+def test_compact_backfills_chunks_without_vectors(tmp_path, monkeypatch):
+    indexer = _indexer(tmp_path, monkeypatch)
+    indexer.add_document("a", "alpha")
+    with indexer.store._conn() as conn:
+        conn.execute("UPDATE chunks SET embedding = NULL")
+
+    assert indexer.compact()["vectors_after"] == 1
+    ids, vecs, missing = indexer.store.get_active_vectors(DIM)
+    assert len(ids) == 1 and not missing
+
+
+def test_compact_catches_up_writes_during_build(tmp_path, monkeypatch):
+    from src.rag import incremental_indexer
+
+    indexer = _indexer(tmp_path, monkeypatch)
+    indexer.add_document("a", "alpha")
+    original_build = incremental_indexer.build_index
+
+    def _build_while_writing(vecs, ids=None, params=None):
+        indexer.add_document("late", "late document")  # writer lock is free during the build
+        return original_build(vecs, ids=ids, params=params)
+
+    monkeypatch.setattr(incremental_indexer, "build_index", _build_while_writing)
+    assert indexer.compact()["vectors_after"] == 2
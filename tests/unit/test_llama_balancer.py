@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/llama_balancer.py — replica selection, ejection, retry
+# =============================================================================
+
+import json
+
+import pytest
+from aiohttp import web
+
+from src.models import llama_balancer, router
+from src.models.chat_context import session_slot
+from src.models.llama_balancer import LlamaBalancer, parse_metrics, parse_slots
+from src.models.llama_registry import LlamaServerConfig
+from src.utils.http_pool import close_http_pool
+
+
+def _server(port, parallel=None):
+    return LlamaServerConfig(alias="tiny", model_path="tiny.gguf", host="127.0.0.1", port=port, parallel=parallel)
+
+
+def _balancer(group, monkeypatch, **kwargs):
+    monkeypatch.setattr(llama_balancer, "resolve_llama_group", lambda model: list(group))
+    options = {"strategy": "least_outstanding", "probe_interval": 3600, "eject_seconds": 30, "retries": 1,
+               "sticky_sessions": True}
+    options.update(kwargs)
+    balancer = LlamaBalancer(**options)
+    for server in group:
+        balancer.state(server).probed_at = float("inf")  # no background probes
+    return balancer
+
+
+def test_least_outstanding_sticky_sessions_and_ejection(monkeypatch):
+    a, b, c = _server(1), _server(2), _server(3)
+    balancer = _balancer([a, b, c], monkeypatch)
+
+    with balancer.using(a), balancer.using(b):
+        assert balancer.candidates("tiny")[0] == c
+        with balancer.using(c), balancer.using(c):
+            assert balancer.candidates("tiny")[:2] in ([a, b], [b, a])
+
+    balancer.report_failure(b, "connection refused")
+    assert balancer.candidates("tiny")[-1] == b
+    balancer.report_success(b)
+    assert b in balancer.candidates("tiny")[:2]
+
+    session = next(s for s in map(str, range(100)) if session_slot(s, 3, salt="replica:") == 1)
+    assert balancer.candidates("tiny", session)[0] == b
+    with balancer.using(b):
+        # Home replica busy (one slot): the session goes elsewhere
+        assert balancer.candidates("tiny", session)[0] != b
+
+
+def test_replica_and_slot_assignments_are_independent():
+    # 2 replicas × 2 slots: every (replica, slot) pair receives sessions
+    pairs = {
+        (session_slot(s, 2, salt="replica:"), session_slot(s, 2))
+        for s in map(str, range(200))
+    }
+    assert pairs == {(0, 0), (0, 1), (1, 0), (1, 1)}
+
+
+def test_slot_aware_load_and_probe_parsing():
+    assert parse_slots([{"id": 0, "is_processing": True}, {"id": 1, "is_processing": False}]) == (2, 1)
+    assert parse_slots([{"id": 0, "state": 1}]) == (1, 1)
+    text = "# HELP x\nllamacpp:requests_processing 3\nllamacpp:requests_deferred 2\nother 1\n"
+    assert parse_metrics(text) == {"requests_processing": 3.0, "requests_deferred": 2.0}
+
+
+@pytest.fixture
+async def replicas():
+    calls = {"bad": 0, "good": 0}
+
+    async def _bad(request):
+        calls["bad"] += 1
+        return web.Response(status=500, text="slot crashed")
+
+    async def _good(request):
+        calls["good"] += 1
+        body = await request.json()
+        if body.get("stream"):
+            resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await resp.prepare(request)
+            await resp.write(b'data: ' + json.dumps({"choices": [{"delta": {"content": "ok"}}]}).encode() + b"\n\n")
+            await resp.write(b"data: [DONE]\n\n")
+            return resp
+        return web.json_response({"choices": [{"message": {"content": "ok"}}], "usage": {}})
+
+    async def _health(request):
+        return web.json_response({"status": "ok"})
+
+    async def _slots(request):
+        return web.json_response([{"id": 0, "is_processing": True}, {"id": 1, "is_processing": False}])
+
+    async def _metrics(request):
+        return web.Response(text="llamacpp:requests_deferred 4\n")
+
+    runners, ports = [], []
+    for handler in (_bad, _good):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", handler)
+        app.router.add_get("/health", _health)
+        app.router.add_get("/slots", _slots)
+        app.router.add_get("/metrics", _metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        ports.append(site._server.sockets[0].getsockname()[1])
+    yield ports, calls
+    await close_http_pool()
+    for runner in runners:
+        await runner.cleanup()
+
+
+async def test_failed_replica_is_ejected_and_request_retried(replicas, monkeypatch):
+    (bad_port, good_port), calls = replicas
+    bad, good = _server(bad_port), _server(good_port)
+    balancer = _balancer([bad, good], monkeypatch)
+    monkeypatch.setattr(llama_balancer, "_balancer", balancer)
+    # Prefer the failing replica first
+    balancer.state(good).outstanding = 1
+
+    result = await router.route_generate("hi", model="llama::tiny", temperature=0.5)
+    assert result["success"] and result["content"] == "ok"
+    assert calls == {"bad": 1, "good": 1}
+    assert balancer.state(bad).ejected_until > 0
+
+    chunks = [c async for c in router.route_generate_stream("hi", model="llama::tiny", temperature=0.5)]
+    assert "".join(c["content"] for c in chunks) == "ok"
+    assert calls == {"bad": 1, "good": 2}  # ejected replica skipped
+
+    await balancer.probe(bad)
+    state = balancer.state(bad)
+    assert state.ejected_until == 0.0  # /health is fine again
+    assert (state.slots_total, state.slots_busy, state.deferred) == (2, 1, 4)
+    stats = balancer.stats()
+    assert stats["strategy"] == "least_outstanding" and stats["retries"] == 1
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/residency.py — LRU / TTL / RAM residency of models
+# =============================================================================
+
+import asyncio
+
+import pytest
+
+from src.models import residency
+from src.models.residency import ModelResidencyManager
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def unloaded(monkeypatch):
+    evicted = []
+
+    async def _unload(model_id):
+        evicted.append(model_id)
+        return {"success": True}
+
+    monkeypatch.setitem(residency._unloaders, "fake", _unload)
+    return evicted
+
+
+def _loader(calls, model_id, delay=0.0):
+    async def _load():
+        calls.append(model_id)
+        await asyncio.sleep(delay)
+        return {"success": True, "model_id": model_id}
+    return _load
+
+
+async def test_concurrent_loads_are_single_flight(unloaded):
+    manager = ModelResidencyManager(max_loaded=2, ttl_seconds=0, max_ram_percent=0)
+    calls = []
+
+    results = await asyncio.gather(*(manager.ensure_loaded("fake", "a", _loader(calls, "a", 0.05)) for _ in range(5)))
+
+    assert calls == ["a"]
+    assert all(r["success"] for r in results)
+    assert manager.stats()["deduplicated_loads"] == 4
+
+
+async def test_count_limit_evicts_least_recently_used_idle_model(unloaded):
+    clock = _Clock()
+    manager = ModelResidencyManager(max_loaded=2, ttl_seconds=0, max_ram_percent=0, clock=clock)
+    calls = []
+    await manager.ensure_loaded("fake", "a", _loader(calls, "a"))
+    clock.now += 1
+    await manager.ensure_loaded("fake", "b", _loader(calls, "b"))
+    clock.now += 1
+    manager.touch("fake", "a")  # b is now least recently used
+
+    await manager.ensure_loaded("fake", "c", _loader(calls, "c"))
+
+    assert unloaded == ["b"]
+    assert [m["model_id"] for m in manager.stats()["models"]] == ["a", "c"]
+
+
+async def test_busy_model_is_not_evicted(unloaded):
+    manager = ModelResidencyManager(max_loaded=1, ttl_seconds=0, max_ram_percent=0)
+    await manager.ensure_loaded("fake", "a", _loader([], "a"))
+
+    async with manager.using("fake", "a"):
+        await manager.ensure_loaded("fake", "b", _loader([], "b"))
+        assert unloaded == []
+
+    await manager.sweep()  # back under the limit; "a" was used last
+    assert unloaded == ["b"]
+
+
+async def test_idle_ttl_and_ram_limit(unloaded):
+    clock = _Clock()
+    ram = {"percent": 50.0}
+    manager = ModelResidencyManager(
+        max_loaded=0, ttl_seconds=60, max_ram_percent=80, ram_percent=lambda: ram["percent"], clock=clock,
+    )
+    for name in ("a", "b", "c"):
+        await manager.ensure_loaded("fake", name, _loader([], name))
+        clock.now += 10
+
+    clock.now += 35  # a: 65 s idle, b: 55 s, c: 45 s
+    assert await manager.sweep() == [("fake", "a")]
+
+    def _free_on_unload():
+        return 90.0 if len(unloaded) < 3 else 70.0
+    manager._ram_percent = _free_on_unload
+    await manager.ensure_loaded("fake", "d", _loader([], "d"))
+
+    assert unloaded == ["a", "b", "c"]
+    stats = manager.stats()
+    assert [m["model_id"] for m in stats["models"]] == ["d"]
+    assert stats["evictions_ttl"] == 1 and stats["evictions_ram"] == 2
+
+
+async def test_failed_load_is_not_resident(unloaded):
+    manager = ModelResidencyManager(max_loaded=2, ttl_seconds=0, max_ram_percent=0)
+
+    async def _fail():
+        return {"success": False, "error": "no such model"}
+
+    assert not (await manager.ensure_loaded("fake", "x", _fail))["success"]
+    assert not manager.is_resident("fake", "x")
+    assert manager.stats()["load_failures"] == 1
+
+
+async def test_model_requested_during_its_unload_is_loaded_again(monkeypatch):
+    backend = set()
+    calls = []
+
+    async def _load(model_id):
+        calls.append(model_id)
+        if model_id in backend:
+            return {"success": True, "model_id": model_id, "status": "already_loaded"}
+        backend.add(model_id)
+        return {"success": True, "model_id": model_id}
+
+    async def _slow_unload(model_id):
+        await asyncio.sleep(0.05)
+        backend.discard(model_id)
+        return {"success": True}
+
+    monkeypatch.setitem(residency._unloaders, "fake", _slow_unload)
+    manager = ModelResidencyManager(max_loaded=1, ttl_seconds=0, max_ram_percent=0)
+    await manager.ensure_loaded("fake", "a", lambda: _load("a"))
+
+    loading_b = asyncio.create_task(manager.ensure_loaded("fake", "b", lambda: _load("b")))
+    await asyncio.sleep(0.01)
+    assert manager.stats()["unloading"] == ["fake::a"]
+    reloaded_a = asyncio.create_task(manager.ensure_loaded("fake", "a", lambda: _load("a")))
+    await asyncio.gather(loading_b, reloaded_a)
+
+    # "a" waited for its unload, then really loaded (and evicted "b" for room)
+    assert calls == ["a", "b", "a"]
+    assert backend == {"a"}
+    assert manager.is_resident("fake", "a") and not manager.is_resident("fake", "b")
+    assert manager.stats()["unloading"] == []
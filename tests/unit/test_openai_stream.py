@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/api/endpoints/openai_models.py — /v1/chat/completions streaming
+# =============================================================================
+
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.api.endpoints import openai_models
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    state = {"closed": False, "pulled": 0}
+
+    def _route(prompt, model, temperature, max_tokens, **_):
+        async def _gen():
+            try:
+                for part in ("Hel", "lo", "!"):
+                    state["pulled"] += 1
+                    yield {"success": True, "content": part, "finished": False}
+                yield {"success": True, "content": "", "finished": True, "model": model,
+                       "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}}
+            finally:
+                state["closed"] = True
+        return _gen()
+
+    monkeypatch.setattr(openai_models, "route_generate_stream", _route)
+    return state
+
+
+async def _post(body):
+    app = FastAPI()
+    app.include_router(openai_models.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/v1/chat/completions", json=body)
+    events = [line[6:] for line in response.text.splitlines() if line.startswith("data: ")]
+    return events[-1], [json.loads(e) for e in events[:-1]]
+
+
+async def test_streams_deltas_and_usage_chunk(upstream):
+    done, chunks = await _post({
+        "model": "ollama-tiny", "stream": True, "stream_options": {"include_usage": True},
+        "messages": [{"role": "user", "content": "hi"}],
+    })
+
+    assert done == "[DONE]"
+    assert [c["choices"][0]["delta"].get("content") for c in chunks[1:4]] == ["Hel", "lo", "!"]
+    assert chunks[4]["choices"][0]["finish_reason"] == "stop"
+    assert all(c["usage"] is None for c in chunks[:-1])
+    assert chunks[-1]["choices"] == []
+    assert chunks[-1]["usage"] == {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}
+    assert upstream["closed"]
+
+
+async def test_no_usage_chunk_without_stream_options(upstream):
+    _, chunks = await _post({"stream": True, "messages": [{"role": "user", "content": "hi"}]})
+
+    assert "usage" not in chunks[-1]
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+
+async def test_client_disconnect_closes_upstream(upstream):
+    class _Gone:
+        async def is_disconnected(self):
+            return True
+
+    stream = openai_models.route_generate_stream("hi", None, 0.7, 16)
+    first = await anext(stream)
+    events = [e async for e in openai_models._stream_chat_completion(
+        _Gone(), stream, first, completion_id="c", created=0, model="m", prompt="hi", include_usage=False,
+    )]
+
+    assert len(events) == 2  # role chunk + the first delta, then generation stops
+    assert upstream["pulled"] == 1
+    assert upstream["closed"]
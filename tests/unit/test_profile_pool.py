@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/profile_pool.py — resident multi-profile RAG index pool
+# =============================================================================
+
+import asyncio
+import json
+import threading
+
+import faiss
+import numpy as np
+import pytest
+
+from src.rag import embedding_service
+from src.rag.profile_pool import ProfilePool, ResidentProfile
+from src.rag.rag_system import RAGSystem
+
+
+def _loader(calls, memory_bytes=0):
+    async def load(path):
+        calls.append(str(path))
+        await asyncio.sleep(0.01)
+        return ResidentProfile(index_dir=str(path), index=faiss.IndexFlatIP(4), memory_bytes=memory_bytes)
+    return load
+
+
+async def test_lazy_single_flight_load():
+    calls = []
+    pool = ProfilePool(_loader(calls))
+
+    first, second = await asyncio.gather(pool.get("/p/support"), pool.get("/p/support"))
+
+    assert first is second
+    assert calls == ["/p/support"]
+    assert pool.stats()["loads"] == 1
+
+
+async def test_lru_eviction_keeps_pinned_profile():
+    pool = ProfilePool(_loader([]), max_profiles=2)
+    await pool.get("/p/a")
+    pool.pin("/p/a")
+    await pool.get("/p/b")
+    await pool.get("/p/c")
+
+    resident = [p["name"] for p in pool.stats()["profiles"]]
+    assert resident == ["a", "c"]
+    assert pool.stats()["evictions"] == 1
+
+
+async def test_memory_budget_evicts_least_recently_used():
+    pool = ProfilePool(_loader([], memory_bytes=600 * 1024 * 1024), max_profiles=10, max_memory_mb=1024)
+    await pool.get("/p/a")
+    await pool.get("/p/b")
+
+    assert [p["name"] for p in pool.stats()["profiles"]] == ["b"]
+
+
+async def test_switching_active_profile_under_memory_budget(tmp_path):
+    sizes = {"a": 3000, "b": 2000}
+
+    async def load(path):
+        return ResidentProfile(index_dir=str(path), index=faiss.IndexFlatIP(4),
+                               memory_bytes=sizes[path.name] * 1024 * 1024)
+
+    rag = RAGSystem()
+    rag.pool = ProfilePool(load, max_profiles=4, max_memory_mb=4096)
+    first, second = tmp_path / "a", tmp_path / "b"
+    first.mkdir()
+    second.mkdir()
+
+    assert await rag.reload_index(str(first))
+    assert await rag.reload_index(str(second))
+
+    # The previously active profile is the victim, not the one just activated
+    assert [p["name"] for p in rag.pool.stats()["profiles"]] == ["b"]
+    assert rag.pool.stats()["profiles"][0]["pinned"]
+    assert rag.current_index_dir == str(second)
+
+
+async def test_single_slot_pool_keeps_the_profile_just_loaded():
+    pool = ProfilePool(_loader([]), max_profiles=1)
+    await pool.load("/p/a", pin=True)
+    await pool.get("/p/b")  # on-demand load next to the pinned profile
+
+    assert sorted(p["name"] for p in pool.stats()["profiles"]) == ["a", "b"]
+    await pool.load("/p/b", pin=True)
+    assert [p["name"] for p in pool.stats()["profiles"]] == ["b"]
+
+
+async def test_cancelled_load_does_not_hang_waiters():
+    started = asyncio.Event()
+
+    async def slow(path):
+        started.set()
+        await asyncio.sleep(10)
+
+    pool = ProfilePool(slow)
+    loader = asyncio.create_task(pool.get("/p/a"))
+    await started.wait()
+    waiter = asyncio.create_task(pool.get("/p/a"))
+    await asyncio.sleep(0)
+    loader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(waiter, 1)
+    assert pool.stats()["loading"] == []
+
+
+async def test_eviction_releases_idle_indexer(tmp_path):
+    from src.rag import incremental_indexer
+
+    writers = {}
+
+    async def load(path):
+        writer = writers[str(path)] = incremental_indexer.get_indexer(path)
+        return ResidentProfile(index_dir=str(path), index=faiss.IndexFlatIP(4), writer=writer)
+
+    pool = ProfilePool(load, max_profiles=1)
+    first, second = tmp_path / "a", tmp_path / "b"
+    try:
+        await pool.get(first)
+        # A writer busy in another thread stays registered
+        held, done = threading.Event(), threading.Event()
+
+        def _write():
+            with writers[str(first)]._lock:
+                held.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=_write)
+        thread.start()
+        held.wait(5)
+        assert incremental_indexer.release_indexer(writers[str(first)]) is False
+        done.set()
+        thread.join()
+
+        await pool.get(second)
+        assert incremental_indexer.peek_indexer(first) is None
+        assert incremental_indexer.peek_indexer(second) is writers[str(second)]
+    finally:
+        for path in (first, second):
+            incremental_indexer._indexers.pop(str(path), None)
+
+
+def _write_profile(root, name, vectors, texts):
+    path = root / name
+    path.mkdir()
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    faiss.write_index(index, str(path / "faiss.index"))
+    (path / "chunks.json").write_text(json.dumps([{"text": t, "source": name} for t in texts]), encoding="utf-8")
+    return path
+
+
+class _FakeModel:
+    def get_sentence_embedding_dimension(self):
+        return 32
+
+    def encode(self, texts, show_progress_bar=False):
+        query = np.zeros(32, dtype="float32")
+        query[0], query[1] = 1.0, 0.2
+        return np.tile(query, (len(texts), 1))
+
+
+async def test_search_named_profiles_and_fan_out(tmp_path, monkeypatch):
+    eye = np.eye(32, dtype="float32")
+    support = _write_profile(tmp_path, "support", eye[[0, 2]], ["s-match", "s-other"])
+    helpdesk = _write_profile(tmp_path, "helpdesk", eye[[1, 3]], ["h-match", "h-other"])
+
+    service = embedding_service.EmbeddingService("fake", model=_FakeModel())
+    rag = RAGSystem()
+    monkeypatch.setattr(rag, "_embedder", lambda: service)
+    monkeypatch.setattr(rag, "_get_model", lambda: _FakeModel())
+
+    only_helpdesk = await rag.search("q", top_k=1, profile=str(helpdesk))
+    assert only_helpdesk[0]["text"] == "h-match"
+    assert rag.index is None  # the active profile was not switched
+
+    merged = await rag.search_profiles("q", [str(support), str(helpdesk)], top_k=2)
+    assert [r["text"] for r in merged] == ["s-match", "h-match"]
+    assert merged[0]["profile"] == str(support)
+    assert merged[0]["score"] >= merged[1]["score"]
+
+    with pytest.raises(FileNotFoundError):
+        await rag.search("q", profile=str(tmp_path / "missing"))
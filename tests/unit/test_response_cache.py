@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/response_cache.py — memory / SQLite response cache
+# =============================================================================
+
+import time
+
+import pytest
+
+from src.models import response_cache, router
+from src.models.response_cache import ResponseCache, namespace_of, parse_cache_control, replay_chunks
+
+
+def _cache(tmp_path, **kwargs):
+    options = {"enabled": True, "max_entries": 16, "ttl_seconds": 60, "max_temperature": 0.0, "namespaces": {}}
+    options.update(kwargs)
+    return ResponseCache(db_path=str(tmp_path / "responses.db"), **options)
+
+
+async def test_memory_and_disk_tiers(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.make_key("What  are your\nhours?", 0.0, 64)
+    assert key == cache.make_key("What are your hours?", 0.0, 64)
+    assert key != cache.make_key("What are your hours?", 0.0, 64, context="abc")
+
+    await cache.put("ollama::tiny", key, {"success": True, "content": "9-18", "model": "ollama::tiny"})
+    assert (await cache.get("ollama::tiny", key))["content"] == "9-18"
+    assert await cache.get("ollama::other", key) is None
+    cache.close()
+
+    reopened = _cache(tmp_path)
+    assert (await reopened.get("ollama::tiny", key))["content"] == "9-18"
+    assert (await reopened.get("ollama::tiny", key))["model"] == "ollama::tiny"
+    stats = await reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["disk_entries"]) == (1, 1, 1)
+
+    assert await reopened.invalidate("ollama::tiny") == 2
+    assert await reopened.get("ollama::tiny", key) is None
+    reopened.close()
+
+
+async def test_ttl_expiry_and_namespace_overrides(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, namespaces={"hf::big": {"enabled": False}, "ollama::slow": {"ttl_seconds": 0}})
+    assert not cache.cacheable("hf::big", 0.0)
+    assert not cache.cacheable("ollama::tiny", 0.7)
+    assert not cache.cacheable("ollama::tiny", None)
+    assert cache.cacheable("ollama::tiny", 0.0)
+
+    await cache.put("ollama::tiny", "k", {"content": "a"})
+    await cache.put("ollama::slow", "k", {"content": "b"})
+    now = time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 120)
+    assert await cache.get("ollama::tiny", "k") is None
+    assert (await cache.get("ollama::slow", "k"))["content"] == "b"
+    assert (await cache.stats())["expirations"] == 2  # memory entry, then the disk row
+    cache.close()
+
+
+def test_cache_control_and_replay():
+    assert parse_cache_control(None) == (True, True)
+    assert parse_cache_control("no-cache") == (False, True)
+    assert parse_cache_control("max-age=0, No-Store") == (False, False)
+
+    text = "Line one.\n\n  Second   line, with  spaces "
+    chunks = list(replay_chunks({"content": text, "model": "m", "usage": {"total_tokens": 3}}, words_per_chunk=2))
+    assert "".join(c["content"] for c in chunks) == text
+    assert chunks[-1] == {
+        "success": True, "content": "", "finished": True, "model": "m", "usage": {"total_tokens": 3}, "cached": True,
+    }
+
+
+@pytest.fixture
+def shared_cache(tmp_path, monkeypatch):
+    cache = _cache(tmp_path)
+    monkeypatch.setattr(response_cache, "_cache", cache)
+    yield cache
+    cache.close()
+
+
+async def test_route_generate_serves_repeats_from_cache(shared_cache, monkeypatch):
+    calls = []
+
+    async def _generate(prompt, model, temperature, max_tokens):
+        calls.append(prompt)
+        return {"success": True, "content": "pong", "model": f"ollama::{model}"}
+
+    monkeypatch.setattr(router, "_generate_ollama", _generate)
+
+    first = await router.route_generate("ping", model="ollama::tiny", temperature=0.0, max_tokens=8)
+    second = await router.route_generate("ping", model="ollama::tiny", temperature=0.0, max_tokens=8)
+    assert "cached" not in first
+    assert second == {"success": True, "content": "pong", "model": "ollama::tiny", "cached": True}
+
+    await router.route_generate("ping", model="ollama::tiny", temperature=0.0, max_tokens=8, cache_control="no-cache")
+    await router.route_generate("ping", model="ollama::tiny", temperature=0.9, max_tokens=8)
+    assert len(calls) == 3
+    assert (await shared_cache.stats())["bypassed"] == 1
+
+
+async def test_stream_is_stored_and_replayed(shared_cache, monkeypatch):
+    calls = []
+
+    async def _stream(prompt, model, temperature, max_tokens):
+        calls.append(prompt)
+        for part in ("Hel", "lo ", "world"):
+            yield {"success": True, "content": part, "finished": False}
+        yield {"success": True, "content": "", "finished": True, "model": "ollama::tiny", "usage": {"total_tokens": 5}}
+
+    monkeypatch.setattr(router, "_stream_ollama", _stream)
+
+    async def _collect():
+        return [c async for c in router.route_generate_stream("ping", model="ollama::tiny", temperature=0.0, max_tokens=8)]
+
+    live = await _collect()
+    replayed = await _collect()
+    assert len(calls) == 1
+    assert "".join(c["content"] for c in replayed) == "".join(c["content"] for c in live) == "Hello world"
+    assert replayed[-1]["cached"] is True
+    assert replayed[-1]["usage"] == {"total_tokens": 5}
+    assert (await router.route_generate("ping", model="ollama::tiny", temperature=0.0, max_tokens=8))["cached"]
+
+
+async def test_requests_without_a_model_use_the_default_namespace(shared_cache, monkeypatch):
+    async def _generate(prompt, model, temperature, max_tokens, **chat):
+        return {"success": True, "content": "hi", "model": "foundry::phi-4"}
+
+    monkeypatch.setattr(router, "_generate_foundry", _generate)
+    await router.route_generate("hello", model=None, temperature=0.0, max_tokens=8)
+
+    assert namespace_of("foundry", "") == "foundry::@default"
+    stats = await shared_cache.stats()
+    assert stats["namespaces"] == {"foundry::@default": 1} and stats["disk_entries"] == 1
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/retrieval_executor.py — bounded retrieval pool
+# =============================================================================
+
+import asyncio
+import threading
+
+import pytest
+
+from src.rag.retrieval_executor import LatencyStats, RetrievalExecutor
+from src.utils.api_utils import ServiceOverloadedError, api_response_handler
+
+
+async def test_run_executes_off_the_event_loop():
+    executor = RetrievalExecutor(max_workers=1, max_queue=0)
+    loop_thread = threading.get_ident()
+
+    worker_thread = await executor.run(threading.get_ident)
+
+    assert worker_thread != loop_thread
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+async def test_rejects_when_threads_and_queue_are_full():
+    executor = RetrievalExecutor(max_workers=1, max_queue=1, retry_after=2)
+    release = threading.Event()
+
+    running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(ServiceOverloadedError) as exc_info:
+        await executor.run(lambda: None)
+    assert exc_info.value.retry_after == 2
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*running)
+    assert executor.stats()["active"] == 0
+    executor.shutdown()
+
+
+def test_latency_snapshot_reports_percentiles():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record("ann", ms / 1000)
+
+    snap = stats.snapshot()["ann"]
+    assert snap["count"] == 100
+    assert snap["max_ms"] == 100
+    assert 49 <= snap["p50_ms"] <= 51
+    assert 94 <= snap["p95_ms"] <= 96
+
+
+async def test_response_handler_passes_overload_through():
+    @api_response_handler
+    async def endpoint() -> dict:
+        raise ServiceOverloadedError("busy", retry_after=3)
+
+    with pytest.raises(ServiceOverloadedError):
+        await endpoint()
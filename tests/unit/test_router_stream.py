@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/models/router.py — route_generate_stream() native streaming
+# =============================================================================
+
+import json
+
+import pytest
+from aiohttp import web
+
+from src.models import llama_registry, ollama_client as ollama_module, router
+from src.models.llama_registry import LlamaServerConfig
+from src.utils.http_pool import close_http_pool
+
+
+async def _serve(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+@pytest.fixture
+async def backend():
+    seen = {}
+
+    async def _ollama(request):
+        seen["ollama"] = await request.json()
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        for part in ("Hel", "lo"):
+            await resp.write(json.dumps({"response": part, "done": False}).encode() + b"\n")
+        await resp.write(json.dumps({"response": "", "done": True, "prompt_eval_count": 3, "eval_count": 2}).encode() + b"\n")
+        return resp
+
+    async def _llama(request):
+        seen["llama"] = await request.json()
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for part in ("Hi", " there"):
+            chunk = {"choices": [{"delta": {"content": part}}]}
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        usage = {"choices": [], "usage": {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6}}
+        await resp.write(f"data: {json.dumps(usage)}\n\ndata: [DONE]\n\n".encode())
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/api/generate", _ollama)
+    app.router.add_post("/v1/chat/completions", _llama)
+    runner, port = await _serve(app)
+    yield port, seen
+    await close_http_pool()
+    await runner.cleanup()
+
+
+async def _collect(model):
+    return [chunk async for chunk in router.route_generate_stream("ping", model=model, max_tokens=8)]
+
+
+async def test_ollama_streams_ndjson(backend, monkeypatch):
+    port, seen = backend
+    monkeypatch.setattr(ollama_module, "_get_base_url", lambda: f"http://127.0.0.1:{port}")
+
+    chunks = await _collect("ollama::tiny")
+
+    assert [c["content"] for c in chunks[:-1]] == ["Hel", "lo"]
+    assert chunks[-1] == {
+        "success": True, "content": "", "finished": True, "model": "ollama::tiny",
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    }
+    assert seen["ollama"]["stream"] is True
+
+
+async def test_llama_streams_sse_with_usage(backend, monkeypatch):
+    port, seen = backend
+    server = LlamaServerConfig(alias="tiny", model_path="tiny.gguf", host="127.0.0.1", port=port)
+    monkeypatch.setattr(llama_registry, "resolve_llama_server", lambda model: server)
+
+    chunks = await _collect("llama::tiny")
+
+    assert "".join(c["content"] for c in chunks) == "Hi there"
+    assert chunks[-1]["model"] == "llama::tiny"
+    assert chunks[-1]["usage"]["total_tokens"] == 6
+    assert seen["llama"]["stream"] is True
+
+
+async def test_backend_error_is_terminal(monkeypatch):
+    async def _failing(prompt, model, temperature, max_tokens):
+        yield {"success": True, "content": "partial", "finished": False}
+        yield {"success": False, "error": "boom"}
+        yield {"success": True, "content": "never", "finished": False}
+
+    monkeypatch.setattr(router, "_stream_ollama", _failing)
+
+    chunks = await _collect("ollama::tiny")
+
+    assert chunks[-1] == {"success": False, "error": "boom", "finished": True}
+    assert len(chunks) == 2
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/rag/search_cache.py — bounded LRU/TTL RAG search cache
+# =============================================================================
+
+from src.rag.search_cache import SearchCache
+
+
+def _results(text: str = "chunk", n: int = 1):
+    return [{"text": text, "score": 0.5} for _ in range(n)]
+
+
+def test_key_normalizes_whitespace_and_includes_filters():
+    a = SearchCache.make_key("p", "  how   to reset ", 5)
+    b = SearchCache.make_key("p", "how to reset", 5)
+    c = SearchCache.make_key("p", "how to reset", 5, {"min_score": 0.3})
+
+    assert a == b
+    assert a != c
+    assert a != SearchCache.make_key("other", "how to reset", 5)
+
+
+def test_hit_miss_and_hit_rate():
+    cache = SearchCache(max_entries=10)
+    key = cache.make_key("p", "q", 3)
+
+    assert cache.get(key) is None
+    cache.put(key, _results())
+    assert cache.get(key) == _results()
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_callers_cannot_modify_cached_results():
+    cache = SearchCache(max_entries=10)
+    key = cache.make_key("p", "q", 3)
+    stored = _results()
+    cache.put(key, stored)
+    stored[0]["profile"] = "changed after put"
+
+    hit = cache.get(key)
+    hit[0]["score"] = -1.0
+    hit.pop()
+
+    assert cache.get(key) == _results()
+
+
+def test_lru_eviction_by_entry_count():
+    cache = SearchCache(max_entries=2)
+    k1, k2, k3 = (cache.make_key("p", q, 1) for q in ("a", "b", "c"))
+    cache.put(k1, _results())
+    cache.put(k2, _results())
+    cache.get(k1)  # k1 becomes most recently used
+    cache.put(k3, _results())
+
+    assert cache.get(k2) is None
+    assert cache.get(k1) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_and_skips_oversized():
+    cache = SearchCache(max_entries=100, max_bytes=2000)
+    k1, k2 = cache.make_key("p", "a", 1), cache.make_key("p", "b", 1)
+    cache.put(k1, _results("x" * 1000))
+    cache.put(k2, _results("y" * 1000))
+
+    assert cache.get(k1) is None
+    assert cache.stats()["bytes"] <= 2000
+
+    cache.put(cache.make_key("p", "huge", 1), _results("z" * 5000))
+    assert cache.stats()["entries"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.rag.search_cache.time.monotonic", lambda: now[0])
+    cache = SearchCache(max_entries=10, ttl_seconds=5)
+    key = cache.make_key("p", "q", 1)
+    cache.put(key, _results())
+
+    now[0] += 10
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_only_one_profile():
+    cache = SearchCache(max_entries=10)
+    cache.put(cache.make_key("support", "q", 1), _results())
+    cache.put(cache.make_key("helpdesk", "q", 1), _results())
+
+    assert cache.invalidate("support") == 1
+    assert cache.get(cache.make_key("helpdesk", "q", 1)) is not None
+    assert cache.stats()["profiles"] == {"helpdesk": 1}
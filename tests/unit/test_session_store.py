@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# =============================================================================
+# Tests for src/db/session_store.py — ChatDB-backed sessions with a hot LRU
+# =============================================================================
+
+import uuid
+
+import pytest_asyncio
+
+from src.db.chat_db import ChatDB
+from src.db.session_store import ChatSessionStore
+
+
+@pytest_asyncio.fixture
+async def db():
+    """In-memory ChatDB shared by the stores of one test (one per "worker")."""
+    chat_db = ChatDB(":memory:")
+    await chat_db.initialize()
+    yield chat_db
+    await chat_db.close()
+
+
+def _new_session_id() -> str:
+    return str(uuid.uuid4())
+
+
+async def test_cold_session_loads_only_last_turns(db):
+    session_id = _new_session_id()
+    await db.create_session(session_id)
+    for turn in range(5):
+        await db.save_message(session_id, "user", f"q{turn}")
+        await db.save_message(session_id, "assistant", f"a{turn}")
+
+    store = ChatSessionStore(max_hot=4, load_turns=2, db=db)
+    state = await store.get(session_id)
+
+    assert [msg["content"] for msg in state.messages] == ["q3", "a3", "q4", "a4"]
+    # Positions differ from any list trimmed before: cut points must be forgotten
+    assert state.count == 10 and state.refreshed
+    assert await store.get(_new_session_id()) is None
+    assert store.stats()["loads"] == 1
+
+
+async def test_write_from_another_worker_invalidates_hot_copy(db):
+    session_id = _new_session_id()
+    worker_a = ChatSessionStore(max_hot=4, load_turns=10, db=db)
+    worker_b = ChatSessionStore(max_hot=4, load_turns=10, db=db)
+    await worker_a.create(session_id)
+    await worker_a.append(session_id, "user", "hello")
+
+    # Own writes keep the hot copy valid
+    assert (await worker_a.get(session_id)).refreshed is False
+    assert worker_a.stats()["hits"] == 1
+
+    await worker_b.get(session_id)
+    await worker_b.append(session_id, "assistant", "hi")
+
+    state = await worker_a.get(session_id)
+    assert state.refreshed is True
+    assert [msg["content"] for msg in state.messages] == ["hello", "hi"]
+    assert worker_a.stats()["invalidations"] == 1
+
+
+async def test_hot_copy_is_bounded(db):
+    session_id = _new_session_id()
+    store = ChatSessionStore(max_hot=2, load_turns=2, db=db)
+    await store.create(session_id)
+    for i in range(8):
+        await store.append(session_id, "user", f"m{i}")
+    state = await store.get(session_id)
+    assert state.refreshed is False and len(state.messages) == 8
+
+    await store.append(session_id, "user", "m8")
+    state = await store.get(session_id)
+    assert [msg["content"] for msg in state.messages] == ["m5", "m6", "m7", "m8"]
+    assert state.refreshed is True and state.count == 9
+
+
+async def test_lru_evicts_least_recently_used_session(db):
+    store = ChatSessionStore(max_hot=2, load_turns=10, db=db)
+    first, second, third = (_new_session_id() for _ in range(3))
+    await store.create(first)
+    await store.create(second)
+    await store.get(first)
+    await store.create(third)
+
+    assert list(store._hot) == [first, third]
+    assert store.stats()["evictions"] == 1
+    # Evicted sessions come back from ChatDB
+    assert (await store.get(second)).messages == []
+    assert store.stats()["loads"] == 1
+
+
+async def test_delete_removes_hot_copy_and_rows(db):
+    session_id = _new_session_id()
+    store = ChatSessionStore(max_hot=2, load_turns=10, db=db)
+    await store.create(session_id)
+    await store.append(session_id, "user", "bye")
+
+    assert await store.delete(session_id) is True
+    assert await store.get(session_id) is None
+    assert await db.session_exists(session_id) is False
+    assert await store.delete(session_id) is False